@@ -18,7 +18,7 @@ import urllib3
 import xml.etree.ElementTree as ET
 from ws4py.client.threadedclient import WebSocketClient
 import time
-from threading import Event, Thread
+from threading import Event, Lock, Thread
 from typing import Dict, Optional, Any, List, Callable, Union
 
 # Disable SSL certificate warnings
@@ -53,8 +53,14 @@ class ABBRobotAPI:
         self.basic_auth = HTTPBasicAuth(username, password)
         self.session = requests.Session()
         self.cookies = None
+        # Serializes refresh_session(); self.session itself is swapped atomically
+        self._session_lock = Lock()
         self.active_subscriptions = {}
         
+        # Called as callback(subscription_id, code, reason) when a subscription
+        # WebSocket drops without being closed by us
+        self.subscription_drop_callbacks = []
+        
         # Set up logging
         self.logger = logging.getLogger('ABBRobotAPI')
         if debug:
@@ -111,6 +117,84 @@ class ABBRobotAPI:
             self.logger.error(f"Unexpected error during connection: {str(e)}")
             return False
     
+    def refresh_session(self) -> bool:
+        """
+        Authenticate again on a new session and swap it in
+        
+        Used when a dropped subscription cannot be re-created because the
+        session no longer exists (see session_valid(), e.g. after a controller
+        restart). The login happens on a separate requests.Session, so requests
+        in flight on other threads keep their cookies; the new session replaces
+        self.session in one assignment once it is authenticated. The superseded
+        session is then logged out and closed so it does not count against the
+        controller's session limit.
+        
+        Returns:
+            True if the new session was established
+        """
+        with self._session_lock:
+            session = requests.Session()
+            try:
+                response = session.get(
+                    self.base_url,
+                    auth=self.basic_auth,
+                    headers={'Accept': 'application/hal+json;v=2.0'},
+                    verify=False,
+                    timeout=10
+                )
+            except requests.RequestException as e:
+                self.logger.error(f"Re-authentication failed: {str(e)}")
+                session.close()
+                return False
+            
+            if response.status_code != 200:
+                self.logger.error(f"Re-authentication failed. Status code: {response.status_code}")
+                session.close()
+                return False
+            
+            old_session, self.session = self.session, session
+            self.cookies = response.cookies
+            self.logger.info(f"Re-authenticated with {self.host}")
+            self._logout(old_session)
+            return True
+    
+    def session_valid(self) -> bool:
+        """
+        Check whether the controller still accepts the current session
+        
+        Returns:
+            False if there is no session or the controller answers 401/403,
+            True otherwise (also when it cannot be reached: a new login would
+            not help then)
+        """
+        if not self.cookies:
+            return False
+        try:
+            response = self.session.get(
+                self.base_url,
+                headers={'Accept': 'application/hal+json;v=2.0'},
+                verify=False,
+                timeout=10
+            )
+        except requests.RequestException as e:
+            self.logger.debug(f"Session check failed: {str(e)}")
+            return True
+        return response.status_code not in (401, 403)
+    
+    def _logout(self, session: requests.Session) -> None:
+        """Log a session out on the controller (RWS /logout) and close it"""
+        try:
+            session.get(
+                f"{self.base_url}/logout",
+                headers={'Accept': 'application/hal+json;v=2.0'},
+                verify=False,
+                timeout=5
+            )
+        except requests.RequestException as e:
+            self.logger.debug(f"Logout of the old session failed: {str(e)}")
+        finally:
+            session.close()
+    
     def disconnect(self) -> None:
         """Close the session and all active subscriptions"""
         try:
@@ -272,7 +356,7 @@ class ABBRobotAPI:
             self.logger.error(f"POST request error: {str(e)}")
             return {'status_code': 0, 'error': str(e)}
     
-    def subscribe(self, resources, callback=None):
+    def subscribe(self, resources, callback=None, group=None, shard=None):
         """
         Subscribe to robot controller events
         
@@ -285,6 +369,8 @@ class ABBRobotAPI:
                 }
             callback (callable): Function to call when events are received
                 Function signature: callback(event_data, resource_path)
+            group (str): Optional ID of the sharded subscription this one belongs to
+            shard (int): Optional index of this shard within the group
                 
         Returns:
             str: Subscription ID if successful, None otherwise
@@ -324,7 +410,30 @@ class ABBRobotAPI:
         
         self.logger.debug(f"Subscription data: {data}")
         
-        # Create the subscription
+        # Create a unique ID for this subscription
+        subscription_id = str(time.time())
+        if shard is not None:
+            subscription_id = f"{group}-{shard}"
+        
+        return self._open_subscription(subscription_id, data, valid_resources, callback, group, shard)
+    
+    def _open_subscription(self, subscription_id, data, resources, callback, group, shard):
+        """
+        Create the RWS subscription and start its WebSocket client
+        
+        Args:
+            subscription_id (str): ID to store the subscription under
+            data (dict): Form data of the subscription request
+            resources (dict): Validated resources of the subscription
+            callback (callable): Function to call when events are received
+            group (str): ID of the sharded subscription this one belongs to
+            shard (int): Index of this shard within the group
+            
+        Returns:
+            str: Subscription ID if successful, None otherwise
+        """
+        # Create the subscription (on the session its WebSocket cookies come from)
+        session = self.session
         response = self.post('/subscription', data=data)
         
         if response['status_code'] != 201:
@@ -342,13 +451,10 @@ class ABBRobotAPI:
         
         # Create the cookie header for the WebSocket
         cookie_header = []
-        for cookie_name, cookie_value in self.session.cookies.items():
+        for cookie_name, cookie_value in session.cookies.items():
             cookie_header.append(f"{cookie_name}={cookie_value}")
         cookie_str = "; ".join(cookie_header)
         
-        # Create a unique ID for this subscription
-        subscription_id = str(time.time())
-        
         # Create and start the WebSocket client
         ws_client = RWSWebSocketClient(
             websocket_url, 
@@ -356,12 +462,19 @@ class ABBRobotAPI:
             callback=callback,
             logger=self.logger
         )
+        ws_client.drop_callback = lambda code, reason: self._subscription_dropped(
+            subscription_id, ws_client, code, reason)
         
         # Store the subscription
         self.active_subscriptions[subscription_id] = {
             'client': ws_client,
-            'resources': valid_resources,
-            'websocket_url': websocket_url
+            'resources': resources,
+            'websocket_url': websocket_url,
+            'group': group,
+            'shard': shard,
+            'callback': callback,
+            'data': data,
+            'session': session
         }
         
         # Start the WebSocket client in a separate thread
@@ -372,6 +485,85 @@ class ABBRobotAPI:
         self.logger.info(f"Subscription {subscription_id} created successfully")
         return subscription_id
     
+    def resubscribe(self, subscription_id, timeout=10.0):
+        """
+        Re-create a dropped subscription with the current session
+        
+        The subscription keeps its ID, resources, callback and shard. The old
+        WebSocket client is discarded. Call refresh_session() first if the old
+        session cookies may be stale.
+        
+        Args:
+            subscription_id (str): The ID of the subscription to re-create
+            timeout (float): Seconds to wait for the new WebSocket to connect
+            
+        Returns:
+            bool: True if the new WebSocket is connected, False otherwise
+        """
+        subscription = self.active_subscriptions.get(subscription_id)
+        if subscription is None:
+            self.logger.warning(f"Subscription {subscription_id} not found")
+            return False
+        
+        # Make sure the old client stays quiet
+        old_client = subscription['client']
+        old_client.closing = True
+        try:
+            old_client.close(code=1001, reason="Subscription re-created")
+        except Exception as e:
+            self.logger.debug(f"Error closing old WebSocket: {str(e)}")
+        
+        # Remove the dead subscription on the controller so they don't pile up
+        self._delete_subscription(subscription)
+        
+        if not self._open_subscription(subscription_id, subscription['data'], subscription['resources'],
+                                       subscription['callback'], subscription['group'], subscription['shard']):
+            return False
+        
+        ws_client = self.active_subscriptions[subscription_id]['client']
+        if not ws_client.connected.wait(timeout):
+            self.logger.error(f"WebSocket for subscription {subscription_id} did not connect within {timeout}s")
+            return False
+        return True
+    
+    def _delete_subscription(self, subscription):
+        """
+        DELETE a subscription on the controller, with the session that created it
+        
+        Failures are only logged: after a controller restart the subscription
+        (and its session) no longer exist.
+        
+        Args:
+            subscription (dict): Entry of active_subscriptions
+        """
+        # The WebSocket URL ends with the subscription number (.../poll/<n>)
+        number = subscription['websocket_url'].rstrip('/').rsplit('/', 1)[-1]
+        session = subscription.get('session') or self.session
+        try:
+            response = session.delete(
+                f"{self.base_url}/subscription/{number}",
+                headers={'Accept': 'application/hal+json;v=2.0'},
+                verify=False,
+                timeout=5
+            )
+            if response.status_code in (200, 204):
+                self.logger.debug(f"Deleted subscription {number} on the controller")
+            else:
+                self.logger.debug(f"Could not delete subscription {number}: HTTP {response.status_code}")
+        except requests.RequestException as e:
+            self.logger.debug(f"Could not delete subscription {number}: {str(e)}")
+    
+    def _subscription_dropped(self, subscription_id, ws_client, code, reason):
+        """Notify drop callbacks if ws_client is still the client of the subscription"""
+        subscription = self.active_subscriptions.get(subscription_id)
+        if subscription is None or subscription['client'] is not ws_client:
+            return
+        for callback in list(self.subscription_drop_callbacks):
+            try:
+                callback(subscription_id, code, reason)
+            except Exception as e:
+                self.logger.error(f"Error in subscription drop callback: {str(e)}")
+    
     def unsubscribe(self, subscription_id):
         """
         Unsubscribe from events
@@ -383,6 +575,12 @@ class ABBRobotAPI:
             bool: True if successful, False otherwise
         """
         if subscription_id not in self.active_subscriptions:
+            # A sharded subscription is closed shard by shard
+            shard_ids = [sub_id for sub_id, sub in self.active_subscriptions.items()
+                         if sub.get('group') == subscription_id]
+            if shard_ids:
+                results = [self.unsubscribe(shard_id) for shard_id in shard_ids]
+                return all(results)
             self.logger.warning(f"Subscription {subscription_id} not found")
             return False
         
@@ -433,6 +631,18 @@ class ABBRobotAPI:
             dict: Status information about the subscription
         """
         if subscription_id not in self.active_subscriptions:
+            # Aggregate the shards of a sharded subscription
+            shard_ids = [sub_id for sub_id, sub in self.active_subscriptions.items()
+                         if sub.get('group') == subscription_id]
+            if shard_ids:
+                shards = {shard_id: self.check_subscription_status(shard_id) for shard_id in shard_ids}
+                return {
+                    'exists': True,
+                    'connected': all(status['connected'] for status in shards.values()),
+                    'resource_count': sum(status['resource_count'] for status in shards.values()),
+                    'error_count': sum(status['error_count'] for status in shards.values()),
+                    'shards': shards
+                }
             return {
                 'exists': False,
                 'error': 'Subscription not found'
@@ -443,12 +653,19 @@ class ABBRobotAPI:
         
         is_connected = hasattr(ws_client, 'connected') and ws_client.connected.is_set()
         
+        last_message_time = getattr(ws_client, 'last_message_time', None)
+        
         return {
             'exists': True,
             'connected': is_connected,
             'resources': subscription['resources'],
+            'resource_count': len(subscription['resources']),
             'websocket_url': subscription['websocket_url'],
-            'error_count': getattr(ws_client, 'error_count', 0)
+            'error_count': getattr(ws_client, 'error_count', 0),
+            'group': subscription.get('group'),
+            'shard': subscription.get('shard'),
+            'messages_received': getattr(ws_client, 'messages_received', 0),
+            'seconds_since_last_message': (time.time() - last_message_time) if last_message_time else None
         }
         
     def list_active_subscriptions(self):
@@ -536,6 +753,13 @@ class RWSWebSocketClient(WebSocketClient):
         self.closing = False
         self.error_count = 0
         self.max_errors = 3
+        self.messages_received = 0
+        self.last_message_time = None
+        
+        # Called as drop_callback(code, reason) once if the connection is lost
+        # or cannot be established, but not after close()
+        self.drop_callback = None
+        self._drop_reported = False
         self.logger.debug(f"WebSocket client initialized with URL: {url}")
         
         # Log headers for debugging without sensitive info
@@ -563,10 +787,21 @@ class RWSWebSocketClient(WebSocketClient):
             self.logger.info(f"WebSocket connection closed cleanly: code={code}, reason={reason}")
         else:
             self.logger.warning(f"WebSocket connection closed unexpectedly: code={code}, reason={reason}")
+            self._report_drop(code, reason)
         
         # Reset state
         self.closing = False
     
+    def _report_drop(self, code, reason):
+        """Call drop_callback once for this client"""
+        if self._drop_reported or self.closing or not self.drop_callback:
+            return
+        self._drop_reported = True
+        try:
+            self.drop_callback(code, reason)
+        except Exception as e:
+            self.logger.error(f"Error in WebSocket drop callback: {str(e)}")
+    
     def close(self, code=1000, reason="Client initiated close"):
         """
         Safely close the WebSocket connection
@@ -589,6 +824,8 @@ class RWSWebSocketClient(WebSocketClient):
     def received_message(self, message):
         """Called when a message is received from the WebSocket"""
         if message.is_text:
+            self.messages_received += 1
+            self.last_message_time = time.time()
             event_data = message.data.decode("utf-8")
             self.logger.debug(f"WebSocket event received: {event_data[:200]}...")
             
@@ -614,6 +851,7 @@ class RWSWebSocketClient(WebSocketClient):
             # Wait for connection with timeout
             if not self.connected.wait(timeout=10):  # Increased timeout to 10 seconds
                 self.logger.error("WebSocket connection timed out after 10 seconds")
+                self._report_drop(None, "Connection timed out")
                 return
                 
             self.logger.info("WebSocket connected successfully, running event loop")
@@ -622,6 +860,7 @@ class RWSWebSocketClient(WebSocketClient):
             
         except Exception as e:
             self.logger.error(f"WebSocket connection error: {str(e)}")
+            self._report_drop(None, str(e))
             # Try to clean up
             try:
                 if self.connected.is_set():
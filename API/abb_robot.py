@@ -14,11 +14,13 @@ Author: Sunny24
 Date: May 21, 2025
 """
 
-from typing import Dict, List, Optional, Any, Union, Callable
+from typing import Dict, List, Optional, Any, Union, Callable, Iterator
 import time
 import threading
 from .abb_base import ABBRobotAPI
-from .abb_robot_utils import IOSignalProcessor, SubscriptionParser, SubscriptionHelper, SubscriptionManager
+from .abb_robot_utils import (IOSignalProcessor, IOWriteQueue, SubscriptionParser, SubscriptionHelper,
+                              SubscriptionManager, SubscriptionSupervisor, DEFAULT_FETCH_WORKERS,
+                              DEFAULT_SIGNAL_PAGE_SIZE)
 
 
 class ABBEndpoints:
@@ -436,6 +438,17 @@ class User(ABBBaseService):
 class Controller(ABBBaseService):
     """Controller management functions for ABB robots"""
     
+    def __init__(self, api: ABBRobotAPI):
+        """
+        Initialize with a reference to the ABB Robot API
+        
+        Args:
+            api: An instance of the ABB Robot API
+        """
+        super().__init__(api)
+        # Callbacks invoked after a restart request was accepted
+        self.restart_callbacks: List[Callable[[str], None]] = []
+    
     def set_restart(self, mode: str) -> Dict[str, Any]:
         """
         Restart the controller
@@ -458,7 +471,15 @@ class Controller(ABBBaseService):
             return error
             
         data = {'restart-mode': mode}
-        return self.api.post(ABBEndpoints.CTRL_RESTART, data=data)
+        result = self.api.post(ABBEndpoints.CTRL_RESTART, data=data)
+        
+        if result.get('status_code') in [200, 202, 204]:
+            for callback in self.restart_callbacks:
+                try:
+                    callback(mode)
+                except Exception as e:
+                    self.logger.error(f"Error in restart callback: {str(e)}")
+        return result
 
     def get_network(self) -> Dict[str, Any]:
         """
@@ -517,6 +538,10 @@ class IO(ABBBaseService):
         self.processor = IOSignalProcessor(self.logger)
         # Initialize subscription helper
         self.sub_helper = SubscriptionHelper(self.api, self.logger)
+        # Background writer for non-blocking writes (started on first use)
+        self.writer = IOWriteQueue(self.set_signal_value, self.logger)
+        # Number of signals requested per page by list_signals()/iter_signal_pages()
+        self.signal_page_size = DEFAULT_SIGNAL_PAGE_SIZE
     
     def search_signals(self, name: Optional[str] = None, device: Optional[str] = None,
                      network: Optional[str] = None, category: Optional[str] = None,
@@ -576,30 +601,99 @@ class IO(ABBBaseService):
             exact_match=exact_match
         )
     
-    def get_signal_value(self, signal_path: str) -> Dict[str, Any]:
+    def _resolve_signal_path(self, signal_path: str) -> str:
         """
-        Get the current value of a signal
+        Resolve a signal name to its full path, using the signal path cache
         
         Args:
-            signal_path: Signal path or name
+            signal_path: Signal path or bare signal name
             
         Returns:
-            Signal value and state information
+            Normalized signal path
         """
         # Check if signal_path is a name rather than a path
         if signal_path and '/' not in signal_path:
-            # Try to find the signal path for this name
+            cached_path = self.processor.signal_cache.get(signal_path)
+            if cached_path:
+                return cached_path
+            
+            # Cache miss - search for the signal path for this name
             matching_paths = self.get_signal_paths(signal_path, exact_match=True)
             if matching_paths:
+                self.processor.signal_cache.put(signal_path, matching_paths[0])
                 signal_path = matching_paths[0]
         
         # Normalize signal path
-        signal_path = self.processor.normalize_signal_path(signal_path)
+        return self.processor.normalize_signal_path(signal_path)
+    
+    def prewarm_signal_cache(self, signals_result: Optional[Dict[str, Any]] = None) -> int:
+        """
+        Fill the signal path cache in bulk so later reads/writes skip the signal search
+        
+        Args:
+            signals_result: Optional response from list_signals() to reuse. If not
+                given, list_signals() is called.
+            
+        Returns:
+            Number of signals added to the cache
+        """
+        if signals_result is None:
+            signals_result = self.list_signals()
+            
+        if signals_result.get('status_code') != 200 or 'content' not in signals_result:
+            self.logger.warning("Could not pre-warm signal path cache: signal list unavailable")
+            return 0
+            
+        resources = signals_result['content'].get('_embedded', {}).get('resources', [])
+        count = self.processor.prewarm_signal_cache(resources)
+        self.logger.info(f"Signal path cache pre-warmed with {count} signals")
+        return count
+    
+    def invalidate_signal_cache(self, name: Optional[str] = None) -> None:
+        """
+        Invalidate the signal path cache, e.g. after a controller restart or
+        an I/O configuration change
+        
+        Args:
+            name: Signal name to drop, or None to clear the whole cache
+        """
+        self.processor.signal_cache.invalidate(name)
+        self.logger.debug(f"Signal path cache invalidated ({name or 'all signals'})")
+    
+    def get_signal_cache_stats(self) -> Dict[str, Any]:
+        """
+        Get hit/miss statistics of the signal path cache
+        
+        Returns:
+            Dictionary with size, hits, misses, hit_rate and invalidations
+        """
+        return self.processor.signal_cache.stats()
+    
+    def get_signal_value(self, signal_path: str) -> Dict[str, Any]:
+        """
+        Get the current value of a signal
+        
+        Args:
+            signal_path: Signal path or name
+            
+        Returns:
+            Signal value and state information
+        """
+        signal_name = signal_path if signal_path and '/' not in signal_path else None
+        signal_path = self._resolve_signal_path(signal_path)
         self.logger.debug(f"Getting signal value for {signal_path}")
         
         # Get signal value using formatted endpoint
         formatted_endpoint = ABBEndpoints.SIGNALS_VALUE.format(signal_path=self.processor.short_signal_path(signal_path))
-        return self.api.get(formatted_endpoint)
+        result = self.api.get(formatted_endpoint)
+        
+        # A 404 on a cached path means the I/O configuration changed - resolve again once
+        if signal_name and result.get('status_code') == 404:
+            self.processor.signal_cache.invalidate(signal_name)
+            signal_path = self._resolve_signal_path(signal_name)
+            formatted_endpoint = ABBEndpoints.SIGNALS_VALUE.format(signal_path=self.processor.short_signal_path(signal_path))
+            result = self.api.get(formatted_endpoint)
+        return result
             
     def set_signal_value(self, signal_path: str, value: Any) -> Dict[str, Any]:
         """
@@ -612,15 +706,8 @@ class IO(ABBBaseService):
         Returns:
             Response information
         """
-        # Check if signal_path is a name rather than a path
-        if signal_path and '/' not in signal_path:
-            # Try to find the signal path for this name
-            matching_paths = self.get_signal_paths(signal_path, exact_match=True)
-            if matching_paths:
-                signal_path = matching_paths[0]
-        
-        # Normalize signal path
-        signal_path = self.processor.normalize_signal_path(signal_path)
+        signal_name = signal_path if signal_path and '/' not in signal_path else None
+        signal_path = self._resolve_signal_path(signal_path)
         self.logger.debug(f"Setting signal value for {signal_path} to {value}")
         
         # Use the SIGNALS_SETVALUE endpoint
@@ -628,23 +715,156 @@ class IO(ABBBaseService):
         
         # Set signal value
         data = {'lvalue': str(value)}
-        return self.api.post(formatted_endpoint, data=data)
+        result = self.api.post(formatted_endpoint, data=data)
         
-    def list_signals(self, filter_pattern: Optional[str] = None) -> Dict[str, Any]:
+        # A 404 on a cached path means the I/O configuration changed - resolve again once
+        if signal_name and result.get('status_code') == 404:
+            self.processor.signal_cache.invalidate(signal_name)
+            signal_path = self._resolve_signal_path(signal_name)
+            formatted_endpoint = ABBEndpoints.SIGNALS_SETVALUE.format(signal_path=self.processor.short_signal_path(signal_path))
+            result = self.api.post(formatted_endpoint, data=data)
+        return result
+        
+    def write_signal_async(self, signal_path: str, value: Any) -> bool:
+        """
+        Queue a signal write on the background writer without blocking
+        
+        Pending writes to the same signal are coalesced (last value wins) and
+        writes matching the last acknowledged value are skipped. Register a
+        callback in ``self.writer.callbacks`` to be told when a write completes.
+        
+        Args:
+            signal_path: Signal path or name
+            value: Value to set
+            
+        Returns:
+            True if the write was queued, False if it was skipped as redundant
+        """
+        return self.writer.submit(signal_path, value)
+        
+    def list_signals(self, filter_pattern: Optional[str] = None,
+                     page_size: Optional[int] = None) -> Dict[str, Any]:
         """
         List all signals, optionally filtered by pattern
         
+        Follows the paging of the controller (see iter_signal_pages()) and
+        returns the response of the first page with the signals of all pages
+        in ``_embedded.resources``.
+        
         Args:
             filter_pattern: Pattern to filter signals
+            page_size: Signals per request (defaults to signal_page_size)
             
         Returns:
             List of signals
         """
-        params = {}
-        if filter_pattern:
-            params['filter'] = filter_pattern
+        result = None
+        signals = []
+        for page in self.iter_signal_pages(filter_pattern, page_size):
+            if page.get('status_code') != 200:
+                if result is None:
+                    return page
+                self.logger.error(f"Signal listing stopped after {len(signals)} signals: "
+                                  f"{page.get('error', page.get('status_code'))}")
+                result['error'] = page.get('error', f"HTTP {page.get('status_code')}")
+                break
+            if result is None:
+                result = page
+            signals.extend(self._page_resources(page))
+            
+        if result is None:
+            return {'status_code': 0, 'error': 'No response'}
+        if isinstance(result.get('content'), dict):
+            result['content'].setdefault('_embedded', {})['resources'] = signals
+        return result
+    
+    def iter_signal_pages(self, filter_pattern: Optional[str] = None,
+                          page_size: Optional[int] = None) -> Iterator[Dict[str, Any]]:
+        """
+        Get the signal list page by page
+        
+        Requests ``page_size`` signals at a time and follows the HAL ``next``
+        link of each page; if a full page has no ``next`` link, the next page
+        is requested with ``start``/``limit``. Each yielded item is the response
+        of one page; iteration stops after an empty page or a failed request
+        (which is yielded too).
+        
+        Args:
+            filter_pattern: Pattern to filter signals
+            page_size: Signals per request (defaults to signal_page_size)
             
-        return self.api.get(ABBEndpoints.SIGNALS_BASE, params=params)
+        Yields:
+            Page responses with the signals of the page in ``_embedded.resources``
+        """
+        page_size = page_size or self.signal_page_size
+        base_params = {'limit': page_size}
+        if filter_pattern:
+            base_params['filter'] = filter_pattern
+            
+        uri = ABBEndpoints.SIGNALS_BASE
+        params = dict(base_params, start=0)
+        start = 0
+        seen = set()
+        while True:
+            page = self.api.get(uri, params=params)
+            yield page
+            if page.get('status_code') != 200:
+                return
+            resources = self._page_resources(page)
+            if not resources:
+                return
+            # Stop if the controller ignores paging and repeats a page
+            first = resources[0].get('_links', {}).get('self', {}).get('href') or resources[0].get('name')
+            if first in seen:
+                return
+            seen.add(first)
+            start += len(resources)
+                
+            next_href = page.get('content', {}).get('_links', {}).get('next', {}).get('href')
+            if next_href:
+                uri = self._resolve_link(next_href)
+                params = None
+            elif len(resources) == page_size:
+                uri = ABBEndpoints.SIGNALS_BASE
+                params = dict(base_params, start=start)
+            else:
+                return
+    
+    def iter_signals(self, filter_pattern: Optional[str] = None,
+                     page_size: Optional[int] = None) -> Iterator[Dict[str, Any]]:
+        """
+        Iterate over all signals, fetching them page by page
+        
+        Args:
+            filter_pattern: Pattern to filter signals
+            page_size: Signals per request (defaults to signal_page_size)
+            
+        Yields:
+            Signal resources
+        """
+        for page in self.iter_signal_pages(filter_pattern, page_size):
+            if page.get('status_code') != 200:
+                self.logger.error(f"Error listing signals: {page.get('error', page.get('status_code'))}")
+                return
+            yield from self._page_resources(page)
+    
+    @staticmethod
+    def _page_resources(page: Dict[str, Any]) -> List[Dict[str, Any]]:
+        """Signal resources of a list_signals page response"""
+        content = page.get('content')
+        if not isinstance(content, dict):
+            return []
+        return content.get('_embedded', {}).get('resources', [])
+    
+    @staticmethod
+    def _resolve_link(href: str) -> str:
+        """Turn a HAL link of the signal collection into a URI for ABBRobotAPI.get()"""
+        if href.startswith('/'):
+            return href
+        if '://' in href:
+            return '/' + href.split('://', 1)[1].split('/', 1)[1]
+        # Relative to the I/O system, e.g. 'signals?start=100&limit=100'
+        return f"{ABBEndpoints.IOSYSTEM_BASE}/{href}"
     
     def parse_io_event_xml(self, xml_str: str) -> Dict[str, Any]:
         """
@@ -2671,6 +2891,10 @@ class ABBRobot:
         self.rapid = RAPID(self.api)
         self.vision = Vision(self.api)
         
+        # Signal paths may change after a restart - drop cached resolutions
+        self.controller.restart_callbacks.append(lambda mode: self.io.invalidate_signal_cache())
+        self.controller.restart_callbacks.append(lambda mode: self.io.writer.forget())
+        
         # Initialize subscription helper - used for individual service subscriptions
         self.subscription_helper = SubscriptionHelper(self.api, self.logger)
         
@@ -2678,9 +2902,15 @@ class ABBRobot:
         self.subscription_manager = SubscriptionManager(self.api, self.logger)
         
         # Initialize subscription parser for parsing event XML
-        from .abb_robot_utils import SubscriptionParser
+        from .abb_robot_utils import SubscriptionParser, SubscriptionDecoder
         self.subscription_parser = SubscriptionParser(self.logger)
         
+        # Single-pass decoder returning all event types of a message at once
+        self.subscription_decoder = SubscriptionDecoder(self.logger)
+        
+        # Reconnects dropped subscription WebSockets and re-reads missed values
+        self.subscription_supervisor = SubscriptionSupervisor(self.api, self.subscription_decoder, self.logger)
+        
         # Set default values
         self.connected = False
         
@@ -2700,6 +2930,8 @@ class ABBRobot:
         Returns:
             True if disconnect was successful
         """
+        self.io.writer.stop()
+        self.subscription_supervisor.stop()
         return self.api.disconnect()
         
     def get(self, uri: str, headers: Optional[Dict[str, str]] = None) -> Dict[str, Any]:
@@ -2809,7 +3041,10 @@ class ABBRobot:
                                   collect_motion: bool = True,
                                   collect_vision: bool = True,
                                   collect_user: bool = True,
-                                  io_signals: Optional[List[str]] = None) -> None:
+                                  io_signals: Optional[List[str]] = None,
+                                  signals_result: Optional[Dict[str, Any]] = None,
+                                  max_workers: int = DEFAULT_FETCH_WORKERS,
+                                  progress_callback: Optional[Callable[[int, int, str], None]] = None) -> None:
         """
         Set up a combined subscription that collects resources from multiple services 
         and gets their initial values before subscribing.
@@ -2824,6 +3059,11 @@ class ABBRobot:
             collect_motion: Collect motion system resources
             collect_vision: Collect vision system resources
             io_signals: List of specific IO signal paths to collect
+            signals_result: Optional list_signals() response; IO initial values
+                found in it are used instead of one request per signal
+            max_workers: Number of concurrent requests for the remaining initial values
+            progress_callback: Optional callback(done, total, resource) called
+                in this thread while initial values are fetched
             
         Returns:
             None
@@ -2836,52 +3076,82 @@ class ABBRobot:
             if io_signals:
                 # Add specific IO signals
                 for signal_path in io_signals:
-                    self.logger.info(f"Adding IO signal {signal_path} to combined subscription")
-                    self.subscription_manager.add_io_signal(f'{signal_path};state', {'p': '1'})
+                    self.logger.debug(f"Adding IO signal {signal_path} to combined subscription")
+                    self.subscription_manager.add_io_signal(f'{signal_path};state', fetch=False)
+                self.logger.info(f"Added {len(io_signals)} IO signals to combined subscription")
         if collect_user:
             self.logger.info("Adding user management resources to combined subscription")
-            self.subscription_manager.add_resource(ABBEndpoints.RMPP_USER_INFO, {'p': '1'})
+            self.subscription_manager.add_resource(ABBEndpoints.RMPP_USER_INFO, {'p': '1'}, fetch=False)
         # Add panel resources if requested
         if collect_panel:
             self.logger.info("Adding panel resources to combined subscription")
             # Use specific parameters for subscription to improve event data format
-            self.subscription_manager.add_resource(ABBEndpoints.CTRL_STATE, {'p': '1', 'resource': 'ctrl-state'})
-            self.subscription_manager.add_resource(ABBEndpoints.OPMODE, {'p': '1', 'resource': 'opmode'})
-            self.subscription_manager.add_resource(ABBEndpoints.SPEED_RATIO, {'p': '1', 'resource': 'speedratio'})
+            self.subscription_manager.add_resource(ABBEndpoints.CTRL_STATE, {'p': '1', 'resource': 'ctrl-state'}, fetch=False)
+            self.subscription_manager.add_resource(ABBEndpoints.OPMODE, {'p': '1', 'resource': 'opmode'}, fetch=False)
+            self.subscription_manager.add_resource(ABBEndpoints.SPEED_RATIO, {'p': '1', 'resource': 'speedratio'}, fetch=False)
             
         # Add RAPID execution resources if requested
         if collect_rapid:
             self.logger.info("Adding RAPID execution resources to combined subscription")
-            self.subscription_manager.add_resource(f'{ABBEndpoints.RAPID_EXECUTION};ctrlexecstate', {'p': '1'})
+            self.subscription_manager.add_resource(f'{ABBEndpoints.RAPID_EXECUTION};ctrlexecstate', {'p': '1'}, fetch=False)
             
         # Add motion system resources if requested
         if collect_motion:
             self.logger.info("Adding motion system resources to combined subscription")
-            self.subscription_manager.add_resource(f'{ABBEndpoints.MOTION_ERRORSTATE};erroreventchange', {'p': '1'})
+            self.subscription_manager.add_resource(f'{ABBEndpoints.MOTION_ERRORSTATE};erroreventchange', {'p': '1'}, fetch=False)
             
         # Add vision system resources if requested
         if collect_vision:
             self.logger.info("Adding vision system resources to combined subscription")
-            self.subscription_manager.add_resource(ABBEndpoints.VISION_BASE, {'p': '1'})
+            self.subscription_manager.add_resource(ABBEndpoints.VISION_BASE, {'p': '1'}, fetch=False)
+        
+        # IO values from the bulk signal listing, the rest fetched concurrently
+        if signals_result and signals_result.get('status_code') == 200 and 'content' in signals_result:
+            resources = signals_result['content'].get('_embedded', {}).get('resources', [])
+            self.subscription_manager.seed_io_initial_values(resources)
+        self.subscription_manager.fetch_initial_values(max_workers=max_workers,
+                                                       progress_callback=progress_callback)
     
-    def subscribe_to_collected_resources(self, callback: Optional[Callable] = None) -> str:
+    def subscribe_to_collected_resources(self, callback: Optional[Callable] = None,
+                                         shard_size: Optional[int] = None) -> str:
         """
-        Subscribe to all collected resources with a single subscription
+        Subscribe to all collected resources
+        
+        Resources are split into shards of at most ``shard_size`` resources,
+        each served by its own WebSocket; all shards deliver their events to
+        the same callback.
         
         Args:
             callback: Optional callback function for subscription events
+                (defaults to the subscription manager's router)
+            shard_size: Optional maximum number of resources per subscription
             
         Returns:
-            Subscription ID
+            Subscription group ID
         """
         self.logger.info("Creating subscription for all collected resources")
         
-        if callback:
-            # If a callback is provided, use it for the subscription
-            return self.api.subscribe(self.subscription_manager.resources, callback)
-        else:
-            # Otherwise use the default subscription manager
-            return self.subscription_manager.subscribe_all()
+        if shard_size:
+            self.subscription_manager.shard_size = shard_size
+        return self.subscription_manager.subscribe_all(callback)
+    
+    def get_subscription_reconnect_stats(self) -> Dict[str, Any]:
+        """
+        Get reconnect metrics of the subscription supervisor
+        
+        Returns:
+            Dictionary with state, drop/reconnect counts, gap and reconnect latency
+        """
+        return self.subscription_supervisor.stats()
+    
+    def get_subscription_shard_health(self) -> Dict[str, Dict[str, Any]]:
+        """
+        Get per-shard health of the combined subscription
+        
+        Returns:
+            Dictionary of shard subscription ID -> status
+        """
+        return self.subscription_manager.get_shard_health()
     
     def get_initial_values(self) -> Dict[str, Dict[str, Any]]:
         """
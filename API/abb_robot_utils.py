@@ -10,12 +10,154 @@ Date: May 21, 2025
 """
 
 import logging
+import threading
+import time
 import xml.etree.ElementTree as ET
+from collections import OrderedDict, deque
+from concurrent.futures import ThreadPoolExecutor, as_completed
 from typing import Dict, List, Optional, Any, Union, Callable, Tuple
 
 # Define XML namespace used in ABB responses
 NAMESPACE = '{http://www.w3.org/1999/xhtml}'
 
+# Default lifetime of a cached signal name -> path resolution (seconds)
+DEFAULT_SIGNAL_CACHE_TTL = 300.0
+
+# Default number of signals requested per page when listing signals
+DEFAULT_SIGNAL_PAGE_SIZE = 100
+
+# Default maximum number of resources per RWS subscription. Larger resource
+# sets are split into several subscriptions (one WebSocket each).
+DEFAULT_SUBSCRIPTION_SHARD_SIZE = 100
+
+# Reconnect backoff for dropped subscriptions (seconds): the delay starts at
+# the initial value and doubles after every failed attempt up to the maximum.
+DEFAULT_RECONNECT_INITIAL_DELAY = 0.5
+DEFAULT_RECONNECT_MAX_DELAY = 30.0
+
+# Default number of concurrent requests used to fetch initial values. Kept below
+# the connection pool size of requests.Session (10 per host).
+DEFAULT_FETCH_WORKERS = 8
+
+
+class SignalPathCache:
+    """
+    Thread-safe cache mapping bare signal names to their full RWS paths
+
+    Entries expire after ``ttl`` seconds so that renamed or moved signals are
+    eventually picked up again. The cache keeps hit/miss counters so callers
+    can check how many signal searches it is saving.
+    """
+
+    def __init__(self, ttl: float = DEFAULT_SIGNAL_CACHE_TTL, logger=None):
+        """
+        Initialize the signal path cache
+
+        Args:
+            ttl: Lifetime of an entry in seconds (0 or None disables expiry)
+            logger: Optional logger instance
+        """
+        self.ttl = ttl
+        self.logger = logger or logging.getLogger('SignalPathCache')
+        self._entries: Dict[str, Tuple[str, float]] = {}
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.invalidations = 0
+
+    def get(self, name: str) -> Optional[str]:
+        """
+        Look up the cached path for a signal name
+
+        Args:
+            name: Bare signal name
+
+        Returns:
+            Full signal path, or None if not cached or expired
+        """
+        with self._lock:
+            entry = self._entries.get(name)
+            if entry is not None:
+                path, stored_at = entry
+                if not self.ttl or time.monotonic() - stored_at < self.ttl:
+                    self.hits += 1
+                    return path
+                del self._entries[name]
+            self.misses += 1
+            return None
+
+    def put(self, name: str, path: str) -> None:
+        """
+        Store the resolved path for a signal name
+
+        Args:
+            name: Bare signal name
+            path: Full signal path
+        """
+        with self._lock:
+            self._entries[name] = (path, time.monotonic())
+
+    def __setitem__(self, name: str, path: str) -> None:
+        self.put(name, path)
+
+    def __contains__(self, name: str) -> bool:
+        with self._lock:
+            return name in self._entries
+
+    def __len__(self) -> int:
+        with self._lock:
+            return len(self._entries)
+
+    def prewarm(self, paths: Dict[str, str]) -> int:
+        """
+        Bulk-load the cache with already resolved signal paths
+
+        Args:
+            paths: Dictionary of signal name -> full signal path
+
+        Returns:
+            Number of entries loaded
+        """
+        now = time.monotonic()
+        with self._lock:
+            for name, path in paths.items():
+                self._entries[name] = (path, now)
+        self.logger.debug(f"Pre-warmed signal path cache with {len(paths)} signals")
+        return len(paths)
+
+    def invalidate(self, name: Optional[str] = None) -> None:
+        """
+        Drop one entry, or the whole cache if no name is given
+
+        Args:
+            name: Signal name to drop, or None to clear everything
+        """
+        with self._lock:
+            if name is None:
+                self._entries.clear()
+            else:
+                self._entries.pop(name, None)
+            self.invalidations += 1
+
+    def stats(self) -> Dict[str, Any]:
+        """
+        Get cache statistics
+
+        Returns:
+            Dictionary with size, hits, misses, hit_rate and invalidations
+        """
+        with self._lock:
+            total = self.hits + self.misses
+            return {
+                'size': len(self._entries),
+                'hits': self.hits,
+                'misses': self.misses,
+                'hit_rate': (self.hits / total) if total else 0.0,
+                'invalidations': self.invalidations,
+                'ttl': self.ttl
+            }
+
+
 class IOSignalProcessor:
     """
     Utility class for processing IO signal data from ABB robots
@@ -29,7 +171,7 @@ class IOSignalProcessor:
             logger: Optional logger instance
         """
         self.logger = logger or logging.getLogger('IOSignalProcessor')
-        self.signal_cache = {}  # Cache signal_name -> full path
+        self.signal_cache = SignalPathCache(logger=self.logger)  # Cache signal_name -> full path
     
     def short_signal_path(self, signal_path: str) -> str:
         """
@@ -180,6 +322,25 @@ class IOSignalProcessor:
         self.logger.info(f"Returning {len(signal_paths)} signals after filtering")
         return signal_paths
             
+    def prewarm_signal_cache(self, resources: List[Dict[str, Any]]) -> int:
+        """
+        Fill the signal path cache from a list of signal resources
+        
+        Args:
+            resources: Signal resources from ``_embedded.resources`` of a
+                list_signals or signal-search response
+            
+        Returns:
+            Number of signals added to the cache
+        """
+        paths = {}
+        for sig in resources:
+            name = sig.get('name')
+            href = sig.get('_links', {}).get('self', {}).get('href')
+            if name and href:
+                paths[name] = self.normalize_signal_path(href)
+        return self.signal_cache.prewarm(paths)
+            
     def build_search_params(self, name: Optional[str] = None, device: Optional[str] = None,
                            network: Optional[str] = None, category: Optional[str] = None,
                            category_pon: Optional[str] = None, type: Optional[str] = None,
@@ -261,6 +422,273 @@ class IOSignalProcessor:
             return []
 
 
+class IOWriteQueue:
+    """
+    Background write-behind queue for IO signal writes
+
+    Writes are handed to a single worker thread so callers (e.g. a camera loop
+    on the GUI thread) never block on the network. Pending writes to the same
+    signal are coalesced (last value wins), and a write is skipped entirely when
+    the value matches the newest value already on its way to (in flight) or
+    acknowledged by the controller.
+    Completion is reported through callbacks invoked on the worker thread:
+    ``callback(signal, value, success, error)``.
+    """
+
+    SUCCESS_CODES = (200, 201, 202, 204)
+
+    def __init__(self, write_func: Callable[[str, Any], Dict[str, Any]], logger=None):
+        """
+        Initialize the IO write queue
+
+        Args:
+            write_func: Function performing the synchronous write, called as
+                write_func(signal, value) and returning a response dict
+            logger: Optional logger instance
+        """
+        self.write_func = write_func
+        self.logger = logger or logging.getLogger('IOWriteQueue')
+        self.callbacks: List[Callable[[str, Any, bool, str], None]] = []
+
+        self._pending: 'OrderedDict[str, Any]' = OrderedDict()
+        self._acked: Dict[str, str] = {}
+        self._in_flight: Optional[Tuple[str, str]] = None
+        self._cond = threading.Condition()
+        self._running = False
+        self._thread: Optional[threading.Thread] = None
+
+        # Statistics
+        self.submitted = 0
+        self.written = 0
+        self.failed = 0
+        self.superseded = 0
+        self.skipped = 0
+
+    def start(self) -> None:
+        """Start the worker thread if it is not already running"""
+        with self._cond:
+            if not self._running:
+                self._start_locked()
+
+    def _start_locked(self) -> None:
+        """Start the worker thread while holding the queue lock"""
+        self._running = True
+        self._thread = threading.Thread(target=self._run, name='IOWriteQueue', daemon=True)
+        self._thread.start()
+        self.logger.debug("IO write queue started")
+
+    def stop(self, timeout: float = 2.0) -> None:
+        """
+        Stop the worker thread, dropping writes that were not sent yet
+
+        Args:
+            timeout: Seconds to wait for an in-flight write to finish
+        """
+        with self._cond:
+            self._running = False
+            self._pending.clear()
+            self._cond.notify_all()
+        if self._thread and self._thread is not threading.current_thread():
+            self._thread.join(timeout)
+        self._thread = None
+        self.logger.debug("IO write queue stopped")
+
+    def submit(self, signal: str, value: Any) -> bool:
+        """
+        Queue a write without blocking
+
+        Args:
+            signal: Signal name or path
+            value: Value to write
+
+        Returns:
+            True if the write was queued, False if it was skipped because the
+            controller already has this value
+        """
+        with self._cond:
+            return self._submit_locked(signal, value)
+
+    def _submit_locked(self, signal: str, value: Any) -> bool:
+        """submit() while holding the queue lock"""
+        value_str = str(value)
+        if not self._running:
+            self._start_locked()
+        self.submitted += 1
+        if signal in self._pending:
+            if str(self._pending[signal]) == value_str:
+                return True
+            self.superseded += 1
+            if self._newest_locked(signal) == value_str:
+                # Back to the value the controller has (or is getting): nothing left to send
+                del self._pending[signal]
+            else:
+                self._pending[signal] = value
+            return True
+        # Nothing pending: skip only if the newest known value (in flight, else acknowledged) matches
+        if self._newest_locked(signal) == value_str:
+            self.skipped += 1
+            return False
+        self._pending[signal] = value
+        self._cond.notify()
+        return True
+
+    def toggle(self, signal: str, current: Any = None) -> Optional[int]:
+        """
+        Queue the inverse of the newest value of a digital signal
+
+        The newest value includes writes that are still pending or in flight,
+        so repeated toggles alternate even before the controller acknowledges
+        them.
+
+        Args:
+            signal: Signal name or path, as used with submit()
+            current: Value read from the controller, used only when the queue
+                knows no value for the signal
+
+        Returns:
+            The queued value (0 or 1), or None if the current value is unknown
+        """
+        with self._cond:
+            newest = self._pending.get(signal, self._newest_locked(signal))
+            if newest is None:
+                newest = current
+            if newest is None:
+                return None
+            try:
+                new_value = 0 if int(float(newest)) == 1 else 1
+            except (ValueError, TypeError):
+                new_value = 1
+            self._submit_locked(signal, new_value)
+            return new_value
+
+    def note_value(self, signal: str, value: Any) -> None:
+        """
+        Record a value reported by the controller (e.g. from a subscription event)
+
+        Keeps the skip check correct when a signal is changed by something
+        other than this queue.
+
+        Args:
+            signal: Signal name or path, as used with submit()
+            value: Current value on the controller
+        """
+        with self._cond:
+            self._acked[signal] = str(value)
+
+    def last_value(self, signal: str) -> Optional[str]:
+        """
+        Get the last value known to be on the controller for a signal
+
+        Args:
+            signal: Signal name or path, as used with submit()
+
+        Returns:
+            Last acknowledged value as a string, or None if unknown
+        """
+        with self._cond:
+            return self._acked.get(signal)
+
+    def latest_value(self, signal: str) -> Optional[str]:
+        """
+        Get the newest value submitted or known for a signal
+
+        Unlike last_value(), this includes writes that were not acknowledged
+        yet, so toggles computed from it do not repeat while a write is queued.
+
+        Args:
+            signal: Signal name or path, as used with submit()
+
+        Returns:
+            Pending value, else in-flight value, else last acknowledged value,
+            as a string, or None if unknown
+        """
+        with self._cond:
+            if signal in self._pending:
+                return str(self._pending[signal])
+            return self._newest_locked(signal)
+
+    def _newest_locked(self, signal: str) -> Optional[str]:
+        """In-flight value of a signal, else its acknowledged value (caller holds the lock)"""
+        if self._in_flight is not None and self._in_flight[0] == signal:
+            return self._in_flight[1]
+        return self._acked.get(signal)
+
+    def forget(self, signal: Optional[str] = None) -> None:
+        """
+        Forget acknowledged values so the next write is always sent
+
+        Args:
+            signal: Signal to forget, or None for all signals
+        """
+        with self._cond:
+            if signal is None:
+                self._acked.clear()
+            else:
+                self._acked.pop(signal, None)
+
+    def pending_count(self) -> int:
+        """Number of writes waiting to be sent"""
+        with self._cond:
+            return len(self._pending)
+
+    def stats(self) -> Dict[str, int]:
+        """
+        Get queue statistics
+
+        Returns:
+            Dictionary with submitted, written, failed, superseded, skipped and pending counts
+        """
+        with self._cond:
+            return {
+                'submitted': self.submitted,
+                'written': self.written,
+                'failed': self.failed,
+                'superseded': self.superseded,
+                'skipped': self.skipped,
+                'pending': len(self._pending)
+            }
+
+    def _run(self) -> None:
+        """Worker loop: send the oldest pending write, one at a time"""
+        while True:
+            with self._cond:
+                while self._running and not self._pending:
+                    self._cond.wait()
+                # Exit when stopped, or when a restart replaced this worker
+                if not self._running or self._thread is not threading.current_thread():
+                    return
+                signal, value = self._pending.popitem(last=False)
+                self._in_flight = (signal, str(value))
+
+            success = False
+            error = ''
+            try:
+                result = self.write_func(signal, value)
+                success = result.get('status_code') in self.SUCCESS_CODES
+                if not success:
+                    error = str(result.get('error', f"HTTP {result.get('status_code')}"))
+            except Exception as e:
+                error = str(e)
+
+            with self._cond:
+                self._in_flight = None
+                if success:
+                    self.written += 1
+                    self._acked[signal] = str(value)
+                else:
+                    self.failed += 1
+                    self._acked.pop(signal, None)
+
+            if not success:
+                self.logger.warning(f"Queued write {signal}={value} failed: {error}")
+
+            for callback in list(self.callbacks):
+                try:
+                    callback(signal, value, success, error)
+                except Exception as e:
+                    self.logger.error(f"Error in IO write callback: {str(e)}")
+
+
 class SubscriptionParser:
     """
     Utility class for parsing subscription data from ABB robots
@@ -552,22 +980,351 @@ class SubscriptionParser:
             return {}
 
 
+class EventRecord:
+    """
+    A single decoded subscription event (one ``<li>`` element of an RWS event)
+    """
+
+    def __init__(self, kind: str, event_class: str, resource: str,
+                 values: Dict[str, Any]):
+        """
+        Initialize an event record
+
+        Args:
+            kind: Event type - 'panel', 'io', 'rapid', 'motion', 'user' or 'vision'
+            event_class: Resource class of the event (e.g. 'ios-signalstate-ev')
+            resource: Resource the event refers to (title attribute)
+            values: Values carried by the event (span class -> text)
+        """
+        self.kind = kind
+        self.event_class = event_class
+        self.resource = resource
+        self.values = values
+
+    def __repr__(self) -> str:
+        return f"EventRecord({self.kind!r}, {self.event_class!r}, {self.resource!r}, {self.values!r})"
+
+
+class SubscriptionEvents:
+    """
+    All events decoded from one subscription message, grouped by type
+
+    ``panel``, ``rapid``, ``motion``, ``user`` and ``vision`` have the same
+    shape as the dictionaries returned by the matching SubscriptionParser
+    methods. ``io`` is a list with one dictionary per signal event (the shape
+    of IOSignalProcessor.parse_io_event_xml), so messages carrying several
+    signal changes are no longer reduced to the last one.
+    """
+
+    def __init__(self):
+        self.records: List[EventRecord] = []
+        self.panel: Dict[str, Any] = {}
+        self.io: List[Dict[str, Any]] = []
+        self.rapid: Dict[str, Any] = {}
+        self.motion: Dict[str, Any] = {}
+        self.user: Dict[str, Any] = {}
+        self.vision: Dict[str, Any] = {}
+
+    def __bool__(self) -> bool:
+        return bool(self.records)
+
+    def by_class(self) -> Dict[str, List[EventRecord]]:
+        """
+        Group the decoded records by resource class
+
+        Returns:
+            Dictionary of event class -> list of records
+        """
+        grouped: Dict[str, List[EventRecord]] = {}
+        for record in self.records:
+            grouped.setdefault(record.event_class, []).append(record)
+        return grouped
+
+
+class SubscriptionDecoder:
+    """
+    Single-pass decoder for RWS subscription event messages
+
+    Parses each message once and walks its ``<li>`` elements once, replacing
+    the separate SubscriptionParser/IOSignalProcessor parse calls per message.
+    """
+
+    # Event class prefix -> event kind, for '<prefix>...-ev' classes
+    CLASS_PREFIXES = (
+        ('pnl-', 'panel'),
+        ('rap-', 'rapid'),
+        ('mot-', 'motion'),
+        ('user-', 'user'),
+        ('vis-', 'vision'),
+    )
+
+    # Panel span/class names -> keys used by SubscriptionParser.parse_event_xml
+    PANEL_KEYS = {
+        'ctrlstate': 'controller_state',
+        'ctrl-state': 'controller_state',
+        'opmode': 'operation_mode',
+        'speedratio': 'speed_ratio',
+    }
+
+    def __init__(self, logger=None):
+        """
+        Initialize the Subscription Decoder
+
+        Args:
+            logger: Optional logger instance
+        """
+        self.logger = logger or logging.getLogger('SubscriptionDecoder')
+        self._li_tag = f"{NAMESPACE}li"
+        self._span_tag = f"{NAMESPACE}span"
+        self._a_tag = f"{NAMESPACE}a"
+
+    def _parse(self, xml_str: str) -> Optional[ET.Element]:
+        """Parse the message, retrying once with escaped ampersands"""
+        try:
+            return ET.fromstring(xml_str)
+        except ET.ParseError:
+            try:
+                return ET.fromstring(xml_str.replace('&', '&amp;'))
+            except ET.ParseError as e:
+                self.logger.error(f"Failed to parse event XML: {e}")
+                self.logger.debug(f"Raw XML: {xml_str[:500]}")
+                return None
+
+    def decode(self, xml_str: str) -> SubscriptionEvents:
+        """
+        Decode a subscription message into typed event records
+
+        Args:
+            xml_str: XML string from WebSocket event
+
+        Returns:
+            SubscriptionEvents with records grouped by event type
+        """
+        events = SubscriptionEvents()
+        if not xml_str:
+            return events
+
+        root = self._parse(xml_str)
+        if root is None:
+            return events
+
+        span_tag = self._span_tag
+        a_tag = self._a_tag
+
+        for li in root.iter(self._li_tag):
+            event_class = li.get('class', '')
+            if not event_class.endswith('-ev'):
+                continue
+
+            # Collect direct child spans and the self link in one pass
+            values: Dict[str, Any] = {}
+            first_text = None
+            has_span = False
+            href = None
+            for child in li:
+                if child.tag == span_tag:
+                    text = child.text
+                    span_class = child.get('class')
+                    if span_class:
+                        values[span_class] = text
+                    if not has_span:
+                        first_text = text
+                        has_span = True
+                elif child.tag == a_tag and child.get('rel') == 'self':
+                    href = child.get('href', '')
+
+            title = li.get('title', '')
+
+            if event_class == 'ios-signalstate-ev':
+                events.records.append(EventRecord('io', event_class, title, values))
+                events.io.append(self._io_event(title, href, values))
+                continue
+
+            for prefix, kind in self.CLASS_PREFIXES:
+                if event_class.startswith(prefix):
+                    break
+            else:
+                continue
+
+            events.records.append(EventRecord(kind, event_class, title, values))
+            middle = event_class[len(prefix):-len('-ev')]
+
+            if kind == 'panel':
+                key = self.PANEL_KEYS.get(middle, middle)
+                value = values.get(middle) if values.get(middle) is not None else first_text
+                if value is not None:
+                    events.panel[key] = value.lower() if key == 'controller_state' else value
+                # Spans named after other panel values (e.g. combined panel events)
+                for span_class, span_text in values.items():
+                    mapped = self.PANEL_KEYS.get(span_class)
+                    if mapped and span_text:
+                        events.panel[mapped] = span_text.lower() if mapped == 'controller_state' else span_text
+            elif has_span:
+                # Same shape as SubscriptionParser: value of the first direct span
+                getattr(events, kind)[middle.replace('-', '_')] = first_text
+
+        return events
+
+    def decode_snapshot(self, resource: str, result: Dict[str, Any]) -> SubscriptionEvents:
+        """
+        Convert a GET response for a subscribed resource into events
+
+        Lets values re-read over HTTP (e.g. after a dropped subscription) go
+        through the same path as subscription events. Each ``state`` entry of
+        the response becomes one record of class ``<_type>-ev``; panel values
+        are mapped like in decode(), other kinds use the state field names.
+
+        Args:
+            resource: Resource path that was read
+            result: Response dictionary from ABBRobotAPI.get()
+
+        Returns:
+            SubscriptionEvents (empty if the read failed)
+        """
+        events = SubscriptionEvents()
+        if not result or result.get('status_code') != 200:
+            return events
+
+        content = result.get('content') or {}
+        for state in content.get('state', []):
+            state_type = state.get('_type', '')
+            values = {key: value for key, value in state.items() if not key.startswith('_')}
+            event_class = f"{state_type}-ev"
+
+            if state_type == 'ios-signalstate':
+                events.records.append(EventRecord('io', event_class, resource, values))
+                events.io.append(self._io_event(resource, resource, values))
+                continue
+
+            for prefix, kind in self.CLASS_PREFIXES:
+                if state_type.startswith(prefix):
+                    break
+            else:
+                continue
+
+            events.records.append(EventRecord(kind, event_class, resource, values))
+            if kind == 'panel':
+                for key, value in values.items():
+                    mapped = self.PANEL_KEYS.get(key)
+                    if mapped and value is not None:
+                        events.panel[mapped] = value.lower() if mapped == 'controller_state' else value
+            else:
+                getattr(events, kind).update(
+                    {key.replace('-', '_'): value for key, value in values.items()})
+
+        return events
+
+    @staticmethod
+    def _io_event(title: str, href: Optional[str], values: Dict[str, Any]) -> Dict[str, Any]:
+        """Build an IO event dictionary matching IOSignalProcessor.parse_io_event_xml"""
+        path_part = title.rsplit('/', 1)[-1]
+        result = {
+            'signal_path': title,
+            'signal_name': path_part.split(';', 1)[0],
+        }
+        if href is not None:
+            result['href'] = href
+        result.update(values)
+        return result
+
+
+class EventCoalescer:
+    """
+    Accumulates decoded subscription events between UI updates
+
+    Only the latest value per resource survives: later panel/RAPID/motion/user/
+    vision values overwrite earlier ones and IO events are keyed by signal name.
+    drain() returns everything collected since the previous drain as a single
+    SubscriptionEvents batch. Not thread-safe; use it from one thread.
+    """
+
+    def __init__(self):
+        self._pending = SubscriptionEvents()
+        self._io: Dict[str, Dict[str, Any]] = {}
+        self._records: Dict[Tuple[str, str], EventRecord] = {}
+
+        # Statistics
+        self.messages = 0
+        self.records_in = 0
+        self.records_out = 0
+        self.batches = 0
+
+    def add(self, events: SubscriptionEvents) -> None:
+        """
+        Merge the events of one message into the pending batch
+
+        Args:
+            events: Decoded events of a single subscription message
+        """
+        self.messages += 1
+        self.records_in += len(events.records)
+        pending = self._pending
+        pending.panel.update(events.panel)
+        pending.rapid.update(events.rapid)
+        pending.motion.update(events.motion)
+        pending.user.update(events.user)
+        pending.vision.update(events.vision)
+        for io_event in events.io:
+            self._io[io_event.get('signal_name') or io_event.get('signal_path', '')] = io_event
+        for record in events.records:
+            self._records[(record.event_class, record.resource)] = record
+
+    def has_pending(self) -> bool:
+        """True if events were added since the last drain"""
+        return bool(self._records)
+
+    def drain(self) -> SubscriptionEvents:
+        """
+        Take the pending batch and start a new one
+
+        Returns:
+            SubscriptionEvents with the latest value per resource
+        """
+        batch = self._pending
+        batch.io = list(self._io.values())
+        batch.records = list(self._records.values())
+        self.records_out += len(batch.records)
+        self.batches += 1
+
+        self._pending = SubscriptionEvents()
+        self._io = {}
+        self._records = {}
+        return batch
+
+    def stats(self) -> Dict[str, int]:
+        """
+        Get coalescing statistics
+
+        Returns:
+            Dictionary with messages, records_in, records_out, coalesced and batches
+        """
+        return {
+            'messages': self.messages,
+            'records_in': self.records_in,
+            'records_out': self.records_out,
+            'coalesced': self.records_in - self.records_out - len(self._records),
+            'batches': self.batches
+        }
+
+
 class SubscriptionManager:
     """
     Centralized manager for subscriptions with initial value gathering
     """
     
-    def __init__(self, api, logger=None):
+    def __init__(self, api, logger=None, shard_size: int = DEFAULT_SUBSCRIPTION_SHARD_SIZE):
         """
         Initialize the Subscription Manager
         
         Args:
             api: The ABB Robot API instance
             logger: Optional logger instance
+            shard_size: Maximum number of resources per RWS subscription
         """
         self.api = api
         self.logger = logger or logging.getLogger('SubscriptionManager')
         self.io_processor = IOSignalProcessor(self.logger)
+        self.shard_size = shard_size
         
         # Store resources to subscribe to
         self.resources = {}
@@ -580,6 +1337,9 @@ class SubscriptionManager:
         
         # Store callbacks for resources
         self.callbacks = {}
+        
+        # Resources added with fetch=False whose initial value is still missing
+        self.unfetched = []
     
     def reset(self):
         """
@@ -588,9 +1348,10 @@ class SubscriptionManager:
         self.resources = {}
         self.initial_values = {}
         self.callbacks = {}
+        self.unfetched = []
         
     def add_resource(self, resource: str, params: Optional[Dict[str, str]] = None, 
-                    callback: Optional[Callable] = None) -> Dict[str, Any]:
+                    callback: Optional[Callable] = None, fetch: bool = True) -> Dict[str, Any]:
         """
         Add a resource to subscribe to and get its initial value
         
@@ -598,33 +1359,40 @@ class SubscriptionManager:
             resource: Resource to subscribe to
             params: Subscription parameters
             callback: Callback function for this resource
+            fetch: If False, only register the resource; its initial value is
+                fetched later by fetch_initial_values()
             
         Returns:
-            Initial value of the resource
+            Initial value of the resource (empty dict if not fetched yet)
         """
         # Set default params if not provided
         if params is None:
             params = {'p': '1'}
-            
-        # Get initial value
-        initial_value = self.api.get(resource)
         
-        # Store resource, initial value, and callback
+        # Store resource and callback
         self.resources[resource] = params
-        self.initial_values[resource] = initial_value
-        
         if callback:
             self.callbacks[resource] = callback
             
+        if not fetch:
+            if resource not in self.initial_values:
+                self.unfetched.append(resource)
+            return self.initial_values.get(resource, {})
+            
+        # Get initial value
+        initial_value = self.api.get(resource)
+        self.initial_values[resource] = initial_value
         return initial_value
     
-    def add_io_signal(self, signal_path: str, callback: Optional[Callable] = None) -> Dict[str, Any]:
+    def add_io_signal(self, signal_path: str, callback: Optional[Callable] = None,
+                     fetch: bool = True) -> Dict[str, Any]:
         """
         Add an IO signal to subscribe to and get its initial value
         
         Args:
             signal_path: Signal path
             callback: Callback function for this signal
+            fetch: If False, defer the initial value (see add_resource)
             
         Returns:
             Initial value of the signal
@@ -633,68 +1401,183 @@ class SubscriptionManager:
         signal_path = self.io_processor.normalize_signal_path(signal_path)
         
         # Get initial value and add resource
-        return self.add_resource(signal_path, {'p': '1'}, callback)
+        return self.add_resource(signal_path, {'p': '1'}, callback, fetch=fetch)
+    
+    def seed_io_initial_values(self, resources: List[Dict[str, Any]]) -> int:
+        """
+        Fill IO signal initial values from a bulk signal listing
+        
+        Signal resources from list_signals() already carry lvalue/lstate, so
+        signals registered with fetch=False do not need a request of their own.
+        
+        Args:
+            resources: Signal resources from ``_embedded.resources`` of list_signals()
+            
+        Returns:
+            Number of initial values filled in
+        """
+        seeded = 0
+        for sig in resources:
+            href = sig.get('_links', {}).get('self', {}).get('href')
+            if not href or 'lvalue' not in sig:
+                continue
+            resource = f"{self.io_processor.normalize_signal_path(href)};state"
+            if resource not in self.resources or resource in self.initial_values:
+                continue
+            self.initial_values[resource] = {
+                'status_code': 200,
+                'content': {
+                    'state': [{
+                        '_type': 'ios-signalstate',
+                        '_title': sig.get('_title', sig.get('name', '')),
+                        'lvalue': sig.get('lvalue'),
+                        'lstate': sig.get('lstate', '')
+                    }]
+                }
+            }
+            seeded += 1
+            
+        if seeded:
+            self.unfetched = [r for r in self.unfetched if r not in self.initial_values]
+        self.logger.info(f"Seeded {seeded} IO initial values from signal listing")
+        return seeded
+    
+    def fetch_initial_values(self, max_workers: int = DEFAULT_FETCH_WORKERS,
+                            progress_callback: Optional[Callable[[int, int, str], None]] = None) -> Dict[str, Dict[str, Any]]:
+        """
+        Fetch the initial values of all deferred resources concurrently
+        
+        Requests share the API's requests.Session through a bounded thread pool.
+        progress_callback(done, total, resource) is called in the calling thread
+        after each completed request.
+        
+        Args:
+            max_workers: Maximum number of concurrent requests
+            progress_callback: Optional progress callback
+            
+        Returns:
+            Dictionary of resource paths to initial values
+        """
+        pending = [r for r in self.unfetched if r not in self.initial_values]
+        self.unfetched = []
+        total = len(pending)
+        if not total:
+            return self.initial_values
+            
+        start_time = time.time()
+        done = 0
+        with ThreadPoolExecutor(max_workers=max(1, min(max_workers, total)),
+                                thread_name_prefix='rws-fetch') as executor:
+            futures = {executor.submit(self.api.get, resource): resource for resource in pending}
+            for future in as_completed(futures):
+                resource = futures[future]
+                try:
+                    self.initial_values[resource] = future.result()
+                except Exception as e:
+                    self.logger.error(f"Error fetching initial value for {resource}: {str(e)}")
+                    self.initial_values[resource] = {'status_code': 500, 'error': str(e)}
+                done += 1
+                if progress_callback:
+                    try:
+                        progress_callback(done, total, resource)
+                    except Exception as e:
+                        self.logger.error(f"Error in progress callback: {str(e)}")
+                        
+        self.logger.info(f"Fetched {total} initial values in {time.time() - start_time:.2f}s "
+                         f"with {max_workers} workers")
+        return self.initial_values
     
     def subscribe_all(self, callback: Optional[Callable] = None) -> str:
         """
-        Subscribe to all collected resources with a single subscription
+        Subscribe to all collected resources
+        
+        Resources are split into shards of at most ``shard_size`` resources,
+        each with its own RWS subscription and WebSocket. All shards deliver
+        their events to the same callback. The returned ID refers to the whole
+        group and can be passed to unsubscribe() and check_subscription_status().
         
         Args:
             callback: Optional callback function to override the router callback
             
         Returns:
-            Subscription ID
+            Subscription group ID ("" if no shard could be created)
         """
         if not self.resources:
             self.logger.warning("No resources to subscribe to")
             return ""
             
         # If a specific callback is provided, use it instead of the router
-        if callback:
-            subscription_id = self.api.subscribe(self.resources, callback)
-        else:
-            # Create a wrapper callback that routes events to individual callbacks
-            def router_callback(xml_str: str) -> None:
-                try:
-                    # Parse XML to determine which resource triggered the event
-                    root = ET.fromstring(xml_str)
-                    
-                    # Extract resource info from event data
-                    for li in root.findall(f".//{NAMESPACE}li"):
-                        # Get the resource path from title attribute or href
-                        resource_path = None
-                        title = li.attrib.get('title', '')
-                        if title:
-                            resource_path = title
-                        else:
-                            # Try to get href from self link
-                            a_self = li.find(f"./{NAMESPACE}a[@rel='self']")
-                            if a_self is not None:
-                                resource_path = a_self.attrib.get('href', '')
-                        
-                        if resource_path:
-                            # Find the matching callback
-                            for res, callback in self.callbacks.items():
-                                # Simple check if resource path contains the resource
-                                # Could be improved for more precise matching
-                                if res in resource_path or resource_path in res:
-                                    if callback:
-                                        # Call the callback with the event data
-                                        callback(xml_str)
-                                    break
-                except Exception as e:
-                    self.logger.error(f"Error in subscription router: {str(e)}")
-            
-            # Subscribe to all resources at once
-            subscription_id = self.api.subscribe(self.resources, router_callback)
+        if not callback:
+            callback = self._router_callback
+        
+        items = list(self.resources.items())
+        shard_size = max(1, self.shard_size)
+        shards = [dict(items[i:i + shard_size]) for i in range(0, len(items), shard_size)]
+        
+        group_id = str(time.time())
+        created = 0
+        for index, shard_resources in enumerate(shards):
+            shard_id = self.api.subscribe(shard_resources, callback, group=group_id, shard=index)
+            if shard_id:
+                created += 1
+            else:
+                self.logger.error(f"Failed to create subscription shard {index + 1}/{len(shards)} "
+                                  f"({len(shard_resources)} resources)")
         
-        if subscription_id:
-            self.logger.info(f"Created subscription {subscription_id} for {len(self.resources)} resources")
-            self.subscription_ids.append(subscription_id)
-        else:
+        if not created:
             self.logger.error("Failed to create subscription")
+            return ""
             
-        return subscription_id
+        self.logger.info(f"Created subscription {group_id} for {len(self.resources)} resources "
+                         f"in {created}/{len(shards)} shards")
+        self.subscription_ids.append(group_id)
+        return group_id
+    
+    def _router_callback(self, xml_str: str) -> None:
+        """Route events to the callbacks registered for individual resources"""
+        try:
+            # Parse XML to determine which resource triggered the event
+            root = ET.fromstring(xml_str)
+            
+            # Extract resource info from event data
+            for li in root.findall(f".//{NAMESPACE}li"):
+                # Get the resource path from title attribute or href
+                resource_path = None
+                title = li.attrib.get('title', '')
+                if title:
+                    resource_path = title
+                else:
+                    # Try to get href from self link
+                    a_self = li.find(f"./{NAMESPACE}a[@rel='self']")
+                    if a_self is not None:
+                        resource_path = a_self.attrib.get('href', '')
+                
+                if resource_path:
+                    # Find the matching callback
+                    for res, callback in self.callbacks.items():
+                        # Simple check if resource path contains the resource
+                        # Could be improved for more precise matching
+                        if res in resource_path or resource_path in res:
+                            if callback:
+                                # Call the callback with the event data
+                                callback(xml_str)
+                            break
+        except Exception as e:
+            self.logger.error(f"Error in subscription router: {str(e)}")
+    
+    def get_shard_health(self) -> Dict[str, Dict[str, Any]]:
+        """
+        Get the health of every shard of the subscriptions created by this manager
+        
+        Returns:
+            Dictionary of shard subscription ID -> status (connected, resource_count,
+            messages_received, seconds_since_last_message, error_count)
+        """
+        health = {}
+        for group_id in self.subscription_ids:
+            status = self.api.check_subscription_status(group_id)
+            health.update(status.get('shards', {}))
+        return health
         
     def get_initial_values(self) -> Dict[str, Dict[str, Any]]:
         """
@@ -724,6 +1607,249 @@ class SubscriptionManager:
         
         return success
 
+class SubscriptionSupervisor:
+    """
+    Re-creates subscriptions whose WebSocket dropped unexpectedly
+
+    Registers itself with ABBRobotAPI.subscription_drop_callbacks. When a
+    WebSocket is lost, a worker thread re-creates the dropped subscriptions
+    with exponential backoff (logging in again only when the controller no
+    longer accepts the session) and then re-reads only the resources of those
+    subscriptions, since those are the only values that may have changed
+    unnoticed. The re-read values
+    are delivered as SubscriptionEvents through ``resync_callbacks``
+    (``callback(events)``, called on the worker thread).
+
+    Metrics: the gap is the time from detecting a drop until the subscription
+    is live again; the reconnect latency additionally includes the re-read,
+    i.e. the time until the client state is consistent again.
+    """
+
+    def __init__(self, api, decoder: Optional[SubscriptionDecoder] = None, logger=None,
+                 initial_delay: float = DEFAULT_RECONNECT_INITIAL_DELAY,
+                 max_delay: float = DEFAULT_RECONNECT_MAX_DELAY,
+                 connect_timeout: float = 10.0,
+                 max_workers: int = DEFAULT_FETCH_WORKERS):
+        """
+        Initialize the Subscription Supervisor
+
+        Args:
+            api: The ABB Robot API instance
+            decoder: Decoder used to convert re-read values into events
+            logger: Optional logger instance
+            initial_delay: Delay before the second reconnect attempt in seconds
+            max_delay: Maximum delay between reconnect attempts in seconds
+            connect_timeout: Seconds to wait for a new WebSocket to connect
+            max_workers: Maximum number of concurrent requests for the re-read
+        """
+        self.api = api
+        self.logger = logger or logging.getLogger('SubscriptionSupervisor')
+        self.decoder = decoder or SubscriptionDecoder(self.logger)
+        self.initial_delay = initial_delay
+        self.max_delay = max_delay
+        self.connect_timeout = connect_timeout
+        self.max_workers = max_workers
+        self.resync_callbacks: List[Callable[[SubscriptionEvents], None]] = []
+
+        self._dropped: Dict[str, Dict[str, Any]] = {}
+        self._cond = threading.Condition()
+        self._running = False
+        self._stopped = False
+        self._thread: Optional[threading.Thread] = None
+        self.state = 'connected'
+
+        # Statistics
+        self.drops = 0
+        self.reconnects = 0
+        self.failed_attempts = 0
+        self.resources_refreshed = 0
+        self.last_gap = 0.0
+        self.max_gap = 0.0
+        self.total_gap = 0.0
+        self.last_latency = 0.0
+        self.max_latency = 0.0
+        self.history = deque(maxlen=50)
+
+        self.api.subscription_drop_callbacks.append(self.on_drop)
+
+    def on_drop(self, subscription_id: str, code: Optional[int], reason: Optional[str]) -> None:
+        """
+        Schedule a reconnect for a dropped subscription (drop callback)
+
+        Args:
+            subscription_id: ID of the dropped subscription
+            code: WebSocket close code, None if the connection failed
+            reason: Close reason or error message
+        """
+        with self._cond:
+            if self._stopped:
+                return
+            if subscription_id not in self._dropped:
+                self.drops += 1
+                self._dropped[subscription_id] = {
+                    'dropped_at': time.monotonic(),
+                    'code': code,
+                    'reason': reason,
+                    'attempts': 0
+                }
+                self.logger.warning(f"Subscription {subscription_id} dropped (code={code}, reason={reason}), "
+                                    f"reconnecting")
+            self.state = 'reconnecting'
+            if not self._running:
+                self._running = True
+                self._thread = threading.Thread(target=self._run, name='SubscriptionSupervisor', daemon=True)
+                self._thread.start()
+            self._cond.notify_all()
+
+    def start(self) -> None:
+        """Allow reconnects again after stop()"""
+        with self._cond:
+            self._stopped = False
+
+    def stop(self, timeout: float = 2.0) -> None:
+        """
+        Stop reconnecting and forget pending drops
+
+        Args:
+            timeout: Seconds to wait for a running attempt to finish
+        """
+        with self._cond:
+            self._stopped = True
+            self._running = False
+            self._dropped.clear()
+            self.state = 'connected'
+            self._cond.notify_all()
+        if self._thread and self._thread is not threading.current_thread():
+            self._thread.join(timeout)
+        self._thread = None
+
+    def pending(self) -> List[str]:
+        """IDs of subscriptions waiting to be reconnected"""
+        with self._cond:
+            return list(self._dropped)
+
+    def stats(self) -> Dict[str, Any]:
+        """
+        Get reconnect metrics
+
+        Returns:
+            Dictionary with state, drops, reconnects, failed_attempts, pending,
+            resources_refreshed and gap/latency figures in seconds
+        """
+        with self._cond:
+            return {
+                'state': self.state,
+                'drops': self.drops,
+                'reconnects': self.reconnects,
+                'failed_attempts': self.failed_attempts,
+                'pending': len(self._dropped),
+                'resources_refreshed': self.resources_refreshed,
+                'last_gap': self.last_gap,
+                'max_gap': self.max_gap,
+                'total_gap': self.total_gap,
+                'last_latency': self.last_latency,
+                'max_latency': self.max_latency
+            }
+
+    def _run(self) -> None:
+        """Worker loop: reconnect dropped subscriptions with exponential backoff"""
+        delay = self.initial_delay
+        while True:
+            with self._cond:
+                while self._running and not self._dropped:
+                    self._cond.wait()
+                if not self._running or self._thread is not threading.current_thread():
+                    return
+                dropped = dict(self._dropped)
+
+            reconnected = []
+            refreshed = False
+            for subscription_id, drop in dropped.items():
+                if subscription_id not in self.api.active_subscriptions:
+                    # Unsubscribed in the meantime
+                    with self._cond:
+                        self._dropped.pop(subscription_id, None)
+                    continue
+                drop['attempts'] += 1
+                # Re-create on the current session; log in again only if the controller dropped it
+                success = self.api.resubscribe(subscription_id, self.connect_timeout)
+                if not success and not refreshed and not self.api.session_valid():
+                    refreshed = True
+                    if not self.api.refresh_session():
+                        self.logger.warning("Could not re-authenticate with the controller")
+                        break
+                    success = self.api.resubscribe(subscription_id, self.connect_timeout)
+                if success:
+                    drop['gap'] = time.monotonic() - drop['dropped_at']
+                    with self._cond:
+                        self._dropped.pop(subscription_id, None)
+                    reconnected.append((subscription_id, drop))
+
+            for subscription_id, drop in reconnected:
+                self._resync(subscription_id, drop)
+
+            with self._cond:
+                if not self._running:
+                    return
+                if self._dropped:
+                    self.failed_attempts += 1
+                    self.logger.warning(f"{len(self._dropped)} subscription(s) still down, "
+                                        f"retrying in {delay:.1f}s")
+                    self._cond.wait(delay)
+                    delay = min(delay * 2, self.max_delay)
+                else:
+                    delay = self.initial_delay
+                    self.state = 'connected'
+
+    def _resync(self, subscription_id: str, drop: Dict[str, Any]) -> None:
+        """Re-read the resources of a re-created subscription and record metrics"""
+        subscription = self.api.active_subscriptions.get(subscription_id)
+        resources = list(subscription['resources']) if subscription else []
+
+        coalescer = EventCoalescer()
+        if resources:
+            with ThreadPoolExecutor(max_workers=max(1, min(self.max_workers, len(resources))),
+                                    thread_name_prefix='rws-resync') as executor:
+                futures = {executor.submit(self.api.get, resource): resource for resource in resources}
+                for future in as_completed(futures):
+                    resource = futures[future]
+                    try:
+                        coalescer.add(self.decoder.decode_snapshot(resource, future.result()))
+                    except Exception as e:
+                        self.logger.error(f"Error re-reading {resource}: {str(e)}")
+
+        if coalescer.has_pending():
+            events = coalescer.drain()
+            for callback in list(self.resync_callbacks):
+                try:
+                    callback(events)
+                except Exception as e:
+                    self.logger.error(f"Error in resync callback: {str(e)}")
+
+        latency = time.monotonic() - drop['dropped_at']
+        gap = drop['gap']
+        with self._cond:
+            self.reconnects += 1
+            self.resources_refreshed += len(resources)
+            self.last_gap = gap
+            self.max_gap = max(self.max_gap, gap)
+            self.total_gap += gap
+            self.last_latency = latency
+            self.max_latency = max(self.max_latency, latency)
+            self.history.append({
+                'subscription_id': subscription_id,
+                'code': drop['code'],
+                'reason': drop['reason'],
+                'attempts': drop['attempts'],
+                'gap': gap,
+                'latency': latency,
+                'resources_refreshed': len(resources),
+                'time': time.time()
+            })
+        self.logger.info(f"Subscription {subscription_id} reconnected after {drop['attempts']} attempt(s): "
+                         f"gap {gap:.2f}s, {len(resources)} resources re-read, latency {latency:.2f}s")
+
+
 class SubscriptionHelper:
     """
     Helper for managing subscriptions and retrieving initial values
@@ -0,0 +1,211 @@
+"""
+Benchmark: EGM loop end to end against the local simulator
+
+Starts egm.simulator.EGMSimulator on localhost and runs an EGM sensor loop
+against it, publishing a stepwise target (a new target every 50 ms, like
+the sliders) into a TargetMailbox. One run per scenario:
+
+    ideal          no loss, no latency, lock-step, min-jerk
+    periodic       as ideal, but sends on a fixed period
+    linear / step  other interpolation profiles
+    loss 2%        2 % packet loss per direction
+    latency 2 ms   2 ms one-way latency plus 1 ms jitter
+
+The report shows, per scenario, the feedback rate, lost / out-of-order
+packets, inter-arrival jitter p99, round trip p50 / p99, convergence p50,
+send period p99 and the largest axis error between the simulated robot and
+the final target.
+
+By default the sensor side is a small client built from the egm package
+(SendScheduler, TargetMailbox, TrajectoryInterpolator, EGMLoopStats) on the
+egm.protocol codec, so only NumPy is needed. --engine runs egm.engine.EGMEngine,
+the engine behind both EGM tabs, instead (needs abb_egm_pyclient).
+
+Usage:
+    python benchmarks/bench_egm_loop.py [--duration S] [--scenario NAME ...] [--engine]
+
+Author: Sunny24
+Date: May 21, 2025
+"""
+
+import argparse
+import os
+import socket
+import sys
+import threading
+import time
+
+# Make the project root importable when run as a script
+project_root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if project_root not in sys.path:
+    sys.path.append(project_root)
+
+import numpy as np
+
+from egm.loop_stats import EGMLoopStats, POSITION_KEYS
+from egm.protocol import decode_robot_message, encode_sensor_message, EGMDecodeError
+from egm.send_scheduler import SendScheduler
+from egm.simulator import EGMSimulator, HOME_POSE
+from egm.target_mailbox import TargetMailbox
+from egm.trajectory import TrajectoryInterpolator, PROFILE_MIN_JERK, PROFILE_LINEAR, PROFILE_STEP
+
+# name: (loss, latency s, jitter s, lockstep, profile)
+SCENARIOS = {
+    'ideal': (0.0, 0.0, 0.0, True, PROFILE_MIN_JERK),
+    'periodic': (0.0, 0.0, 0.0, False, PROFILE_MIN_JERK),
+    'linear': (0.0, 0.0, 0.0, True, PROFILE_LINEAR),
+    'step': (0.0, 0.0, 0.0, True, PROFILE_STEP),
+    'loss 2%': (0.02, 0.0, 0.0, True, PROFILE_MIN_JERK),
+    'latency 2 ms': (0.0, 0.002, 0.001, True, PROFILE_MIN_JERK),
+}
+
+TARGET_PERIOD = 0.05
+TARGET_STEP = np.array([4.0, -2.0, 1.5, 0.5, 0.0, -0.5])
+
+
+class SensorLoop:
+    """Receive / send threads of an EGM sensor, without Qt"""
+
+    def __init__(self, lockstep, profile):
+        self.socket = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+        self.socket.bind(('127.0.0.1', 0))
+        self.socket.settimeout(0.2)
+        self.port = self.socket.getsockname()[1]
+        self.loop_stats = EGMLoopStats()
+        self.scheduler = SendScheduler(lockstep=lockstep, summary_interval=float('inf'))
+        self.target_mailbox = TargetMailbox()
+        self.trajectory = TrajectoryInterpolator(profile)
+        self.controller = None
+        self.last_position = None
+        self.running = False
+
+    def start(self):
+        self.running = True
+        self.threads = [threading.Thread(target=self.receive_loop, daemon=True),
+                        threading.Thread(target=self.send_loop, daemon=True)]
+        for thread in self.threads:
+            thread.start()
+
+    def stop(self):
+        self.running = False
+        self.scheduler.stop()
+        for thread in self.threads:
+            thread.join(timeout=1.0)
+        self.socket.close()
+
+    def receive_loop(self):
+        while self.running:
+            try:
+                data, self.controller = self.socket.recvfrom(1024)
+            except socket.timeout:
+                self.loop_stats.on_error(timeout=True)
+                continue
+            except OSError:
+                break
+            now = time.perf_counter()
+            try:
+                message = decode_robot_message(data)
+            except EGMDecodeError:
+                self.loop_stats.on_error()
+                continue
+            self.last_position = message['feedback']
+            self.loop_stats.on_receive(message['seqno'], message['feedback'], message['convergence_met'], now)
+            self.scheduler.notify_feedback()
+
+    def send_loop(self):
+        scheduler = self.scheduler
+        scheduler.start()
+        target = np.empty(self.target_mailbox.size)
+        seqno = 0
+        while self.running:
+            if not scheduler.wait():
+                break
+            seq, values, _ = self.target_mailbox.read(target)
+            if not seq or self.controller is None:
+                continue
+            if not self.trajectory.active and self.last_position:
+                self.trajectory.reset([self.last_position[key] for key in POSITION_KEYS])
+            setpoint = self.trajectory.update(values)
+            seqno += 1
+            data = encode_sensor_message(seqno, int(time.perf_counter() * 1000),
+                                         dict(zip(POSITION_KEYS, setpoint.tolist())))
+            try:
+                self.socket.sendto(data, self.controller)
+            except OSError:
+                continue
+            self.loop_stats.on_send(values)
+            scheduler.record_send()
+
+
+class EngineLoop:
+    """EGMEngine (the engine behind both EGM tabs) on a free port"""
+
+    def __init__(self, lockstep, profile):
+        from egm.engine import EGMEngine
+
+        probe = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+        probe.bind(('127.0.0.1', 0))
+        self.port = probe.getsockname()[1]
+        probe.close()
+        self.engine = EGMEngine("benchmark")
+        self.engine.configure(self.port, lockstep=lockstep, profile=profile)
+        self.loop_stats = self.engine.loop_stats
+        self.target_mailbox = self.engine.target()
+        self.scheduler = self.engine.send_scheduler
+
+    def start(self):
+        self.engine.start()
+
+    def stop(self):
+        self.engine.stop()
+
+
+def run_scenario(name, args):
+    loss, latency, jitter, lockstep, profile = SCENARIOS[name]
+    loop = (EngineLoop if args.engine else SensorLoop)(lockstep, profile)
+    simulator = EGMSimulator(loop.port, loss=loss, latency=latency, jitter=jitter, seed=1)
+    loop.start()
+    simulator.start()
+
+    # Publish targets like the GUI thread: start at the robot's pose, then step
+    target = np.array([HOME_POSE[key] for key in POSITION_KEYS])
+    started = time.perf_counter()
+    next_target = started
+    while time.perf_counter() - started < args.duration:
+        if time.perf_counter() >= next_target:
+            if time.perf_counter() - started < args.duration * 0.7:  # Hold for the last 30 %
+                target = target + TARGET_STEP
+            loop.target_mailbox.publish(target)
+            next_target += TARGET_PERIOD
+        time.sleep(0.002)
+
+    loop.stop()
+    simulator.stop()
+    pose = simulator.stats()['pose']
+    difference = np.array([pose[key] for key in POSITION_KEYS]) - target
+    difference[3:] = (difference[3:] + 180.0) % 360.0 - 180.0
+    return loop.loop_stats.snapshot(), loop.scheduler.stats(), float(np.max(np.abs(difference)))
+
+
+def main():
+    parser = argparse.ArgumentParser(description="EGM loop against the local EGM simulator")
+    parser.add_argument('--duration', type=float, default=5.0, help='Seconds per scenario (default: 5)')
+    parser.add_argument('--scenario', action='append', choices=list(SCENARIOS),
+                        help='Scenario to run (repeatable, default: all)')
+    parser.add_argument('--engine', action='store_true',
+                        help="Run egm.engine.EGMEngine as the sensor side (needs abb_egm_pyclient)")
+    args = parser.parse_args()
+
+    print(f"{'scenario':<14}{'rate Hz':>8}{'lost':>6}{'ooo':>5}{'jit p99':>9}{'rtt p50':>9}{'rtt p99':>9}"
+          f"{'conv p50':>10}{'send p99':>10}{'error':>8}")
+    for name in args.scenario or list(SCENARIOS):
+        stats, send, error = run_scenario(name, args)
+        print(f"{name:<14}{stats['rate_hz']:>8.0f}{stats['lost']:>6}{stats['out_of_order']:>5}"
+              f"{stats['jitter']['p99_ms']:>7.2f}ms{stats['round_trip']['p50_ms']:>7.2f}ms"
+              f"{stats['round_trip']['p99_ms']:>7.2f}ms{stats['convergence']['p50_ms']:>8.1f}ms"
+              f"{send['period']['p99_ms']:>8.2f}ms{error:>6.2f}mm")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
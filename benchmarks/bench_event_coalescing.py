@@ -0,0 +1,75 @@
+"""
+Benchmark: I/O event storm through SubscriptionDecoder + EventCoalescer
+
+Simulates a few hundred I/O signals toggling several times within one UI
+frame, as SubscriptionDispatcher sees them, and reports how much work is
+done off the GUI thread and how many updates are left for the GUI thread.
+
+Usage:
+    python benchmarks/bench_event_coalescing.py [--signals N] [--toggles N] [--frames N]
+
+Author: Sunny24
+Date: May 21, 2025
+"""
+
+import argparse
+import os
+import sys
+import time
+
+# Make the project root importable when run as a script
+project_root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if project_root not in sys.path:
+    sys.path.append(project_root)
+
+from API.abb_robot_utils import SubscriptionDecoder, EventCoalescer
+
+EVENT_TEMPLATE = (
+    '<?xml version="1.0" encoding="utf-8"?>'
+    '<html xmlns="http://www.w3.org/1999/xhtml"><head><base href="https://192.168.125.1:443/"/></head>'
+    '<body><div class="state"><a href="subscription/4" rel="group"></a><ul>'
+    '<li class="ios-signalstate-ev" title="signals/Local/DRV_1/{name};state">'
+    '<a href="/rw/iosystem/signals/Local/DRV_1/{name};state" rel="self"></a>'
+    '<span class="lvalue">{value}</span><span class="lstate">not simulated</span>'
+    '<span class="quality">good</span></li></ul></div></body></html>'
+)
+
+
+def main():
+    arg_parser = argparse.ArgumentParser(description=__doc__.split('\n\n')[0])
+    arg_parser.add_argument('--signals', type=int, default=400, help='Number of I/O signals')
+    arg_parser.add_argument('--toggles', type=int, default=3, help='Toggles per signal within one frame')
+    arg_parser.add_argument('--frames', type=int, default=20, help='Number of frames to simulate')
+    args = arg_parser.parse_args()
+
+    # One message per signal change, as delivered by the WebSocket
+    frame_messages = [
+        EVENT_TEMPLATE.format(name=f"DO_{i}", value=t % 2)
+        for t in range(args.toggles)
+        for i in range(args.signals)
+    ]
+
+    decoder = SubscriptionDecoder()
+    coalescer = EventCoalescer()
+    gui_updates = 0
+
+    start = time.perf_counter()
+    for _ in range(args.frames):
+        for xml_str in frame_messages:
+            coalescer.add(decoder.decode(xml_str))
+        gui_updates += len(coalescer.drain().io)
+    elapsed = time.perf_counter() - start
+
+    messages = len(frame_messages) * args.frames
+    print(f"messages received:        {messages}")
+    print(f"worker time per frame:    {elapsed / args.frames * 1e3:.1f} ms "
+          f"({elapsed / messages * 1e6:.1f} us/message)")
+    print(f"GUI batches:              {args.frames}")
+    print(f"GUI signal updates:       {gui_updates} "
+          f"({messages / max(gui_updates, 1):.1f}x fewer than messages)")
+    print(f"coalescer stats:          {coalescer.stats()}")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,112 @@
+"""
+Microbenchmark: single-pass SubscriptionDecoder vs. the five-parser path
+
+The legacy path is what ABBRobotControlUI.handle_subscription_data used to do
+for every WebSocket message: SubscriptionParser.parse_event_xml (which parses
+once more in _sanitize_xml), IOSignalProcessor.parse_io_event_xml and the
+RAPID/motion/user parsers, each building its own ElementTree.
+
+Usage:
+    python benchmarks/bench_event_decoder.py [--payload-dir DIR] [--repeat N]
+
+The payload directory holds recorded RWS event messages, one per .xml file.
+
+Author: Sunny24
+Date: May 21, 2025
+"""
+
+import argparse
+import glob
+import logging
+import os
+import sys
+import timeit
+
+# Make the project root importable when run as a script
+project_root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if project_root not in sys.path:
+    sys.path.append(project_root)
+
+from API.abb_robot_utils import IOSignalProcessor, SubscriptionParser, SubscriptionDecoder
+
+DEFAULT_PAYLOAD_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'data', 'rws_events')
+
+
+def load_payloads(payload_dir):
+    """Load recorded event messages as {file name: xml string}"""
+    payloads = {}
+    for path in sorted(glob.glob(os.path.join(payload_dir, '*.xml'))):
+        with open(path, 'r', encoding='utf-8') as f:
+            payloads[os.path.basename(path)] = f.read()
+    return payloads
+
+
+def legacy_decode(parser, processor, xml_str):
+    """The per-message parsing done before SubscriptionDecoder"""
+    return (
+        parser.parse_event_xml(xml_str),
+        processor.parse_io_event_xml(xml_str),
+        parser.parse_rapid_event_xml(xml_str),
+        parser.parse_motion_event_xml(xml_str),
+        parser.parse_user_event_xml(xml_str),
+    )
+
+
+def check_equivalent(decoder, parser, processor, name, xml_str):
+    """Report differences between the decoder and the legacy parsers"""
+    panel, io, rapid, motion, user = legacy_decode(parser, processor, xml_str)
+    events = decoder.decode(xml_str)
+    mismatches = []
+    if events.panel != panel:
+        mismatches.append(f"panel {events.panel} != {panel}")
+    # The legacy IO parser only keeps the last signal of a message
+    if io and (not events.io or events.io[-1] != io):
+        mismatches.append(f"io {events.io[-1:] } != {io}")
+    for kind, legacy in (('rapid', rapid), ('motion', motion), ('user', user)):
+        if getattr(events, kind) != legacy:
+            mismatches.append(f"{kind} {getattr(events, kind)} != {legacy}")
+    for mismatch in mismatches:
+        print(f"  MISMATCH in {name}: {mismatch}")
+    return not mismatches
+
+
+def main():
+    arg_parser = argparse.ArgumentParser(description=__doc__.split('\n\n')[0])
+    arg_parser.add_argument('--payload-dir', default=DEFAULT_PAYLOAD_DIR,
+                            help='Directory with recorded RWS event messages (*.xml)')
+    arg_parser.add_argument('--repeat', type=int, default=2000,
+                            help='Number of decodes per payload')
+    args = arg_parser.parse_args()
+
+    # The legacy parsers log every event at INFO - keep that out of the timing
+    logging.disable(logging.CRITICAL)
+
+    payloads = load_payloads(args.payload_dir)
+    if not payloads:
+        print(f"No *.xml payloads found in {args.payload_dir}")
+        return 1
+
+    parser = SubscriptionParser()
+    processor = IOSignalProcessor()
+    decoder = SubscriptionDecoder()
+
+    print(f"{'payload':<28}{'legacy us':>12}{'decoder us':>12}{'speedup':>10}")
+    total_legacy = total_decoder = 0.0
+    all_equivalent = True
+    for name, xml_str in payloads.items():
+        all_equivalent &= check_equivalent(decoder, parser, processor, name, xml_str)
+        legacy = timeit.timeit(lambda: legacy_decode(parser, processor, xml_str), number=args.repeat)
+        single = timeit.timeit(lambda: decoder.decode(xml_str), number=args.repeat)
+        total_legacy += legacy
+        total_decoder += single
+        print(f"{name:<28}{legacy / args.repeat * 1e6:>12.1f}{single / args.repeat * 1e6:>12.1f}"
+              f"{legacy / single:>9.1f}x")
+
+    print(f"{'total':<28}{total_legacy / args.repeat * 1e6:>12.1f}{total_decoder / args.repeat * 1e6:>12.1f}"
+          f"{total_legacy / total_decoder:>9.1f}x")
+    print("Outputs equivalent" if all_equivalent else "Outputs differ (see above)")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,163 @@
+"""
+Benchmark: HandDetector full-frame detection vs. region-of-interest tracking
+
+Runs every frame of a recorded video through HandDetector once per mode and
+reports throughput (frames per second, mean/p95 time per frame), how many
+frames had a hand, and in tracking mode how many frames were processed on the
+crop, on the full frame, and how often the hand was lost.
+
+Usage:
+    python benchmarks/bench_hand_tracking.py VIDEO [--max-frames N]
+        [--max-num-hands N] [--model-complexity 0|1] [--static-image-mode]
+        [--inference-width N] [--fps N]
+
+VIDEO is any file OpenCV can read (e.g. an MP4 recorded with the cell camera).
+A third run feeds the full-frame results to GestureStateMachine with adaptive
+frame skipping and reports the inference time saved and the latency added
+to confirmed gesture changes (frames are timed at --fps).
+
+Frames are decoded into memory first so decoding is not measured. Compare
+--inference-width 0 (full resolution) with the default 640 to see the cost of
+a high-resolution preview.
+
+Author: Sunny24
+Date: May 21, 2025
+"""
+
+import argparse
+import os
+import sys
+import time
+
+# Make the project root importable when run as a script
+project_root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if project_root not in sys.path:
+    sys.path.append(project_root)
+
+import cv2
+import numpy as np
+
+from vision.hand_detector import HandDetector, DEFAULT_INFERENCE_WIDTH, is_fist, pinch_distance
+from vision.gesture_state import GestureStateMachine
+
+
+def load_frames(path, max_frames):
+    """Decode up to max_frames frames of a video (mirrored like the camera view)"""
+    capture = cv2.VideoCapture(path)
+    if not capture.isOpened():
+        raise SystemExit(f"Cannot open video: {path}")
+    frames = []
+    while not max_frames or len(frames) < max_frames:
+        ok, frame = capture.read()
+        if not ok:
+            break
+        frames.append(cv2.flip(frame, 1))
+    capture.release()
+    return frames
+
+
+def run_mode(frames, tracking_mode, args):
+    """Run all frames through a fresh detector and return the measurements"""
+    detector = HandDetector(
+        max_num_hands=args.max_num_hands,
+        model_complexity=args.model_complexity,
+        static_image_mode=args.static_image_mode,
+        tracking_mode=tracking_mode,
+        inference_width=args.inference_width or None
+    )
+    times = []
+    with_hand = 0
+    for frame in frames:
+        frame = frame.copy()  # findHands draws on the frame
+        start = time.perf_counter()
+        _, hand_lms = detector.findHands(frame)
+        times.append(time.perf_counter() - start)
+        if len(hand_lms):
+            with_hand += 1
+    times = np.array(times)
+    return {
+        'fps': len(times) / times.sum(),
+        'mean_ms': times.mean() * 1e3,
+        'p95_ms': np.percentile(times, 95) * 1e3,
+        'with_hand': with_hand,
+        'stats': detector.tracking_stats
+    }
+
+
+def run_gestures(frames, adaptive, args):
+    """Confirmed gesture per frame with or without adaptive skipping, plus state machine stats"""
+    detector = HandDetector(
+        max_num_hands=args.max_num_hands,
+        model_complexity=args.model_complexity,
+        static_image_mode=args.static_image_mode,
+        inference_width=args.inference_width or None
+    )
+    gesture_state = GestureStateMachine(max_skip=3 if adaptive else 1)
+    confirmed = []
+    busy = 0.0
+    for i, frame in enumerate(frames):
+        timestamp = i / args.fps
+        if gesture_state.should_infer(timestamp):
+            start = time.perf_counter()
+            _, hand_lms = detector.findHands(frame.copy(), draw=False)
+            pinch = float(pinch_distance(hand_lms, 4, 8)[0]) if len(hand_lms) else None
+            elapsed = time.perf_counter() - start
+            busy += elapsed
+            gesture_state.update(detector.count_finger(hand_lms), pinch, is_fist(hand_lms), timestamp, elapsed)
+        confirmed.append(gesture_state.gesture)
+    return confirmed, busy, gesture_state.stats()
+
+
+def change_frames(confirmed):
+    """Frame indices where the confirmed gesture changes"""
+    return [i for i in range(1, len(confirmed)) if confirmed[i] != confirmed[i - 1]]
+
+
+def main():
+    arg_parser = argparse.ArgumentParser(description=__doc__.split('\n\n')[0])
+    arg_parser.add_argument('video', help='Recorded video file')
+    arg_parser.add_argument('--max-frames', type=int, default=0, help='Limit the number of frames (0 = all)')
+    arg_parser.add_argument('--max-num-hands', type=int, default=2, help='MediaPipe max_num_hands')
+    arg_parser.add_argument('--model-complexity', type=int, default=1, choices=[0, 1], help='MediaPipe model_complexity')
+    arg_parser.add_argument('--static-image-mode', action='store_true', help='MediaPipe static_image_mode')
+    arg_parser.add_argument('--fps', type=float, default=30.0, help='Frame rate used for timestamps in the skipping run')
+    arg_parser.add_argument('--inference-width', type=int, default=DEFAULT_INFERENCE_WIDTH,
+                            help='Downscale wider images to this width before MediaPipe (0 = full resolution)')
+    args = arg_parser.parse_args()
+
+    frames = load_frames(args.video, args.max_frames)
+    if not frames:
+        raise SystemExit("No frames decoded")
+    h, w, _ = frames[0].shape
+
+    full = run_mode(frames, False, args)
+    roi = run_mode(frames, True, args)
+
+    print(f"{len(frames)} frames {w}x{h}, max_num_hands={args.max_num_hands}, "
+          f"model_complexity={args.model_complexity}, static_image_mode={args.static_image_mode}, "
+          f"inference_width={args.inference_width or 'full'}\n")
+    print(f"{'':<22}{'full frame':>14}{'ROI tracking':>14}")
+    print(f"{'throughput (fps)':<22}{full['fps']:>14.1f}{roi['fps']:>14.1f}")
+    print(f"{'mean per frame (ms)':<22}{full['mean_ms']:>14.2f}{roi['mean_ms']:>14.2f}")
+    print(f"{'p95 per frame (ms)':<22}{full['p95_ms']:>14.2f}{roi['p95_ms']:>14.2f}")
+    print(f"{'frames with a hand':<22}{full['with_hand']:>14}{roi['with_hand']:>14}")
+    stats = roi['stats']
+    print(f"\nROI tracking: {stats['roi_frames']} crop frames, {stats['full_frames']} full frames, "
+          f"hand lost {stats['lost']} times")
+
+    # Adaptive frame skipping against inference on every frame
+    every_frame, busy_all, _ = run_gestures(frames, False, args)
+    skipping, busy_skip, skip_stats = run_gestures(frames, True, args)
+    reference, delayed = change_frames(every_frame), change_frames(skipping)
+    delays = [min((d - r for d in delayed if d >= r), default=0) for r in reference]
+    print(f"\nAdaptive skipping: inference on {skip_stats['inferred']}/{skip_stats['frames']} frames "
+          f"({skip_stats['savings']:.0%} skipped), inference time {busy_all:.2f} s -> {busy_skip:.2f} s")
+    print(f"confirmed changes: {len(reference)} every frame, {len(delayed)} with skipping; "
+          f"added delay mean {np.mean(delays) if delays else 0:.2f} frames, max {max(delays, default=0)} frames "
+          f"(state machine estimate {skip_stats['added_latency_ms']:.0f} ms mean, "
+          f"{skip_stats['added_latency_max_ms']:.0f} ms max)")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,159 @@
+"""
+Benchmark: in-process HandDetector vs. ProcessHandDetector
+
+Runs hand detection continuously in a worker thread, as the camera pipeline
+does, while two other threads stand in for the rest of the application:
+
+- a GUI tick every 16 ms doing a little Python work (timer lateness shows
+  how responsive the Qt event loop would be)
+- an EGM-style sender sending a UDP packet to localhost every 4 ms
+  (send period jitter)
+
+Each mode runs for --duration seconds; the report shows detection
+throughput, GUI tick lateness and EGM period jitter (mean / p95 / max).
+
+Usage:
+    python benchmarks/bench_process_detector.py [VIDEO] [--duration S]
+        [--resolution WxH] [--egm-period MS]
+
+Without VIDEO, random frames of --resolution are used (no hands are found,
+but palm detection still runs on every frame).
+
+Author: Sunny24
+Date: May 21, 2025
+"""
+
+import argparse
+import os
+import socket
+import sys
+import threading
+import time
+
+# Make the project root importable when run as a script
+project_root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if project_root not in sys.path:
+    sys.path.append(project_root)
+
+import cv2
+import numpy as np
+
+from vision.hand_detector import HandDetector
+from vision.process_detector import ProcessHandDetector
+
+
+def load_frames(path, resolution, count=120):
+    """Frames from a video file, or random frames of the given (width, height)"""
+    if not path:
+        width, height = resolution
+        rng = np.random.default_rng(0)
+        return [rng.integers(0, 255, (height, width, 3), dtype=np.uint8) for _ in range(8)]
+    capture = cv2.VideoCapture(path)
+    frames = []
+    while len(frames) < count:
+        ok, frame = capture.read()
+        if not ok:
+            break
+        frames.append(frame)
+    capture.release()
+    if not frames:
+        raise SystemExit(f"Cannot read frames from {path}")
+    return frames
+
+
+def gui_ticks(stop, lateness, period=0.016):
+    """Fixed-rate tick with a little Python work, like a Qt timer slot"""
+    next_tick = time.perf_counter() + period
+    while not stop.is_set():
+        delay = next_tick - time.perf_counter()
+        if delay > 0:
+            time.sleep(delay)
+        lateness.append(time.perf_counter() - next_tick)
+        sum(i * i for i in range(2000))  # Slot work
+        next_tick += period
+
+
+def egm_sender(stop, periods, period):
+    """Send a small UDP packet every period seconds and record the actual periods"""
+    sock = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+    target = ('127.0.0.1', 9)  # Discard port; nothing needs to listen
+    payload = bytes(64)
+    last = None
+    next_send = time.perf_counter()
+    while not stop.is_set():
+        delay = next_send - time.perf_counter()
+        if delay > 0:
+            time.sleep(delay)
+        now = time.perf_counter()
+        try:
+            sock.sendto(payload, target)
+        except OSError:
+            pass
+        if last is not None:
+            periods.append(now - last)
+        last = now
+        next_send += period
+    sock.close()
+
+
+def run_mode(detector, frames, args):
+    """Run detection plus the GUI/EGM threads for args.duration seconds"""
+    stop = threading.Event()
+    lateness, periods = [], []
+    detections = [0]
+
+    def detect():
+        i = 0
+        while not stop.is_set():
+            detector.findHands(frames[i % len(frames)].copy(), draw=False)
+            detections[0] += 1
+            i += 1
+
+    threads = [
+        threading.Thread(target=detect, daemon=True),
+        threading.Thread(target=gui_ticks, args=(stop, lateness), daemon=True),
+        threading.Thread(target=egm_sender, args=(stop, periods, args.egm_period / 1000.0), daemon=True)
+    ]
+    for thread in threads:
+        thread.start()
+    time.sleep(args.duration)
+    stop.set()
+    for thread in threads:
+        thread.join(5.0)
+
+    lateness = np.array(lateness) * 1e3
+    jitter = np.abs(np.array(periods) - args.egm_period / 1000.0) * 1e3
+    return {
+        'fps': detections[0] / args.duration,
+        'gui': (lateness.mean(), np.percentile(lateness, 95), lateness.max()),
+        'egm': (jitter.mean(), np.percentile(jitter, 95), jitter.max())
+    }
+
+
+def main():
+    arg_parser = argparse.ArgumentParser(description=__doc__.split('\n\n')[0])
+    arg_parser.add_argument('video', nargs='?', help='Recorded video file (default: random frames)')
+    arg_parser.add_argument('--duration', type=float, default=10.0, help='Seconds per mode')
+    arg_parser.add_argument('--resolution', default='1280x720', help='Random frame size WxH')
+    arg_parser.add_argument('--egm-period', type=float, default=4.0, help='EGM send period in ms')
+    args = arg_parser.parse_args()
+
+    resolution = tuple(int(x) for x in args.resolution.split('x'))
+    frames = load_frames(args.video, resolution)
+    h, w, _ = frames[0].shape
+
+    in_process = run_mode(HandDetector(), frames, args)
+    with ProcessHandDetector(max_frame_shape=frames[0].shape) as detector:
+        separate = run_mode(detector, frames, args)
+
+    print(f"{len(frames)} frames {w}x{h}, {args.duration:.0f} s per mode, EGM period {args.egm_period} ms\n")
+    print(f"{'':<30}{'in-process':>16}{'separate process':>18}")
+    print(f"{'detection (fps)':<30}{in_process['fps']:>16.1f}{separate['fps']:>18.1f}")
+    for key, label in (('gui', 'GUI tick lateness (ms)'), ('egm', 'EGM period jitter (ms)')):
+        for i, stat in enumerate(('mean', 'p95', 'max')):
+            print(f"{label + ' ' + stat:<30}{in_process[key][i]:>16.2f}{separate[key][i]:>18.2f}")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
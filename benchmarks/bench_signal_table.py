@@ -0,0 +1,155 @@
+"""
+Benchmark: I/O signal table with N synthetic signals
+
+Compares the former QTableWidget population of IOTab (four QTableWidgetItems
+per signal, colours set cell by cell, linear scan per update) with
+SignalTableModel (column store, cells produced on demand) behind a QTableView.
+Reports population time, Python memory allocated, value update cost and
+incremental filtering while a search text is typed.
+
+Usage:
+    python benchmarks/bench_signal_table.py [--signals N] [--updates N]
+
+Runs with the offscreen Qt platform unless QT_QPA_PLATFORM is set.
+
+Author: Sunny24
+Date: May 21, 2025
+"""
+
+import argparse
+import os
+import random
+import sys
+import time
+import tracemalloc
+
+# Make the project root importable when run as a script
+project_root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if project_root not in sys.path:
+    sys.path.append(project_root)
+
+os.environ.setdefault('QT_QPA_PLATFORM', 'offscreen')
+
+from PyQt5.QtWidgets import QApplication, QTableWidget, QTableWidgetItem, QTableView
+from PyQt5.QtGui import QColor
+
+from ui.widgets.signal_table_model import SignalTableModel
+
+SIGNAL_TYPES = ['DI', 'DO', 'AI', 'AO', 'GI', 'GO']
+
+
+def make_signals(count):
+    """Synthetic signal resources shaped like list_signals() output"""
+    signals = []
+    for i in range(count):
+        signal_type = SIGNAL_TYPES[i % len(SIGNAL_TYPES)]
+        name = f"{signal_type}_{i}"
+        signals.append({
+            'name': name,
+            'type': signal_type,
+            'lvalue': str(i % 2),
+            'lstate': 'not simulated',
+            '_links': {'self': {'href': f"/rw/iosystem/signals/Local/DRV_1/{name}"}}
+        })
+    return signals
+
+
+def populate_table_widget(table, signals):
+    """The former IOTab.populate_signal_table"""
+    table.setRowCount(len(signals))
+    for i, signal in enumerate(signals):
+        signal_type = signal.get('type', 'Unknown')
+        value = signal.get('lvalue', 'Unknown')
+        value_item = QTableWidgetItem(value)
+        table.setItem(i, 0, QTableWidgetItem(signal.get('name', 'Unknown')))
+        table.setItem(i, 1, QTableWidgetItem(signal_type))
+        table.setItem(i, 2, value_item)
+        table.setItem(i, 3, QTableWidgetItem(signal.get('lstate', 'Unknown')))
+        if signal_type in ['DI', 'DO', 'GI', 'GO']:
+            value_item.setBackground(QColor('#A3FFA3') if value == '1' else QColor('#FFA3A3'))
+
+
+def update_table_widget(table, name, value):
+    """The former IOTab.update_signal_value lookup (without its debug prints)"""
+    for row in range(table.rowCount()):
+        name_item = table.item(row, 0)
+        if name_item and name_item.text().strip() == name.strip():
+            table.item(row, 2).setText(value)
+            return
+
+
+def filter_table_widget(table, search_text):
+    """The former IOTab.filter_table, name filter only"""
+    for row in range(table.rowCount()):
+        name_item = table.item(row, 0)
+        table.setRowHidden(row, bool(search_text) and search_text not in name_item.text().lower())
+
+
+def measure(func):
+    """Run func, return (seconds, peak Python allocation in MB)"""
+    tracemalloc.start()
+    start = time.perf_counter()
+    func()
+    elapsed = time.perf_counter() - start
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    return elapsed, peak / 1e6
+
+
+def main():
+    arg_parser = argparse.ArgumentParser(description=__doc__.split('\n\n')[0])
+    arg_parser.add_argument('--signals', type=int, default=10000, help='Number of synthetic signals')
+    arg_parser.add_argument('--updates', type=int, default=500, help='Number of value updates')
+    args = arg_parser.parse_args()
+
+    app = QApplication.instance() or QApplication(sys.argv)
+    signals = make_signals(args.signals)
+    update_names = [random.choice(signals)['name'] for _ in range(args.updates)]
+    typed = ['d', 'do', 'do_', 'do_1', 'do_12']
+
+    # Former implementation
+    table = QTableWidget(0, 4)
+    table.show()
+    widget_populate, widget_mem = measure(lambda: (populate_table_widget(table, signals), app.processEvents()))
+    start = time.perf_counter()
+    for i, name in enumerate(update_names):
+        update_table_widget(table, name, str(i % 2))
+    widget_update = (time.perf_counter() - start) / args.updates
+    start = time.perf_counter()
+    for text in typed:
+        filter_table_widget(table, text)
+        app.processEvents()
+    widget_filter = time.perf_counter() - start
+    table.close()
+
+    # Model/view implementation
+    model = SignalTableModel()
+    view = QTableView()
+    view.setModel(model)
+    view.show()
+    model_populate, model_mem = measure(lambda: (model.set_signals(signals), app.processEvents()))
+    start = time.perf_counter()
+    for i, name in enumerate(update_names):
+        model.set_value(model.row_of(name), str(i % 2))
+    model_update = (time.perf_counter() - start) / args.updates
+    start = time.perf_counter()
+    for text in typed:
+        model.set_filters(text, 'All')
+        app.processEvents()
+    model_filter = time.perf_counter() - start
+    visible = model.visible_count()
+    view.close()
+
+    print(f"{args.signals} signals, {args.updates} updates, typing {typed[-1]!r}\n")
+    print(f"{'':<22}{'QTableWidget':>14}{'model/view':>14}")
+    print(f"{'populate (ms)':<22}{widget_populate * 1e3:>14.1f}{model_populate * 1e3:>14.1f}")
+    print(f"{'Python memory (MB)':<22}{widget_mem:>14.2f}{model_mem:>14.2f}")
+    print(f"{'update (us)':<22}{widget_update * 1e6:>14.1f}{model_update * 1e6:>14.1f}")
+    print(f"{'filter typing (ms)':<22}{widget_filter * 1e3:>14.1f}{model_filter * 1e3:>14.1f}")
+    print(f"\nrows passing filter: {visible}")
+    print("(Python memory does not include the C++ QTableWidgetItems of the former table)")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
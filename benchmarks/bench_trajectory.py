@@ -0,0 +1,112 @@
+"""
+Benchmark: EGM target interpolation profiles
+
+Replays a stepwise target, as the sliders or the ESP32 wrist estimate
+produce it (a new target every --target-period ms, with noise), through
+TrajectoryInterpolator at the EGM rate for each profile. The report shows,
+per profile, the peak setpoint velocity / acceleration / jerk relative to
+the per-axis limits, the tracking lag behind the target, and the cost of
+update() per send and of a replan.
+
+Usage:
+    python benchmarks/bench_trajectory.py [--duration S] [--target-period MS]
+        [--step MM] [--noise MM]
+
+Author: Sunny24
+Date: May 21, 2025
+"""
+
+import argparse
+import os
+import sys
+import time
+
+# Make the project root importable when run as a script
+project_root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if project_root not in sys.path:
+    sys.path.append(project_root)
+
+import numpy as np
+
+from egm.loop_stats import DEFAULT_EGM_PERIOD
+from egm.trajectory import (TrajectoryInterpolator, PROFILES, DEFAULT_MAX_VELOCITY,
+                            DEFAULT_MAX_ACCELERATION, ANGLE_AXES)
+
+HOME = np.array([600.0, 0.0, 800.0, 180.0, 0.0, 90.0])
+
+
+def target_stream(args, count):
+    """Target per EGM tick: held for target_period, then a step plus noise"""
+    rng = np.random.default_rng(0)
+    hold = max(1, int(round(args.target_period / 1000.0 / DEFAULT_EGM_PERIOD)))
+    step = np.array([args.step, -args.step / 2, args.step / 3, 1.0, 0.5, -0.5])
+    targets = np.empty((count, 6))
+    target = HOME.copy()
+    for i in range(count):
+        if i % hold == 0 and i < count * 3 // 4:  # Stop moving for the last quarter
+            target = target + step + rng.normal(0.0, args.noise, 6) * [1, 1, 1, 0.1, 0.1, 0.1]
+        targets[i] = target
+    return targets
+
+
+def derivatives(setpoints, period):
+    """Velocity, acceleration and jerk of the sampled setpoints (angle steps unwrapped)"""
+    steps = np.diff(setpoints, axis=0)
+    steps[:, ANGLE_AXES] = (steps[:, ANGLE_AXES] + 180.0) % 360.0 - 180.0
+    velocity = steps / period
+    acceleration = np.diff(velocity, axis=0) / period
+    jerk = np.diff(acceleration, axis=0) / period
+    return velocity, acceleration, jerk
+
+
+def run_profile(profile, targets, period):
+    interpolator = TrajectoryInterpolator(profile)
+    interpolator.reset(targets[0], now=0.0)
+    setpoints = np.empty_like(targets)
+    started = time.perf_counter()
+    for i, target in enumerate(targets):
+        setpoints[i] = interpolator.update(target, now=i * period)
+    update_cost = (time.perf_counter() - started) / len(targets)
+
+    replans = 200
+    started = time.perf_counter()
+    for i in range(replans):
+        interpolator.set_target(targets[(i * 37) % len(targets)], now=len(targets) * period + i * period)
+    replan_cost = (time.perf_counter() - started) / replans
+    return setpoints, update_cost, replan_cost
+
+
+def main():
+    parser = argparse.ArgumentParser(description="EGM trajectory interpolation profiles")
+    parser.add_argument('--duration', type=float, default=10.0, help='Simulated seconds (default: 10)')
+    parser.add_argument('--target-period', type=float, default=50.0, help='Time between target changes in ms (default: 50)')
+    parser.add_argument('--step', type=float, default=5.0, help='Target step in mm (default: 5)')
+    parser.add_argument('--noise', type=float, default=1.0, help='Target noise in mm (default: 1)')
+    args = parser.parse_args()
+
+    period = DEFAULT_EGM_PERIOD
+    count = int(args.duration / period)
+    targets = target_stream(args, count)
+    max_velocity = np.array(DEFAULT_MAX_VELOCITY)
+    max_acceleration = np.array(DEFAULT_MAX_ACCELERATION)
+
+    print(f"{count} sends at {1 / period:.0f} Hz, target change every {args.target_period:g} ms\n")
+    print(f"{'profile':<10}{'v/vmax':>9}{'a/amax':>11}{'jerk max':>12}{'lag p50':>10}{'lag max':>10}"
+          f"{'update us':>11}{'replan us':>11}")
+    for profile in PROFILES:
+        setpoints, update_cost, replan_cost = run_profile(profile, targets, period)
+        velocity, acceleration, jerk = derivatives(setpoints, period)
+        lag = np.linalg.norm(targets[:, :3] - setpoints[:, :3], axis=1)
+        print(f"{profile:<10}"
+              f"{np.max(np.abs(velocity) / max_velocity):>9.2f}"
+              f"{np.max(np.abs(acceleration) / max_acceleration):>11.2f}"
+              f"{np.max(np.abs(jerk[:, :3])):>12.3g}"
+              f"{np.percentile(lag, 50):>8.2f}mm"
+              f"{lag.max():>8.2f}mm"
+              f"{update_cost * 1e6:>11.1f}"
+              f"{replan_cost * 1e6:>11.1f}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,16 @@
+"""
+EGM package for ABB Robot Control.
+Contains the non-Qt parts of Externally Guided Motion: loop instrumentation,
+send pacing, the target mailbox, trajectory interpolation, the EGM message
+codec and (in egm.simulator) a controller simulator.
+"""
+
+from .loop_stats import LatencyHistogram, EGMLoopStats, DEFAULT_EGM_PERIOD
+from .send_scheduler import SendScheduler, DEFAULT_SEND_RATE
+from .target_mailbox import TargetMailbox
+from .trajectory import TrajectoryInterpolator, PROFILES, resample
+from .protocol import encode_robot_message, decode_robot_message, encode_sensor_message, decode_sensor_message
+
+__all__ = ["LatencyHistogram", "EGMLoopStats", "DEFAULT_EGM_PERIOD", "SendScheduler", "DEFAULT_SEND_RATE",
+           "TargetMailbox", "TrajectoryInterpolator", "PROFILES", "resample",
+           "encode_robot_message", "decode_robot_message", "encode_sensor_message", "decode_sensor_message"]
@@ -0,0 +1,510 @@
+"""
+EGM session engine
+
+EGMEngine runs one Externally Guided Motion session without Qt: it binds
+the UDP port, waits for the controller, then runs a receive thread
+(feedback, loop statistics) and a send thread (newest target from a
+TargetMailbox, smoothed by TrajectoryInterpolator, paced by SendScheduler).
+Receive timeout, socket buffer size, send rate, lock-step and the motion
+profile are all set through configure().
+
+Only one engine in the process may use a port at a time: start() raises
+EGMPortInUseError while another engine holds it, so two tabs cannot split
+the controller's packets between them.
+
+Events are reported through optional callbacks, called on the engine's
+threads (rws_io.egm_worker.EGMWorker re-emits them as Qt signals):
+on_position(dict), on_status(str), on_error(str), on_connected(bool) and
+on_debug(str).
+
+Author: Sunny24
+Date: May 21, 2025
+"""
+
+import logging
+import socket
+import threading
+import time
+import traceback
+
+import numpy as np
+
+from abb_egm_pyclient.egm_client import EGMClient
+from abb_egm_pyclient import DEFAULT_UDP_PORT
+from abb_egm_pyclient.atomic_counter import AtomicCounter
+
+from .loop_stats import EGMLoopStats, POSITION_KEYS
+from .send_scheduler import SendScheduler, DEFAULT_SEND_RATE
+from .target_mailbox import TargetMailbox
+from .trajectory import TrajectoryInterpolator, PROFILE_MIN_JERK
+
+DEFAULT_RECEIVE_TIMEOUT = 0.5      # s; lets the receive thread notice stop() and count silent periods
+DEFAULT_RECEIVE_BUFFER = 16 * 1024  # bytes; ~50 feedback packets, so a stalled reader does not act on stale ones
+DEFAULT_SOURCE = "SLIDERS"
+
+_port_lock = threading.Lock()
+_port_owners = {}
+
+
+class EGMPortInUseError(RuntimeError):
+    """Raised by EGMEngine.start() when another engine already uses the port"""
+
+
+def port_owner(port):
+    """Name of the engine currently using port, or None"""
+    with _port_lock:
+        engine = _port_owners.get(port)
+        return engine.name if engine else None
+
+
+class EGMEngine:
+    """
+    One EGM session on a UDP port
+
+    Args:
+        name: Name shown in messages (e.g. the tab using the engine)
+        logger: Optional logger instance
+    """
+
+    def __init__(self, name="EGM", logger=None):
+        self.name = name
+        self.logger = logger or logging.getLogger('EGMEngine')
+        self.port = DEFAULT_UDP_PORT
+        self.receive_timeout = DEFAULT_RECEIVE_TIMEOUT
+        self.receive_buffer = DEFAULT_RECEIVE_BUFFER
+        self.running = False
+        self.egm_client = None
+        self.socket = None
+        self.last_position = None  # Latest feedback position (dict)
+
+        # Event callbacks (called on the engine's threads)
+        self.on_position = None
+        self.on_status = None
+        self.on_error = None
+        self.on_connected = None
+        self.on_debug = None
+
+        # Receive timing, packet loss and convergence
+        self.loop_stats = EGMLoopStats()
+
+        # Send pacing: lock-step with the controller's feedback, up to its 4 ms cycle
+        self.send_scheduler = SendScheduler(DEFAULT_SEND_RATE, lockstep=True, logger=self.logger)
+
+        # Target mailboxes by source ("SLIDERS", "ESP32", ...): the GUI thread publishes, the sender reads
+        self._targets = {}
+        self.source = DEFAULT_SOURCE
+        self.target(DEFAULT_SOURCE)
+
+        # Smooths target steps into setpoints at the send rate (sender thread only)
+        self.trajectory = TrajectoryInterpolator()
+
+        self._thread = None
+        self._claimed_port = None
+        # Incremented by every start(); a session thread only touches the shared
+        # state (socket, client, running, port claim) while its id is current
+        self._session_id = 0
+        self._session_lock = threading.Lock()
+
+    def configure(self, port, send_rate=DEFAULT_SEND_RATE, lockstep=True, profile=PROFILE_MIN_JERK,
+                  receive_timeout=DEFAULT_RECEIVE_TIMEOUT, receive_buffer=DEFAULT_RECEIVE_BUFFER):
+        """
+        Session settings (take effect at the next start())
+
+        Args:
+            port: UDP port to listen on
+            send_rate: Target planned frame rate in Hz (at most 250)
+            lockstep: Reply to each feedback packet instead of a fixed period
+            profile: Interpolation of target changes (see egm.trajectory.PROFILES)
+            receive_timeout: Socket timeout in seconds
+            receive_buffer: SO_RCVBUF in bytes (None keeps the OS default)
+        """
+        self.port = port
+        self.send_scheduler.configure(send_rate, lockstep)
+        self.trajectory.configure(profile)
+        self.receive_timeout = receive_timeout
+        self.receive_buffer = receive_buffer
+
+    def target(self, source=DEFAULT_SOURCE):
+        """Target mailbox of a source, created on first use (call from the GUI thread)"""
+        mailbox = self._targets.get(source)
+        if mailbox is None:
+            mailbox = self._targets[source] = TargetMailbox()
+        return mailbox
+
+    def set_source(self, source):
+        """Send the targets of this source from now on"""
+        self.target(source)
+        self.source = source
+        self._debug(f"Control mode changed to: {source}")
+
+    def start(self):
+        """
+        Claim the port and start the session thread
+
+        Raises:
+            EGMPortInUseError: If another engine is using the port
+        """
+        if self.running:
+            return
+        if self._thread is not None and self._thread.is_alive():
+            self._thread.join(2.0)  # Previous session still closing its socket
+        with _port_lock:
+            owner = _port_owners.get(self.port)
+            if owner is not None and owner is not self:
+                raise EGMPortInUseError(f"UDP port {self.port} is already used by {owner.name}; stop EGM there first")
+            _port_owners[self.port] = self
+        with self._session_lock:
+            # A previous session thread that is still closing no longer owns anything
+            self._session_id += 1
+            self._claimed_port = self.port
+            self.socket = None
+            self.egm_client = None
+            self.running = True
+        self._thread = threading.Thread(target=self._run, args=(self._session_id,),
+                                        name=f"EGM-{self.name}", daemon=True)
+        self._thread.start()
+
+    def stop(self, timeout=2.0):
+        """Stop the session and release the port"""
+        self._debug("Stopping EGM worker thread")
+        self.running = False
+        self.send_scheduler.stop()  # Wake the sender
+
+        # Wait for the session to finish
+        if self._thread is not None and self._thread is not threading.current_thread():
+            self._thread.join(timeout)
+
+        # If it didn't finish, force socket closure
+        with self._session_lock:
+            sock, self.socket = self.socket, None
+            # Explicitly set client to None
+            self.egm_client = None
+            self._release_port()
+        if sock:
+            try:
+                self._debug("Forcing socket closure")
+                # Force socket to unblock by shutting down properly
+                try:
+                    sock.shutdown(socket.SHUT_RDWR)
+                except OSError:
+                    pass
+                sock.close()
+            except Exception as e:
+                self._debug(f"Error forcing socket closure: {str(e)}")
+
+    def send_cartesian_target(self, x, y, z, rx, ry, rz):
+        """Send cartesian target to robot (now used only for initial positioning)"""
+        return self._send_cartesian_target(self.egm_client, x, y, z, rx, ry, rz)
+
+    def _send_cartesian_target(self, egm_client, x, y, z, rx, ry, rz):
+        """Send a cartesian target twice through egm_client"""
+        if not egm_client:
+            self._error("EGM client not initialized")
+            return False
+
+        try:
+            self._status(f"Moving to cartesian target: [{x}, {y}, {z}, {rx}, {ry}, {rz}]")
+            self._debug(f"Sending cartesian target: x={x}, y={y}, z={z}, rx={rx}, ry={ry}, rz={rz}")
+
+            # Send directly using EGM client
+            target = {"x": x, "y": y, "z": z, "rx": rx, "ry": ry, "rz": rz}
+            egm_client.send_planned_frame(x, y, z, rx, ry, rz)
+            self.loop_stats.on_send(target)
+
+            # Send a second time for reliability
+            time.sleep(0.05)
+            egm_client.send_planned_frame(x, y, z, rx, ry, rz)
+            self.loop_stats.on_send(target)
+
+            return True
+
+        except Exception as e:
+            self._error(f"Error sending cartesian target: {str(e)}")
+            self._debug(f"Error sending cartesian target: {str(e)}\n{traceback.format_exc()}")
+            return False
+
+    def reset_sequence_counter(self):
+        """Reset the sequence counter to ensure fresh commands"""
+        egm_client = self.egm_client
+        if not egm_client:
+            return False
+
+        try:
+            # Use the EGMClient's native method to reset the counter
+            if hasattr(egm_client, 'reset_sequence_counter'):
+                egm_client.reset_sequence_counter()
+            else:
+                # Fallback if method not available
+                egm_client.send_counter = AtomicCounter()
+
+            self._debug("EGM sequence counter reset")
+            return True
+
+        except Exception as e:
+            self._debug(f"Error resetting sequence counter: {str(e)}")
+            return False
+
+    def _active(self, session_id):
+        """True while session_id is the current, running session"""
+        return self.running and self._session_id == session_id
+
+    def _run(self, session_id):
+        """Session thread: open the socket, wait for the controller, run receive/send threads"""
+        self.loop_stats.reset()
+        self.trajectory.reset()
+        egm_client = sock = None
+
+        try:
+            opened = self._open()
+            if opened is None:
+                return
+            # The client and socket belong to this session; publish them only if it is still current
+            egm_client, sock = opened
+            with self._session_lock:
+                if self._session_id != session_id:
+                    return
+                self.egm_client, self.socket = egm_client, sock
+
+            self._status(f"Listening for EGM messages on port {self.port}")
+
+            # Wait for first message to establish connection
+            try:
+                self._debug("Waiting for initial EGM message...")
+                pb_robot_msg = self._receive_first(egm_client, session_id)
+                if pb_robot_msg is None:
+                    return  # Stopped while waiting
+                self._connected(True)
+                self._status("EGM connection established")
+                self._debug("Connection established with controller at " +
+                            str(egm_client.robot_controller_address))
+
+                # Extract initial cartesian position if available
+                cartesian_data = self._position(pb_robot_msg)
+                if cartesian_data is not None:
+                    self.last_position = cartesian_data
+                    self._notify(self.on_position, cartesian_data)
+                    self._debug(f"Initial position: {cartesian_data}")
+
+                    # Send a reply with current position to maintain connection
+                    self._send_cartesian_target(egm_client, *(cartesian_data[key] for key in POSITION_KEYS))
+            except Exception as e:
+                if self._active(session_id):
+                    self._error(f"Failed to receive initial EGM message: {str(e)}")
+                    self._debug(f"Error receiving initial message: {str(e)}\n{traceback.format_exc()}")
+                    self._connected(False)
+                return
+
+            # Separate threads for receiving and sending EGM messages
+            receive_thread = threading.Thread(target=self._receive_loop, args=(egm_client, session_id),
+                                              name=f"EGM-{self.name}-receive", daemon=True)
+            send_thread = threading.Thread(target=self._send_loop, args=(egm_client, session_id),
+                                           name=f"EGM-{self.name}-send", daemon=True)
+            receive_thread.start()
+            send_thread.start()
+
+            # This thread just waits for termination
+            while self._active(session_id):
+                time.sleep(0.1)
+
+            receive_thread.join(timeout=2.0)
+            send_thread.join(timeout=2.0)
+
+        except Exception as e:
+            self._error(f"Failed to initialize EGM client: {str(e)}")
+            self._debug(f"Initialization error: {str(e)}\n{traceback.format_exc()}")
+            self._connected(False)
+
+        finally:
+            # Clean up this session's socket, and the shared state only if it is still ours
+            try:
+                if sock:
+                    self._debug("Closing socket")
+                    sock.close()
+            except Exception as e:
+                self._debug(f"Error closing socket: {str(e)}")
+
+            with self._session_lock:
+                current = self._session_id == session_id
+                if current:
+                    if self.socket is sock:
+                        self.socket = None
+                    if self.egm_client is egm_client:
+                        self.egm_client = None
+                    self.running = False
+                    self._release_port()
+            if current:
+                self._status("EGM communication stopped")
+            self._debug("EGM thread stopped")
+
+    def _open(self):
+        """Create the EGM client and tune its socket; (client, socket), or None if the port cannot be bound"""
+        self._debug("Creating socket on port " + str(self.port))
+        egm_client = sock = None
+        try:
+            # Let the client create and bind its own socket first
+            egm_client = EGMClient(port=self.port)
+            sock = egm_client.socket
+            self._debug("EGM client created successfully with default socket")
+
+        except OSError as e:
+            self._debug(f"Failed to create EGM client: {str(e)}")
+
+            # Retry with our own socket; SO_REUSEADDR only, never SO_REUSEPORT, which
+            # would let a second socket share the port and split the controller's packets
+            try:
+                self._debug("Attempting to create custom socket")
+                if sock:
+                    try:
+                        sock.close()
+                    except OSError:
+                        pass
+
+                # Wait for OS to release the socket
+                time.sleep(1)
+
+                sock = socket.socket(family=socket.AF_INET, type=socket.SOCK_DGRAM)
+                sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+                sock.bind(('', self.port))
+                self._debug("Custom socket bound successfully")
+
+                # Create EGM client and replace its socket
+                egm_client = EGMClient(port=self.port)
+                egm_client.socket = sock
+                self._debug("EGM client created with custom socket")
+
+            except Exception as retry_e:
+                self._error(f"Failed to bind socket: {str(retry_e)}")
+                self._debug(f"Socket binding failed: {str(retry_e)}\n{traceback.format_exc()}")
+                self._connected(False)
+                return None
+
+        # Ensure the send_counter is properly initialized
+        if getattr(egm_client, 'send_counter', None) is None:
+            egm_client.send_counter = AtomicCounter()
+
+        sock.settimeout(self.receive_timeout)
+        if self.receive_buffer:
+            try:
+                sock.setsockopt(socket.SOL_SOCKET, socket.SO_RCVBUF, self.receive_buffer)
+            except OSError as e:
+                self._debug(f"Could not set receive buffer: {str(e)}")
+        return egm_client, sock
+
+    def _receive_first(self, egm_client, session_id):
+        """First controller message, or None if stopped while waiting"""
+        while self._active(session_id):
+            try:
+                return egm_client.receive_msg()
+            except socket.timeout:
+                continue
+        return None
+
+    @staticmethod
+    def _position(pb_robot_msg):
+        """Feedback cartesian position as a dict, or None"""
+        if hasattr(pb_robot_msg.feedBack, "cartesian") and pb_robot_msg.feedBack.cartesian.HasField("pos"):
+            pos = pb_robot_msg.feedBack.cartesian.pos
+            euler = pb_robot_msg.feedBack.cartesian.euler
+            return {
+                "x": pos.x, "y": pos.y, "z": pos.z,
+                "rx": euler.x, "ry": euler.y, "rz": euler.z
+            }
+        return None
+
+    def _receive_loop(self, egm_client, session_id):
+        """Receive feedback; every packet is recorded in self.loop_stats"""
+        while self._active(session_id):
+            try:
+                pb_robot_msg = egm_client.receive_msg()
+            except socket.timeout:
+                self.loop_stats.on_error(timeout=True)
+                continue
+            except Exception as e:
+                if self._active(session_id):  # Only log errors if still running
+                    self.loop_stats.on_error()
+                    self._debug(f"Error receiving message: {str(e)}")
+                time.sleep(0.5)  # Wait before retrying
+                continue
+            arrival = time.perf_counter()
+
+            try:
+                cartesian_data = self._position(pb_robot_msg)
+
+                # Loop timing, sequence gaps and convergence
+                seqno = pb_robot_msg.header.seqno if pb_robot_msg.HasField("header") else None
+                converged = bool(getattr(pb_robot_msg, "mciConvergenceMet", False))
+                self.loop_stats.on_receive(seqno, cartesian_data, converged, arrival)
+                self.send_scheduler.notify_feedback()
+
+                if cartesian_data is not None:
+                    self.last_position = cartesian_data
+                    self._notify(self.on_position, cartesian_data)
+
+                if converged:
+                    self._status("Position converged")
+
+            except Exception as e:
+                if self._active(session_id):
+                    self._debug(f"Error handling message: {str(e)}")
+
+    def _send_loop(self, egm_client, session_id):
+        """Send the active source's target, paced by self.send_scheduler"""
+        scheduler = self.send_scheduler
+        scheduler.start()
+        target = np.empty(len(POSITION_KEYS))
+
+        while self._active(session_id):
+            # Deadline (or next feedback packet in lock-step mode) on the monotonic clock
+            if not scheduler.wait():
+                break
+            try:
+                # Newest target of the active source (published by the GUI thread)
+                mailbox = self._targets.get(self.source)
+                seq, values, _ = mailbox.read(target) if mailbox else (0, None, 0.0)
+
+                if seq:
+                    # Start the first move from where the robot is
+                    if not self.trajectory.active and self.last_position:
+                        self.trajectory.reset([self.last_position[key] for key in POSITION_KEYS])
+                    egm_client.send_planned_frame(*self.trajectory.update(values))
+                    self.loop_stats.on_send(values)
+                    scheduler.record_send()
+
+                # Achieved period and jitter percentiles (no per-packet debug output at up to 250 Hz)
+                if scheduler.summary_due():
+                    self._debug(scheduler.summary_text())
+
+            except Exception as e:
+                self._debug(f"Error in send loop: {str(e)}")
+                time.sleep(0.5)
+
+    def _release_port(self):
+        with _port_lock:
+            if self._claimed_port is not None and _port_owners.get(self._claimed_port) is self:
+                del _port_owners[self._claimed_port]
+            self._claimed_port = None
+
+    def _notify(self, callback, value):
+        if callback is not None:
+            callback(value)
+
+    def _status(self, message):
+        if self.on_status is not None:
+            self.on_status(message)
+        else:
+            self.logger.info(message)
+
+    def _error(self, message):
+        if self.on_error is not None:
+            self.on_error(message)
+        else:
+            self.logger.error(message)
+
+    def _debug(self, message):
+        if self.on_debug is not None:
+            self.on_debug(message)
+        else:
+            self.logger.debug(message)
+
+    def _connected(self, connected):
+        self._notify(self.on_connected, connected)
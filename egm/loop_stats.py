@@ -0,0 +1,340 @@
+"""
+EGM loop instrumentation
+
+The controller sends a feedback packet every EGM cycle (4 ms = 250 Hz) and
+expects a planned frame back. EGMLoopStats records, per received packet:
+
+- inter-arrival time and its deviation from the expected period (jitter)
+- sequence gaps in the robot header (lost, duplicated or reordered packets)
+- round-trip time from sending a planned frame to the next feedback packet
+- convergence time from a new target until the robot reports convergence
+  (mciConvergenceMet) or its position is within a tolerance of the target
+
+Times go into LatencyHistogram, an HDR-style log-linear histogram: constant
+relative precision over a wide range, O(1) recording and fixed memory, so it
+can run in the 250 Hz receive loop. Histograms and counters can be exported
+to CSV.
+
+Author: Sunny24
+Date: May 21, 2025
+"""
+
+import csv
+import math
+import threading
+import time
+
+import numpy as np
+
+DEFAULT_EGM_PERIOD = 0.004  # Controller EGM cycle (s)
+SEQNO_MODULUS = 2 ** 32     # Header seqno is a uint32
+POSITION_KEYS = ('x', 'y', 'z', 'rx', 'ry', 'rz')
+
+
+class LatencyHistogram:
+    """
+    Log-linear (HDR-style) histogram of durations
+
+    Values are stored in microseconds. Below 2 * 10^significant_digits they
+    are counted exactly; above, each power of two is split into the same
+    number of sub-buckets, which keeps the relative error under
+    10^-significant_digits.
+
+    Args:
+        name: Metric name used in exports
+        highest: Largest trackable duration in seconds (larger values are clamped)
+        significant_digits: Decimal digits of precision (1-3)
+    """
+
+    def __init__(self, name, highest=10.0, significant_digits=2):
+        if not 1 <= significant_digits <= 3:
+            raise ValueError("significant_digits must be 1, 2 or 3")
+        self.name = name
+        self.highest_us = int(highest * 1e6)
+        self._sub_bits = math.ceil(math.log2(2 * 10 ** significant_digits))
+        self._sub_count = 1 << self._sub_bits
+        self._half = self._sub_count // 2
+        self._counts = np.zeros(self._index(self.highest_us) + 1, dtype=np.int64)
+        self.reset()
+
+    def reset(self):
+        self._counts[:] = 0
+        self.count = 0
+        self.clamped = 0
+        self._sum = 0
+        self._min = None
+        self._max = 0
+
+    def record(self, seconds):
+        """Add one duration (negative values count as 0)"""
+        value = int(seconds * 1e6) if seconds > 0 else 0
+        if value > self.highest_us:
+            value = self.highest_us
+            self.clamped += 1
+        self._counts[self._index(value)] += 1
+        self.count += 1
+        self._sum += value
+        if self._min is None or value < self._min:
+            self._min = value
+        if value > self._max:
+            self._max = value
+
+    @property
+    def min(self):
+        """Smallest duration in seconds (0 when empty)"""
+        return (self._min or 0) / 1e6
+
+    @property
+    def max(self):
+        return self._max / 1e6
+
+    @property
+    def mean(self):
+        return self._sum / self.count / 1e6 if self.count else 0.0
+
+    def percentile(self, percent):
+        """Duration in seconds below which percent of the values fall (0 when empty)"""
+        return self.percentiles([percent])[0]
+
+    def percentiles(self, percents):
+        """Several percentiles at once, in seconds"""
+        if not self.count:
+            return [0.0] * len(percents)
+        cumulative = np.cumsum(self._counts)
+        result = []
+        for percent in percents:
+            rank = max(1, math.ceil(percent / 100.0 * self.count))
+            index = int(np.searchsorted(cumulative, rank))
+            # Upper bound of the bucket, never beyond the largest recorded value
+            result.append(min(self._upper(index), self._max) / 1e6)
+        return result
+
+    def buckets(self):
+        """
+        Non-empty buckets
+
+        Returns:
+            List of (low_seconds, high_seconds, count, cumulative_fraction)
+        """
+        rows = []
+        cumulative = 0
+        for index in np.flatnonzero(self._counts):
+            count = int(self._counts[index])
+            cumulative += count
+            rows.append((self._lower(index) / 1e6, self._upper(index) / 1e6, count, cumulative / self.count))
+        return rows
+
+    def snapshot(self, percents=(50, 90, 99, 99.9)):
+        """Summary dictionary (durations in milliseconds)"""
+        summary = {'count': self.count, 'mean_ms': self.mean * 1e3, 'min_ms': self.min * 1e3,
+                   'max_ms': self.max * 1e3}
+        for percent, value in zip(percents, self.percentiles(percents)):
+            summary[f'p{percent:g}_ms'] = value * 1e3
+        return summary
+
+    def _index(self, value):
+        if value < self._sub_count:
+            return value
+        shift = value.bit_length() - self._sub_bits
+        return self._sub_count + (shift - 1) * self._half + (value >> shift) - self._half
+
+    def _lower(self, index):
+        if index < self._sub_count:
+            return index
+        shift = (index - self._sub_count) // self._half + 1
+        sub = (index - self._sub_count) % self._half + self._half
+        return sub << shift
+
+    def _upper(self, index):
+        if index < self._sub_count:
+            return index
+        shift = (index - self._sub_count) // self._half + 1
+        return self._lower(index) + (1 << shift) - 1
+
+
+class EGMLoopStats:
+    """
+    Timing and loss counters of an EGM session
+
+    on_receive() is called from the receive thread for every feedback packet
+    and on_send() for every planned frame sent; snapshot() and write_csv()
+    may be called from any thread.
+
+    Args:
+        period: Expected EGM cycle in seconds
+        position_tolerance: Distance (mm / degrees, per axis) at which a
+            target counts as reached when the robot does not report convergence
+    """
+
+    METRICS = ('inter_arrival', 'jitter', 'round_trip', 'convergence')
+
+    def __init__(self, period=DEFAULT_EGM_PERIOD, position_tolerance=1.0):
+        self.period = period
+        self.position_tolerance = position_tolerance
+        self.histograms = {name: LatencyHistogram(name) for name in self.METRICS}
+        self._lock = threading.Lock()
+        self.reset()
+
+    def reset(self):
+        with self._lock:
+            for histogram in self.histograms.values():
+                histogram.reset()
+            self.received = 0
+            self.sent = 0
+            self.lost = 0          # Packets missing from seqno gaps
+            self.out_of_order = 0  # Duplicated or reordered packets
+            self.late = 0          # Inter-arrival above 1.5 periods
+            self.errors = 0
+            self.timeouts = 0
+            self._first_arrival = None
+            self._last_arrival = None
+            self._last_seqno = None
+            self._pending_send = None
+            self._target = None
+            self._target_time = None
+
+    def on_receive(self, seqno=None, position=None, convergence_met=False, now=None):
+        """
+        Record a feedback packet
+
+        Args:
+            seqno: Robot header sequence number (None if the header is missing)
+            position: Feedback position dictionary (x, y, z, rx, ry, rz) or None
+            convergence_met: mciConvergenceMet flag of the packet
+            now: time.perf_counter() at arrival (default: now)
+        """
+        now = time.perf_counter() if now is None else now
+        with self._lock:
+            self.received += 1
+            if self._first_arrival is None:
+                self._first_arrival = now
+            if self._last_arrival is not None:
+                interval = now - self._last_arrival
+                self.histograms['inter_arrival'].record(interval)
+                self.histograms['jitter'].record(abs(interval - self.period))
+                if interval > 1.5 * self.period:
+                    self.late += 1
+            self._last_arrival = now
+
+            if seqno is not None:
+                if self._last_seqno is not None:
+                    gap = (seqno - self._last_seqno) % SEQNO_MODULUS
+                    if gap == 0 or gap > SEQNO_MODULUS // 2:
+                        self.out_of_order += 1
+                        seqno = self._last_seqno  # Keep counting from the newest one
+                    else:
+                        self.lost += gap - 1
+                self._last_seqno = seqno
+
+            if self._pending_send is not None:
+                self.histograms['round_trip'].record(now - self._pending_send)
+                self._pending_send = None
+
+            if self._target_time is not None and (convergence_met or self._reached(position)):
+                self.histograms['convergence'].record(now - self._target_time)
+                self._target_time = None
+
+    def on_send(self, target=None, now=None):
+        """
+        Record a planned frame sent to the controller
+
+        Args:
+            target: Target position as a dictionary or sequence (x, y, z, rx, ry, rz), or None
+            now: time.perf_counter() when sent (default: now)
+        """
+        now = time.perf_counter() if now is None else now
+        with self._lock:
+            self.sent += 1
+            if self._pending_send is None:
+                self._pending_send = now
+            if target is not None:
+                if isinstance(target, dict):
+                    values = [float(target[key]) for key in POSITION_KEYS]
+                else:
+                    values = [float(value) for value in target]
+                moved = self._target is None or max(
+                    abs(a - b) for a, b in zip(values, self._target)) > self.position_tolerance
+                if moved:
+                    # New target: convergence is timed from here
+                    self._target = values
+                    self._target_time = now
+
+    def on_error(self, timeout=False):
+        """Count a receive error or timeout"""
+        with self._lock:
+            if timeout:
+                self.timeouts += 1
+            else:
+                self.errors += 1
+
+    def snapshot(self):
+        """
+        Counters and histogram summaries
+
+        Returns:
+            Dictionary with 'received', 'sent', 'lost', 'loss_rate',
+            'out_of_order', 'late', 'errors', 'timeouts', 'rate_hz' (mean
+            receive rate), 'period_met' (fraction of intervals within 1.5
+            periods) and one histogram snapshot per metric
+        """
+        with self._lock:
+            elapsed = self._last_arrival - self._first_arrival if self.received > 1 else 0.0
+            intervals = self.histograms['inter_arrival'].count
+            result = {
+                'received': self.received,
+                'sent': self.sent,
+                'lost': self.lost,
+                'loss_rate': self.lost / (self.received + self.lost) if self.received + self.lost else 0.0,
+                'out_of_order': self.out_of_order,
+                'late': self.late,
+                'errors': self.errors,
+                'timeouts': self.timeouts,
+                'rate_hz': (self.received - 1) / elapsed if elapsed > 0 else 0.0,
+                'period_met': 1.0 - self.late / intervals if intervals else 0.0
+            }
+            for name, histogram in self.histograms.items():
+                result[name] = histogram.snapshot()
+            return result
+
+    def write_csv(self, path):
+        """
+        Export to CSV
+
+        Counters are written as '#' comment lines, followed by one row per
+        non-empty histogram bucket: metric, low_ms, high_ms, count,
+        cumulative_fraction.
+        """
+        summary = self.snapshot()
+        with self._lock:
+            rows = [(name, low * 1e3, high * 1e3, count, fraction)
+                    for name, histogram in self.histograms.items()
+                    for low, high, count, fraction in histogram.buckets()]
+        with open(path, 'w', newline='') as csv_file:
+            csv_file.write(f"# expected_period_ms={self.period * 1e3:g}\n")
+            for key in ('received', 'sent', 'lost', 'loss_rate', 'out_of_order', 'late', 'errors',
+                        'timeouts', 'rate_hz', 'period_met'):
+                csv_file.write(f"# {key}={summary[key]:g}\n")
+            writer = csv.writer(csv_file)
+            writer.writerow(['metric', 'low_ms', 'high_ms', 'count', 'cumulative_fraction'])
+            for name, low, high, count, fraction in rows:
+                writer.writerow([name, f"{low:.3f}", f"{high:.3f}", count, f"{fraction:.6f}"])
+
+    def summary_text(self):
+        """Short multi-line text for a status label"""
+        stats = self.snapshot()
+        lines = [
+            f"Received {stats['received']} ({stats['rate_hz']:.0f} Hz), sent {stats['sent']}, "
+            f"lost {stats['lost']} ({stats['loss_rate']:.2%}), out of order {stats['out_of_order']}, "
+            f"period met {stats['period_met']:.1%}"
+        ]
+        for name in self.METRICS:
+            h = stats[name]
+            lines.append(f"{name.replace('_', ' ')}: p50 {h['p50_ms']:.2f} / p99 {h['p99_ms']:.2f} / "
+                         f"max {h['max_ms']:.2f} ms (n={h['count']})")
+        return "\n".join(lines)
+
+    def _reached(self, position):
+        if position is None or self._target is None:
+            return False
+        return all(abs(float(position[key]) - target) <= self.position_tolerance
+                   for key, target in zip(POSITION_KEYS, self._target))
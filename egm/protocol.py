@@ -0,0 +1,275 @@
+"""
+EGM protobuf messages without generated code
+
+Encodes and decodes the subset of ABB's egm.proto (proto2) that this
+application uses, directly in the protobuf wire format:
+
+- EgmRobot (controller -> sensor): header, feedBack.cartesian (pos, orient,
+  euler), feedBack.time, planned.cartesian, motorState, mciState,
+  mciConvergenceMet, rapidExecState
+- EgmSensor (sensor -> controller): header, planned.cartesian (pos, orient,
+  euler)
+
+Field numbers follow egm.proto, so the bytes are interchangeable with the
+ones produced by abb_egm_pyclient's generated egm_pb2 module. Unknown fields
+are skipped when decoding. Used by egm.simulator and the headless
+benchmarks, which then need neither protobuf nor the abb_egm_pyclient
+submodule.
+
+Poses are dictionaries with x, y, z (mm) and rx, ry, rz (Euler angles in
+degrees, ZYX as used by RAPID).
+
+Author: Sunny24
+Date: May 21, 2025
+"""
+
+import math
+import struct
+
+from .loop_stats import POSITION_KEYS
+
+# EgmHeader.MessageType
+MSGTYPE_UNDEFINED = 0
+MSGTYPE_COMMAND = 1
+MSGTYPE_DATA = 2
+MSGTYPE_CORRECTION = 3
+
+# EgmMotorState / EgmMCIState / EgmRAPIDExecState
+MOTORS_ON = 1
+MCI_RUNNING = 3
+RAPID_RUNNING = 2
+
+_VARINT = 0
+_FIXED64 = 1
+_LENGTH = 2
+_FIXED32 = 5
+
+_DOUBLE = struct.Struct('<d')
+
+
+class EGMDecodeError(ValueError):
+    """Raised for bytes that are not a valid protobuf message"""
+
+
+def euler_to_quaternion(rx, ry, rz):
+    """ZYX Euler angles in degrees to a unit quaternion (u0, u1, u2, u3)"""
+    cx, sx = math.cos(math.radians(rx) / 2), math.sin(math.radians(rx) / 2)
+    cy, sy = math.cos(math.radians(ry) / 2), math.sin(math.radians(ry) / 2)
+    cz, sz = math.cos(math.radians(rz) / 2), math.sin(math.radians(rz) / 2)
+    return (cz * cy * cx + sz * sy * sx,
+            cz * cy * sx - sz * sy * cx,
+            cz * sy * cx + sz * cy * sx,
+            sz * cy * cx - cz * sy * sx)
+
+
+def quaternion_to_euler(u0, u1, u2, u3):
+    """Unit quaternion to ZYX Euler angles in degrees (rx, ry, rz)"""
+    rx = math.atan2(2 * (u0 * u1 + u2 * u3), 1 - 2 * (u1 * u1 + u2 * u2))
+    ry = math.asin(max(-1.0, min(1.0, 2 * (u0 * u2 - u3 * u1))))
+    rz = math.atan2(2 * (u0 * u3 + u1 * u2), 1 - 2 * (u2 * u2 + u3 * u3))
+    return math.degrees(rx), math.degrees(ry), math.degrees(rz)
+
+
+# Encoding
+
+def _varint(value):
+    out = bytearray()
+    while True:
+        byte = value & 0x7F
+        value >>= 7
+        if value:
+            out.append(byte | 0x80)
+        else:
+            out.append(byte)
+            return bytes(out)
+
+
+def _key(field, wire_type):
+    return _varint(field << 3 | wire_type)
+
+
+def _uint(field, value):
+    return _key(field, _VARINT) + _varint(int(value))
+
+
+def _double(field, value):
+    return _key(field, _FIXED64) + _DOUBLE.pack(value)
+
+
+def _message(field, payload):
+    return _key(field, _LENGTH) + _varint(len(payload)) + payload
+
+
+def _header(seqno, tm, mtype):
+    return _message(1, _uint(1, seqno & 0xFFFFFFFF) + _uint(2, tm & 0xFFFFFFFF) + _uint(3, mtype))
+
+
+def _pose(pose):
+    """EgmPose: pos = 1, orient = 2, euler = 3"""
+    rx, ry, rz = float(pose['rx']), float(pose['ry']), float(pose['rz'])
+    pos = _double(1, float(pose['x'])) + _double(2, float(pose['y'])) + _double(3, float(pose['z']))
+    orient = b''.join(_double(i + 1, value) for i, value in enumerate(euler_to_quaternion(rx, ry, rz)))
+    euler = _double(1, rx) + _double(2, ry) + _double(3, rz)
+    return _message(1, pos) + _message(2, orient) + _message(3, euler)
+
+
+def encode_robot_message(seqno, tm, pose, planned=None, convergence_met=False, clock=None):
+    """
+    Serialize an EgmRobot feedback message
+
+    Args:
+        seqno: Header sequence number
+        tm: Header time stamp in milliseconds
+        pose: Feedback pose dictionary
+        planned: Planned (last commanded) pose dictionary, or None
+        convergence_met: mciConvergenceMet flag
+        clock: (sec, usec) for feedBack.time, or None
+
+    Returns:
+        Bytes to send
+    """
+    feedback = _message(2, _pose(pose))
+    if clock is not None:
+        feedback += _message(4, _uint(1, clock[0]) + _uint(2, clock[1]))
+    data = _header(seqno, tm, MSGTYPE_DATA) + _message(2, feedback)
+    if planned is not None:
+        data += _message(3, _message(2, _pose(planned)))
+    data += _message(4, _uint(1, MOTORS_ON))
+    data += _message(5, _uint(1, MCI_RUNNING))
+    data += _uint(6, 1 if convergence_met else 0)
+    data += _message(8, _uint(1, RAPID_RUNNING))
+    return data
+
+
+def encode_sensor_message(seqno, tm, pose):
+    """Serialize an EgmSensor message with a planned Cartesian pose (what send_planned_frame sends)"""
+    return _header(seqno, tm, MSGTYPE_CORRECTION) + _message(2, _message(2, _pose(pose)))
+
+
+# Decoding
+
+def _fields(data):
+    """Yield (field number, wire type, value) of a serialized message"""
+    index, end = 0, len(data)
+    try:
+        while index < end:
+            key, index = _read_varint(data, index)
+            field, wire_type = key >> 3, key & 7
+            if wire_type == _VARINT:
+                value, index = _read_varint(data, index)
+            elif wire_type == _FIXED64:
+                value = _DOUBLE.unpack_from(data, index)[0]
+                index += 8
+            elif wire_type == _LENGTH:
+                length, index = _read_varint(data, index)
+                value = data[index:index + length]
+                if len(value) != length:
+                    raise EGMDecodeError("Truncated field")
+                index += length
+            elif wire_type == _FIXED32:
+                value = data[index:index + 4]
+                index += 4
+            else:
+                raise EGMDecodeError(f"Unsupported wire type {wire_type}")
+            yield field, wire_type, value
+    except struct.error as e:
+        raise EGMDecodeError(str(e))
+
+
+def _read_varint(data, index):
+    value = shift = 0
+    while True:
+        if index >= len(data):
+            raise EGMDecodeError("Truncated varint")
+        byte = data[index]
+        index += 1
+        value |= (byte & 0x7F) << shift
+        if not byte & 0x80:
+            return value, index
+        shift += 7
+
+
+def _decode_header(data):
+    header = {'seqno': None, 'tm': None, 'mtype': MSGTYPE_UNDEFINED}
+    for field, _, value in _fields(data):
+        if field in (1, 2, 3):
+            header[('seqno', 'tm', 'mtype')[field - 1]] = value
+    return header
+
+
+def _decode_doubles(data, count):
+    values = [0.0] * count
+    for field, wire_type, value in _fields(data):
+        if wire_type == _FIXED64 and 1 <= field <= count:
+            values[field - 1] = value
+    return values
+
+
+def _decode_pose(data):
+    """EgmPose to a pose dictionary (Euler angles from orient when euler is missing)"""
+    pos = orient = euler = None
+    for field, _, value in _fields(data):
+        if field == 1:
+            pos = _decode_doubles(value, 3)
+        elif field == 2:
+            orient = _decode_doubles(value, 4)
+        elif field == 3:
+            euler = _decode_doubles(value, 3)
+    if pos is None:
+        return None
+    if euler is None:
+        euler = quaternion_to_euler(*orient) if orient is not None else (0.0, 0.0, 0.0)
+    return dict(zip(POSITION_KEYS, list(pos) + list(euler)))
+
+
+def _decode_cartesian(data, field_number):
+    """Pose in field `cartesian` (2) of an EgmFeedBack / EgmPlanned message"""
+    for field, _, value in _fields(data):
+        if field == field_number:
+            return _decode_pose(value)
+    return None
+
+
+def decode_sensor_message(data):
+    """
+    Parse an EgmSensor message
+
+    Returns:
+        Dictionary with 'seqno', 'tm', 'mtype' and 'planned' (pose
+        dictionary or None)
+
+    Raises:
+        EGMDecodeError: If the bytes are not a valid message
+    """
+    message = {'seqno': None, 'tm': None, 'mtype': MSGTYPE_UNDEFINED, 'planned': None}
+    for field, _, value in _fields(data):
+        if field == 1:
+            message.update(_decode_header(value))
+        elif field == 2:
+            message['planned'] = _decode_cartesian(value, 2)
+    return message
+
+
+def decode_robot_message(data):
+    """
+    Parse an EgmRobot message
+
+    Returns:
+        Dictionary with 'seqno', 'tm', 'mtype', 'feedback' and 'planned'
+        (pose dictionaries or None) and 'convergence_met'
+
+    Raises:
+        EGMDecodeError: If the bytes are not a valid message
+    """
+    message = {'seqno': None, 'tm': None, 'mtype': MSGTYPE_UNDEFINED, 'feedback': None,
+               'planned': None, 'convergence_met': False}
+    for field, _, value in _fields(data):
+        if field == 1:
+            message.update(_decode_header(value))
+        elif field == 2:
+            message['feedback'] = _decode_cartesian(value, 2)
+        elif field == 3:
+            message['planned'] = _decode_cartesian(value, 2)
+        elif field == 6:
+            message['convergence_met'] = bool(value)
+    return message
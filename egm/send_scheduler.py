@@ -0,0 +1,180 @@
+"""
+Send pacing for the EGM sender thread
+
+SendScheduler replaces "compare time.time() with a threshold, then sleep
+10 ms" with deadlines on the monotonic clock:
+
+- periodic: one send per period; the thread sleeps until shortly before the
+  deadline and spins the rest, so the period does not depend on the OS
+  sleep granularity. Missed deadlines are skipped (counted as overruns),
+  never sent in a burst.
+- lock-step: one send per feedback packet from the controller, as the EGM
+  protocol expects, but not faster than the configured rate. If feedback
+  stops, one frame still goes out every two periods.
+
+The achieved send period and its deviation from the target period are
+recorded in LatencyHistograms; summary_text() reports their percentiles.
+
+Author: Sunny24
+Date: May 21, 2025
+"""
+
+import logging
+import threading
+import time
+
+from .loop_stats import LatencyHistogram, DEFAULT_EGM_PERIOD
+
+DEFAULT_SEND_RATE = 1.0 / DEFAULT_EGM_PERIOD  # 250 Hz, the controller cycle
+DEFAULT_SPIN = 0.0015  # Busy-wait the last 1.5 ms before a deadline
+LOCKSTEP_SLACK = DEFAULT_EGM_PERIOD / 2  # A feedback packet may arrive this much early (s)
+
+
+class SendScheduler:
+    """
+    Deadline-driven pacing of EGM sends
+
+    Args:
+        rate_hz: Target send rate (at most the controller cycle, 250 Hz)
+        lockstep: Send once per feedback packet (see notify_feedback())
+        spin: Seconds before a deadline to stop sleeping and busy-wait
+        summary_interval: Seconds between summary_due() returning True
+        logger: Optional logger instance
+
+    Raises:
+        ValueError: If rate_hz is not in (0, 250]
+    """
+
+    def __init__(self, rate_hz=DEFAULT_SEND_RATE, lockstep=True, spin=DEFAULT_SPIN,
+                 summary_interval=5.0, logger=None):
+        self.logger = logger or logging.getLogger('SendScheduler')
+        self.spin = spin
+        self.summary_interval = summary_interval
+        self.period_histogram = LatencyHistogram('send_period')
+        self.jitter_histogram = LatencyHistogram('send_jitter')
+        self._feedback = threading.Event()
+        self._wake = threading.Event()
+        self.configure(rate_hz, lockstep)
+        self.start()
+
+    def configure(self, rate_hz, lockstep):
+        """Change the target rate and mode (takes effect at the next deadline)"""
+        if not 0 < rate_hz <= DEFAULT_SEND_RATE:
+            raise ValueError(f"Send rate must be in (0, {DEFAULT_SEND_RATE:g}] Hz")
+        self.rate_hz = rate_hz
+        self.period = 1.0 / rate_hz
+        self.lockstep = lockstep
+
+    def start(self):
+        """Reset deadlines and counters; call when the send loop starts"""
+        now = time.perf_counter()
+        self._deadline = now + self.period
+        self._last_send = None
+        self._last_summary = now
+        self._stopped = False
+        self._feedback.clear()
+        self._wake.clear()
+        self.sends = 0
+        self.overruns = 0   # Deadlines skipped because the sender was late
+        self.fallbacks = 0  # Lock-step sends without feedback (controller silent)
+        self.period_histogram.reset()
+        self.jitter_histogram.reset()
+
+    def stop(self):
+        """Wake a waiting sender so it can see that it should exit"""
+        self._stopped = True
+        self._wake.set()
+        self._feedback.set()
+
+    def notify_feedback(self):
+        """Called by the receive thread for every feedback packet"""
+        self._feedback.set()
+
+    def wait(self):
+        """
+        Block until the next send is due
+
+        Returns:
+            True when it is time to send, False if stop() was called
+        """
+        if self.lockstep:
+            return self._wait_lockstep()
+        return self._wait_until(self._next_deadline())
+
+    def record_send(self):
+        """Record that a frame was sent now (achieved period and jitter)"""
+        now = time.perf_counter()
+        if self._last_send is not None:
+            period = now - self._last_send
+            self.period_histogram.record(period)
+            self.jitter_histogram.record(abs(period - self.period))
+        self._last_send = now
+        self.sends += 1
+
+    def summary_due(self):
+        """True once every summary_interval seconds"""
+        now = time.perf_counter()
+        if now - self._last_summary < self.summary_interval:
+            return False
+        self._last_summary = now
+        return True
+
+    def stats(self):
+        """Target and achieved send timing (durations in milliseconds)"""
+        return {
+            'rate_hz': self.rate_hz,
+            'lockstep': self.lockstep,
+            'sends': self.sends,
+            'overruns': self.overruns,
+            'fallbacks': self.fallbacks,
+            'period': self.period_histogram.snapshot(),
+            'jitter': self.jitter_histogram.snapshot()
+        }
+
+    def summary_text(self):
+        """One line with the achieved period and jitter percentiles"""
+        period = self.period_histogram.snapshot()
+        jitter = self.jitter_histogram.snapshot()
+        mode = "lock-step" if self.lockstep else "periodic"
+        return (f"EGM send ({mode}, target {self.period * 1e3:.1f} ms): period p50 {period['p50_ms']:.2f} / "
+                f"p99 {period['p99_ms']:.2f} / max {period['max_ms']:.2f} ms, jitter p50 {jitter['p50_ms']:.2f} / "
+                f"p99 {jitter['p99_ms']:.2f} ms, {self.sends} sends, {self.overruns} overruns, "
+                f"{self.fallbacks} fallbacks")
+
+    def _next_deadline(self):
+        deadline = self._deadline
+        now = time.perf_counter()
+        if now > deadline + self.period:
+            # Late by more than a period: skip the missed deadlines instead of bursting
+            missed = int((now - deadline) / self.period)
+            self.overruns += missed
+            deadline += missed * self.period
+        self._deadline = deadline + self.period
+        return deadline
+
+    def _wait_until(self, deadline):
+        remaining = deadline - time.perf_counter() - self.spin
+        if remaining > 0 and self._wake.wait(remaining):
+            return False
+        while time.perf_counter() < deadline:
+            if self._stopped:
+                return False
+            time.sleep(0)  # Yield the GIL while spinning
+        return not self._stopped
+
+    def _wait_lockstep(self):
+        # Earliest time the next send may go out at the configured rate
+        earliest = self._last_send + self.period - LOCKSTEP_SLACK if self._last_send else 0.0
+        while True:
+            if not self._feedback.wait(2 * self.period):
+                if self._stopped:
+                    return False
+                # No feedback for two periods: keep the target going
+                self.fallbacks += 1
+                return self._wait_until(max(earliest, time.perf_counter()))
+            if self._stopped:
+                return False
+            self._feedback.clear()
+            if time.perf_counter() >= earliest:
+                return True
+            # Rate below the controller cycle: answer a later packet
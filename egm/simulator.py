@@ -0,0 +1,302 @@
+"""
+Local EGM controller simulator
+
+EGMSimulator plays the robot controller side of EGM on localhost:
+
+- streams EgmRobot feedback to the sensor port (the port the EGM tabs
+  listen on) at a configurable rate, paced by SendScheduler
+- applies the planned frames it receives (EgmSensor) with a first-order
+  model: every axis moves towards the target with time constant tau,
+  angles the short way round; mciConvergenceMet is set when all axes are
+  within the tolerance
+- drops packets in either direction with a given probability and delays
+  them by a one-way latency (plus uniform jitter)
+
+It speaks the protobuf wire format through egm.protocol, so it needs
+neither protobuf nor the abb_egm_pyclient submodule.
+
+Run it against the application (start EGM on port 6510 in the EGM tab):
+
+    python -m egm.simulator --port 6510 --rate 250 --loss 0.01 --latency 2
+
+Author: Sunny24
+Date: May 21, 2025
+"""
+
+import argparse
+import heapq
+import logging
+import math
+import random
+import socket
+import sys
+import threading
+import time
+from collections import deque
+
+from .loop_stats import POSITION_KEYS
+from .protocol import encode_robot_message, decode_sensor_message, EGMDecodeError
+from .send_scheduler import SendScheduler, DEFAULT_SEND_RATE
+
+DEFAULT_SIMULATOR_PORT = 6510
+HOME_POSE = {'x': 600.0, 'y': 0.0, 'z': 800.0, 'rx': 180.0, 'ry': 0.0, 'rz': 90.0}
+ANGLE_KEYS = ('rx', 'ry', 'rz')
+
+
+class EGMSimulator:
+    """
+    Simulated EGM controller on a UDP socket
+
+    Args:
+        port: Sensor port to send feedback to (where the EGM client listens)
+        host: Sensor host
+        rate_hz: Feedback rate (at most 250 Hz, the controller cycle)
+        tau: Time constant of the first-order position response in seconds
+        loss: Probability of dropping a packet, per direction
+        latency: One-way delay in seconds, per direction
+        jitter: Extra uniform random delay in seconds (0..jitter)
+        start_pose: Initial pose dictionary (default HOME_POSE)
+        tolerance: Distance (mm / degrees, per axis) for mciConvergenceMet
+        seed: Random seed for loss and jitter (reproducible runs)
+        logger: Optional logger instance
+    """
+
+    def __init__(self, port=DEFAULT_SIMULATOR_PORT, host='127.0.0.1', rate_hz=DEFAULT_SEND_RATE, tau=0.05,
+                 loss=0.0, latency=0.0, jitter=0.0, start_pose=None, tolerance=1.0, seed=None, logger=None):
+        if not 0.0 <= loss < 1.0:
+            raise ValueError("loss must be in [0, 1)")
+        if tau <= 0:
+            raise ValueError("tau must be positive")
+        self.logger = logger or logging.getLogger('EGMSimulator')
+        self.address = (host, port)
+        self.tau = tau
+        self.loss = loss
+        self.latency = latency
+        self.jitter = jitter
+        self.tolerance = tolerance
+        self.start_pose = dict(start_pose or HOME_POSE)
+        self._random = random.Random(seed)
+        self._scheduler = SendScheduler(rate_hz, lockstep=False, summary_interval=float('inf'), logger=self.logger)
+        self._lock = threading.Lock()
+        self._outgoing = []        # Heap of (due time, counter, bytes) for delayed feedback
+        self._incoming = deque()   # (due time, pose) of received planned frames
+        self._wake = threading.Condition()
+        self._threads = []
+        self._socket = None
+        self.running = False
+        self.reset()
+
+    def reset(self):
+        """Back to the start pose with cleared counters"""
+        with self._lock:
+            self.pose = dict(self.start_pose)
+            self.target = None
+            self.seqno = 0
+            self.sent = 0
+            self.dropped_out = 0
+            self.received = 0
+            self.dropped_in = 0
+            self.invalid = 0
+            self.last_sensor_seqno = None
+
+    @property
+    def rate_hz(self):
+        return self._scheduler.rate_hz
+
+    @property
+    def local_address(self):
+        """(host, port) the simulator sends from and receives planned frames on"""
+        return self._socket.getsockname() if self._socket else None
+
+    def start(self):
+        """Open the socket and start streaming feedback"""
+        if self.running:
+            return
+        self._socket = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+        self._socket.bind((self.address[0], 0))
+        self._socket.settimeout(0.2)
+        self.running = True
+        self._start_time = time.perf_counter()
+        self._threads = [threading.Thread(target=target, name=name, daemon=True) for target, name in (
+            (self._feedback_loop, 'EGMSimFeedback'),
+            (self._receive_loop, 'EGMSimReceive'),
+            (self._delivery_loop, 'EGMSimDelivery'))]
+        for thread in self._threads:
+            thread.start()
+        self.logger.info(f"EGM simulator sending {self.rate_hz:g} Hz feedback to {self.address[0]}:{self.address[1]}")
+
+    def stop(self):
+        """Stop the threads and close the socket"""
+        if not self.running:
+            return
+        self.running = False
+        self._scheduler.stop()
+        with self._wake:
+            self._wake.notify()
+        for thread in self._threads:
+            thread.join(timeout=1.0)
+        self._threads = []
+        self._socket.close()
+        self._socket = None
+
+    def __enter__(self):
+        self.start()
+        return self
+
+    def __exit__(self, *exc_info):
+        self.stop()
+
+    def stats(self):
+        """Packet counters, current pose and target"""
+        with self._lock:
+            return {
+                'sent': self.sent,
+                'dropped_out': self.dropped_out,
+                'received': self.received,
+                'dropped_in': self.dropped_in,
+                'invalid': self.invalid,
+                'pose': dict(self.pose),
+                'target': dict(self.target) if self.target else None,
+                'error': self._error()
+            }
+
+    def _error(self):
+        """Largest per-axis distance between pose and target (0 without a target)"""
+        if self.target is None:
+            return 0.0
+        return max(abs(self._difference(key)) for key in POSITION_KEYS)
+
+    def _difference(self, key):
+        difference = self.target[key] - self.pose[key]
+        if key in ANGLE_KEYS:
+            difference = (difference + 180.0) % 360.0 - 180.0
+        return difference
+
+    def _delay(self):
+        return self.latency + (self._random.uniform(0.0, self.jitter) if self.jitter else 0.0)
+
+    def _feedback_loop(self):
+        scheduler = self._scheduler
+        scheduler.start()
+        last_step = time.perf_counter()
+        while self.running:
+            if not scheduler.wait():
+                break
+            now = time.perf_counter()
+
+            # Planned frames whose (simulated) latency has elapsed
+            while self._incoming and self._incoming[0][0] <= now:
+                _, pose = self._incoming.popleft()
+                with self._lock:
+                    self.target = pose
+
+            with self._lock:
+                alpha = 1.0 - math.exp(-(now - last_step) / self.tau)
+                if self.target is not None:
+                    for key in POSITION_KEYS:
+                        self.pose[key] += alpha * self._difference(key)
+                        if key in ANGLE_KEYS:
+                            self.pose[key] = (self.pose[key] + 180.0) % 360.0 - 180.0
+                self.seqno += 1
+                elapsed = now - self._start_time
+                data = encode_robot_message(self.seqno, int(elapsed * 1000), self.pose, planned=self.target,
+                                            convergence_met=self.target is not None and self._error() <= self.tolerance,
+                                            clock=(int(elapsed), int(elapsed % 1 * 1e6)))
+            last_step = now
+
+            if self.loss and self._random.random() < self.loss:
+                with self._lock:
+                    self.dropped_out += 1
+                continue
+            delay = self._delay()
+            if delay > 0:
+                with self._wake:
+                    heapq.heappush(self._outgoing, (now + delay, self.seqno, data))
+                    self._wake.notify()
+            else:
+                self._send(data)
+
+    def _send(self, data):
+        try:
+            self._socket.sendto(data, self.address)
+            with self._lock:
+                self.sent += 1
+        except OSError as e:
+            if self.running:
+                self.logger.debug(f"Feedback send failed: {e}")
+
+    def _delivery_loop(self):
+        """Send delayed feedback packets when they are due"""
+        while self.running:
+            with self._wake:
+                if not self._outgoing:
+                    self._wake.wait(0.1)
+                    continue
+                due, _, data = self._outgoing[0]
+                remaining = due - time.perf_counter()
+                if remaining > 0:
+                    self._wake.wait(remaining)
+                    continue
+                heapq.heappop(self._outgoing)
+            self._send(data)
+
+    def _receive_loop(self):
+        while self.running:
+            try:
+                data, _ = self._socket.recvfrom(1024)
+            except socket.timeout:
+                continue
+            except OSError:
+                if self.running:
+                    time.sleep(0.05)
+                continue
+            try:
+                message = decode_sensor_message(data)
+            except EGMDecodeError:
+                with self._lock:
+                    self.invalid += 1
+                continue
+            if self.loss and self._random.random() < self.loss:
+                with self._lock:
+                    self.dropped_in += 1
+                continue
+            with self._lock:
+                self.received += 1
+                self.last_sensor_seqno = message['seqno']
+            if message['planned'] is not None:
+                self._incoming.append((time.perf_counter() + self._delay(), message['planned']))
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Simulated ABB EGM controller on localhost")
+    parser.add_argument('--port', type=int, default=DEFAULT_SIMULATOR_PORT, help='Sensor UDP port (default: 6510)')
+    parser.add_argument('--host', default='127.0.0.1', help='Sensor host (default: 127.0.0.1)')
+    parser.add_argument('--rate', type=float, default=DEFAULT_SEND_RATE, help='Feedback rate in Hz (default: 250)')
+    parser.add_argument('--tau', type=float, default=50.0, help='Response time constant in ms (default: 50)')
+    parser.add_argument('--loss', type=float, default=0.0, help='Packet loss probability per direction (default: 0)')
+    parser.add_argument('--latency', type=float, default=0.0, help='One-way latency in ms (default: 0)')
+    parser.add_argument('--jitter', type=float, default=0.0, help='Extra random latency in ms (default: 0)')
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s %(levelname)s %(message)s')
+    simulator = EGMSimulator(args.port, args.host, args.rate, args.tau / 1000.0, args.loss,
+                             args.latency / 1000.0, args.jitter / 1000.0)
+    simulator.start()
+    try:
+        while True:
+            time.sleep(5.0)
+            stats = simulator.stats()
+            pose = stats['pose']
+            simulator.logger.info(
+                f"sent {stats['sent']} (dropped {stats['dropped_out']}), received {stats['received']} "
+                f"(dropped {stats['dropped_in']}, invalid {stats['invalid']}), "
+                f"pose [{', '.join(f'{pose[key]:.1f}' for key in POSITION_KEYS)}], error {stats['error']:.2f}")
+    except KeyboardInterrupt:
+        pass
+    finally:
+        simulator.stop()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,100 @@
+"""
+Target mailbox between the GUI thread and the EGM sender
+
+Producers (sliders, ESP32 wrist estimates) publish Cartesian targets on the
+GUI thread; the EGM sender reads the newest one every cycle without calling
+into Qt. TargetMailbox is a single-writer / single-reader seqlock over two
+fixed NumPy slots:
+
+- publish() writes the slot the reader is not using, then bumps the
+  sequence number (a single reference assignment)
+- read() copies the current slot and retries if the sequence number moved
+  while it was copying, so it never returns a half-written target
+
+Neither side takes a lock or allocates per call.
+
+Author: Sunny24
+Date: May 21, 2025
+"""
+
+import time
+
+import numpy as np
+
+from .loop_stats import POSITION_KEYS
+
+
+class TargetMailbox:
+    """
+    Latest Cartesian target (x, y, z, rx, ry, rz), sequence-stamped
+
+    publish() must only be called from one thread (the GUI thread) and
+    read() from one other thread (the EGM sender).
+
+    Args:
+        size: Number of values per target
+    """
+
+    def __init__(self, size=len(POSITION_KEYS)):
+        self.size = size
+        self._slots = np.zeros((2, size), dtype=np.float64)
+        self._stamps = [0.0, 0.0]
+        self._seq = 0  # 0 = nothing published yet
+
+    @property
+    def seq(self):
+        """Sequence number of the newest target (0 if none)"""
+        return self._seq
+
+    def publish(self, values, timestamp=None):
+        """
+        Publish a new target
+
+        Args:
+            values: Sequence of `size` numbers (x, y, z, rx, ry, rz)
+            timestamp: time.perf_counter() of the measurement (default: now)
+
+        Returns:
+            Sequence number of the published target
+        """
+        seq = self._seq + 1
+        slot = seq & 1
+        self._slots[slot] = values
+        self._stamps[slot] = time.perf_counter() if timestamp is None else timestamp
+        self._seq = seq
+        return seq
+
+    def publish_pose(self, pose, timestamp=None):
+        """Publish a target given as a dictionary with the keys x, y, z, rx, ry, rz"""
+        return self.publish([pose[key] for key in POSITION_KEYS], timestamp)
+
+    def read(self, out=None):
+        """
+        Copy the newest target
+
+        Args:
+            out: Optional float64 array of `size` values to copy into
+
+        Returns:
+            (seq, values, timestamp); seq is 0 and values is None if nothing
+            has been published
+        """
+        if out is None:
+            out = np.empty(self.size, dtype=np.float64)
+        while True:
+            seq = self._seq
+            if not seq:
+                return 0, None, 0.0
+            slot = seq & 1
+            out[:] = self._slots[slot]
+            timestamp = self._stamps[slot]
+            if self._seq == seq:
+                # The writer only touches the other slot until it publishes again
+                return seq, out, timestamp
+
+    def read_pose(self):
+        """Newest target as a dictionary (None if nothing has been published)"""
+        seq, values, _ = self.read()
+        if not seq:
+            return None
+        return dict(zip(POSITION_KEYS, values.tolist()))
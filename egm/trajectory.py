@@ -0,0 +1,309 @@
+"""
+Trajectory interpolation between EGM target producers and the sender
+
+Sliders and the ESP32 wrist estimate change the target in steps at UI
+rates (~20 Hz). Sending those steps straight to the controller gives jerky
+motion and trips EGM supervision. TrajectoryInterpolator turns the newest
+target into a setpoint per send, sampled at the EGM rate:
+
+- min_jerk: quintic segment from the current setpoint, velocity and
+  acceleration to the target (at rest). A new target mid-motion starts a
+  new segment from the current state, so velocity and acceleration stay
+  continuous. The duration is the shortest one that keeps every axis
+  within its velocity and acceleration limit.
+- linear: constant velocity along a straight line; only the velocity
+  limits apply. Every new target starts from rest, so the velocity steps
+  at each target change; use min_jerk for smooth motion.
+- step: the target is sent unchanged (no interpolation).
+
+Positions are x, y, z (mm) and rx, ry, rz (degrees, Euler angles as sent
+by EGM); angle differences are wrapped so rotations take the short way.
+All axes are computed together as NumPy arrays.
+
+Author: Sunny24
+Date: May 21, 2025
+"""
+
+import logging
+import time
+
+import numpy as np
+
+from .loop_stats import DEFAULT_EGM_PERIOD, POSITION_KEYS
+
+PROFILE_STEP = 'step'
+PROFILE_LINEAR = 'linear'
+PROFILE_MIN_JERK = 'min_jerk'
+PROFILES = (PROFILE_MIN_JERK, PROFILE_LINEAR, PROFILE_STEP)
+
+# Per-axis limits (mm/s, mm/s^2 for x, y, z; deg/s, deg/s^2 for rx, ry, rz)
+DEFAULT_MAX_VELOCITY = (250.0, 250.0, 250.0, 45.0, 45.0, 45.0)
+DEFAULT_MAX_ACCELERATION = (1000.0, 1000.0, 1000.0, 180.0, 180.0, 180.0)
+
+ANGLE_AXES = np.array([False, False, False, True, True, True])
+
+# Peak velocity and acceleration of a rest-to-rest minimum-jerk move of
+# distance d and duration T are 1.875 d/T and 5.7735 d/T^2
+MIN_JERK_PEAK_VELOCITY = 1.875
+MIN_JERK_PEAK_ACCELERATION = 10.0 / np.sqrt(3.0)
+
+_CHECK_POINTS = np.linspace(0.0, 1.0, 33)  # Normalised times where limits are checked
+_MAX_STRETCH_ITERATIONS = 64
+
+
+def wrap_angles(values):
+    """Wrap the angle axes of one or more poses to [-180, 180) degrees"""
+    values = np.array(values, dtype=np.float64)
+    values[..., ANGLE_AXES] = (values[..., ANGLE_AXES] + 180.0) % 360.0 - 180.0
+    return values
+
+
+def quintic_coefficients(p0, v0, a0, distance, duration):
+    """
+    Coefficients of a quintic from (p0, v0, a0) to (p0 + distance, 0, 0)
+
+    Args:
+        p0, v0, a0: Start position, velocity and acceleration per axis
+        distance: Displacement per axis
+        duration: Segment duration in seconds
+
+    Returns:
+        Array of shape (6, axes): coefficients of t^0 ... t^5
+    """
+    T = duration
+    return np.array([
+        p0,
+        v0,
+        a0 / 2.0,
+        (20.0 * distance - 12.0 * v0 * T - 3.0 * a0 * T ** 2) / (2.0 * T ** 3),
+        (-30.0 * distance + 16.0 * v0 * T + 3.0 * a0 * T ** 2) / (2.0 * T ** 4),
+        (12.0 * distance - 6.0 * v0 * T - a0 * T ** 2) / (2.0 * T ** 5)
+    ])
+
+
+def evaluate_polynomial(coefficients, t, derivative=0):
+    """
+    Evaluate per-axis polynomials at one or more times
+
+    Args:
+        coefficients: Array (degree + 1, axes), lowest order first
+        t: Time or array of times from the start of the segment
+        derivative: 0 = position, 1 = velocity, 2 = acceleration
+
+    Returns:
+        Array (axes,) for a scalar t, else (len(t), axes)
+    """
+    t = np.asarray(t, dtype=np.float64)
+    order = np.arange(coefficients.shape[0])
+    factors = np.ones(len(order))
+    for k in range(derivative):
+        factors = factors * np.clip(order - k, 0, None)
+    powers = np.clip(order - derivative, 0, None)
+    return (t[..., None] ** powers * factors) @ coefficients
+
+
+def _limit_ratio(distance, v0, a0, duration, velocity_limit, acceleration_limit):
+    """How far a quintic segment of this duration exceeds the limits (<= 1 when within)"""
+    coefficients = quintic_coefficients(np.zeros_like(distance), v0, a0, distance, duration)
+    times = _CHECK_POINTS * duration
+    velocity_ratio = np.max(np.abs(evaluate_polynomial(coefficients, times, 1)) / velocity_limit)
+    acceleration_ratio = np.max(np.abs(evaluate_polynomial(coefficients, times, 2)) / acceleration_limit)
+    return max(velocity_ratio, np.sqrt(acceleration_ratio))
+
+
+def segment_duration(distance, v0, a0, max_velocity, max_acceleration, profile=PROFILE_MIN_JERK):
+    """
+    Shortest duration of a segment that stays within the per-axis limits
+
+    Args:
+        distance: Displacement per axis
+        v0, a0: Start velocity and acceleration per axis (min_jerk only)
+        max_velocity, max_acceleration: Per-axis limits
+        profile: PROFILE_MIN_JERK or PROFILE_LINEAR
+
+    Returns:
+        Duration in seconds (0 when nothing needs to move). When no duration
+        meets the limits (a reversal from a fast, accelerating start), the one
+        closest to them, and a warning is logged
+    """
+    magnitude = np.abs(distance)
+    if profile == PROFILE_LINEAR:
+        return float(np.max(magnitude / max_velocity))
+    if not magnitude.any() and not np.any(v0) and not np.any(a0):
+        return 0.0
+    # Rest-to-rest estimate (plus time to stop), then stretch until the sampled profile is within limits
+    duration = max(float(np.max(MIN_JERK_PEAK_VELOCITY * magnitude / max_velocity)),
+                   float(np.max(np.sqrt(MIN_JERK_PEAK_ACCELERATION * magnitude / max_acceleration))),
+                   float(np.max(np.abs(v0) / max_acceleration)), 1e-3)
+    # The start state is given: a start above a limit only has to not grow further
+    velocity_limit = np.maximum(max_velocity, np.abs(v0))
+    acceleration_limit = np.maximum(max_acceleration, np.abs(a0))
+    best_ratio, best_duration = np.inf, duration
+    for _ in range(_MAX_STRETCH_ITERATIONS):
+        ratio = _limit_ratio(distance, v0, a0, duration, velocity_limit, acceleration_limit)
+        if ratio <= 1.001:
+            return duration
+        if not ratio < best_ratio:
+            # A longer segment also holds a0 for longer and overshoots more: a
+            # reversal from a fast, accelerating state cannot meet the limits
+            break
+        best_ratio, best_duration = ratio, duration
+        duration *= ratio
+    logging.getLogger('TrajectoryInterpolator').warning(
+        f"Segment exceeds the limits by {best_ratio:.3f}x at its best duration ({best_duration:.3f}s)")
+    return best_duration
+
+
+def resample(start, target, profile=PROFILE_MIN_JERK, max_velocity=DEFAULT_MAX_VELOCITY,
+             max_acceleration=DEFAULT_MAX_ACCELERATION, period=DEFAULT_EGM_PERIOD):
+    """
+    Setpoints of a rest-to-rest move at the EGM rate
+
+    Args:
+        start, target: Poses (x, y, z, rx, ry, rz)
+        profile: One of PROFILES
+        max_velocity, max_acceleration: Per-axis limits
+        period: Sample period in seconds
+
+    Returns:
+        (times, setpoints): arrays of shape (n,) and (n, 6); the last
+        setpoint is the target
+    """
+    interpolator = TrajectoryInterpolator(profile, max_velocity, max_acceleration)
+    interpolator.reset(start, now=0.0)
+    interpolator.set_target(target, now=0.0)
+    count = int(np.ceil(interpolator.duration / period)) + 1
+    times = np.arange(count) * period
+    return times, interpolator.sample_many(times)
+
+
+class TrajectoryInterpolator:
+    """
+    Smooths a stepwise target into per-send setpoints
+
+    Only the EGM sender thread uses an instance: it calls update() with the
+    newest target on every send.
+
+    Args:
+        profile: One of PROFILES
+        max_velocity: Per-axis velocity limits (mm/s, deg/s)
+        max_acceleration: Per-axis acceleration limits (mm/s^2, deg/s^2)
+
+    Raises:
+        ValueError: If profile is unknown or a limit is not positive
+    """
+
+    def __init__(self, profile=PROFILE_MIN_JERK, max_velocity=DEFAULT_MAX_VELOCITY,
+                 max_acceleration=DEFAULT_MAX_ACCELERATION):
+        self.configure(profile, max_velocity, max_acceleration)
+        self.reset()
+
+    def configure(self, profile, max_velocity=None, max_acceleration=None):
+        """Change the profile and/or limits (applies from the next target)"""
+        if profile not in PROFILES:
+            raise ValueError(f"Unknown profile {profile!r}, expected one of {PROFILES}")
+        if max_velocity is not None:
+            max_velocity = np.array(max_velocity, dtype=np.float64)
+            if max_velocity.shape != (len(POSITION_KEYS),) or (max_velocity <= 0).any():
+                raise ValueError("max_velocity needs 6 positive values")
+            self.max_velocity = max_velocity
+        if max_acceleration is not None:
+            max_acceleration = np.array(max_acceleration, dtype=np.float64)
+            if max_acceleration.shape != (len(POSITION_KEYS),) or (max_acceleration <= 0).any():
+                raise ValueError("max_acceleration needs 6 positive values")
+            self.max_acceleration = max_acceleration
+        self.profile = profile
+
+    @property
+    def active(self):
+        """True once the start position is known"""
+        return self._coefficients is not None
+
+    def reset(self, position=None, now=None):
+        """
+        Forget the current motion
+
+        Args:
+            position: Pose to hold at rest (e.g. the robot's feedback
+                position); None waits for the first target
+            now: time.perf_counter() (default: now)
+        """
+        self._target = None
+        self._coefficients = None
+        self.duration = 0.0
+        if position is not None:
+            now = time.perf_counter() if now is None else now
+            self._hold(wrap_angles(position), now)
+
+    def update(self, target, now=None):
+        """
+        Setpoint to send now
+
+        Args:
+            target: Newest target pose (x, y, z, rx, ry, rz)
+            now: time.perf_counter() of the send (default: now)
+
+        Returns:
+            Array of 6 values
+        """
+        now = time.perf_counter() if now is None else now
+        if self._target is None or not np.array_equal(target, self._target):
+            self.set_target(target, now)
+        return self.sample(now)
+
+    def set_target(self, target, now=None):
+        """Start a segment from the current state to target"""
+        now = time.perf_counter() if now is None else now
+        target = np.array(target, dtype=np.float64)
+        self._target = target.copy()
+        goal = wrap_angles(target)
+        if self.profile == PROFILE_STEP or not self.active:
+            self._hold(goal, now)
+            return
+
+        p0 = self.sample(now)
+        v0 = self._evaluate(now, 1)
+        a0 = self._evaluate(now, 2)
+        distance = goal - p0
+        distance[ANGLE_AXES] = (distance[ANGLE_AXES] + 180.0) % 360.0 - 180.0  # Short way round
+
+        if self.profile == PROFILE_LINEAR:
+            v0 = a0 = np.zeros_like(distance)
+        duration = segment_duration(distance, v0, a0, self.max_velocity, self.max_acceleration, self.profile)
+        if duration <= 0.0:
+            self._hold(goal, now)
+            return
+        if self.profile == PROFILE_LINEAR:
+            coefficients = np.zeros((2, len(distance)))
+            coefficients[0] = p0
+            coefficients[1] = distance / duration
+        else:
+            coefficients = quintic_coefficients(p0, v0, a0, distance, duration)
+        self._start = now
+        self.duration = duration
+        self._coefficients = coefficients
+        self._end = p0 + distance
+
+    def sample(self, now):
+        """Setpoint at time now (the target once the segment has ended)"""
+        elapsed = now - self._start
+        if elapsed >= self.duration:
+            return wrap_angles(self._end)
+        return wrap_angles(evaluate_polynomial(self._coefficients, max(elapsed, 0.0)))
+
+    def sample_many(self, times):
+        """Setpoints at an array of times, shape (len(times), 6)"""
+        elapsed = np.clip(np.asarray(times, dtype=np.float64) - self._start, 0.0, self.duration)
+        return wrap_angles(evaluate_polynomial(self._coefficients, elapsed))
+
+    def _evaluate(self, now, derivative):
+        elapsed = now - self._start
+        if elapsed >= self.duration:
+            return np.zeros(len(POSITION_KEYS))
+        return evaluate_polynomial(self._coefficients, max(elapsed, 0.0), derivative)
+
+    def _hold(self, position, now):
+        self._start = now
+        self.duration = 0.0
+        self._coefficients = np.array([position], dtype=np.float64)
+        self._end = np.array(position, dtype=np.float64)
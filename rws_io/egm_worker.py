@@ -0,0 +1,115 @@
+"""
+Qt adapter for the EGM engine
+
+egm.engine.EGMEngine runs the EGM session on its own threads and reports
+through plain callbacks. EGMWorker re-emits them as Qt signals, so the EGM
+tab and the robot control tab can update their widgets on the GUI thread,
+and keeps the slider helpers that touch widgets on the Qt side.
+
+Author: Sunny24
+Date: May 21, 2025
+"""
+
+from PyQt5.QtCore import QObject, pyqtSignal
+
+from egm.engine import EGMEngine, DEFAULT_SOURCE
+from egm.send_scheduler import DEFAULT_SEND_RATE
+from egm.trajectory import PROFILE_MIN_JERK
+
+
+class EGMWorker(QObject):
+    """Signals and GUI-side helpers around one EGMEngine"""
+    position_update = pyqtSignal(dict)
+    status_update = pyqtSignal(str)
+    error = pyqtSignal(str)
+    connected = pyqtSignal(bool)
+    debug_update = pyqtSignal(str)
+
+    def __init__(self, name="EGM", parent=None):
+        super().__init__(parent)
+        self.engine = EGMEngine(name)
+        # Called on the engine's threads; the queued connections hand them to the GUI thread
+        self.engine.on_position = self.position_update.emit
+        self.engine.on_status = self.status_update.emit
+        self.engine.on_error = self.error.emit
+        self.engine.on_connected = self.connected.emit
+        self.engine.on_debug = self.debug_update.emit
+
+    @property
+    def running(self):
+        return self.engine.running
+
+    @property
+    def egm_client(self):
+        return self.engine.egm_client
+
+    @property
+    def last_position(self):
+        return self.engine.last_position
+
+    @property
+    def loop_stats(self):
+        return self.engine.loop_stats
+
+    @property
+    def send_scheduler(self):
+        return self.engine.send_scheduler
+
+    @property
+    def target_mailbox(self):
+        """Mailbox of the slider target"""
+        return self.engine.target(DEFAULT_SOURCE)
+
+    @property
+    def control_mode(self):
+        return self.engine.source
+
+    def configure(self, port, send_rate=DEFAULT_SEND_RATE, lockstep=True, profile=PROFILE_MIN_JERK):
+        """Configure the EGM port, the send rate and the motion profile (see EGMEngine.configure)"""
+        self.engine.configure(port, send_rate, lockstep, profile)
+
+    def start(self):
+        """Start the session (raises egm.engine.EGMPortInUseError if another tab uses the port)"""
+        self.engine.start()
+
+    def stop(self):
+        """Stop the session and release the port"""
+        self.engine.stop()
+
+    def set_control_mode(self, mode):
+        """Set the control mode (SLIDERS, ESP32)"""
+        self.engine.set_source(mode)
+
+    def set_esp32_position(self, position):
+        """Publish the current ESP32 wrist position as the ESP32 target"""
+        self.engine.target("ESP32").publish_pose(position)
+
+    def send_cartesian_target(self, x, y, z, rx, ry, rz):
+        """Send a cartesian target directly (initial positioning, sequence reset)"""
+        return self.engine.send_cartesian_target(x, y, z, rx, ry, rz)
+
+    def reset_sequence_counter(self):
+        """Reset the sequence counter to ensure fresh commands"""
+        return self.engine.reset_sequence_counter()
+
+    def update_sliders_with_position(self, spinboxes, sliders):
+        """Update UI sliders with current position if they don't have focus"""
+        if not self.last_position:
+            return
+
+        pos = self.last_position
+        for key in ('x', 'y', 'z', 'rx', 'ry', 'rz'):
+            self._update_if_not_focused(spinboxes[key], sliders[key], pos[key])
+
+    def _update_if_not_focused(self, spinbox, slider, value):
+        """Update spinbox and slider if they don't have focus"""
+        if not spinbox.hasFocus() and not slider.hasFocus():
+            # Temporarily block signals to prevent feedback loops
+            spinbox.blockSignals(True)
+            slider.blockSignals(True)
+
+            spinbox.setValue(value)
+            slider.setValue(int(value))
+
+            spinbox.blockSignals(False)
+            slider.blockSignals(False)
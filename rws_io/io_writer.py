@@ -0,0 +1,45 @@
+"""
+Qt bridge for the background IO writer
+
+IOWriteQueue (API/abb_robot_utils.py) reports completed writes through plain
+callbacks on its worker thread. IOWriteNotifier re-emits them as a Qt signal so
+tabs can update labels and logs safely on the GUI thread.
+
+Author: Sunny24
+Date: May 21, 2025
+"""
+
+from PyQt5.QtCore import QObject, pyqtSignal
+
+
+class IOWriteNotifier(QObject):
+    """Emits write_finished for every write completed by robot.io.writer"""
+
+    # signal name, value, success, error message
+    write_finished = pyqtSignal(str, str, bool, str)
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self.writer = None
+
+    def attach(self, robot):
+        """
+        Start listening to the IO writer of a robot
+
+        Args:
+            robot: ABBRobot instance (or None to detach)
+        """
+        self.detach()
+        if robot is not None and hasattr(robot.io, 'writer'):
+            self.writer = robot.io.writer
+            self.writer.callbacks.append(self._on_write_done)
+
+    def detach(self):
+        """Stop listening to the current IO writer"""
+        if self.writer is not None and self._on_write_done in self.writer.callbacks:
+            self.writer.callbacks.remove(self._on_write_done)
+        self.writer = None
+
+    def _on_write_done(self, signal, value, success, error):
+        # Called on the writer thread; the queued connection hands it to the GUI thread
+        self.write_finished.emit(str(signal), str(value), bool(success), error or '')
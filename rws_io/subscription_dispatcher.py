@@ -0,0 +1,122 @@
+"""
+Subscription event dispatcher
+
+RWSWebSocketClient delivers every subscription message on the ws4py thread.
+SubscriptionDispatcher takes those raw messages, decodes them on its own
+thread, coalesces bursts so only the latest value per resource is kept, and
+emits one batch per frame interval. batch_ready is delivered to GUI-thread
+slots through a queued connection, so widgets are only touched on the GUI
+thread and at a bounded rate.
+
+Author: Sunny24
+Date: May 21, 2025
+"""
+
+import threading
+import time
+import logging
+from collections import deque
+
+from PyQt5.QtCore import QThread, pyqtSignal
+
+from API.abb_robot_utils import SubscriptionDecoder, SubscriptionEvents, EventCoalescer
+
+
+class SubscriptionDispatcher(QThread):
+    """Decode and coalesce subscription messages off the GUI thread"""
+
+    # SubscriptionEvents batch with the latest value per resource
+    batch_ready = pyqtSignal(object)
+
+    def __init__(self, decoder=None, frame_interval=0.05, max_backlog=5000, logger=None):
+        """
+        Initialize the dispatcher
+
+        Args:
+            decoder: SubscriptionDecoder to use (a new one is created if None)
+            frame_interval: Minimum time between two batches in seconds
+            max_backlog: Maximum number of undecoded messages kept; the oldest
+                are dropped first when the decoder falls behind
+            logger: Optional logger instance
+        """
+        super().__init__()
+        self.logger = logger or logging.getLogger('SubscriptionDispatcher')
+        self.decoder = decoder or SubscriptionDecoder(self.logger)
+        self.frame_interval = frame_interval
+        self.coalescer = EventCoalescer()
+
+        self._inbox = deque(maxlen=max_backlog)
+        self._wakeup = threading.Event()
+        self.running = False
+        self.dropped = 0
+
+    def submit(self, xml_str):
+        """
+        Queue a raw subscription message (called on the WebSocket thread)
+
+        Args:
+            xml_str: XML string from WebSocket event
+        """
+        if len(self._inbox) == self._inbox.maxlen:
+            self.dropped += 1
+        self._inbox.append(xml_str)
+        self._wakeup.set()
+
+    def submit_events(self, events):
+        """
+        Queue already decoded events (e.g. values re-read after a reconnect)
+
+        Args:
+            events: SubscriptionEvents to merge into the next batch
+        """
+        self.submit(events)
+
+    def start(self, *args):
+        """Start the dispatcher thread"""
+        # Set here, not in run(): a stop() before the thread is scheduled must stick
+        self.running = True
+        super().start(*args)
+
+    def stop(self):
+        """Stop the dispatcher thread"""
+        self.running = False
+        self._wakeup.set()
+        self.wait(2000)
+
+    def stats(self):
+        """Get dispatcher statistics (coalescer counters plus backlog and drops)"""
+        stats = self.coalescer.stats()
+        stats['backlog'] = len(self._inbox)
+        stats['dropped'] = self.dropped
+        return stats
+
+    def run(self):
+        last_emit = 0.0
+        while self.running:
+            # Sleep until a message arrives or the pending batch is due
+            timeout = None
+            if self.coalescer.has_pending():
+                timeout = max(0.0, last_emit + self.frame_interval - time.monotonic())
+            self._wakeup.wait(timeout)
+            self._wakeup.clear()
+
+            # Decode everything received so far
+            while self._inbox:
+                try:
+                    xml_str = self._inbox.popleft()
+                except IndexError:
+                    break
+                try:
+                    if isinstance(xml_str, SubscriptionEvents):
+                        self.coalescer.add(xml_str)
+                    else:
+                        self.coalescer.add(self.decoder.decode(xml_str))
+                except Exception as e:
+                    self.logger.error(f"Error decoding subscription event: {str(e)}")
+
+            # Emit at most one batch per frame interval
+            now = time.monotonic()
+            if self.coalescer.has_pending() and now - last_emit >= self.frame_interval:
+                batch = self.coalescer.drain()
+                last_emit = now
+                self.batch_ready.emit(batch)
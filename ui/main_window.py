@@ -26,6 +26,8 @@ from ui.widgets.status_widget import StatusWidget
 
 # Import backend robot controller
 from API.abb_robot import ABBRobot
+from rws_io.subscription_dispatcher import SubscriptionDispatcher
+from vision.camera_service import shared_camera_service
 
 
 class ABBRobotControlUI(QMainWindow):
@@ -40,6 +42,9 @@ class ABBRobotControlUI(QMainWindow):
         # Initialize robot object
         self.robot = None
         
+        # Decodes and batches subscription events (created in setup_subscriptions)
+        self.subscription_dispatcher = None
+        
         # Setup UI
         self.setWindowTitle("ABB Robot Control")
         self.setMinimumSize(1280, 800)
@@ -86,7 +91,10 @@ class ABBRobotControlUI(QMainWindow):
         self.rapid_tab = RAPIDTab()
         self.tab_widget.addTab(self.rapid_tab, "RAPID")
         
-        self.robot_control_tab = RobotControlTab()
+        # Camera and hand detector shared by every tab that shows video
+        self.camera_service = shared_camera_service()
+        
+        self.robot_control_tab = RobotControlTab(camera_service=self.camera_service)
         self.tab_widget.addTab(self.robot_control_tab, "Robot Control")
         
         self.system_tab = SystemTab()
@@ -307,6 +315,7 @@ class ABBRobotControlUI(QMainWindow):
             try:
                 # Unsubscribe from all subscriptions
                 self.robot.unsubscribe_all()
+                self.stop_subscription_dispatcher()
                 
                 # Disconnect
                 self.robot.disconnect()
@@ -371,9 +380,12 @@ class ABBRobotControlUI(QMainWindow):
         try:
             # Get a list of all IO signals for subscription
             io_signals_list = []
+            signals_result = None
             try:
                 # Get all signals
                 signals_result = self.robot.io.list_signals()
+                # Reuse the signal list to resolve signal names without extra searches
+                self.robot.io.prewarm_signal_cache(signals_result)
                 if signals_result.get('status_code') == 200 and 'content' in signals_result:
                     if '_embedded' in signals_result['content'] and 'resources' in signals_result['content']['_embedded']:
                         signals = signals_result['content']['_embedded']['resources']
@@ -396,23 +408,31 @@ class ABBRobotControlUI(QMainWindow):
                 collect_rapid=True,
                 collect_motion=True,
                 collect_vision=False,
-                io_signals=io_signals_list
+                io_signals=io_signals_list,
+                signals_result=signals_result,
+                progress_callback=self.connection_tab.set_progress
             )
+            self.connection_tab.clear_progress()
             
             # Get initial values
             initial_values = self.robot.get_initial_values()
-            print(initial_values)
+            self.logger.debug(f"Collected {len(initial_values)} initial values")
             # Store initial values in each tab
             self.panel_tab.set_initial_values(initial_values)
             self.io_tab.set_initial_values(initial_values)
             self.rapid_tab.set_initial_values(initial_values)
             self.system_tab.set_initial_values(initial_values)
-            # Create a custom callback for subscription data
-            def subscription_callback(xml_str):
-                self.handle_subscription_data(xml_str)
+            # Decode and coalesce events off the GUI thread; batches arrive via a queued signal
+            self.stop_subscription_dispatcher()
+            self.subscription_dispatcher = SubscriptionDispatcher(
+                decoder=self.robot.subscription_decoder, logger=self.logger)
+            self.subscription_dispatcher.batch_ready.connect(self.handle_subscription_events)
+            self.subscription_dispatcher.start()
+            # Values re-read after a dropped WebSocket is reconnected go through the same batches
+            self.robot.subscription_supervisor.resync_callbacks.append(self.subscription_dispatcher.submit_events)
             
-            # Create subscription with the callback
-            subscription_id = self.robot.subscribe_to_collected_resources(subscription_callback)
+            # Create subscription with the callback (runs on the WebSocket thread)
+            subscription_id = self.robot.subscribe_to_collected_resources(self.subscription_dispatcher.submit)
             
             self.logger.info(f"Created subscription: {subscription_id}")
             
@@ -421,28 +441,36 @@ class ABBRobotControlUI(QMainWindow):
             import traceback
             self.logger.debug(f"Stack trace: {traceback.format_exc()}")
     
+    def stop_subscription_dispatcher(self):
+        """Stop the subscription event dispatcher thread if it is running"""
+        if self.subscription_dispatcher is not None:
+            if self.robot and self.subscription_dispatcher.submit_events in self.robot.subscription_supervisor.resync_callbacks:
+                self.robot.subscription_supervisor.resync_callbacks.remove(self.subscription_dispatcher.submit_events)
+            self.subscription_dispatcher.batch_ready.disconnect(self.handle_subscription_events)
+            self.subscription_dispatcher.stop()
+            self.subscription_dispatcher = None
+    
     def handle_subscription_data(self, xml_str):
-        """Handle subscription data received from robot"""
-        try:
-            # Log the raw XML for debugging (limited length)
-            self.logger.debug(f"Received subscription data: {xml_str[:200]}...")
-            
-            # Use the subscription parser from the robot object
-            if not hasattr(self.robot, 'subscription_parser'):
-                from API.abb_robot_utils import SubscriptionParser
-                self.robot.subscription_parser = SubscriptionParser(self.logger)
+        """Handle a single subscription message synchronously (must be called on the GUI thread)"""
+        # Log the raw XML for debugging (limited length)
+        self.logger.debug(f"Received subscription data: {xml_str[:200]}...")
+        self.handle_subscription_events(self.robot.subscription_decoder.decode(xml_str))
+    
+    def handle_subscription_events(self, events):
+        """Update the UI from a batch of decoded subscription events (GUI thread)"""
+        if not self.robot:
+            return
             
-            # Parse different types of events
-            panel_data = self.robot.subscription_parser.parse_event_xml(xml_str)
-            io_data = self.robot.io.processor.parse_io_event_xml(xml_str)
-            rapid_data = self.robot.subscription_parser.parse_rapid_event_xml(xml_str)
-            motion_data = self.robot.subscription_parser.parse_motion_event_xml(xml_str)
-            user_data = self.robot.subscription_parser.parse_user_event_xml(xml_str)
-            print(user_data)
+        try:
+            self.logger.debug(f"Applying subscription batch: {len(events.records)} events, {len(events.io)} IO signals")
+            panel_data = events.panel
+            rapid_data = events.rapid
+            motion_data = events.motion
+            user_data = events.user
             # Update UI based on event data
             if panel_data:
                 # Process panel events
-                self.logger.info(f"Received panel event: {panel_data}")
+                self.logger.debug(f"Received panel event: {panel_data}")
                 
                 # Prepare update data with only fields that were received in event
                 panel_update = {}
@@ -451,7 +479,7 @@ class ABBRobotControlUI(QMainWindow):
                     # Convert controller_state to motor_state correctly
                     ctrl_state = panel_data['controller_state']
                     motor_state = "Running" if ctrl_state.lower() == "motoron" else "Stopped"
-                    self.logger.info(f"Updated motor state to: {motor_state}")
+                    self.logger.debug(f"Updated motor state to: {motor_state}")
                     # Update only the motor state
                     self.connection_tab.update_motor_state(motor_state)
                     self.panel_tab.update_motor_state(motor_state)
@@ -459,7 +487,7 @@ class ABBRobotControlUI(QMainWindow):
                 if 'operation_mode' in panel_data:
                     # Only include op_mode if it was in the event
                     panel_update['op_mode'] = panel_data['operation_mode']
-                    self.logger.info(f"Updated operation mode to: {panel_data['operation_mode']}")
+                    self.logger.debug(f"Updated operation mode to: {panel_data['operation_mode']}")
                     # Update only operation mode in connection tab
                     self.connection_tab.update_operation_mode(panel_data['operation_mode'])
                     self.panel_tab.update_operation_mode(panel_data['operation_mode'])
@@ -468,60 +496,27 @@ class ABBRobotControlUI(QMainWindow):
                     # Only include speed_ratio if it was in the event
                     panel_update['speed_ratio'] = panel_data['speed_ratio']
                     self.panel_tab.update_speed_ratio(panel_data['speed_ratio'])
-                    self.logger.info(f"Updated speed ratio to: {panel_data['speed_ratio']}")
+                    self.logger.debug(f"Updated speed ratio to: {panel_data['speed_ratio']}")
                 
-            if io_data:
-                # Process IO events
-                self.logger.info(f"Received IO event: {io_data}")
-                if hasattr(self.io_tab, 'update_signal_value'):
-                    signal_name = io_data.get('signal_name', '')
-                    signal_value = io_data.get('lvalue', '')
-                    signal_path = io_data.get('signal_path', '')
-                    
-                    # If we have a signal path but no name, try to extract the name
-                    if signal_path and not signal_name and ';state' in signal_path:
-                        try:
-                            signal_name = signal_path.split('/')[-1].split(';')[0]
-                            self.logger.debug(f"Extracted signal name {signal_name} from path {signal_path}")
-                        except Exception as e:
-                            self.logger.error(f"Error extracting signal name from path: {str(e)}")
-                    
-                    # If we have a signal path but no value, try to extract from span elements
-                    if not signal_value and 'class' in io_data:
-                        signal_value = io_data.get(io_data['class'], '')
-                        self.logger.debug(f"Extracted signal value {signal_value} from class {io_data['class']}")
-                    
-                    if signal_name and signal_value:
-                        self.logger.info(f"Updating signal {signal_name} to {signal_value}")
+            for io_data in events.io:
+                # Process IO events - one entry per signal in the message
+                self.logger.debug(f"Received IO event: {io_data}")
+                signal_name = io_data.get('signal_name', '')
+                signal_value = io_data.get('lvalue')
+                if signal_value is None:
+                    signal_value = io_data.get('value', '')
+                
+                if signal_name and signal_value:
+                    if hasattr(self.io_tab, 'update_signal_value'):
                         self.io_tab.update_signal_value(signal_name, signal_value)
-                    elif signal_path:
-                        # Try harder to extract signal name
-                        self.logger.warning(f"Signal event with incomplete data: {io_data}")
-                        if '/' in signal_path:
-                            parts = signal_path.split('/')
-                            for part in reversed(parts):
-                                if part and part != 'state' and ';' not in part:
-                                    # This is likely the signal name
-                                    signal_name = part
-                                    self.logger.info(f"Extracted alternate signal name: {signal_name}")
-                                    break
-                            
-                            # If we found a name but no value, try to get it from the event
-                            if signal_name and not signal_value:
-                                # Try various common class names for signal values
-                                for key in ['lvalue', 'value', 'state']:
-                                    if key in io_data:
-                                        signal_value = io_data[key]
-                                        self.logger.info(f"Extracted signal value {signal_value} using key {key}")
-                                        break
-                            
-                            if signal_name and signal_value:
-                                self.logger.info(f"Updating signal {signal_name} to {signal_value} (alternative method)")
-                                self.io_tab.update_signal_value(signal_name, signal_value)
+                    # Keep the background writer's view of the controller current
+                    self.robot.io.writer.note_value(signal_name, signal_value)
+                else:
+                    self.logger.warning(f"Signal event with incomplete data: {io_data}")
             
             if rapid_data and rapid_data.get('ctrlexecstate', ''):
                 # Process RAPID events
-                self.logger.info(f"Received RAPID event: {rapid_data}")
+                self.logger.debug(f"Received RAPID event: {rapid_data}")
                 rapid_exec_state = rapid_data.get('ctrlexecstate', '')
                 rapid_state = "Unknown"
                 
@@ -532,18 +527,18 @@ class ABBRobotControlUI(QMainWindow):
                 else:
                     rapid_state = "Ready"
                 
-                self.logger.info(f"Updated RAPID state to: {rapid_state}")
+                self.logger.debug(f"Updated RAPID state to: {rapid_state}")
                 self.connection_tab.update_rapid_state(rapid_state)
                 self.panel_tab.update_rapid_state(rapid_state)
                 self.rapid_tab.update_rapid_state(rapid_state)
             
             if motion_data and motion_data.get('errorstate', ''):
-                self.logger.info(f"Received motion event: {motion_data}")
+                self.logger.debug(f"Received motion event: {motion_data}")
                 self.motion_tab.update_motion_data(motion_data)
             
             if user_data and user_data.get('rmmp', ''):
                 rmmp_value = user_data.get('rmmp', '0')
-                self.logger.info(f"Received user event: {rmmp_value}")
+                self.logger.debug(f"Received user event: {rmmp_value}")
                 self.system_tab.update_rmpp_user_info(rmmp_value)
                     
             # Store timestamp of last subscription update
@@ -570,6 +565,11 @@ class ABBRobotControlUI(QMainWindow):
             # Update connection status
             connection_status = "Connected"
             status_color = "green"
+            reconnect_stats = self.robot.get_subscription_reconnect_stats()
+            reconnecting = reconnect_stats['state'] == 'reconnecting'
+            if reconnecting:
+                connection_status = f"Reconnecting ({reconnect_stats['pending']} subscription(s))"
+                status_color = "orange"
             
             # Update status and each tab
             self.status_widget.set_status(connection_status, status_color)
@@ -589,7 +589,10 @@ class ABBRobotControlUI(QMainWindow):
                 time_since_last_update = time.time() - last_update_time
                 
                 # Only perform a manual update if no subscription data received for 30 seconds
-                if time_since_last_update > 30 or last_update_time == 0:
+                # (skipped while reconnecting - missed values are re-read after the reconnect)
+                if reconnecting:
+                    self.logger.debug(f"Subscription reconnecting: {reconnect_stats}")
+                elif time_since_last_update > 30 or last_update_time == 0:
                     self.logger.info("No recent subscription data. Performing manual UI update as fallback.")
                     try:
                         # Get the current controller state directly
@@ -705,6 +708,13 @@ class ABBRobotControlUI(QMainWindow):
         if self.robot:
             self.disconnect_robot()
             
+        # Release the camera if a tab is still streaming
+        self.camera_service.close()
+        
+        # Stop EGM so the UDP port is released
+        if self.robot_control_tab.egm_worker.running:
+            self.robot_control_tab.egm_worker.stop()
+            
         # Save settings
         self.save_settings()
         
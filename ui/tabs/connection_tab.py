@@ -1,11 +1,14 @@
 from PyQt5.QtWidgets import (QWidget, QVBoxLayout, QHBoxLayout, QFormLayout, 
                            QLabel, QLineEdit, QPushButton, QComboBox, 
-                           QGroupBox, QCheckBox, QFrame, QGridLayout)
+                           QGroupBox, QCheckBox, QFrame, QGridLayout,
+                           QProgressBar)
 from PyQt5.QtCore import Qt, pyqtSignal, QSettings
 from PyQt5.QtGui import QFont, QIcon
 class ConnectionTab(QWidget):
     """Tab for robot connection settings and controls"""
     
+    PROGRESS_TEXT = "Loading initial values:"
+    
     def __init__(self, connect_callback):
         super().__init__()
         
@@ -115,6 +118,14 @@ class ConnectionTab(QWidget):
         status_layout.addWidget(QLabel("RAPID State:"), 5, 0)
         status_layout.addWidget(self.rapid_state_label, 5, 1)
 
+        # Progress of the initial value snapshot (shown while connecting)
+        self.progress_label = QLabel(self.PROGRESS_TEXT)
+        self.progress_bar = QProgressBar()
+        self.progress_bar.setTextVisible(True)
+        status_layout.addWidget(self.progress_label, 6, 0)
+        status_layout.addWidget(self.progress_bar, 6, 1)
+        self.progress_label.hide()
+        self.progress_bar.hide()
 
 
         # Apply to status group
@@ -169,12 +180,17 @@ class ConnectionTab(QWidget):
         self.status_label.setText("Connecting...")
         self.status_label.setStyleSheet("color: orange; font-weight: bold;")
         
+        # No second connect while this one runs (set_connected() takes over on success)
+        self.connect_button.setEnabled(False)
+        
         # Call the connect callback
         success = self.connect_callback(host, username, password, protocol)
         
         # If connection was successful, save to recent connections
         if success:
             self.save_to_recent_connections(host, username, password if self.save_password_check.isChecked() else "")
+        elif not self.disconnect_button.isEnabled():
+            self.connect_button.setEnabled(True)
         
     def on_disconnect_click(self):
         """Handle disconnect button click"""
@@ -215,6 +231,31 @@ class ConnectionTab(QWidget):
             self.motor_state_label.setText("N/A")
             self.rapid_state_label.setText("N/A")
     
+    def set_progress(self, done, total, text=None):
+        """Show progress of a connection step (e.g. initial value fetch)
+        
+        Args:
+            done: Completed items
+            total: Total items
+            text: Item just completed (e.g. the resource path), shown in the label
+        """
+        self.progress_label.setText(text or self.PROGRESS_TEXT)
+        self.progress_label.show()
+        self.progress_bar.show()
+        self.progress_bar.setMaximum(max(total, 1))
+        self.progress_bar.setValue(done)
+        self.progress_bar.setFormat("%v / %m")
+        # Called from a blocking step on the GUI thread: paint these two widgets
+        # now, without processing input events (which could start a second connect)
+        self.progress_label.repaint()
+        self.progress_bar.repaint()
+    
+    def clear_progress(self):
+        """Hide the progress indicator"""
+        self.progress_label.hide()
+        self.progress_bar.hide()
+        self.progress_label.setText(self.PROGRESS_TEXT)
+    
     def set_controller_info(self, controller_version, robotware_version, controller_state, motor_state, rapid_state):
         """Update controller information"""
         print("Inside set_controller_info method")
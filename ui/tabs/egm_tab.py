@@ -3,377 +3,34 @@ from PyQt5.QtWidgets import (QWidget, QVBoxLayout, QHBoxLayout, QFormLayout,
                            QGroupBox, QCheckBox, QFrame, QGridLayout,
                            QDoubleSpinBox, QSlider, QTabWidget,
                            QSpinBox, QRadioButton, QButtonGroup, QMessageBox,
-                           QTextEdit, QSplitter)
-from PyQt5.QtCore import Qt, pyqtSignal, QTimer, QThread, pyqtSlot
+                           QTextEdit, QSplitter, QTableWidget, QTableWidgetItem,
+                           QHeaderView, QFileDialog)
+from PyQt5.QtCore import Qt, pyqtSignal, QTimer, pyqtSlot
 from PyQt5.QtGui import QFont, QIcon, QColor
 
 import time
-import numpy as np
 import socket
 import traceback
 import os
-import threading
 
 # Import EGM client
-from abb_egm_pyclient.egm_client import EGMClient
 from abb_egm_pyclient import DEFAULT_UDP_PORT
 
-
-class AtomicCounter:
-    """Thread-safe counter for EGM sequence numbers"""
-    def __init__(self, initial=0):
-        self.value = initial
-        self._lock = None
-        try:
-            import threading
-            self._lock = threading.Lock()
-        except ImportError:
-            pass
-            
-    def inc(self):
-        """Increment the counter and return the new value"""
-        if self._lock:
-            with self._lock:
-                self.value += 1
-                return self.value
-        else:
-            self.value += 1
-            return self.value
-            
-    def reset(self):
-        """Reset counter to initial value"""
-        if self._lock:
-            with self._lock:
-                self.value = 0
-        else:
-            self.value = 0
-
-
-class EGMWorker(QThread):
-    """Worker thread for EGM communication"""
-    position_update = pyqtSignal(dict)
-    status_update = pyqtSignal(str)
-    error = pyqtSignal(str)
-    connected = pyqtSignal(bool)
-    debug_update = pyqtSignal(str)
-    
-    def __init__(self):
-        super().__init__()
-        self.running = False
-        self.egm_client = None
-        self.port = DEFAULT_UDP_PORT
-        self.socket = None
-        self.last_position = None  # Store the last received position
-        
-        # Control flags for thread coordination
-        self.is_sending = False
-        self.use_position_feedback = True  # Auto-echo position
-        
-    def configure(self, port):
-        """Configure the EGM client with the specified port"""
-        self.port = port
-        
-    def run(self):
-        """Main thread loop for EGM communication"""
-        self.running = True
-        self.cartesian_target = None
-        
-        try:
-            # Create EGM client with custom socket handling
-            self.debug_update.emit("Creating socket on port " + str(self.port))
-            
-            # First try to create a completely new EGM client
-            try:
-                # Important: Create EGM client first WITHOUT providing a socket
-                self.egm_client = EGMClient(port=self.port)
-                
-                # Reference the socket created by the client
-                self.socket = self.egm_client.socket
-                
-                # Ensure the send_counter is properly initialized
-                if not hasattr(self.egm_client, 'send_counter') or self.egm_client.send_counter is None:
-                    self.egm_client.send_counter = AtomicCounter()
-                
-                self.debug_update.emit("EGM client created successfully with default socket")
-                
-            except OSError as e:
-                self.debug_update.emit(f"Failed to create EGM client: {str(e)}")
-                
-                # If failed, try to create our own socket with more options
-                try:
-                    self.debug_update.emit("Attempting to create custom socket")
-                    
-                    # Close any existing socket
-                    if self.socket:
-                        try:
-                            self.socket.close()
-                        except:
-                            pass
-                        
-                    # Wait for OS to release the socket
-                    time.sleep(1)
-                    
-                    # Create a new socket
-                    self.socket = socket.socket(family=socket.AF_INET, type=socket.SOCK_DGRAM)
-                    self.socket.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
-                    
-                    # On Windows, we need SO_REUSEPORT as well if available
-                    try:
-                        self.socket.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEPORT, 1)
-                        self.debug_update.emit("Added SO_REUSEPORT option")
-                    except (AttributeError, OSError):
-                        self.debug_update.emit("SO_REUSEPORT option not available")
-                    
-                    # Set socket timeout to non-blocking
-                    self.socket.settimeout(0.5)
-                    
-                    # Try to bind the socket
-                    self.socket.bind(('', self.port))
-                    self.debug_update.emit("Custom socket bound successfully")
-                    
-                    # Create EGM client and replace its socket
-                    self.egm_client = EGMClient(port=self.port)
-                    self.egm_client.socket = self.socket
-                    
-                    # Ensure the send_counter is properly initialized
-                    if not hasattr(self.egm_client, 'send_counter') or self.egm_client.send_counter is None:
-                        self.egm_client.send_counter = AtomicCounter()
-                        
-                    self.debug_update.emit("EGM client created with custom socket")
-                    
-                except Exception as retry_e:
-                    self.error.emit(f"Failed to bind socket: {str(retry_e)}")
-                    self.debug_update.emit(f"Socket binding failed: {str(retry_e)}\n{traceback.format_exc()}")
-                    self.running = False
-                    return
-            
-            self.status_update.emit(f"Listening for EGM messages on port {self.port}")
-            
-            # Wait for first message to establish connection
-            try:
-                self.debug_update.emit("Waiting for initial EGM message...")
-                pb_robot_msg = self.egm_client.receive_msg()
-                self.connected.emit(True)
-                self.status_update.emit("EGM connection established")
-                self.debug_update.emit("Connection established with controller at " + 
-                                     str(self.egm_client.robot_controller_address))
-                
-                # Extract initial cartesian position if available
-                if hasattr(pb_robot_msg.feedBack, "cartesian") and pb_robot_msg.feedBack.cartesian.HasField("pos"):
-                    pos = pb_robot_msg.feedBack.cartesian.pos
-                    euler = pb_robot_msg.feedBack.cartesian.euler
-                    cartesian_data = {
-                        "x": pos.x, "y": pos.y, "z": pos.z,
-                        "rx": euler.x, "ry": euler.y, "rz": euler.z
-                    }
-                    self.last_position = cartesian_data  # Store latest position
-                    self.position_update.emit(cartesian_data)
-                    self.debug_update.emit(f"Initial position: {cartesian_data}")
-                    
-                    # Send a reply with current position to maintain connection
-                    self.send_cartesian_target(pos.x, pos.y, pos.z, euler.x, euler.y, euler.z)
-            except Exception as e:
-                self.error.emit(f"Failed to receive initial EGM message: {str(e)}")
-                self.debug_update.emit(f"Error receiving initial message: {str(e)}\n{traceback.format_exc()}")
-                self.connected.emit(False)
-                self.running = False
-                return
-            
-            # Create separate threads for receiving and sending EGM messages
-            receive_thread = threading.Thread(target=self.receive_loop, daemon=True)
-            send_thread = threading.Thread(target=self.send_loop, daemon=True)
-            
-            receive_thread.start()
-            send_thread.start()
-            
-            # Main thread just waits for termination
-            while self.running:
-                time.sleep(0.1)
-                
-            # Wait for threads to finish
-            receive_thread.join(timeout=2.0)
-            send_thread.join(timeout=2.0)
-            
-        except Exception as e:
-            self.error.emit(f"Failed to initialize EGM client: {str(e)}")
-            self.debug_update.emit(f"Initialization error: {str(e)}\n{traceback.format_exc()}")
-            self.connected.emit(False)
-        
-        # Clean up resources
-        try:
-            if self.socket:
-                self.debug_update.emit("Closing socket")
-                self.socket.close()
-                self.socket = None
-            self.egm_client = None
-        except Exception as e:
-            self.debug_update.emit(f"Error closing socket: {str(e)}")
-        
-        self.running = False
-        self.status_update.emit("EGM communication stopped")
-        self.debug_update.emit("EGM thread stopped")
-    
-    def receive_loop(self):
-        """Thread function to continuously receive messages from robot"""
-        while self.running:
-            try:
-                # Receive message from robot
-                pb_robot_msg = self.egm_client.receive_msg()
-                
-                # Extract cartesian position
-                if hasattr(pb_robot_msg.feedBack, "cartesian") and pb_robot_msg.feedBack.cartesian.HasField("pos"):
-                    pos = pb_robot_msg.feedBack.cartesian.pos
-                    euler = pb_robot_msg.feedBack.cartesian.euler
-                    cartesian_data = {
-                        "x": pos.x, "y": pos.y, "z": pos.z,
-                        "rx": euler.x, "ry": euler.y, "rz": euler.z
-                    }
-                    self.last_position = cartesian_data  # Store latest position
-                    self.position_update.emit(cartesian_data)
-                
-                # Check convergence status
-                if hasattr(pb_robot_msg, "mciConvergenceMet") and pb_robot_msg.mciConvergenceMet:
-                    self.status_update.emit("Position converged")
-                
-            except Exception as e:
-                if self.running:  # Only log errors if still running
-                    self.debug_update.emit(f"Error receiving message: {str(e)}")
-                time.sleep(0.5)  # Wait before retrying
-    
-    def send_loop(self):
-        """Thread function to continuously send position updates from UI sliders"""
-        last_send_time = 0
-        
-        while self.running:
-            try:
-                current_time = time.time()
-                
-                # Gửi lệnh mỗi 50ms (20Hz)
-                if (current_time - last_send_time) > 0.05:
-                    # Lấy giá trị trực tiếp từ thanh trượt UI
-                    if hasattr(self, "get_slider_values"):
-                        slider_values = self.get_slider_values()
-                        if slider_values:
-                            # Gửi giá trị từ thanh trượt
-                            self.egm_client.send_planned_frame(
-                                slider_values["x"], slider_values["y"], slider_values["z"],
-                                slider_values["rx"], slider_values["ry"], slider_values["rz"]
-                            )
-                            # self.debug_update.emit(f"Sent slider values: {slider_values}")
-                    
-                    last_send_time = current_time
-                
-                # Small delay to avoid excessive CPU usage
-                time.sleep(0.01)
-                
-            except Exception as e:
-                self.debug_update.emit(f"Error in send loop: {str(e)}")
-                time.sleep(0.5)
-
-    def stop(self):
-        """Stop the worker thread"""
-        self.debug_update.emit("Stopping EGM worker thread")
-        self.running = False
-        
-        # Wait for thread to finish
-        self.wait(2000)  # Wait up to 2 seconds
-        
-        # If thread didn't finish, force socket closure
-        if self.socket:
-            try:
-                self.debug_update.emit("Forcing socket closure")
-                # Force socket to unblock by shutting down properly
-                try:
-                    self.socket.shutdown(socket.SHUT_RDWR)
-                except:
-                    pass
-                self.socket.close()
-                self.socket = None
-            except Exception as e:
-                self.debug_update.emit(f"Error forcing socket closure: {str(e)}")
-        
-        # Explicitly set client to None
-        self.egm_client = None
-    
-    def send_cartesian_target(self, x, y, z, rx, ry, rz):
-        """Send cartesian target to robot (now used only for initial positioning)"""
-        if not self.egm_client:
-            self.error.emit("EGM client not initialized")
-            return False
-        
-        try:
-            self.status_update.emit(f"Moving to cartesian target: [{x}, {y}, {z}, {rx}, {ry}, {rz}]")
-            self.debug_update.emit(f"Sending cartesian target: x={x}, y={y}, z={z}, rx={rx}, ry={ry}, rz={rz}")
-            
-            # Send directly using EGM client
-            self.egm_client.send_planned_frame(x, y, z, rx, ry, rz)
-            
-            # Send a second time for reliability
-            time.sleep(0.05)
-            self.egm_client.send_planned_frame(x, y, z, rx, ry, rz)
-            
-            return True
-            
-        except Exception as e:
-            self.error.emit(f"Error sending cartesian target: {str(e)}")
-            self.debug_update.emit(f"Error sending cartesian target: {str(e)}\n{traceback.format_exc()}")
-            return False
-
-    def reset_sequence_counter(self):
-        """Reset the sequence counter to ensure fresh commands"""
-        if not self.egm_client:
-            return False
-            
-        try:
-            # Use the EGMClient's native method to reset the counter
-            if hasattr(self.egm_client, 'reset_sequence_counter'):
-                self.egm_client.reset_sequence_counter()
-            else:
-                # Fallback if method not available
-                self.egm_client.send_counter = AtomicCounter()
-                
-            self.debug_update.emit("EGM sequence counter reset")
-            return True
-            
-        except Exception as e:
-            self.debug_update.emit(f"Error resetting sequence counter: {str(e)}")
-            return False
-    
-    def update_sliders_with_position(self, spinboxes, sliders):
-        """Update UI sliders with current position if they don't have focus"""
-        if not self.last_position:
-            return
-            
-        # Only update if we have valid position data
-        pos = self.last_position
-        
-        # Update X, Y, Z position
-        self._update_if_not_focused(spinboxes['x'], sliders['x'], pos['x'])
-        self._update_if_not_focused(spinboxes['y'], sliders['y'], pos['y'])
-        self._update_if_not_focused(spinboxes['z'], sliders['z'], pos['z'])
-        
-        # Update orientation
-        self._update_if_not_focused(spinboxes['rx'], sliders['rx'], pos['rx'])
-        self._update_if_not_focused(spinboxes['ry'], sliders['ry'], pos['ry'])
-        self._update_if_not_focused(spinboxes['rz'], sliders['rz'], pos['rz'])
-    
-    def _update_if_not_focused(self, spinbox, slider, value):
-        """Update spinbox and slider if they don't have focus"""
-        if not spinbox.hasFocus() and not slider.hasFocus():
-            # Temporarily block signals to prevent feedback loops
-            spinbox.blockSignals(True)
-            slider.blockSignals(True)
-            
-            spinbox.setValue(value)
-            slider.setValue(int(value))
-            
-            spinbox.blockSignals(False)
-            slider.blockSignals(False)
+from egm.loop_stats import EGMLoopStats
+from egm.send_scheduler import DEFAULT_SEND_RATE
+from egm.trajectory import PROFILE_MIN_JERK, PROFILE_LINEAR, PROFILE_STEP
+from rws_io.egm_worker import EGMWorker
 
 
 class EGMTab(QWidget):
     """Tab for ABB Externally Guided Motion (EGM) control"""
     
+    # Loop timing table columns: (histogram snapshot key, header)
+    LOOP_COLUMNS = [
+        ('count', "Count"), ('p50_ms', "p50 (ms)"), ('p90_ms', "p90 (ms)"),
+        ('p99_ms', "p99 (ms)"), ('p99.9_ms', "p99.9 (ms)"), ('max_ms', "Max (ms)")
+    ]
+    
     def __init__(self):
         super().__init__()
         
@@ -381,7 +38,7 @@ class EGMTab(QWidget):
         self.robot = None
         
         # EGM worker
-        self.egm_worker = EGMWorker()
+        self.egm_worker = EGMWorker("the EGM tab")
         self.egm_worker.position_update.connect(self.update_cartesian_position)
         self.egm_worker.status_update.connect(self.update_status)
         self.egm_worker.error.connect(self.handle_error)
@@ -418,6 +75,28 @@ class EGMTab(QWidget):
         self.port_spinbox.setValue(DEFAULT_UDP_PORT)
         connection_layout.addRow("UDP Port:", self.port_spinbox)
         
+        # Send rate (planned frames per second, up to the 4 ms controller cycle)
+        self.send_rate_spinbox = QSpinBox()
+        self.send_rate_spinbox.setRange(1, int(DEFAULT_SEND_RATE))
+        self.send_rate_spinbox.setValue(int(DEFAULT_SEND_RATE))
+        self.send_rate_spinbox.setSuffix(" Hz")
+        connection_layout.addRow("Send Rate:", self.send_rate_spinbox)
+        
+        self.lockstep_check = QCheckBox("Reply to each feedback packet (lock-step)")
+        self.lockstep_check.setChecked(True)
+        self.lockstep_check.setToolTip("Send when a feedback packet arrives, not faster than the send rate")
+        connection_layout.addRow("", self.lockstep_check)
+        
+        # Interpolation between target changes
+        self.profile_combo = QComboBox()
+        self.profile_combo.addItem("Minimum jerk", PROFILE_MIN_JERK)
+        self.profile_combo.addItem("Linear", PROFILE_LINEAR)
+        self.profile_combo.addItem("Off (step)", PROFILE_STEP)
+        self.profile_combo.setToolTip("How the robot moves to a new target: minimum jerk keeps the velocity "
+                                      "and acceleration limits, linear only the velocity limits, off sends "
+                                      "each target as is")
+        connection_layout.addRow("Motion Profile:", self.profile_combo)
+        
         # Connection buttons
         button_layout = QHBoxLayout()
         
@@ -472,6 +151,36 @@ class EGMTab(QWidget):
         connection_group.setLayout(connection_layout)
         top_layout.addWidget(connection_group)
         
+        # Loop timing group: histogram percentiles of the receive loop
+        timing_group = QGroupBox("Loop Timing")
+        timing_layout = QVBoxLayout()
+        
+        self.loop_summary_label = QLabel("No EGM packets received")
+        timing_layout.addWidget(self.loop_summary_label)
+        
+        self.loop_table = QTableWidget(len(EGMLoopStats.METRICS), len(self.LOOP_COLUMNS))
+        self.loop_table.setHorizontalHeaderLabels([label for _, label in self.LOOP_COLUMNS])
+        self.loop_table.setVerticalHeaderLabels(
+            [metric.replace('_', ' ').capitalize() for metric in EGMLoopStats.METRICS])
+        self.loop_table.horizontalHeader().setSectionResizeMode(QHeaderView.Stretch)
+        self.loop_table.setEditTriggers(QTableWidget.NoEditTriggers)
+        self.loop_table.setMaximumHeight(150)
+        timing_layout.addWidget(self.loop_table)
+        
+        timing_buttons = QHBoxLayout()
+        self.reset_loop_stats_button = QPushButton("Reset Timing")
+        self.reset_loop_stats_button.clicked.connect(self.reset_loop_stats)
+        timing_buttons.addWidget(self.reset_loop_stats_button)
+        
+        self.export_loop_stats_button = QPushButton("Export CSV...")
+        self.export_loop_stats_button.setToolTip("Save counters and histogram buckets to a CSV file")
+        self.export_loop_stats_button.clicked.connect(self.export_loop_stats)
+        timing_buttons.addWidget(self.export_loop_stats_button)
+        timing_layout.addLayout(timing_buttons)
+        
+        timing_group.setLayout(timing_layout)
+        top_layout.addWidget(timing_group)
+        
         # Cartesian control section
         cartesian_group = QGroupBox("Cartesian Control")
         cartesian_layout = QHBoxLayout()  # Changed to horizontal layout
@@ -624,6 +333,11 @@ class EGMTab(QWidget):
         self.rz_spinbox.valueChanged.connect(lambda v: self.rz_slider.setValue(int(v)))
         self.rz_slider.valueChanged.connect(lambda v: self.rz_spinbox.setValue(float(v)))
         
+        # Every change is published to the EGM sender
+        for spinbox in (self.x_spinbox, self.y_spinbox, self.z_spinbox,
+                        self.rx_spinbox, self.ry_spinbox, self.rz_spinbox):
+            spinbox.valueChanged.connect(self.publish_slider_target)
+        
 
         # Apply layout to group
         target_group.setLayout(target_layout)
@@ -675,9 +389,6 @@ class EGMTab(QWidget):
         """Initialize the tab with robot reference"""
         self.robot = robot
         
-        # Pass reference to get_slider_values to worker
-        self.egm_worker.get_slider_values = self.get_slider_values
-        
         # Check if ABB EGM module is available by checking version info and RWS capabilities
         if self.robot is not None:
             try:
@@ -697,7 +408,8 @@ class EGMTab(QWidget):
         try:
             # Configure EGM worker
             port = self.port_spinbox.value()
-            self.egm_worker.configure(port)
+            self.egm_worker.configure(port, self.send_rate_spinbox.value(), self.lockstep_check.isChecked(),
+                                      self.profile_combo.currentData())
             
             # Start worker thread
             self.egm_worker.start()
@@ -705,7 +417,7 @@ class EGMTab(QWidget):
             # Update UI
             self.start_button.setEnabled(False)
             self.stop_button.setEnabled(True)
-            self.port_spinbox.setEnabled(False)
+            self.set_egm_settings_enabled(False)
             
             self.log_event(f"Started EGM on port {port}")
             self.update_debug_log(f"Starting EGM worker thread on port {port}")
@@ -726,7 +438,7 @@ class EGMTab(QWidget):
             # Update UI
             self.start_button.setEnabled(True)
             self.stop_button.setEnabled(False)
-            self.port_spinbox.setEnabled(True)
+            self.set_egm_settings_enabled(True)
             
             self.log_event("Stopped EGM")
             
@@ -764,8 +476,9 @@ class EGMTab(QWidget):
             self.ry_slider.setValue(int(cartesian_data['ry']))
             self.rz_slider.setValue(int(cartesian_data['rz']))
             
-            # Mark as initialized
+            # Mark as initialized and start sending from the current position
             self.slider_initialized = True
+            self.publish_slider_target()
             self.log_event("Control sliders initialized with current position")
             self.update_debug_log("Control sliders initialized with current position")
     
@@ -794,7 +507,14 @@ class EGMTab(QWidget):
             if not self.start_button.isEnabled() and self.stop_button.isEnabled():
                 self.start_button.setEnabled(True)
                 self.stop_button.setEnabled(False)
-                self.port_spinbox.setEnabled(True)
+                self.set_egm_settings_enabled(True)
+    
+    def set_egm_settings_enabled(self, enabled):
+        """Port and send settings can only change while EGM is stopped"""
+        self.port_spinbox.setEnabled(enabled)
+        self.send_rate_spinbox.setEnabled(enabled)
+        self.lockstep_check.setEnabled(enabled)
+        self.profile_combo.setEnabled(enabled)
     
     @pyqtSlot(str)
     def update_debug_log(self, message):
@@ -831,11 +551,53 @@ class EGMTab(QWidget):
                 'rx': self.rx_slider, 'ry': self.ry_slider, 'rz': self.rz_slider
             }
             self.egm_worker.update_sliders_with_position(spinboxes, sliders)
+            # Spinbox signals are blocked during that update
+            self.publish_slider_target()
             
         else:
             # Not connected
             self.robot_state_label.setText("DISCONNECTED")
             self.robot_state_label.setStyleSheet("font-weight: bold; color: gray;")
+        
+        self.update_loop_stats()
+    
+    def update_loop_stats(self):
+        """Show receive loop counters and histogram percentiles"""
+        stats = self.egm_worker.loop_stats.snapshot()
+        if not stats['received']:
+            self.loop_summary_label.setText("No EGM packets received")
+        else:
+            target_hz = 1.0 / self.egm_worker.loop_stats.period
+            self.loop_summary_label.setText(
+                f"{stats['rate_hz']:.0f} Hz (target {target_hz:.0f}) | Period met {stats['period_met']:.1%} | "
+                f"Received {stats['received']} | Lost {stats['lost']} ({stats['loss_rate']:.2%}) | "
+                f"Out of order {stats['out_of_order']} | Errors {stats['errors']}"
+            )
+        for row, metric in enumerate(EGMLoopStats.METRICS):
+            for column, (key, _) in enumerate(self.LOOP_COLUMNS):
+                value = stats[metric][key]
+                text = str(value) if key == 'count' else f"{value:.2f}"
+                self.loop_table.setItem(row, column, QTableWidgetItem(text))
+    
+    def reset_loop_stats(self):
+        """Clear the loop timing histograms and counters"""
+        self.egm_worker.loop_stats.reset()
+        self.update_loop_stats()
+        self.log_event("Loop timing reset")
+    
+    def export_loop_stats(self):
+        """Save the loop timing histograms to a CSV file"""
+        default_name = f"egm_timing_{time.strftime('%Y%m%d_%H%M%S')}.csv"
+        path, _ = QFileDialog.getSaveFileName(self, "Export EGM Loop Timing", default_name,
+                                              "CSV Files (*.csv);;All Files (*)")
+        if not path:
+            return
+        try:
+            self.egm_worker.loop_stats.write_csv(path)
+            self.log_event(f"Loop timing exported to {path}")
+        except Exception as e:
+            self.log_event(f"Error exporting loop timing: {str(e)}")
+            self.update_debug_log(f"Error exporting loop timing: {str(e)}\n{traceback.format_exc()}")
 
     def force_release_port(self):
         """Force release the UDP port by killing any socket using it"""
@@ -994,6 +756,11 @@ class EGMTab(QWidget):
             self.update_debug_log(f"Error resetting sequence counter: {str(e)}\n{traceback.format_exc()}")
             QMessageBox.critical(self, "Error", f"Failed to reset sequence counter: {str(e)}")
 
+    def publish_slider_target(self, *args):
+        """Publish the spinbox values to the EGM sender's target mailbox"""
+        if self.slider_initialized:
+            self.egm_worker.target_mailbox.publish_pose(self.get_slider_values())
+    
     def get_slider_values(self):
         """Get current values from sliders/spinboxes for EGM worker"""
         if not hasattr(self, 'x_spinbox'):
@@ -1,11 +1,15 @@
 from PyQt5.QtWidgets import (QWidget, QVBoxLayout, QHBoxLayout, QFormLayout, 
                            QLabel, QLineEdit, QPushButton, QComboBox, 
                            QGroupBox, QCheckBox, QFrame, QGridLayout,
-                           QTableWidget, QTableWidgetItem, QHeaderView,
+                           QTableView, QHeaderView,
                            QTabWidget, QSplitter, QTextEdit)
 from PyQt5.QtCore import Qt, pyqtSignal, QTimer
 from PyQt5.QtGui import QFont, QIcon, QColor, QTextCursor
 
+import threading
+
+from ui.widgets.signal_table_model import SignalTableModel
+
 # Đăng ký meta types để tránh cảnh báo về queue
 try:
     from PyQt5.QtCore import qRegisterMetaType
@@ -17,18 +21,24 @@ except (ImportError, TypeError):
 class IOTab(QWidget):
     """Tab for robot I/O signals control"""
     
+    # Emitted from the signal list thread: load id, page response (None when all pages are loaded)
+    signal_page_loaded = pyqtSignal(int, object)
+    
     def __init__(self):
         super().__init__()
         
         # Store robot reference
         self.robot = None
         
+        # Signal list loading: pages are fetched on a worker thread; a new load
+        # (or a search) bumps the id so pages of an older load are ignored
+        self._signal_load_id = 0
+        self._signal_pages_loaded = 0
+        self.signal_page_loaded.connect(self.on_signal_page_loaded)
+        
         # Disable updates until initialized
         self.initialized = False
         
-        # Store signals
-        self.signals = []
-        
         # Initialize UI
         self.init_ui()
         
@@ -71,12 +81,13 @@ class IOTab(QWidget):
         # Create splitter between signal table and details/control
         self.splitter = QSplitter(Qt.Vertical)
         
-        # Signal table
-        self.signal_table = QTableWidget(0, 4)  # Rows, Columns
-        self.signal_table.setHorizontalHeaderLabels(["Name", "Type", "Value", "State"])
+        # Signal table: column-store model keyed by signal name, filtered in the model
+        self.signal_model = SignalTableModel(self)
+        self.signal_table = QTableView()
+        self.signal_table.setModel(self.signal_model)
         self.signal_table.setAlternatingRowColors(True)
-        self.signal_table.setSelectionBehavior(QTableWidget.SelectRows)
-        self.signal_table.setSelectionMode(QTableWidget.SingleSelection)
+        self.signal_table.setSelectionBehavior(QTableView.SelectRows)
+        self.signal_table.setSelectionMode(QTableView.SingleSelection)
         self.signal_table.horizontalHeader().setSectionResizeMode(0, QHeaderView.Stretch)  # Stretch name column
         self.signal_table.horizontalHeader().setStretchLastSection(True)  # Stretch last column
         self.signal_table.verticalHeader().setVisible(False)  # Hide vertical header
@@ -212,72 +223,27 @@ class IOTab(QWidget):
             return
             
         try:
-            # Log the update attempt for debugging
-            from datetime import datetime
-            timestamp = datetime.now().strftime("%H:%M:%S.%f")[:-3]
-            
             # Force signal_value to be a string
             signal_value = str(signal_value)
             
-            # Print current table contents for debugging
-            print(f"[{timestamp}] Current table has {self.signal_table.rowCount()} rows")
-            
             # Find the signal in the table
-            signal_found = False
-                        # Trong update_signal_value, trước vòng for:
-            print(f"==> Đang cập nhật signal: '{signal_name}' với giá trị {signal_value}")
-            for row in range(self.signal_table.rowCount()):
-                name_item = self.signal_table.item(row, 0)
-                if name_item:
-                    print(f"Row {row}: '{name_item.text()}'")
-            for row in range(self.signal_table.rowCount()):
-                name_item = self.signal_table.item(row, 0)
-                if name_item:
-                    print(f"[{timestamp}] Row {row}: '{name_item.text()}' vs '{signal_name}'")
-                    
-                if name_item and name_item.text().strip() == signal_name.strip():
-                    signal_found = True
-                    print(f"[{timestamp}] Found signal {signal_name} at row {row}")
-                    # Update the value in the table
-                    value_item = self.signal_table.item(row, 2)
-                    if value_item:
-                        old_value = value_item.text()
-                        
-                        # Only update if value actually changed
-                        if old_value != signal_value:
-                            value_item.setText(signal_value)
-                            
-                            # Update the signal in our signals list
-                            if row < len(self.signals):
-                                self.signals[row]['lvalue'] = signal_value
-                            
-                            # Update color for digital signals
-                            signal_type = self.signal_table.item(row, 1).text()
-                            if signal_type in ['DI', 'DO', 'GI', 'GO']:
-                                if signal_value == '1':
-                                    value_item.setBackground(QColor('#A3FFA3'))  # Light green
-                                else:
-                                    value_item.setBackground(QColor('#FFA3A3'))  # Light red
-                            
-                            # If this signal is currently selected, update the details
-                            selected_indexes = self.signal_table.selectedIndexes()
-                            if selected_indexes and selected_indexes[0].row() == row:
-                                self.signal_value_label.setText(signal_value)
-                            
-                            # Log value change
-                            self.log_event(f"Signal {signal_name} changed: {old_value} → {signal_value}")
-                            
-                            # Make sure the change is visible immediately
-                            self.signal_table.viewport().update()
+            row = self.signal_model.row_of(signal_name)
+            if row is not None:
+                old_value = self.signal_model.set_value(row, signal_value)
+                
+                # Only update if value actually changed
+                if old_value != signal_value:
+                    # If this signal is currently selected, update the details
+                    if self.selected_row() == row:
+                        self.signal_value_label.setText(signal_value)
                     
-                    # We found our signal, no need to continue checking
-                    break
+                    # Log value change
+                    self.log_event(f"Signal {signal_name} changed: {old_value} → {signal_value}")
             
             # If signal wasn't found in the table but we received an update
-            if not signal_found:
+            else:
                 # Log the issue
                 self.log_event(f"Signal {signal_name} not found in table, attempting to add it")
-                print(f"[{timestamp}] Signal {signal_name} not found in table, attempting to add it")
                 
                 # If robot is available, try to get more information about the signal
                 if self.robot:
@@ -289,7 +255,6 @@ class IOTab(QWidget):
                         
                         # Get signal info
                         signal_info = self.robot.io.get_signal_value(signal_path)
-                        print(f"[{timestamp}] Signal info: {signal_info}")
                         
                         if signal_info.get('status_code') == 200 and 'content' in signal_info:
                             # Create new signal entry
@@ -307,26 +272,8 @@ class IOTab(QWidget):
                                     if 'type' in state_item:
                                         new_signal['type'] = state_item['type']
                             
-                            # Add to signals list
-                            self.signals.append(new_signal)
-                            
                             # Add to table
-                            row = self.signal_table.rowCount()
-                            self.signal_table.setRowCount(row + 1)
-                            
-                            # Set items
-                            self.signal_table.setItem(row, 0, QTableWidgetItem(signal_name))
-                            self.signal_table.setItem(row, 1, QTableWidgetItem(new_signal['type']))
-                            self.signal_table.setItem(row, 2, QTableWidgetItem(signal_value))
-                            self.signal_table.setItem(row, 3, QTableWidgetItem(new_signal.get('lstate', 'valid')))
-                            
-                            # Set color
-                            value_item = self.signal_table.item(row, 2)
-                            if new_signal['type'] in ['DI', 'DO', 'GI', 'GO']:
-                                if signal_value == '1':
-                                    value_item.setBackground(QColor('#A3FFA3'))  # Light green
-                                else:
-                                    value_item.setBackground(QColor('#FFA3A3'))  # Light red
+                            self.signal_model.append_signal(new_signal)
                             
                             self.log_event(f"Added new signal {signal_name} to table with value {signal_value}")
                             # Store path for future updates
@@ -334,8 +281,6 @@ class IOTab(QWidget):
                                 self.signal_paths[signal_name] = signal_path
                     except Exception as e:
                         self.log_event(f"Error adding signal {signal_name}: {str(e)}")
-                        import traceback
-                        print(f"Error adding signal: {traceback.format_exc()}")
                 else:
                     # Store the path for future updates, in case we reload the table
                     if hasattr(self, 'signal_paths'):
@@ -343,17 +288,23 @@ class IOTab(QWidget):
                     self.log_event(f"Received update for signal {signal_name} not in table: {signal_value}")
                     
                     # Try to refresh signals list if we haven't in a while
+                    import time
                     self._last_refresh_attempt = getattr(self, '_last_refresh_attempt', 0)
-                    if timestamp.time() - self._last_refresh_attempt > 15:  # Refresh at most every 15 seconds
-                        self._last_refresh_attempt = timestamp.time()
+                    if time.time() - self._last_refresh_attempt > 15:  # Refresh at most every 15 seconds
+                        self._last_refresh_attempt = time.time()
                         self.log_event(f"Automatically refreshing signals list to find {signal_name}")
                         # Use QTimer to avoid blocking the UI thread
                         QTimer.singleShot(100, self.on_refresh_click)
                 
         except Exception as e:
             self.log_event(f"Error updating signal value: {str(e)}")
-            import traceback
-            print(f"Error stack: {traceback.format_exc()}")
+    
+    def selected_row(self):
+        """Model row of the selected signal, or None if nothing is selected"""
+        indexes = self.signal_table.selectionModel().selectedRows()
+        if not indexes:
+            return None
+        return self.signal_model.store_row(indexes[0].row())
     
     def update_ui(self):
         """Periodic UI update"""
@@ -374,31 +325,7 @@ class IOTab(QWidget):
     
     def filter_table(self):
         """Apply filters to the signal table"""
-        search_text = self.search_input.text().lower()
-        type_filter = self.type_combo.currentText()
-        
-        # Show all rows first
-        for row in range(self.signal_table.rowCount()):
-            self.signal_table.setRowHidden(row, False)
-        
-        # Apply filters
-        for row in range(self.signal_table.rowCount()):
-            show_row = True
-            
-            # Check name filter
-            if search_text:
-                name_item = self.signal_table.item(row, 0)
-                if not name_item or search_text not in name_item.text().lower():
-                    show_row = False
-            
-            # Check type filter
-            if type_filter != "All" and show_row:
-                type_item = self.signal_table.item(row, 1)
-                if not type_item or type_filter != type_item.text():
-                    show_row = False
-            
-            # Show or hide row based on filters
-            self.signal_table.setRowHidden(row, not show_row)
+        self.signal_model.set_filters(self.search_input.text(), self.type_combo.currentText())
     
     def on_search_click(self):
         """Search for signals matching criteria"""
@@ -418,9 +345,9 @@ class IOTab(QWidget):
             results = self.robot.io.search_signals(name=search_name)
             
             if results.get('status_code') == 200 and 'content' in results:
-                # Clear existing table
-                self.signal_table.setRowCount(0)
-                self.signals = []
+                # Clear existing table (and stop a signal list that is still loading)
+                self._signal_load_id += 1
+                self.signal_model.clear()
                 
                 # Process results
                 if '_embedded' in results['content'] and 'resources' in results['content']['_embedded']:
@@ -442,94 +369,90 @@ class IOTab(QWidget):
             
         try:
             # Clear existing table
-            self.signal_table.setRowCount(0)
-            self.signals = []
+            self.signal_model.clear()
             
-            # Get all signals
+            # Stream the signal list: pages are requested on a worker thread
+            # and shown as they arrive
             self.log_event("Loading signals...")
-            results = self.robot.io.list_signals()
+            self._signal_load_id += 1
+            self._signal_pages_loaded = 0
+            threading.Thread(target=self._fetch_signal_pages, args=(self.robot, self._signal_load_id),
+                             name='IOSignalPages', daemon=True).start()
+                
+        except Exception as e:
+            self.log_event(f"Error refreshing signals: {str(e)}")
+    
+    def _fetch_signal_pages(self, robot, load_id):
+        """Request the signal list page by page (worker thread)"""
+        try:
+            for results in robot.io.iter_signal_pages():
+                if load_id != self._signal_load_id:
+                    return  # Superseded by a newer load or a search
+                self.signal_page_loaded.emit(load_id, results)
+            self.signal_page_loaded.emit(load_id, None)
+        except Exception as e:
+            self.signal_page_loaded.emit(load_id, {'status_code': 0, 'error': str(e)})
+    
+    def on_signal_page_loaded(self, load_id, results):
+        """Show one page of the signal list started by on_refresh_click (GUI thread)"""
+        if load_id != self._signal_load_id:
+            return
             
+        try:
+            if results is None:
+                # All pages loaded
+                self.log_event(f"Loaded {len(self.signal_model)} signals")
+                return
+                
             if results.get('status_code') == 200 and 'content' in results:
-                # Process results
-                if '_embedded' in results['content'] and 'resources' in results['content']['_embedded']:
-                    signals = results['content']['_embedded']['resources']
+                signals = results['content'].get('_embedded', {}).get('resources', [])
+                if self._signal_pages_loaded == 0:
                     self.populate_signal_table(signals)
-                    self.log_event(f"Loaded {len(signals)} signals")
                 else:
+                    self.append_signal_rows(signals)
+                self._signal_pages_loaded += 1
+                if not len(self.signal_model):
                     self.log_event("No signals found")
             else:
+                self._signal_load_id += 1  # Ignore the rest of this load
                 self.log_event(f"Error loading signals: {results.get('error', 'Unknown error')}")
                 
         except Exception as e:
+            self._signal_load_id += 1
             self.log_event(f"Error refreshing signals: {str(e)}")
     
     def populate_signal_table(self, signals):
         """Populate the signal table with signal data"""
-        # Store signals
-        self.signals = signals
-        
+        # Fill table with signal data (the current filters are kept by the model)
+        self.remember_signal_paths(signals)
+        self.signal_model.set_signals(signals)
+    
+    def append_signal_rows(self, signals):
+        """Add signals to the table, e.g. further pages of the signal list"""
+        self.remember_signal_paths(signals)
+        self.signal_model.append_signals(signals)
+    
+    def remember_signal_paths(self, signals):
+        """Store signal name -> path for subscription updates"""
         # Ensure we have a signal_paths dictionary
         if not hasattr(self, 'signal_paths'):
             self.signal_paths = {}
         
-        # Set table row count
-        self.signal_table.setRowCount(len(signals))
-        
-        # Fill table with signal data
-        for i, signal in enumerate(signals):
-            # Extract data
+        for signal in signals:
             name = signal.get('name', 'Unknown')
-            signal_type = signal.get('type', 'Unknown')
-            value = signal.get('lvalue', 'Unknown')
-            state = signal.get('lstate', 'Unknown')
-            
-            # Get and store signal path
             signal_path = signal.get('_links', {}).get('self', {}).get('href', '')
             if signal_path and name != 'Unknown':
-                # Store the path for subscription updates
                 self.signal_paths[name] = signal_path
-            
-            # Create table items
-            name_item = QTableWidgetItem(name)
-            type_item = QTableWidgetItem(signal_type)
-            value_item = QTableWidgetItem(value)
-            state_item = QTableWidgetItem(state)
-            
-            # Set items in table
-            self.signal_table.setItem(i, 0, name_item)
-            self.signal_table.setItem(i, 1, type_item)
-            self.signal_table.setItem(i, 2, value_item)
-            self.signal_table.setItem(i, 3, state_item)
-            
-            # Color based on signal type
-            if signal_type in ['DI', 'DO', 'GI', 'GO']:
-                if value == '1':
-                    value_item.setBackground(QColor('#A3FFA3'))  # Light green
-                else:
-                    value_item.setBackground(QColor('#FFA3A3'))  # Light red
-        
-        # Apply filters
-        self.filter_table()
     
     def on_signal_selected(self, selected, deselected):
         """Handle signal selection in the table"""
         # Get selected row
-        indexes = selected.indexes()
-        if not indexes:
-            # No selection
+        row = self.selected_row()
+        signal = self.signal_model.signal_at(row) if row is not None else None
+        if signal is None:
+            # No selection or invalid row
             self.set_control_enabled(False)
             return
-            
-        # Get row index
-        row = indexes[0].row()
-        
-        # Get signal data
-        if row < 0 or row >= len(self.signals):
-            # Invalid row
-            self.set_control_enabled(False)
-            return
-            
-        signal = self.signals[row]
         
         # Update details labels
         self.signal_path_label.setText(signal.get('_links', {}).get('self', {}).get('href', 'Unknown'))
@@ -578,15 +501,10 @@ class IOTab(QWidget):
             return
             
         # Get selected signal
-        indexes = self.signal_table.selectedIndexes()
-        if not indexes:
+        row = self.selected_row()
+        signal = self.signal_model.signal_at(row) if row is not None else None
+        if signal is None:
             return
-            
-        row = indexes[0].row()
-        if row < 0 or row >= len(self.signals):
-            return
-            
-        signal = self.signals[row]
         signal_path = signal.get('_links', {}).get('self', {}).get('href', '')
         
         if not signal_path:
@@ -604,18 +522,8 @@ class IOTab(QWidget):
                 # Update the displayed value
                 self.signal_value_label.setText(str(value))
                 
-                # Update table item for this signal
-                value_item = self.signal_table.item(row, 2)
-                if value_item:
-                    value_item.setText(str(value))
-                    
-                    # Update background color for digital signals
-                    signal_type = signal.get('type', '')
-                    if signal_type in ['DO', 'GO']:
-                        if value == 1 or value == '1':
-                            value_item.setBackground(QColor('#A3FFA3'))  # Light green
-                        else:
-                            value_item.setBackground(QColor('#FFA3A3'))  # Light red
+                # Update table row for this signal
+                self.signal_model.set_value(row, value)
             else:
                 self.log_event(f"Failed to set signal value: {result.get('error', 'Unknown error')}")
                 
@@ -3,26 +3,26 @@ from PyQt5.QtWidgets import (QWidget, QVBoxLayout, QHBoxLayout, QFormLayout,
                            QGroupBox, QCheckBox, QFrame, QGridLayout,
                            QDoubleSpinBox, QSlider, QTabWidget,
                            QSpinBox, QRadioButton, QButtonGroup, QMessageBox,
-                           QTextEdit, QSplitter, QTableWidget, QHeaderView, QTableWidgetItem)
-from PyQt5.QtCore import Qt, pyqtSignal, QTimer, QThread, pyqtSlot
-from PyQt5.QtGui import QFont, QIcon, QColor, QPixmap, QImage
+                           QTextEdit, QSplitter, QTableWidget, QHeaderView, QTableWidgetItem,
+                           QFileDialog)
+from PyQt5.QtCore import Qt, pyqtSignal, QTimer, pyqtSlot
+from PyQt5.QtGui import QFont, QIcon, QColor
 
 import time
-import numpy as np
-import socket
 import traceback
 import threading
 import os
-import cv2
 import sys
 
 # Import EGM client
-from abb_egm_pyclient.egm_client import EGMClient
 from abb_egm_pyclient import DEFAULT_UDP_PORT
-from abb_egm_pyclient.atomic_counter import AtomicCounter
 
 # Import ESP32 socket client
 from rws_io.esp32_socket import ESP32Socket
+from rws_io.egm_worker import EGMWorker
+from rws_io.io_writer import IOWriteNotifier
+from ui.widgets.camera_source_combo import CameraSourceCombo
+from ui.widgets.video_widget import VideoWidget
 
 # Ensure the vision module can be imported
 current_dir = os.path.dirname(os.path.abspath(__file__))
@@ -30,391 +30,33 @@ project_root = os.path.dirname(os.path.dirname(current_dir))  # Go up two levels
 if project_root not in sys.path:
     sys.path.append(project_root)
 
-# Import hand detector from vision module
-try:
-    from vision.hand_detector import HandDetector
-    MEDIAPIPE_AVAILABLE = True
-except ImportError:
-    MEDIAPIPE_AVAILABLE = False
-
-
-class EGMWorker(QThread):
-    """Worker thread for EGM communication"""
-    position_update = pyqtSignal(dict)
-    status_update = pyqtSignal(str)
-    error = pyqtSignal(str)
-    connected = pyqtSignal(bool)
-    debug_update = pyqtSignal(str)
-    
-    def __init__(self):
-        super().__init__()
-        self.running = False
-        self.egm_client = None
-        self.port = DEFAULT_UDP_PORT
-        self.socket = None
-        self.last_position = None  # Store the last received position
-        
-        # Control flags for thread coordination
-        self.is_sending = False
-        self.use_position_feedback = True  # Auto-echo position
-        
-        # Control mode
-        self.control_mode = "SLIDERS"  # "SLIDERS", "ESP32", "VISION"
-        self.esp32_position = None
-    def configure(self, port):
-        """Configure the EGM client with the specified port"""
-        self.port = port
-        
-    def set_control_mode(self, mode):
-        """Set the control mode (SLIDERS, ESP32, VISION)"""
-        self.control_mode = mode
-        self.debug_update.emit(f"Control mode changed to: {mode}")
-        
-    def set_esp32_position(self, position):
-        """Set the current ESP32 position data"""
-        self.esp32_position = position
-        
-    def run(self):
-        """Main thread loop for EGM communication"""
-        self.running = True
-        self.cartesian_target = None
-        
-        try:
-            # Create EGM client with custom socket handling
-            self.debug_update.emit("Creating socket on port " + str(self.port))
-            
-            # First try to create a completely new EGM client
-            try:
-                # Important: Create EGM client first WITHOUT providing a socket
-                self.egm_client = EGMClient(port=self.port)
-                
-                # Reference the socket created by the client
-                self.socket = self.egm_client.socket
-                
-                # Ensure the send_counter is properly initialized
-                if not hasattr(self.egm_client, 'send_counter') or self.egm_client.send_counter is None:
-                    self.egm_client.send_counter = AtomicCounter()
-                
-                self.debug_update.emit("EGM client created successfully with default socket")
-                
-            except OSError as e:
-                self.debug_update.emit(f"Failed to create EGM client: {str(e)}")
-                
-                # If failed, try to create our own socket with more options
-                try:
-                    self.debug_update.emit("Attempting to create custom socket")
-                    
-                    # Close any existing socket
-                    if self.socket:
-                        try:
-                            self.socket.close()
-                        except:
-                            pass
-                        
-                    # Wait for OS to release the socket
-                    time.sleep(1)
-                    
-                    # Create a new socket
-                    self.socket = socket.socket(family=socket.AF_INET, type=socket.SOCK_DGRAM)
-                    self.socket.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
-                    
-                    # On Windows, we need SO_REUSEPORT as well if available
-                    try:
-                        self.socket.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEPORT, 1)
-                        self.debug_update.emit("Added SO_REUSEPORT option")
-                    except (AttributeError, OSError):
-                        self.debug_update.emit("SO_REUSEPORT option not available")
-                    
-                    # Set socket timeout to non-blocking
-                    self.socket.settimeout(0.5)
-                    
-                    # Try to bind the socket
-                    self.socket.bind(('', self.port))
-                    self.debug_update.emit("Custom socket bound successfully")
-                    
-                    # Create EGM client and replace its socket
-                    self.egm_client = EGMClient(port=self.port)
-                    self.egm_client.socket = self.socket
-                    
-                    # Ensure the send_counter is properly initialized
-                    if not hasattr(self.egm_client, 'send_counter') or self.egm_client.send_counter is None:
-                        self.egm_client.send_counter = AtomicCounter()
-                        
-                    self.debug_update.emit("EGM client created with custom socket")
-                    
-                except Exception as retry_e:
-                    self.error.emit(f"Failed to bind socket: {str(retry_e)}")
-                    self.debug_update.emit(f"Socket binding failed: {str(retry_e)}\n{traceback.format_exc()}")
-                    self.running = False
-                    return
-            
-            self.status_update.emit(f"Listening for EGM messages on port {self.port}")
-            
-            # Wait for first message to establish connection
-            try:
-                self.debug_update.emit("Waiting for initial EGM message...")
-                pb_robot_msg = self.egm_client.receive_msg()
-                self.connected.emit(True)
-                self.status_update.emit("EGM connection established")
-                self.debug_update.emit("Connection established with controller at " + 
-                                     str(self.egm_client.robot_controller_address))
-                
-                # Extract initial cartesian position if available
-                if hasattr(pb_robot_msg.feedBack, "cartesian") and pb_robot_msg.feedBack.cartesian.HasField("pos"):
-                    pos = pb_robot_msg.feedBack.cartesian.pos
-                    euler = pb_robot_msg.feedBack.cartesian.euler
-                    cartesian_data = {
-                        "x": pos.x, "y": pos.y, "z": pos.z,
-                        "rx": euler.x, "ry": euler.y, "rz": euler.z
-                    }
-                    self.last_position = cartesian_data  # Store latest position
-                    self.position_update.emit(cartesian_data)
-                    self.debug_update.emit(f"Initial position: {cartesian_data}")
-                    
-                    # Send a reply with current position to maintain connection
-                    self.send_cartesian_target(pos.x, pos.y, pos.z, euler.x, euler.y, euler.z)
-                    self.debug_update.emit(f"Sent initial position: {cartesian_data}")
-            except Exception as e:
-                self.error.emit(f"Failed to receive initial EGM message: {str(e)}")
-                self.debug_update.emit(f"Error receiving initial message: {str(e)}\n{traceback.format_exc()}")
-                self.connected.emit(False)
-                self.running = False
-                return
-            
-            # Create separate threads for receiving and sending EGM messages
-            receive_thread = threading.Thread(target=self.receive_loop, daemon=True)
-            send_thread = threading.Thread(target=self.send_loop, daemon=True)
-            
-            receive_thread.start()
-            send_thread.start()
-            
-            # Main thread just waits for termination
-            while self.running:
-                time.sleep(0.1)
-                
-            # Wait for threads to finish
-            receive_thread.join(timeout=2.0)
-            send_thread.join(timeout=2.0)
-            
-        except Exception as e:
-            self.error.emit(f"Failed to initialize EGM client: {str(e)}")
-            self.debug_update.emit(f"Initialization error: {str(e)}\n{traceback.format_exc()}")
-            self.connected.emit(False)
-        
-        # Clean up resources
-        try:
-            if self.socket:
-                self.debug_update.emit("Closing socket")
-                self.socket.close()
-                self.socket = None
-            self.egm_client = None
-        except Exception as e:
-            self.debug_update.emit(f"Error closing socket: {str(e)}")
-        
-        self.running = False
-        self.status_update.emit("EGM communication stopped")
-        self.debug_update.emit("EGM thread stopped")
-    
-    def receive_loop(self):
-        """Thread function to continuously receive messages from robot"""
-        while self.running:
-            try:
-                # Receive message from robot
-                pb_robot_msg = self.egm_client.receive_msg()
-                
-                # Extract cartesian position
-                if hasattr(pb_robot_msg.feedBack, "cartesian") and pb_robot_msg.feedBack.cartesian.HasField("pos"):
-                    pos = pb_robot_msg.feedBack.cartesian.pos
-                    euler = pb_robot_msg.feedBack.cartesian.euler
-                    cartesian_data = {
-                        "x": pos.x, "y": pos.y, "z": pos.z,
-                        "rx": euler.x, "ry": euler.y, "rz": euler.z
-                    }
-                    self.last_position = cartesian_data  # Store latest position
-                    self.position_update.emit(cartesian_data)
-                
-                # Check convergence status
-                if hasattr(pb_robot_msg, "mciConvergenceMet") and pb_robot_msg.mciConvergenceMet:
-                    self.status_update.emit("Position converged")
-                
-            except Exception as e:
-                if self.running:  # Only log errors if still running
-                    self.debug_update.emit(f"Error receiving message: {str(e)}")
-                time.sleep(0.5)  # Wait before retrying
-    
-    def send_loop(self):
-        """Thread function to continuously send position updates based on active control mode"""
-        last_send_time = 0
-        
-        while self.running:
-            try:
-                current_time = time.time()
-                
-                # Send command every 50ms (20Hz)
-                if (current_time - last_send_time) >= 0.05:
-                    
-                    # Choose source based on control mode
-                    if self.control_mode == "SLIDERS" and hasattr(self, "get_slider_values"):
-                        # Get values from UI sliders
-                        values = self.get_slider_values()
-                        if values:
-                            self.debug_update.emit(f"EGM sending: {values}")
-                            self.egm_client.send_planned_frame(
-                                values["x"], values["y"], values["z"],
-                                values["rx"], values["ry"], values["rz"]
-                            )
-                            
-                    elif self.control_mode == "ESP32" and self.esp32_position:
-                        # Get values from ESP32 wrist controller
-                        esp_pos = self.esp32_position
-                        
-                        # Calculate new position by adding ESP32 deltas to robot position
-                        new_pos = {
-                            "x":esp_pos["x"],
-                            "y": esp_pos["y"],
-                            "z": esp_pos["z"],
-                            "rx": esp_pos["rx"],
-                            "ry": esp_pos["ry"],
-                            "rz": esp_pos["rz"]
-                        }
-                        
-                        self.egm_client.send_planned_frame(
-                            new_pos["x"], new_pos["y"], new_pos["z"],
-                            new_pos["rx"], new_pos["ry"], new_pos["rz"]
-                        )
-                        self.debug_update.emit(f"EGM sending: {new_pos}")
-                    # Add VISION mode here if needed
-                    
-                    last_send_time = current_time
-                
-                # Small delay to avoid excessive CPU usage
-                time.sleep(0.01)
-                
-            except Exception as e:
-                self.debug_update.emit(f"Error in send loop: {str(e)}")
-                time.sleep(0.5)
-
-    def stop(self):
-        """Stop the worker thread"""
-        self.debug_update.emit("Stopping EGM worker thread")
-        self.running = False
-        
-        # Wait for thread to finish
-        self.wait(2000)  # Wait up to 2 seconds
-        
-        # If thread didn't finish, force socket closure
-        if self.socket:
-            try:
-                self.debug_update.emit("Forcing socket closure")
-                # Force socket to unblock by shutting down properly
-                try:
-                    self.socket.shutdown(socket.SHUT_RDWR)
-                except:
-                    pass
-                self.socket.close()
-                self.socket = None
-            except Exception as e:
-                self.debug_update.emit(f"Error forcing socket closure: {str(e)}")
-        
-        # Explicitly set client to None
-        self.egm_client = None
-    
-    def send_cartesian_target(self, x, y, z, rx, ry, rz):
-        """Send cartesian target to robot (now used only for initial positioning)"""
-        if not self.egm_client:
-            self.error.emit("EGM client not initialized")
-            return False
-        
-        try:
-            self.status_update.emit(f"Moving to cartesian target: [{x}, {y}, {z}, {rx}, {ry}, {rz}]")
-            self.debug_update.emit(f"Sending cartesian target: x={x}, y={y}, z={z}, rx={rx}, ry={ry}, rz={rz}")
-            
-            # Send directly using EGM client
-            self.egm_client.send_planned_frame(x, y, z, rx, ry, rz)
-            
-            # Send a second time for reliability
-            time.sleep(0.05)
-            self.egm_client.send_planned_frame(x, y, z, rx, ry, rz)
-            
-            return True
-            
-        except Exception as e:
-            self.error.emit(f"Error sending cartesian target: {str(e)}")
-            self.debug_update.emit(f"Error sending cartesian target: {str(e)}\n{traceback.format_exc()}")
-            return False
-
-    def reset_sequence_counter(self):
-        """Reset the sequence counter to ensure fresh commands"""
-        if not self.egm_client:
-            return False
-            
-        try:
-            # Use the EGMClient's native method to reset the counter
-            if hasattr(self.egm_client, 'reset_sequence_counter'):
-                self.egm_client.reset_sequence_counter()
-            else:
-                # Fallback if method not available
-                self.egm_client.send_counter = AtomicCounter()
-                
-            self.debug_update.emit("EGM sequence counter reset")
-            return True
-            
-        except Exception as e:
-            self.debug_update.emit(f"Error resetting sequence counter: {str(e)}")
-            return False
-    
-    def update_sliders_with_position(self, spinboxes, sliders):
-        """Update UI sliders with current position if they don't have focus"""
-        if not self.last_position:
-            return
-            
-        # Only update if we have valid position data
-        pos = self.last_position
-        
-        # Update X, Y, Z position
-        self._update_if_not_focused(spinboxes['x'], sliders['x'], pos['x'])
-        self._update_if_not_focused(spinboxes['y'], sliders['y'], pos['y'])
-        self._update_if_not_focused(spinboxes['z'], sliders['z'], pos['z'])
-        
-        # Update orientation
-        self._update_if_not_focused(spinboxes['rx'], sliders['rx'], pos['rx'])
-        self._update_if_not_focused(spinboxes['ry'], sliders['ry'], pos['ry'])
-        self._update_if_not_focused(spinboxes['rz'], sliders['rz'], pos['rz'])
-    
-    def _update_if_not_focused(self, spinbox, slider, value):
-        """Update spinbox and slider if they don't have focus"""
-        if not spinbox.hasFocus() and not slider.hasFocus():
-            # Temporarily block signals to prevent feedback loops
-            spinbox.blockSignals(True)
-            slider.blockSignals(True)
-            
-            spinbox.setValue(value)
-            slider.setValue(int(value))
-            
-            spinbox.blockSignals(False)
-            slider.blockSignals(False)
+from vision.camera_service import shared_camera_service
+from egm.send_scheduler import DEFAULT_SEND_RATE
+from egm.trajectory import PROFILE_MIN_JERK, PROFILE_LINEAR, PROFILE_STEP
 
 
 class RobotControlTab(QTabWidget):
     """Tab for robot control combining EGM, Vision and ESP32"""
     
-    def __init__(self):
+    # Emitted from the camera pipeline display thread when a new frame is ready
+    frame_ready = pyqtSignal()
+    # Emitted from the back home read thread when a toggle failed (signal name, error)
+    home_toggle_error = pyqtSignal(str, str)
+    
+    def __init__(self, camera_service=None):
         super().__init__()
         
         # Store robot reference
         self.robot = None
         
         # EGM worker
-        self.egm_worker = EGMWorker()
+        self.egm_worker = EGMWorker("the Robot Control tab")
         self.egm_worker.position_update.connect(self.update_cartesian_position)
         self.egm_worker.status_update.connect(self.update_status)
         self.egm_worker.error.connect(self.handle_error)
         self.egm_worker.connected.connect(self.update_connection_status)
         self.egm_worker.debug_update.connect(self.update_debug_log)
         
-        # Pass the slider values method to the worker
-        self.egm_worker.get_slider_values = self.get_slider_values
-        
         # ESP32 socket worker
         self.esp32_worker = ESP32Socket()
         self.esp32_worker.wrist_data_received.connect(self.update_esp32_position)
@@ -422,34 +64,35 @@ class RobotControlTab(QTabWidget):
         self.esp32_worker.error.connect(self.handle_error)
         self.esp32_worker.debug_update.connect(self.update_debug_log)
         
+        # Completion notices from the background IO writer
+        self.io_write_notifier = IOWriteNotifier(self)
+        self.io_write_notifier.write_finished.connect(self.on_io_write_finished)
+        
+        # Back home taps waiting for a read of the signal value, per signal
+        self._home_toggle_lock = threading.Lock()
+        self._home_toggle_taps = {}
+        self.home_toggle_error.connect(self.on_home_toggle_error)
+        
         # Camera and vision processing variables
-        self.camera = None
         self.is_streaming = False
         self.processed_frame = None
         self.n_fingers = -1
         self.last_detected_gesture = "Không phát hiện tay"
         self.hand_option = -1
         
+        # Camera, hand detector and gesture state are shared with other tabs;
+        # the service starts with the first subscription and stops with the last
+        self.camera_service = camera_service or shared_camera_service()
+        self.camera_subscription = None
+        self.camera_connected = False
+        # Last confirmed gesture written by auto-write, per target
+        self._auto_written = {'io': None, 'group': None}
+        
+        self.frame_ready.connect(self.on_pipeline_frame)
+        
         # Initialize UI variables
         self.slider_initialized = False
         
-        # Initialize HandDetector if MediaPipe is available
-        if MEDIAPIPE_AVAILABLE:
-            try:
-                from vision.hand_detector import HandDetector
-                self.hand_detector = HandDetector(min_detection_confidence=0.7)
-                self.mediapipe_available = True
-                print("Hand detector initialized successfully")
-            except Exception as e:
-                print(f"Failed to initialize hand detector: {str(e)}")
-                traceback.print_exc()
-                self.mediapipe_available = False
-                self.hand_detector = None
-        else:
-            self.mediapipe_available = False
-            self.hand_detector = None
-            print("MediaPipe not available - hand detection disabled")
-        
         # Initialize UI
         self.init_ui()
         
@@ -477,10 +120,7 @@ class RobotControlTab(QTabWidget):
         # Camera controls
         camera_controls = QHBoxLayout()
         
-        self.camera_combo = QComboBox()
-        self.camera_combo.addItem("Camera 0")
-        self.camera_combo.addItem("Camera 1")
-        self.camera_combo.addItem("Camera 2")
+        self.camera_combo = CameraSourceCombo()
         camera_controls.addWidget(self.camera_combo)
         
         self.connect_camera_button = QPushButton("Connect")
@@ -509,12 +149,10 @@ class RobotControlTab(QTabWidget):
         camera_layout = QVBoxLayout(camera_group)
         
         # Video feed - make it larger and more prominent
-        self.video_label = QLabel("No video feed")
-        self.video_label.setAlignment(Qt.AlignCenter)
-        self.video_label.setStyleSheet("background-color: black; color: white;")
-        self.video_label.setMinimumHeight(600)  # Increased height
-        self.video_label.setMinimumWidth(800)   # Set minimum width
-        camera_layout.addWidget(self.video_label)
+        self.video_widget = VideoWidget("No video feed")
+        self.video_widget.setMinimumHeight(600)  # Increased height
+        self.video_widget.setMinimumWidth(800)   # Set minimum width
+        camera_layout.addWidget(self.video_widget)
         
         # Hand gesture info
         gesture_layout = QHBoxLayout()
@@ -541,6 +179,11 @@ class RobotControlTab(QTabWidget):
 
         camera_layout.addLayout(gesture_layout)
         
+        # Camera pipeline FPS/latency counters
+        self.pipeline_stats_label = QLabel("Pipeline: stopped")
+        self.pipeline_stats_label.setStyleSheet("color: gray;")
+        camera_layout.addWidget(self.pipeline_stats_label)
+        
         left_layout.addWidget(camera_group)
         
         # Right side - Control panels
@@ -575,6 +218,17 @@ class RobotControlTab(QTabWidget):
         self.robot_state_label.setStyleSheet("font-weight: bold;")
         connection_layout.addRow("Robot State:", self.robot_state_label)
         
+        # Receive loop timing (rate, loss, jitter percentiles)
+        self.egm_loop_label = QLabel("-")
+        self.egm_loop_label.setStyleSheet("color: gray;")
+        self.egm_loop_label.setWordWrap(True)
+        connection_layout.addRow("Loop:", self.egm_loop_label)
+        
+        self.export_egm_timing_button = QPushButton("Export Timing CSV...")
+        self.export_egm_timing_button.setToolTip("Save EGM loop counters and histograms to a CSV file")
+        self.export_egm_timing_button.clicked.connect(self.export_egm_timing)
+        connection_layout.addRow("", self.export_egm_timing_button)
+        
         right_layout.addWidget(connection_group)
         
         # ESP32 connection group
@@ -762,6 +416,11 @@ class RobotControlTab(QTabWidget):
         self.rz_spinbox.valueChanged.connect(lambda v: self.rz_slider.setValue(int(v)))
         self.rz_slider.valueChanged.connect(lambda v: self.rz_spinbox.setValue(float(v)))
         
+        # Every change is published to the EGM sender
+        for spinbox in (self.x_spinbox, self.y_spinbox, self.z_spinbox,
+                        self.rx_spinbox, self.ry_spinbox, self.rz_spinbox):
+            spinbox.valueChanged.connect(self.publish_slider_target)
+        
         self.target_layout.addWidget(self.slider_widget)
         
         # Create ESP32 data display widget (will be shown/hidden dynamically)
@@ -872,10 +531,6 @@ class RobotControlTab(QTabWidget):
         # Add panels to main layout
         main_layout.addWidget(left_panel, 7)  # 70% width for camera
         main_layout.addWidget(right_panel, 3)  # 30% width for controls
-        
-        # Create and start camera timer
-        self.camera_timer = QTimer(self)
-        self.camera_timer.timeout.connect(self.process_camera)
     
     def setup_settings_tab(self):
         """Setup the settings tab with camera and I/O settings"""
@@ -1088,6 +743,11 @@ class RobotControlTab(QTabWidget):
         # Add grid to main camera settings layout
         camera_settings_layout.addLayout(camera_params_grid)
         
+        # Run MediaPipe outside the GUI process (takes effect on the next stream start)
+        self.process_detector_check = QCheckBox("Run hand detection in a separate process")
+        self.process_detector_check.setToolTip("Keeps MediaPipe off the GUI/EGM process; frames are shared through shared memory")
+        camera_settings_layout.addWidget(self.process_detector_check)
+        
         # Horizontal separator line
         separator = QFrame()
         separator.setFrameShape(QFrame.HLine)
@@ -1121,6 +781,30 @@ class RobotControlTab(QTabWidget):
         self.egm_port_spinbox.setRange(1024, 65535)
         self.egm_port_spinbox.setValue(DEFAULT_UDP_PORT)
         egm_layout.addWidget(self.egm_port_spinbox, 0, 1)
+        
+        # Send rate (planned frames per second, up to the 4 ms controller cycle)
+        egm_layout.addWidget(QLabel("EGM Send Rate:"), 1, 0)
+        self.egm_send_rate_spinbox = QSpinBox()
+        self.egm_send_rate_spinbox.setRange(1, int(DEFAULT_SEND_RATE))
+        self.egm_send_rate_spinbox.setValue(int(DEFAULT_SEND_RATE))
+        self.egm_send_rate_spinbox.setSuffix(" Hz")
+        egm_layout.addWidget(self.egm_send_rate_spinbox, 1, 1)
+        
+        self.egm_lockstep_check = QCheckBox("Reply to each feedback packet (lock-step)")
+        self.egm_lockstep_check.setChecked(True)
+        self.egm_lockstep_check.setToolTip("Send when a feedback packet arrives, not faster than the send rate")
+        egm_layout.addWidget(self.egm_lockstep_check, 2, 0, 1, 2)
+        
+        # Interpolation between target changes
+        egm_layout.addWidget(QLabel("Motion Profile:"), 3, 0)
+        self.egm_profile_combo = QComboBox()
+        self.egm_profile_combo.addItem("Minimum jerk", PROFILE_MIN_JERK)
+        self.egm_profile_combo.addItem("Linear", PROFILE_LINEAR)
+        self.egm_profile_combo.addItem("Off (step)", PROFILE_STEP)
+        self.egm_profile_combo.setToolTip("How the robot moves to a new target: minimum jerk keeps the velocity "
+                                          "and acceleration limits, linear only the velocity limits, off sends "
+                                          "each target as is")
+        egm_layout.addWidget(self.egm_profile_combo, 3, 1)
         connection_settings_layout.addLayout(egm_layout)
         
         # Separator
@@ -1321,8 +1005,9 @@ class RobotControlTab(QTabWidget):
             self.ry_slider.setValue(int(cartesian_data['ry']))
             self.rz_slider.setValue(int(cartesian_data['rz']))
             
-            # Mark as initialized
+            # Mark as initialized and start sending from the current position
             self.slider_initialized = True
+            self.publish_slider_target()
             self.log_event("Control sliders initialized with current position")
             self.update_debug_log("Control sliders initialized with current position")
     
@@ -1374,7 +1059,14 @@ class RobotControlTab(QTabWidget):
             if not self.start_button.isEnabled() and self.stop_button.isEnabled():
                 self.start_button.setEnabled(True)
                 self.stop_button.setEnabled(False)
-                self.egm_port_spinbox.setEnabled(True)
+                self.set_egm_settings_enabled(True)
+    
+    def set_egm_settings_enabled(self, enabled):
+        """Port and send settings can only change while EGM is stopped"""
+        self.egm_port_spinbox.setEnabled(enabled)
+        self.egm_send_rate_spinbox.setEnabled(enabled)
+        self.egm_lockstep_check.setEnabled(enabled)
+        self.egm_profile_combo.setEnabled(enabled)
     
     def update_debug_log(self, message):
         """Add message to debug log (now going to event log)"""
@@ -1409,6 +1101,11 @@ class RobotControlTab(QTabWidget):
             self.event_log.clear()
             self.log_event("Event log cleared")
     
+    def publish_slider_target(self, *args):
+        """Publish the spinbox values to the EGM sender's slider mailbox"""
+        if self.slider_initialized:
+            self.egm_worker.target_mailbox.publish_pose(self.get_slider_values())
+    
     def get_slider_values(self):
         """Get current values from sliders/spinboxes for EGM worker"""
         if not hasattr(self, 'x_spinbox'):
@@ -1429,7 +1126,9 @@ class RobotControlTab(QTabWidget):
         try:
             # Configure EGM worker
             port = self.egm_port_spinbox.value()
-            self.egm_worker.configure(port)
+            self.egm_worker.configure(port, self.egm_send_rate_spinbox.value(),
+                                      self.egm_lockstep_check.isChecked(),
+                                      self.egm_profile_combo.currentData())
             
             # Start worker thread
             self.egm_worker.start()
@@ -1437,6 +1136,7 @@ class RobotControlTab(QTabWidget):
             # Update UI
             self.start_button.setEnabled(False)
             self.stop_button.setEnabled(True)
+            self.set_egm_settings_enabled(False)
             
             self.log_event(f"Started EGM on port {port}")
             
@@ -1445,6 +1145,20 @@ class RobotControlTab(QTabWidget):
             self.log_event(f"Error: {error_msg}")
             QMessageBox.critical(self, "EGM Error", error_msg)
     
+    def export_egm_timing(self):
+        """Save the EGM loop timing histograms to a CSV file"""
+        default_name = f"egm_timing_{time.strftime('%Y%m%d_%H%M%S')}.csv"
+        path, _ = QFileDialog.getSaveFileName(self, "Export EGM Loop Timing", default_name,
+                                              "CSV Files (*.csv);;All Files (*)")
+        if not path:
+            return
+        try:
+            self.egm_worker.loop_stats.write_csv(path)
+            self.log_event(f"EGM loop timing exported to {path}")
+        except Exception as e:
+            self.log_event(f"Error exporting EGM loop timing: {str(e)}")
+            self.update_debug_log(f"Error exporting EGM loop timing: {str(e)}\n{traceback.format_exc()}")
+    
     def stop_egm(self):
         """Stop EGM communication"""
         try:
@@ -1455,7 +1169,7 @@ class RobotControlTab(QTabWidget):
             # Update UI
             self.start_button.setEnabled(True)
             self.stop_button.setEnabled(False)
-            self.egm_port_spinbox.setEnabled(True)
+            self.set_egm_settings_enabled(True)
             
             self.log_event("Stopped EGM")
             
@@ -1570,68 +1284,49 @@ class RobotControlTab(QTabWidget):
             QMessageBox.critical(self, "ESP32 Error", error_msg)
     
     def connect_camera(self):
-        """Connect to the selected camera"""
-        camera_idx = self.camera_combo.currentIndex()
+        """Select the camera, or a recording to replay, for the shared camera service"""
+        camera_idx = self.camera_combo.selected_source()
+        if camera_idx is None:
+            return
         self.log_event(f"Connecting to camera: {camera_idx}")
         
         try:
-            # Close current camera if open
-            if self.camera is not None:
-                self.stop_stream()
-                self.camera.release()
-                self.camera = None
-            
-            # Open new camera
-            self.camera = cv2.VideoCapture(camera_idx)
-            
-            if not self.camera.isOpened():
-                self.log_event(f"Failed to open camera {camera_idx}")
-                return
-                
-            # Read a frame to verify connection
-            ret, frame = self.camera.read()
-            if not ret or frame is None:
-                self.log_event("Failed to capture frame from camera")
-                self.camera.release()
-                self.camera = None
-                return
+            # Switches the stream of every subscribed tab if the service is running
+            self.camera_service.set_source(camera_idx)
+            self.camera_connected = True
             
             # Update UI
-            self.start_stream_button.setEnabled(True)
+            self.start_stream_button.setEnabled(not self.is_streaming)
             self.connect_camera_button.setEnabled(False)
             self.disconnect_camera_button.setEnabled(True)
             self.apply_settings_button.setEnabled(True)
             
-            self.log_event(f"Connected to camera {camera_idx} successfully")
+            self.log_event(f"Camera source set to {camera_idx}; it is opened when a stream starts")
             
         except Exception as e:
             error_msg = f"Failed to connect to camera: {str(e)}"
             self.log_event(f"Error: {error_msg}")
             self.update_debug_log(f"Error connecting to camera: {str(e)}\n{traceback.format_exc()}")
-            if self.camera:
-                self.camera.release()
-                self.camera = None
     
     def start_stream(self):
         """Start the video stream"""
-        if not self.camera:
+        if not self.camera_connected:
             self.log_event("Cannot start stream - no camera connected")
             return
             
         try:
             # Get current resolution
             width, height = [int(x) for x in self.resolution_combo.currentText().split('x')]
-            
-            # Set resolution
-            self.camera.set(cv2.CAP_PROP_FRAME_WIDTH, width)
-            self.camera.set(cv2.CAP_PROP_FRAME_HEIGHT, height)
-            
-            # Start streaming
+            self.camera_service.apply_settings({'width': width, 'height': height})
+            self.camera_service.use_process_detector = self.process_detector_check.isChecked()
+            
+            # Start streaming (opens the camera if no other tab is streaming)
+            self._auto_written = {'io': None, 'group': None}
+            self.camera_subscription = self.camera_service.subscribe(
+                on_frame=self.frame_ready.emit, name="Robot Control"
+            )
             self.is_streaming = True
             
-            # Start camera timer
-            self.camera_timer.start(30)  # 30ms = ~33 fps
-            
             # Update UI
             self.stop_stream_button.setEnabled(True)
             self.start_stream_button.setEnabled(False)
@@ -1653,12 +1348,13 @@ class RobotControlTab(QTabWidget):
             # Stop streaming
             self.is_streaming = False
             
-            # Stop camera timer
-            if self.camera_timer.isActive():
-                self.camera_timer.stop()
+            # Leave the camera service (it stops when no other tab is streaming)
+            if self.camera_subscription:
+                self.camera_subscription.close()
+                self.camera_subscription = None
             
-            # Clear video label
-            self.video_label.setText("No video feed")
+            # Clear video display
+            self.video_widget.clear("No video feed")
             self.processed_frame = None
             
             # Update UI
@@ -1672,135 +1368,47 @@ class RobotControlTab(QTabWidget):
             self.log_event(f"Error: {error_msg}")
             self.update_debug_log(f"Error stopping video stream: {str(e)}\n{traceback.format_exc()}")
     
-    def process_camera(self):
-        """Process camera frame and detect hand gestures"""
-        if not self.camera or not self.is_streaming:
+    def on_pipeline_frame(self):
+        """Show the newest frame and gesture result of the camera service (GUI thread)"""
+        if not self.is_streaming or self.camera_subscription is None:
+            return
+            
+        # The service keeps this buffer out of reuse while the widget shows it
+        packet = self.camera_subscription.latest()
+        if packet is None:
+            # Already shown with an earlier notification
             return
             
         try:
-            # Read frame from camera
-            ret, frame = self.camera.read()
-            if not ret or frame is None:
-                self.log_event("Error reading frame from camera")
-                return
-                
-            # Flip image horizontally for easier use
-            frame = cv2.flip(frame, 1)
+            result = packet.result
+            self.processed_frame = packet.image
             
-            # Process frame with hand detector if available
-            if self.hand_detector and self.mediapipe_available:
-                processed_frame, hand_lms = self.hand_detector.findHands(frame)
-                
-                # Count fingers
-                n_fingers = self.hand_detector.count_finger(hand_lms)
-                
-                # Get hand gesture
-                hand_gesture = self.hand_detector.get_hand_gesture(n_fingers)
-                Trigger = 0
-                # Get option
-                hand_option = self.hand_detector.get_option(n_fingers)
-                
-                # --- Double tap detection ---
-                fingers_touching, tap_count, status = self.hand_detector.update_double_tap(hand_lms, 4, 8)
+            if result is None:
+                self.n_fingers = -1
+                self.last_detected_gesture = "MediaPipe không khả dụng"
+                self.hand_option = -1
+            else:
+                n_fingers = result['n_fingers']
+                hand_gesture = result['gesture']
                 
                 # Update tap label
-                self.tap_label.setText(str(tap_count))
+                self.tap_label.setText(str(result['tap_count']))
                 
+                # --- Double tap (events counted by the camera service) ---
                 double_tap_active = False
-                if status == "triggered" or status == "reset":
-                    hand_gesture += " + Đã kích hoạt!"
-                    self.log_event("Double tap: Đã kích hoạt!")
+                for _ in range(self.camera_subscription.new_taps(result)):
                     double_tap_active = True
+                    self.handle_double_tap()
                     
-                    # Update double tap status display
-                    self.double_tap_status.setText("ACTIVE")
-                    self.double_tap_status.setStyleSheet("font-weight: bold; color: green;")
-                    
-                    # Handle back home position if enabled
-                    if self.back_home_check.isChecked() and self.back_home_signal.currentText() != "Select a signal":
-                        signal_name = self.back_home_signal.currentText()
-                        
-                        # First get the current signal value properly
-                        try:
-                            # Get the proper signal path
-                            signal_path = f"/rw/iosystem/signals/{signal_name}"
-                            
-                            # Get current value directly from robot controller
-                            result = self.robot.io.get_signal_value(signal_path)
-                            
-                            if result.get('status_code') == 200 and 'content' in result:
-                                # Extract the current value from the response
-                                current_value = None
-
-                                # Extract value in different possible formats
-                                if 'value' in result['content']:
-                                    current_value = result['content']['value']
-                                elif 'state' in result['content'] and len(result['content']['state']) > 0:
-                                    for state in result['content']['state']:
-                                        if 'lvalue' in state:
-                                            current_value = state['lvalue']
-                                            break
-                                elif '_embedded' in result['content'] and 'resources' in result['content']['_embedded']:
-                                    resources = result['content']['_embedded']['resources']
-                                    if len(resources) > 0 and 'lvalue' in resources[0]:
-                                        current_value = resources[0]['lvalue']
-                                # ...existing code...
-                                
-                                if current_value is not None:
-                                    # Convert to integer
-                                    try:
-                                        current_value = int(current_value)
-                                    except (ValueError, TypeError):
-                                        current_value = 0
-                                        
-                                    self.log_event(f"Current value of {signal_name}: {current_value}")
-                                    
-                                    # Toggle value (0->1, 1->0)
-                                    new_value = 0 if current_value == 1 else 1
-                                    self.log_event(f"Toggling {signal_name} from {current_value} to {new_value}")
-                                    
-                                    # Write toggled value
-                                    success = self.write_signal_value(signal_name, new_value)
-                                    
-                                    if success:
-                                        self.home_status_label.setText(f"{signal_name} = {new_value} (toggled from {current_value})")
-                                        self.home_status_label.setStyleSheet("font-weight: bold; color: green;")
-                                        self.log_event(f"Back home triggered: {signal_name} toggled from {current_value} to {new_value}")
-                                else:
-                                    self.log_event(f"Could not extract current value from response: {result}")
-                                    self.home_status_label.setText(f"Error: Could not extract value")
-                                    self.home_status_label.setStyleSheet("font-weight: bold; color: red;")
-                            else:
-                                error_msg = f"Failed to get current signal value: {result.get('error', 'Unknown error')}"
-                                self.log_event(error_msg)
-                                self.home_status_label.setText(error_msg)
-                                self.home_status_label.setStyleSheet("font-weight: bold; color: red;")
-                        except Exception as e:
-                            self.log_event(f"Error toggling home signal: {str(e)}")
-                            self.home_status_label.setText(f"Error: {str(e)}")
-                            self.home_status_label.setStyleSheet("font-weight: bold; color: red;")
-                
+                if double_tap_active:
+                    hand_gesture += " + Đã kích hoạt!"
                 else:
                     # Update double tap status display for idle state
                     self.double_tap_status.setText("Not Active")
                     self.double_tap_status.setStyleSheet("font-weight: bold; color: gray;")
-
                 # --- End double tap ---
                 
-                # Display option information on image
-                if hand_option > 0:
-                    cv2.putText(processed_frame, f"Option: {hand_option}", 
-                               (10, 70), cv2.FONT_HERSHEY_SIMPLEX, 1, (0, 255, 0), 2)
-                # Hiển thị trạng thái double tap lên ảnh
-                cv2.putText(processed_frame, f"Tap Count: {tap_count}", (10, 110), cv2.FONT_HERSHEY_SIMPLEX, 1, (0,0,255), 2)
-                
-                # Add double tap status to image
-                double_tap_text = "Double Tap: ACTIVE" if double_tap_active else "Double Tap: Inactive"
-                double_tap_color = (0, 255, 0) if double_tap_active else (0, 0, 255)
-                cv2.putText(processed_frame, double_tap_text, (10, 150), cv2.FONT_HERSHEY_SIMPLEX, 1, double_tap_color, 2)
-                
                 # Save results
-                self.processed_frame = cv2.cvtColor(processed_frame, cv2.COLOR_BGR2RGB)  # Convert to RGB for Qt
                 self.n_fingers = n_fingers
                 self.last_detected_gesture = hand_gesture
                 self.hand_option = hand_gesture
@@ -1809,57 +1417,116 @@ class RobotControlTab(QTabWidget):
                 self.fingers_label.setText(str(self.n_fingers))
                 self.gesture_label.setText(self.last_detected_gesture)
                 
-                # Process I/O auto-write if enabled and robot connected
+                # Process I/O auto-write if enabled and robot connected,
+                # only when the confirmed gesture changed since the last write
                 if self.robot:
                     # Only process if hand is detected
                     if n_fingers >= 0 and hand_gesture != "Không phát hiện tay":
                         # Regular I/O
-                        if self.auto_write_button.isChecked():
+                        if self.auto_write_button.isChecked() and self._auto_written['io'] != n_fingers:
+                            self._auto_written['io'] = n_fingers
                             self.write_gesture_to_io()
                         
                         # Group I/O
-                        if hasattr(self, 'auto_write_group_button') and self.auto_write_group_button.isChecked():
+                        if (hasattr(self, 'auto_write_group_button') and self.auto_write_group_button.isChecked()
+                                and self._auto_written['group'] != n_fingers):
+                            self._auto_written['group'] = n_fingers
                             self.write_gesture_to_group()
                 
-            else:
-                # If hand detector not available, just show original image with a notice
-                h, w, _ = frame.shape
-                cv2.putText(frame, "MediaPipe not available", (int(w/4), int(h/2)-30), 
-                           cv2.FONT_HERSHEY_SIMPLEX, 0.8, (0, 0, 255), 2)
-                self.processed_frame = cv2.cvtColor(frame, cv2.COLOR_BGR2RGB)
-                self.n_fingers = -1
-                self.last_detected_gesture = "MediaPipe không khả dụng"
-                self.hand_option = -1
-                
-            # Update video label with processed frame
-            self.update_video_label()
+            # Show the processed frame (repainted only for a new frame)
+            self.video_widget.set_frame(packet.image, packet.seq)
                 
         except Exception as e:
             self.log_event(f"Error processing camera: {str(e)}")
             self.update_debug_log(f"Error processing camera: {str(e)}\n{traceback.format_exc()}")
     
-    def update_video_label(self):
-        """Update video label with latest processed frame"""
-        if self.processed_frame is not None:
-            try:
-                # Convert frame from OpenCV to QImage for display
-                h, w, ch = self.processed_frame.shape
-                bytes_per_line = ch * w
-                qt_image = QImage(self.processed_frame.data, w, h, bytes_per_line, QImage.Format_RGB888)
-                pixmap = QPixmap.fromImage(qt_image)
-                
-                # Scale pixmap to fit label while maintaining aspect ratio
-                pixmap = pixmap.scaled(self.video_label.width(), self.video_label.height(), 
-                                      Qt.KeepAspectRatio, Qt.SmoothTransformation)
-                
-                # Set pixmap to label
-                self.video_label.setPixmap(pixmap)
-            except Exception as e:
-                self.update_debug_log(f"Error updating video label: {str(e)}")
+    def handle_double_tap(self):
+        """React to a confirmed double tap (GUI thread)"""
+        self.log_event("Double tap: Đã kích hoạt!")
+        
+        # Update double tap status display
+        self.double_tap_status.setText("ACTIVE")
+        self.double_tap_status.setStyleSheet("font-weight: bold; color: green;")
+        
+        # Handle back home position if enabled
+        if self.back_home_check.isChecked() and self.back_home_signal.currentText() != "Select a signal":
+            signal_name = self.back_home_signal.currentText()
+            if not self.robot:
+                self.log_event(f"Cannot toggle {signal_name} - no robot connection")
+                return
+
+            with self._home_toggle_lock:
+                # A read of the current value is running: toggle once more when it returns
+                if signal_name in self._home_toggle_taps:
+                    self._home_toggle_taps[signal_name] += 1
+                    return
+
+                # Toggle from the newest value known to the writer (pending, in flight, acknowledged)
+                new_value = self.robot.io.writer.toggle(signal_name)
+                if new_value is None:
+                    self._home_toggle_taps[signal_name] = 1
+
+            if new_value is not None:
+                self.log_event(f"Back home triggered: {signal_name} toggled to {new_value}")
+                self.home_status_label.setText(f"{signal_name} = {new_value} (pending)")
+                self.home_status_label.setStyleSheet("font-weight: bold; color: orange;")
+                return
+
+            # Value unknown: read it from the controller off the GUI thread
+            self.home_status_label.setText(f"Reading {signal_name}...")
+            self.home_status_label.setStyleSheet("font-weight: bold; color: orange;")
+            threading.Thread(target=self._read_and_toggle_home, args=(self.robot, signal_name),
+                             name='BackHomeToggle', daemon=True).start()
+
+    def _read_and_toggle_home(self, robot, signal_name):
+        """Read the back home signal and queue the toggles of the taps so far (worker thread)"""
+        current_value = None
+        error = ''
+        try:
+            result = robot.io.get_signal_value(f"/rw/iosystem/signals/{signal_name}")
+            if result.get('status_code') == 200 and 'content' in result:
+                current_value = self._extract_signal_value(result['content'])
+                if current_value is None:
+                    error = "Could not extract value"
+            else:
+                error = f"Failed to get current signal value: {result.get('error', 'Unknown error')}"
+        except Exception as e:
+            error = str(e)
+
+        with self._home_toggle_lock:
+            taps = self._home_toggle_taps.pop(signal_name, 0)
+            new_value = None
+            if current_value is not None:
+                for _ in range(taps):
+                    new_value = robot.io.writer.toggle(signal_name, current_value)
+
+        if new_value is None:
+            self.home_toggle_error.emit(signal_name, error or "Could not read value")
+
+    @staticmethod
+    def _extract_signal_value(content):
+        """Extract the value of a signal from a get_signal_value response content"""
+        if 'value' in content:
+            return content['value']
+        if 'state' in content and len(content['state']) > 0:
+            for state in content['state']:
+                if 'lvalue' in state:
+                    return state['lvalue']
+        elif '_embedded' in content and 'resources' in content['_embedded']:
+            resources = content['_embedded']['resources']
+            if len(resources) > 0 and 'lvalue' in resources[0]:
+                return resources[0]['lvalue']
+        return None
+
+    def on_home_toggle_error(self, signal_name, error):
+        """Show a failed back home toggle (GUI thread)"""
+        self.log_event(f"Error toggling home signal {signal_name}: {error}")
+        self.home_status_label.setText(f"Error: {error}")
+        self.home_status_label.setStyleSheet("font-weight: bold; color: red;")
     
     def apply_camera_settings(self):
         """Apply camera settings"""
-        if not self.camera:
+        if not self.camera_connected:
             self.log_event("Cannot apply settings - no camera connected")
             return
             
@@ -1884,18 +1551,8 @@ class RobotControlTab(QTabWidget):
             exposure_map = {"1/30": -5, "1/60": -6, "1/125": -7, "1/250": -8, "1/500": -9, "Auto": 0}
             settings['exposure'] = exposure_map[self.exposure_combo.currentText()]
             
-            # Apply settings
-            self.camera.set(cv2.CAP_PROP_BRIGHTNESS, settings['brightness'] if settings['brightness'] >= 0 else 0.5)
-            self.camera.set(cv2.CAP_PROP_CONTRAST, settings['contrast'] if settings['contrast'] >= 0 else 0.5)
-            self.camera.set(cv2.CAP_PROP_FRAME_WIDTH, settings['width'])
-            self.camera.set(cv2.CAP_PROP_FRAME_HEIGHT, settings['height'])
-            
-            # Handle exposure separately due to auto vs manual modes
-            if settings['exposure'] == 0:  # Auto
-                self.camera.set(cv2.CAP_PROP_AUTO_EXPOSURE, 3)  # 3 = auto
-            else:
-                self.camera.set(cv2.CAP_PROP_AUTO_EXPOSURE, 1)  # 1 = manual
-                self.camera.set(cv2.CAP_PROP_EXPOSURE, settings['exposure'])
+            # Applied between two reads if the camera is streaming, else when it is opened
+            self.camera_service.apply_settings(settings)
             
             self.log_event("Camera settings applied")
             
@@ -2067,13 +1724,8 @@ class RobotControlTab(QTabWidget):
                 # Get corresponding I/O value from table
                 io_value = int(self.signal_table.item(table_index, 1).text())
                 
-                # Write value to robot I/O using our utility method
-                success = self.write_signal_value(signal_name, io_value)
-                
-                # Update status display
-                if success:
-                    self.io_status_label.setText(f"{signal_name} = {io_value}")
-                    self.io_status_label.setStyleSheet("font-weight: bold; color: green;")
+                # Queue value for the robot I/O - status is updated in on_io_write_finished
+                self.write_signal_value(signal_name, io_value)
             else:
                 # Log that we didn't find a matching finger value in the table
                 available_values = [str(value) for _, value in available_finger_values]
@@ -2090,6 +1742,8 @@ class RobotControlTab(QTabWidget):
     
     def on_auto_write_changed(self, state):
         """Handle auto-write checkbox state change"""
+        # Write the current gesture once on enable, then only on changes
+        self._auto_written['io'] = None
         if state == Qt.Checked:
             signal_name = self.io_signal_combo.currentText()
             if signal_name == "Select an I/O signal":
@@ -2175,11 +1829,24 @@ class RobotControlTab(QTabWidget):
                     'rx': self.rx_slider, 'ry': self.ry_slider, 'rz': self.rz_slider
                 }
                 self.egm_worker.update_sliders_with_position(spinboxes, sliders)
+                # Spinbox signals are blocked during that update
+                self.publish_slider_target()
         else:
             # Not connected
             self.robot_state_label.setText("DISCONNECTED")
             self.robot_state_label.setStyleSheet("font-weight: bold; color: gray;")
         
+        # EGM receive loop timing
+        loop_stats = self.egm_worker.loop_stats.snapshot()
+        if loop_stats['received']:
+            self.egm_loop_label.setText(
+                f"{loop_stats['rate_hz']:.0f} Hz, period met {loop_stats['period_met']:.1%}, "
+                f"lost {loop_stats['lost']} | jitter p99 {loop_stats['jitter']['p99_ms']:.2f} ms | "
+                f"RTT p99 {loop_stats['round_trip']['p99_ms']:.2f} ms"
+            )
+        else:
+            self.egm_loop_label.setText("-")
+        
         # Update ESP32 connection status
         if self.esp32_worker.running:
             if self.esp32_worker.connected:
@@ -2192,13 +1859,25 @@ class RobotControlTab(QTabWidget):
             self.esp32_status_label.setText("DISCONNECTED")
             self.esp32_status_label.setStyleSheet("font-weight: bold; color: gray;")
         
-        # Update video label if frame has changed
-        if self.is_streaming and self.processed_frame is not None:
-            self.update_video_label()
+        # Camera service counters (frames are shown by on_pipeline_frame)
+        stats = self.camera_service.stats() if self.is_streaming else None
+        if stats:
+            gesture_stats = stats['gesture']
+            self.pipeline_stats_label.setText(
+                f"Capture {stats['capture']['fps']:.0f} fps | "
+                f"Inference {stats['inference']['fps']:.0f} fps, {stats['inference']['latency_ms']:.0f} ms | "
+                f"End-to-end {stats['end_to_end']['latency_ms']:.0f} ms | "
+                f"Dropped {stats['inference']['dropped'] + stats['display']['dropped']} | "
+                f"Skipped {gesture_stats['savings']:.0%} (k={gesture_stats['skip_interval']}, "
+                f"+{gesture_stats['added_latency_ms']:.0f} ms)"
+            )
+        else:
+            self.pipeline_stats_label.setText("Pipeline: stopped")
     
     def initialize(self, robot):
         """Initialize the tab with robot reference"""
         self.robot = robot
+        self.io_write_notifier.attach(robot)
         
         # Fill IO signal combo box
         if self.robot:
@@ -2217,11 +1896,8 @@ class RobotControlTab(QTabWidget):
         if self.esp32_worker.running:
             self.disconnect_esp32()
         
-        # Release camera
-        if self.camera:
-            self.stop_stream()
-            self.camera.release()
-            self.camera = None 
+        # Leave the camera service
+        self.stop_stream()
     
     def refresh_group_signals(self):
         """Refresh group I/O signals from robot controller"""
@@ -2298,13 +1974,8 @@ class RobotControlTab(QTabWidget):
                 # Get corresponding I/O value from table
                 group_value = int(self.group_signal_table.item(finger_count, 1).text())
                 
-                # Write value to robot I/O using our utility method
-                success = self.write_signal_value(signal_name, group_value)
-                
-                # Update status display
-                if success:
-                    self.group_status_label.setText(f"{signal_name} = {group_value}")
-                    self.group_status_label.setStyleSheet("font-weight: bold; color: green;")
+                # Queue value for the robot I/O - status is updated in on_io_write_finished
+                self.write_signal_value(signal_name, group_value)
             else:
                 # Log that we're ignoring this finger count
                 self.log_event(f"Finger count {self.n_fingers} outside allowed values (0,1), maintaining previous value")
@@ -2320,6 +1991,8 @@ class RobotControlTab(QTabWidget):
     
     def on_auto_write_group_changed(self, state):
         """Handle auto-write button state change for group signals"""
+        # Write the current gesture once on enable, then only on changes
+        self._auto_written['group'] = None
         if state == Qt.Checked:
             signal_name = self.group_signal_combo.currentText()
             if signal_name == "Select a group signal":
@@ -2335,25 +2008,20 @@ class RobotControlTab(QTabWidget):
             self.auto_write_group_button.setStyleSheet("")
     
     def write_signal_value(self, signal_name, value):
-        """Write a value to a signal - similar to io_tab implementation"""
+        """Queue a value for a signal on the background IO writer (non-blocking)
+        
+        Returns True once the write is accepted; the result arrives later in
+        on_io_write_finished.
+        """
         if not self.robot:
             self.log_event(f"Cannot write to signal {signal_name} - no robot connection")
             return False
             
         try:
-            # Log the attempt
-            self.log_event(f"Setting signal {signal_name} to {value}...")
-            
-            # Call RWS API to set the signal value
-            result = self.robot.io.set_signal_value(signal_name, value)
-            
-            if result.get('status_code') in [200, 201, 202, 204]:
-                self.log_event(f"Successfully set {signal_name} to {value}")
-                return True
-            else:
-                error_msg = result.get('error', 'Unknown error')
-                self.log_event(f"Failed to set signal {signal_name}: {error_msg}")
-                return False
+            # Superseded and redundant writes are dropped by the writer
+            if self.robot.io.write_signal_async(signal_name, value):
+                self.log_event(f"Setting signal {signal_name} to {value}...")
+            return True
                 
         except Exception as e:
             import traceback
@@ -2362,6 +2030,25 @@ class RobotControlTab(QTabWidget):
             self.update_debug_log(f"Error details: \n{error_traceback}")
             return False
 
+    def on_io_write_finished(self, signal_name, value, success, error):
+        """Update status displays when a background I/O write completes"""
+        if success:
+            self.log_event(f"Successfully set {signal_name} to {value}")
+            text, style = f"{signal_name} = {value}", "font-weight: bold; color: green;"
+        else:
+            self.log_event(f"Failed to set signal {signal_name}: {error}")
+            text, style = f"Error: {error}", "font-weight: bold; color: red;"
+        
+        if signal_name == self.io_signal_combo.currentText():
+            self.io_status_label.setText(text)
+            self.io_status_label.setStyleSheet(style)
+        if signal_name == self.group_signal_combo.currentText():
+            self.group_status_label.setText(text)
+            self.group_status_label.setStyleSheet(style)
+        if signal_name == self.back_home_signal.currentText():
+            self.home_status_label.setText(text)
+            self.home_status_label.setStyleSheet(style)
+
     def disconnect_camera(self):
         """Disconnect from the camera"""
         try:
@@ -2369,14 +2056,11 @@ class RobotControlTab(QTabWidget):
             if self.is_streaming:
                 self.stop_stream()
                 
-            # Release camera
-            if self.camera is not None:
-                self.camera.release()
-                self.camera = None
+            # The camera itself is released by the service when no tab streams
+            self.camera_connected = False
                 
             # Reset video display
-            self.video_label.setText("No video feed")
-            self.video_label.setStyleSheet("background-color: black; color: white;")
+            self.video_widget.clear("No video feed")
             
             # Update UI
             self.connect_camera_button.setEnabled(True)
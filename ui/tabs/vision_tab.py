@@ -5,7 +5,7 @@ from PyQt5.QtWidgets import (QWidget, QVBoxLayout, QHBoxLayout, QFormLayout,
                            QTabWidget, QSplitter, QTextEdit, QListWidget,
                            QMessageBox)
 from PyQt5.QtCore import Qt, pyqtSignal, QTimer
-from PyQt5.QtGui import QFont, QIcon, QPixmap, QImage
+from PyQt5.QtGui import QFont, QIcon
 import cv2
 import numpy as np
 import threading
@@ -21,12 +21,18 @@ if project_root not in sys.path:
     sys.path.append(project_root)
 
 # Import hand detector directly from vision module
-from vision.hand_detector import HandDetector
+from vision.camera_service import shared_camera_service
+from rws_io.io_writer import IOWriteNotifier
+from ui.widgets.camera_source_combo import CameraSourceCombo
+from ui.widgets.video_widget import VideoWidget
 
 class VisionTab(QWidget):
     """Tab for robot vision system control"""
     
-    def __init__(self):
+    # Emitted from the camera pipeline display thread when a new frame is ready
+    frame_ready = pyqtSignal()
+    
+    def __init__(self, camera_service=None):
         super().__init__()
         
         # Store robot reference
@@ -36,27 +42,26 @@ class VisionTab(QWidget):
         self.initialized = False
         
         # Initialize vision processing variables
-        self.camera = None
         self.is_streaming = False
         self.processed_frame = None
+        self.frame_seq = None  # Sequence number of processed_frame
         self.n_fingers = -1
         self.last_detected_gesture = "Không phát hiện tay"
         self.hand_option = -1
         
-        # Initialize HandDetector
-        try:
-            self.hand_detector = HandDetector(min_detection_confidence=0.7)
-            self.mediapipe_available = True
-            print("Hand detector initialized successfully in vision_tab")
-        except Exception as e:
-            print(f"Failed to initialize hand detector: {str(e)}")
-            traceback.print_exc()
-            self.mediapipe_available = False
-            self.hand_detector = None
+        # Camera and hand detector shared with other tabs (started by the first subscriber)
+        self.camera_service = camera_service or shared_camera_service()
+        self.camera_subscription = None
+        self.camera_connected = False
+        self.frame_ready.connect(self.update_ui_from_frame)
         
         # Tín hiệu I/O được chọn
         self.selected_io_signal = None
         
+        # Completion notices from the background IO writer
+        self.io_write_notifier = IOWriteNotifier(self)
+        self.io_write_notifier.write_finished.connect(self.on_io_write_finished)
+        
         # Initialize UI
         self.init_ui()
         
@@ -71,10 +76,7 @@ class VisionTab(QWidget):
         
         # Camera selection
         camera_form = QFormLayout()
-        self.camera_combo = QComboBox()
-        self.camera_combo.addItem("Camera 0")
-        self.camera_combo.addItem("Camera 1")
-        self.camera_combo.addItem("Camera 2")
+        self.camera_combo = CameraSourceCombo()
         camera_form.addRow("Select Camera:", self.camera_combo)
         camera_layout.addLayout(camera_form)
         
@@ -113,11 +115,9 @@ class VisionTab(QWidget):
         video_layout = QVBoxLayout(video_widget)
         
         # Video feed label
-        self.video_label = QLabel("No video feed")
-        self.video_label.setAlignment(Qt.AlignCenter)
-        self.video_label.setStyleSheet("background-color: black; color: white;")
-        self.video_label.setMinimumSize(640, 480)
-        video_layout.addWidget(self.video_label)
+        self.video_widget = VideoWidget("No video feed")
+        self.video_widget.setMinimumSize(640, 480)
+        video_layout.addWidget(self.video_widget)
         
         # Hand gesture detection info
         gesture_layout = QHBoxLayout()
@@ -222,20 +222,11 @@ class VisionTab(QWidget):
         
         # Add splitter to main layout
         main_layout.addWidget(self.splitter)
-        
-        # Timer for updating UI with processed frames
-        self.ui_update_timer = QTimer(self)
-        self.ui_update_timer.timeout.connect(self.update_ui_from_frame)
-        self.ui_update_timer.start(30)  # 30ms = ~33 fps
-        
-        # Camera processing timer
-        self.camera_timer = QTimer(self)
-        self.camera_timer.timeout.connect(self.process_camera)
-        # Don't start the timer yet - it will be started when camera is connected
     
     def initialize(self, robot):
         """Initialize with robot reference and load initial state"""
         self.robot = robot
+        self.io_write_notifier.attach(robot)
         
         try:
             # Lấy danh sách tín hiệu I/O để điền vào combo box
@@ -246,7 +237,7 @@ class VisionTab(QWidget):
             self.log_event("Vision system initialized")
             
             # Log MediaPipe status
-            if self.mediapipe_available:
+            if self.camera_service.mediapipe_available:
                 self.log_event("MediaPipe initialized successfully")
             else:
                 self.log_event("MediaPipe initialization failed - hand detection disabled")
@@ -256,68 +247,6 @@ class VisionTab(QWidget):
             traceback.print_exc()
             self.initialized = False
     
-    def process_camera(self):
-        """Process camera frame and detect hand gestures"""
-        if not self.camera or not self.is_streaming:
-            return
-            
-        try:
-            # Read frame from camera
-            ret, frame = self.camera.read()
-            if not ret or frame is None:
-                self.log_event("Error reading frame from camera")
-                return
-                
-            # Flip image horizontally for easier use
-            frame = cv2.flip(frame, 1)
-            
-            # Process frame with hand detector if available
-            if self.hand_detector and self.mediapipe_available:
-                processed_frame, hand_lms = self.hand_detector.findHands(frame)
-                
-                # Count fingers
-                n_fingers = self.hand_detector.count_finger(hand_lms)
-                
-                # Get hand gesture
-                hand_gesture = self.hand_detector.get_hand_gesture(n_fingers)
-                
-                # Get option
-                hand_option = self.hand_detector.get_option(n_fingers)
-                
-                # Display option information on image
-                if hand_option > 0:
-                    cv2.putText(processed_frame, f"Option: {hand_option}", 
-                               (10, 70), cv2.FONT_HERSHEY_SIMPLEX, 1, (0, 255, 0), 2)
-                
-                # Save results
-                self.processed_frame = cv2.cvtColor(processed_frame, cv2.COLOR_BGR2RGB)  # Convert to RGB for Qt
-                self.n_fingers = n_fingers
-                self.last_detected_gesture = hand_gesture
-                self.hand_option = hand_option
-            else:
-                # If hand detector not available, just show original image with a notice
-                h, w, _ = frame.shape
-                cv2.putText(frame, "MediaPipe not available", (int(w/4), int(h/2)-30), 
-                           cv2.FONT_HERSHEY_SIMPLEX, 0.8, (0, 0, 255), 2)
-                self.processed_frame = cv2.cvtColor(frame, cv2.COLOR_BGR2RGB)
-                self.n_fingers = -1
-                self.last_detected_gesture = "MediaPipe không khả dụng"
-                self.hand_option = -1
-                
-            # Process I/O auto-write if enabled
-            if self.selected_io_signal and self.robot:
-                try:
-                    io_value = self.n_fingers + 1 if self.n_fingers >= 0 else 0
-                    io_value = min(io_value, 6)
-                    self.robot.io.set_signal_value(self.selected_io_signal, io_value)
-                except Exception as e:
-                    # Don't log errors here to avoid noise
-                    pass
-                
-        except Exception as e:
-            self.log_event(f"Error processing camera: {str(e)}")
-            traceback.print_exc()
-    
     def load_io_signals(self):
         """Load I/O signals into combo box"""
         if not self.robot:
@@ -372,17 +301,20 @@ class VisionTab(QWidget):
             # Giới hạn giá trị tối đa là 6
             io_value = min(io_value, 6)
             
-            # Ghi giá trị vào tín hiệu
-            result = self.robot.io.set_signal_value(signal_name, io_value)
-            
-            if result.get('status_code') in [200, 204]:
-                self.log_event(f"Wrote value {io_value} to signal {signal_name}")
-            else:
-                self.log_event(f"Failed to write to signal {signal_name}: {result.get('error', 'Unknown error')}")
+            # Ghi giá trị vào tín hiệu (kết quả báo về qua on_io_write_finished)
+            if not self.robot.io.write_signal_async(signal_name, io_value):
+                self.log_event(f"Signal {signal_name} already has value {io_value}")
                 
         except Exception as e:
             self.log_event(f"Error writing to I/O signal: {str(e)}")
     
+    def on_io_write_finished(self, signal_name, value, success, error):
+        """Report a completed background I/O write"""
+        if success:
+            self.log_event(f"Wrote value {value} to signal {signal_name}")
+        else:
+            self.log_event(f"Failed to write to signal {signal_name}: {error}")
+    
     def on_auto_write_changed(self, state):
         """Handle auto-write checkbox state change"""
         if state == Qt.Checked:
@@ -404,26 +336,47 @@ class VisionTab(QWidget):
         pass
     
     def update_ui_from_frame(self):
-        """Update UI with latest processed frame"""
-        if self.processed_frame is not None:
+        """Show the newest processed frame and gesture of the camera service (GUI thread)"""
+        if not self.is_streaming or self.camera_subscription is None:
+            return
+        
+        # Buffer stays out of reuse while the widget shows it
+        packet = self.camera_subscription.latest()
+        if packet is None:
+            return
+        
+        try:
+            result = packet.result
+            if result is None:
+                self.n_fingers = -1
+                self.last_detected_gesture = "MediaPipe không khả dụng"
+                self.hand_option = -1
+            else:
+                self.n_fingers = result['n_fingers']
+                self.last_detected_gesture = result['gesture']
+                self.hand_option = result['option']
+            self.processed_frame = packet.image
+            self.frame_seq = packet.seq
+            
+            # Hiển thị frame trực tiếp từ buffer (không copy), chỉ vẽ lại khi có frame mới
+            self.video_widget.set_frame(packet.image, packet.seq)
+            
+            # Cập nhật thông tin cử chỉ
+            self.fingers_label.setText(str(self.n_fingers))
+            self.gesture_label.setText(self.last_detected_gesture)
+        except Exception as e:
+            self.log_event(f"Error updating UI from frame: {str(e)}")
+        
+        # Process I/O auto-write if enabled
+        if self.selected_io_signal and self.robot:
             try:
-                # Chuyển đổi frame từ OpenCV sang QImage để hiển thị
-                h, w, ch = self.processed_frame.shape
-                bytes_per_line = ch * w
-                convertToQtFormat = QImage(self.processed_frame.data, w, h, bytes_per_line, QImage.Format_RGB888)
-                pixmap = QPixmap.fromImage(convertToQtFormat)
-                self.video_label.setPixmap(pixmap)
-                
-                # Cập nhật thông tin cử chỉ
-                self.fingers_label.setText(str(self.n_fingers))
-                self.gesture_label.setText(self.last_detected_gesture)
+                io_value = self.n_fingers + 1 if self.n_fingers >= 0 else 0
+                io_value = min(io_value, 6)
+                # Queued on the background writer - never blocks the GUI
+                self.robot.io.write_signal_async(self.selected_io_signal, io_value)
             except Exception as e:
-                self.log_event(f"Error updating UI from frame: {str(e)}")
-        else:
-            # Không có frame, hiển thị thông báo
-            self.video_label.setText("No video feed")
-            self.fingers_label.setText("-1")
-            self.gesture_label.setText("Không có dữ liệu")
+                # Don't log errors here to avoid noise
+                pass
     
     def update_ui(self):
         """Periodic UI update - used for live video feed if implemented"""
@@ -431,60 +384,43 @@ class VisionTab(QWidget):
         pass
     
     def connect_camera(self, camera_id):
-        """Connect to a camera"""
+        """Select a camera (index) or a recording to replay (video file or image folder)
+        
+        The shared camera service opens it when a stream starts.
+        """
         self.log_event(f"Connecting to camera {camera_id}")
         
         try:
-            # Close current camera if open
-            if self.camera is not None:
-                self.stop_camera()
-                self.camera.release()
-                self.camera = None
-            
-            # Open new camera
-            self.camera = cv2.VideoCapture(camera_id)
-            
-            if not self.camera.isOpened():
-                self.log_event(f"Failed to open camera {camera_id}")
-                return False
-                
-            # Read a frame to verify connection
-            ret, frame = self.camera.read()
-            if not ret or frame is None:
-                self.log_event("Failed to capture frame from camera")
-                self.camera.release()
-                self.camera = None
-                return False
-            
+            # Switches the stream of every subscribed tab if the service is running
+            self.camera_service.set_source(camera_id)
+            self.camera_connected = True
             self.log_event(f"Connected to camera {camera_id} successfully")
             return True
             
         except Exception as e:
             self.log_event(f"Error connecting to camera: {str(e)}")
-            if self.camera:
-                self.camera.release()
-                self.camera = None
             return False
     
     def start_camera(self, resolution=None):
         """Start camera processing"""
-        if not self.camera:
+        if not self.camera_connected:
             self.log_event("Cannot start camera - not connected")
             return False
+        if self.is_streaming:
+            return True
         
         try:
             # Set resolution if provided
             if resolution:
                 width, height = resolution
-                self.camera.set(cv2.CAP_PROP_FRAME_WIDTH, width)
-                self.camera.set(cv2.CAP_PROP_FRAME_HEIGHT, height)
+                self.camera_service.apply_settings({'width': width, 'height': height})
             
-            # Start streaming
+            # Subscribe (opens the camera if no other tab is streaming)
+            self.camera_subscription = self.camera_service.subscribe(
+                on_frame=self.frame_ready.emit, name="Vision"
+            )
             self.is_streaming = True
             
-            # Start camera timer
-            self.camera_timer.start(30)  # 30ms = ~33 fps
-            
             self.log_event("Camera streaming started")
             return True
             
@@ -500,36 +436,21 @@ class VisionTab(QWidget):
         self.log_event("Stopping camera")
         self.is_streaming = False
         
-        # Stop camera timer
-        if self.camera_timer.isActive():
-            self.camera_timer.stop()
+        # Leave the camera service (it stops when no other tab is streaming)
+        if self.camera_subscription:
+            self.camera_subscription.close()
+            self.camera_subscription = None
         
         self.log_event("Camera stopped")
     
     def set_camera_settings(self, settings):
         """Apply camera settings"""
-        if not self.camera:
+        if not self.camera_connected:
             return False
             
         try:
-            # Apply brightness
-            if 'brightness' in settings:
-                self.camera.set(cv2.CAP_PROP_BRIGHTNESS, settings['brightness'])
-            
-            # Apply contrast
-            if 'contrast' in settings:
-                self.camera.set(cv2.CAP_PROP_CONTRAST, settings['contrast'])
-            
-            # Apply resolution
-            if 'width' in settings and 'height' in settings:
-                self.camera.set(cv2.CAP_PROP_FRAME_WIDTH, settings['width'])
-                self.camera.set(cv2.CAP_PROP_FRAME_HEIGHT, settings['height'])
-            
-            # Apply exposure
-            if 'exposure' in settings:
-                self.camera.set(cv2.CAP_PROP_AUTO_EXPOSURE, 1 if settings['exposure'] != 0 else 3)  # 1 = manual, 3 = auto
-                if settings['exposure'] != 0:
-                    self.camera.set(cv2.CAP_PROP_EXPOSURE, settings['exposure'])
+            # Applied between two reads if the camera is streaming, else when it is opened
+            self.camera_service.apply_settings(settings)
             
             self.log_event("Camera settings applied")
             return True
@@ -540,7 +461,9 @@ class VisionTab(QWidget):
     
     def on_connect_camera(self):
         """Connect to the selected camera"""
-        camera_idx = self.camera_combo.currentIndex()
+        camera_idx = self.camera_combo.selected_source()
+        if camera_idx is None:
+            return
         self.log_event(f"Connecting to camera: {camera_idx}")
         
         if self.connect_camera(camera_idx):
@@ -571,7 +494,7 @@ class VisionTab(QWidget):
         self.stop_camera()
         
         # Display "No video feed"
-        self.video_label.setText("No video feed")
+        self.video_widget.clear("No video feed")
         self.processed_frame = None
         
         # Update button states
@@ -635,13 +558,9 @@ class VisionTab(QWidget):
     def cleanup_camera(self):
         """Release camera resources"""
         try:
-            # Stop camera first
+            # Leave the camera service; it releases the camera after the last tab
             self.stop_camera()
-            
-            # Release camera
-            if self.camera:
-                self.camera.release()
-                self.camera = None
+            self.camera_connected = False
                 
             self.log_event("Camera resources released")
         except Exception as e:
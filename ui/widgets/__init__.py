@@ -5,10 +5,16 @@ This module contains reusable UI components used throughout the application.
 
 from ui.widgets.log_widget import LogWidget
 from ui.widgets.status_widget import StatusWidget
+from ui.widgets.signal_table_model import SignalTableModel
+from ui.widgets.camera_source_combo import CameraSourceCombo
+from ui.widgets.video_widget import VideoWidget
 
 __all__ = [
     'LogWidget',
-    'StatusWidget'
+    'StatusWidget',
+    'SignalTableModel',
+    'CameraSourceCombo',
+    'VideoWidget'
 ]
 
 # ui/widgets package 
\ No newline at end of file
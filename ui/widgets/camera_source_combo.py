@@ -0,0 +1,41 @@
+from PyQt5.QtWidgets import QComboBox, QFileDialog
+
+
+class CameraSourceCombo(QComboBox):
+    """Camera selector that can also pick a recording to replay"""
+
+    REPLAY_VIDEO = "Replay video..."
+    REPLAY_IMAGES = "Replay image folder..."
+
+    def __init__(self, camera_count=3, parent=None):
+        super().__init__(parent)
+        self.camera_count = camera_count
+        for i in range(camera_count):
+            self.addItem(f"Camera {i}")
+        self.addItem(self.REPLAY_VIDEO)
+        self.addItem(self.REPLAY_IMAGES)
+        self._last_path = ""
+
+    def selected_source(self):
+        """
+        Source for vision.frame_source.open_frame_source()
+
+        Asks for the file or folder when a replay item is selected.
+
+        Returns:
+            Camera index, path of the recording, or None if the dialog was cancelled
+        """
+        index = self.currentIndex()
+        if index < self.camera_count:
+            return index
+        if self.currentText() == self.REPLAY_VIDEO:
+            path, _ = QFileDialog.getOpenFileName(
+                self, "Select Video to Replay", self._last_path,
+                "Video Files (*.mp4 *.avi *.mov *.mkv);;All Files (*)"
+            )
+        else:
+            path = QFileDialog.getExistingDirectory(self, "Select Image Folder to Replay", self._last_path)
+        if not path:
+            return None
+        self._last_path = path
+        return path
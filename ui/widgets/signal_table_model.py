@@ -0,0 +1,278 @@
+from bisect import bisect_left
+
+from PyQt5.QtCore import Qt, QAbstractTableModel, QModelIndex
+from PyQt5.QtGui import QColor
+
+# Signal types whose value is shown as on/off
+DIGITAL_TYPES = frozenset(('DI', 'DO', 'GI', 'GO'))
+
+
+def _runs(positions):
+    """Ascending positions as a list of (first, last) ranges of consecutive values"""
+    runs = []
+    for position in positions:
+        if runs and runs[-1][1] == position - 1:
+            runs[-1][1] = position
+        else:
+            runs.append([position, position])
+    return runs
+
+
+class SignalTableModel(QAbstractTableModel):
+    """
+    Table model for I/O signals backed by a column store
+
+    Signals are kept in parallel lists (one per field) and addressed by their
+    store row; a name -> store row index makes value updates O(1). Nothing is
+    created per row or per cell: data() reads the columns when the view asks
+    for a visible cell.
+
+    The model also applies the name/type filter itself. ``_visible`` holds the
+    store rows that pass the filter, in ascending order, and is what the view
+    sees. Narrowing the filter (a longer search text, or a type filter after
+    'All') only re-checks the rows that are currently visible.
+    """
+
+    COLUMNS = ["Name", "Type", "Value", "State"]
+    VALUE_COLUMN = 2
+
+    # Filter changes with more removed/inserted row ranges than this reset the model
+    MAX_FILTER_RUNS = 64
+
+    ON_COLOR = QColor('#A3FFA3')   # Light green
+    OFF_COLOR = QColor('#FFA3A3')  # Light red
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+
+        # Column store
+        self._names = []
+        self._types = []
+        self._values = []
+        self._states = []
+        self._paths = []
+        self._names_lower = []
+        self._columns = (self._names, self._types, self._values, self._states)
+
+        # Signal name -> store row
+        self._index = {}
+
+        # Store rows shown in the view, ascending
+        self._visible = []
+        self._search_text = ''
+        self._type_filter = 'All'
+
+    def rowCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else len(self._visible)
+
+    def columnCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else len(self.COLUMNS)
+
+    def headerData(self, section, orientation, role=Qt.DisplayRole):
+        if orientation == Qt.Horizontal and role == Qt.DisplayRole:
+            return self.COLUMNS[section]
+        return None
+
+    def data(self, index, role=Qt.DisplayRole):
+        if not index.isValid():
+            return None
+        row = self._visible[index.row()]
+        if role == Qt.DisplayRole:
+            return self._columns[index.column()][row]
+        if role == Qt.BackgroundRole and index.column() == self.VALUE_COLUMN:
+            if self._types[row] in DIGITAL_TYPES:
+                return self.ON_COLOR if self._values[row] == '1' else self.OFF_COLOR
+        return None
+
+    def set_signals(self, signals):
+        """Replace all signals with signal resources from list_signals()"""
+        self.beginResetModel()
+        self._clear_store()
+        self._extend_store(signals)
+        self._visible = self._filter_rows(range(len(self._names)))
+        self.endResetModel()
+
+    def append_signals(self, signals):
+        """
+        Add signal resources at the end of the table
+
+        A signal whose name is already in the table is not added again; its
+        row takes the type, state and path of the resource but keeps its value,
+        which may come from a newer subscription event.
+        """
+        new_signals = []
+        new_names = set()
+        retyped = False
+        for signal in signals:
+            name = str(signal.get('name', 'Unknown')).strip()
+            row = self._index.get(name)
+            if row is not None:
+                retyped |= self._update_row(row, signal)
+            elif name not in new_names:
+                new_names.add(name)
+                new_signals.append(signal)
+
+        if retyped and self._type_filter != 'All':
+            self._apply_visible(self._filter_rows(range(len(self._names))))
+
+        start = len(self._names)
+        self._extend_store(new_signals)
+        rows = self._filter_rows(range(start, len(self._names)))
+        if rows:
+            first = len(self._visible)
+            self.beginInsertRows(QModelIndex(), first, first + len(rows) - 1)
+            self._visible.extend(rows)
+            self.endInsertRows()
+
+    def append_signal(self, signal):
+        """Add a signal resource at the end of the table and return its store row"""
+        self.append_signals([signal])
+        return self._index[str(signal.get('name', 'Unknown')).strip()]
+
+    def clear(self):
+        """Remove all signals"""
+        self.set_signals([])
+
+    def __len__(self):
+        return len(self._names)
+
+    def visible_count(self):
+        """Number of signals passing the current filter"""
+        return len(self._visible)
+
+    def store_row(self, view_row):
+        """Store row shown at a view row"""
+        return self._visible[view_row]
+
+    def signal_at(self, row):
+        """Signal at a store row as a resource dictionary, or None if the row is invalid"""
+        if row is None or not 0 <= row < len(self._names):
+            return None
+        return {
+            'name': self._names[row],
+            'type': self._types[row],
+            'lvalue': self._values[row],
+            'lstate': self._states[row],
+            '_links': {'self': {'href': self._paths[row]}}
+        }
+
+    def row_of(self, name):
+        """Store row of a signal by name, or None if it is not in the table"""
+        return self._index.get(name.strip())
+
+    def set_value(self, row, value):
+        """
+        Set the value of the signal at a store row
+
+        Returns:
+            Previous value as a string
+        """
+        old_value = self._values[row]
+        value = str(value)
+        if old_value != value:
+            self._values[row] = value
+            view_row = self._view_row(row)
+            if view_row is not None:
+                index = self.index(view_row, self.VALUE_COLUMN)
+                self.dataChanged.emit(index, index, [Qt.DisplayRole, Qt.BackgroundRole])
+        return old_value
+
+    def set_filters(self, search_text, type_filter):
+        """
+        Show only signals whose name contains search_text (case-insensitive)
+        and whose type is type_filter ('All' for any type)
+        """
+        search_text = search_text.lower()
+        narrowing = (search_text.startswith(self._search_text)
+                     and (type_filter == self._type_filter or self._type_filter == 'All'))
+        self._search_text = search_text
+        self._type_filter = type_filter
+
+        candidates = self._visible if narrowing else range(len(self._names))
+        self._apply_visible(self._filter_rows(candidates))
+
+    def _apply_visible(self, visible):
+        """Show the store rows in visible, keeping the selection where possible"""
+        if visible == self._visible:
+            return
+
+        old_set = set(self._visible)
+        new_set = set(visible)
+        removed = _runs([position for position, row in enumerate(self._visible) if row not in new_set])
+        inserted = _runs([position for position, row in enumerate(visible) if row not in old_set])
+        if len(removed) + len(inserted) > self.MAX_FILTER_RUNS:
+            # Scattered change: one reset is cheaper than many row signals (drops the selection)
+            self.beginResetModel()
+            self._visible = visible
+            self.endResetModel()
+            return
+
+        # Row removals and insertions keep selection/current index on the same signals
+        for first, last in reversed(removed):
+            self.beginRemoveRows(QModelIndex(), first, last)
+            del self._visible[first:last + 1]
+            self.endRemoveRows()
+        for first, last in inserted:
+            self.beginInsertRows(QModelIndex(), first, last)
+            self._visible[first:first] = visible[first:last + 1]
+            self.endInsertRows()
+
+    def _update_row(self, row, signal):
+        """
+        Refresh type, state and path of a store row from a signal resource
+
+        Returns:
+            True if the type changed (the row may need to be filtered again)
+        """
+        signal_type = str(signal.get('type', 'Unknown'))
+        state = str(signal.get('lstate', 'Unknown'))
+        path = signal.get('_links', {}).get('self', {}).get('href', '') or self._paths[row]
+        retyped = self._types[row] != signal_type
+        if not retyped and self._states[row] == state and self._paths[row] == path:
+            return False
+        self._types[row] = signal_type
+        self._states[row] = state
+        self._paths[row] = path
+        view_row = self._view_row(row)
+        if view_row is not None:
+            self.dataChanged.emit(self.index(view_row, 0), self.index(view_row, self.columnCount() - 1))
+        return retyped
+
+    def _view_row(self, row):
+        """View row of a store row, or None if it is filtered out"""
+        position = bisect_left(self._visible, row)
+        if position < len(self._visible) and self._visible[position] == row:
+            return position
+        return None
+
+    def _filter_rows(self, rows):
+        """Store rows from rows that pass the current filter, in the same order"""
+        search_text = self._search_text
+        type_filter = self._type_filter
+        if not search_text and type_filter == 'All':
+            return list(rows)
+        names_lower = self._names_lower
+        types = self._types
+        if type_filter == 'All':
+            return [row for row in rows if search_text in names_lower[row]]
+        if not search_text:
+            return [row for row in rows if types[row] == type_filter]
+        return [row for row in rows if types[row] == type_filter and search_text in names_lower[row]]
+
+    def _clear_store(self):
+        for column in (self._names, self._types, self._values, self._states, self._paths, self._names_lower):
+            column.clear()
+        self._index.clear()
+
+    def _extend_store(self, signals):
+        start = len(self._names)
+        for signal in signals:
+            name = str(signal.get('name', 'Unknown'))
+            self._names.append(name)
+            self._types.append(str(signal.get('type', 'Unknown')))
+            self._values.append(str(signal.get('lvalue', 'Unknown')))
+            self._states.append(str(signal.get('lstate', 'Unknown')))
+            self._paths.append(signal.get('_links', {}).get('self', {}).get('href', ''))
+        self._names_lower.extend(name.lower() for name in self._names[start:])
+        for row in range(start, len(self._names)):
+            self._index[self._names[row].strip()] = row
@@ -0,0 +1,68 @@
+from PyQt5.QtWidgets import QWidget
+from PyQt5.QtCore import Qt, QRect
+from PyQt5.QtGui import QImage, QPainter
+
+
+class VideoWidget(QWidget):
+    """
+    Video display that paints RGB frames without copying them
+
+    set_frame() wraps the frame buffer in a QImage view (no conversion, no
+    QPixmap) and schedules a repaint only when the frame sequence number
+    changes. Scaling to the widget size, keeping the aspect ratio, happens
+    once in paintEvent(). The caller must not write into a buffer while it
+    is shown (see vision.pipeline.FrameBufferRing).
+    """
+
+    def __init__(self, text="No video feed", parent=None):
+        super().__init__(parent)
+        self._text = text
+        self._buffer = None  # Keeps the array alive while the QImage views it
+        self._image = None
+        self._seq = None
+        self.frames_shown = 0
+        self.setAttribute(Qt.WA_OpaquePaintEvent)
+
+    def set_frame(self, frame, seq):
+        """
+        Show an RGB frame (H x W x 3, uint8, rows contiguous)
+
+        Returns:
+            True if a repaint was scheduled, False if seq was already shown
+        """
+        if seq == self._seq and frame is self._buffer:
+            return False
+        h, w, _ = frame.shape
+        self._buffer = frame
+        self._image = QImage(frame.data, w, h, frame.strides[0], QImage.Format_RGB888)
+        self._seq = seq
+        self.frames_shown += 1
+        self.update()
+        return True
+
+    def clear(self, text=None):
+        """Drop the current frame and show a text instead"""
+        if text is not None:
+            self._text = text
+        self._buffer = self._image = self._seq = None
+        self.update()
+
+    @property
+    def frame(self):
+        """Buffer currently shown, or None"""
+        return self._buffer
+
+    def paintEvent(self, event):
+        painter = QPainter(self)
+        painter.fillRect(self.rect(), Qt.black)
+        if self._image is None:
+            painter.setPen(Qt.white)
+            painter.drawText(self.rect(), Qt.AlignCenter, self._text)
+            return
+
+        # Fit the frame into the widget, keeping its aspect ratio
+        size = self._image.size().scaled(self.size(), Qt.KeepAspectRatio)
+        target = QRect((self.width() - size.width()) // 2, (self.height() - size.height()) // 2,
+                       size.width(), size.height())
+        painter.setRenderHint(QPainter.SmoothPixmapTransform)
+        painter.drawImage(target, self._image)
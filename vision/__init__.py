@@ -48,6 +48,19 @@ def fix_mediapipe_dll_loading():
 fix_mediapipe_dll_loading()
 
 # Then import the rest
-from .hand_detector import HandDetector
+from .pipeline import FramePipeline, FramePacket, FrameBufferRing, LatestSlot, StageStats
+from .camera_service import CameraService, CameraSubscription, shared_camera_service
 
-__all__ = ["HandDetector"]
+from .gesture_state import GestureStateMachine, GestureUpdate
+
+try:
+    from .hand_detector import HandDetector
+    from .process_detector import ProcessHandDetector
+except ImportError:
+    # MediaPipe not installed; the frame pipeline works without it
+    HandDetector = None
+    ProcessHandDetector = None
+
+__all__ = ["HandDetector", "ProcessHandDetector", "FramePipeline", "FramePacket", "FrameBufferRing",
+           "LatestSlot", "StageStats", "GestureStateMachine", "GestureUpdate", "CameraService",
+           "CameraSubscription", "shared_camera_service"]
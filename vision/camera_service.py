@@ -0,0 +1,408 @@
+"""
+Shared camera and hand gesture service
+
+One CameraService owns the camera (or recording), the hand detector and the
+gesture state machine, and publishes every processed frame to any number of
+subscribers, so several tabs can show the same camera without opening it
+twice or building a MediaPipe graph each.
+
+The service starts lazily: the source is opened and the FramePipeline
+started when the first subscriber arrives, and both are released when the
+last subscriber leaves. The hand detector is created on the first frame, in
+the inference thread, and kept for later runs.
+
+Each subscription has its own single-slot queue, so a slow subscriber only
+drops its own frames. Display images live in one FrameBufferRing that keeps
+the buffer each subscriber shows out of reuse.
+
+Author: Sunny24
+Date: May 21, 2025
+"""
+
+import logging
+import threading
+import time
+
+import cv2
+
+from .pipeline import FramePipeline, FrameBufferRing, LatestSlot
+from .frame_source import open_frame_source, SPEED_NATIVE
+from .gesture_state import GestureStateMachine
+
+try:
+    from .hand_detector import HandDetector, draw_landmarks, is_fist, pinch_distance
+    from .process_detector import ProcessHandDetector
+    MEDIAPIPE_AVAILABLE = True
+except ImportError:
+    MEDIAPIPE_AVAILABLE = False
+
+
+class CameraSubscription:
+    """
+    Handle returned by CameraService.subscribe()
+
+    Args:
+        service: Owning CameraService
+        on_frame: Called without arguments from the pipeline display thread
+            when a new packet is available through latest()
+        name: Name used in log messages
+    """
+
+    def __init__(self, service, on_frame=None, name=None):
+        self.service = service
+        self.on_frame = on_frame
+        self.name = name or "subscriber"
+        self._slot = LatestSlot()
+        self._tap_events = service.tap_events
+
+    def latest(self):
+        """
+        Take the newest packet for this subscriber
+
+        The packet image is kept out of reuse until the next packet is taken
+        or the subscription is closed, so it can be shown without a copy.
+
+        Returns:
+            FramePacket, or None if there is no new one
+        """
+        return self.service.frame_ring.take(self._slot, self)
+
+    def new_taps(self, result):
+        """
+        Count double tap events since the last call
+
+        Tap events are counted by the service, so none are lost when this
+        subscriber drops frames.
+
+        Args:
+            result: Gesture result of a packet (None is ignored)
+
+        Returns:
+            Number of new tap events
+        """
+        if result is None:
+            return 0
+        count = result['tap_events'] - self._tap_events
+        self._tap_events = result['tap_events']
+        return max(count, 0)
+
+    @property
+    def dropped(self):
+        """Packets replaced before this subscriber took them"""
+        return self._slot.dropped
+
+    def close(self):
+        """Unsubscribe; stops the service if this was the last subscriber"""
+        self.service.unsubscribe(self)
+
+
+class CameraService:
+    """
+    Camera, hand detection and gesture recognition shared by subscribers
+
+    Args:
+        detector_options: Keyword arguments for HandDetector / ProcessHandDetector
+        flip: Mirror frames horizontally
+        logger: Optional logger instance
+    """
+
+    def __init__(self, detector_options=None, flip=True, logger=None):
+        self.detector_options = detector_options or {'min_detection_confidence': 0.7}
+        self.flip = flip
+        self.logger = logger or logging.getLogger('CameraService')
+
+        self.source = None
+        self.speed = SPEED_NATIVE
+        self.settings = {}
+        # Run MediaPipe in a child process (read when the detector is first needed)
+        self.use_process_detector = False
+        self.mediapipe_available = MEDIAPIPE_AVAILABLE
+
+        self.gesture_state = GestureStateMachine()
+        self.frame_ring = FrameBufferRing()
+        self.tap_events = 0  # Double tap events since the service was created
+
+        self.capture = None
+        self.pipeline = None
+        self.hand_detector = None
+        self.process_detector = None
+        self._last_result = None
+        self._subscribers = ()
+        self._lock = threading.RLock()
+
+    @property
+    def running(self):
+        return self.pipeline is not None
+
+    @property
+    def subscriber_count(self):
+        return len(self._subscribers)
+
+    def set_source(self, source, speed=SPEED_NATIVE):
+        """
+        Select the camera index, video file or image directory to use
+
+        Switches a running service over to the new source.
+
+        Raises:
+            RuntimeError: If the service is running and the new source cannot be opened
+        """
+        with self._lock:
+            self.source = source
+            self.speed = speed
+            if self.running:
+                self.logger.info(f"Switching camera source to {source}")
+                self._stop()
+                self._start()
+
+    def apply_settings(self, settings):
+        """
+        Set camera properties now (if open) and whenever the source is opened
+
+        Args:
+            settings: Dictionary with any of 'brightness', 'contrast' (-1 = auto),
+                'width', 'height' and 'exposure' (0 = auto)
+        """
+        with self._lock:
+            self.settings.update(settings)
+            if self.capture is not None:
+                # Between two reads of the capture thread
+                with self.pipeline.source_lock:
+                    self._apply_settings(settings)
+
+    def subscribe(self, on_frame=None, name=None):
+        """
+        Receive processed frames; starts the service for the first subscriber
+
+        Args:
+            on_frame: Called without arguments from the pipeline display thread
+                when a new packet is ready (e.g. a queued Qt signal's emit)
+            name: Name used in log messages
+
+        Returns:
+            CameraSubscription
+
+        Raises:
+            RuntimeError: If no source is selected or it cannot be opened
+        """
+        with self._lock:
+            subscription = CameraSubscription(self, on_frame, name)
+            if not self.running:
+                self._start()
+            self._subscribers = self._subscribers + (subscription,)
+            self.logger.info(f"{subscription.name} subscribed ({len(self._subscribers)} subscribers)")
+            return subscription
+
+    def unsubscribe(self, subscription):
+        """Stop delivering frames to subscription; stops the service after the last one"""
+        with self._lock:
+            if subscription not in self._subscribers:
+                return
+            self._subscribers = tuple(s for s in self._subscribers if s is not subscription)
+            self.frame_ring.show(None, subscription)
+            self.logger.info(f"{subscription.name} unsubscribed ({len(self._subscribers)} subscribers)")
+            if not self._subscribers:
+                self._stop()
+
+    def stats(self):
+        """
+        Get pipeline and gesture counters
+
+        Returns:
+            FramePipeline.stats() plus 'gesture' (GestureStateMachine.stats()),
+            or None when the service is stopped
+        """
+        pipeline = self.pipeline
+        if pipeline is None:
+            return None
+        result = pipeline.stats()
+        result['gesture'] = self.gesture_state.stats()
+        return result
+
+    def close(self):
+        """Drop all subscribers and release the camera"""
+        with self._lock:
+            for subscription in self._subscribers:
+                self.frame_ring.show(None, subscription)
+            self._subscribers = ()
+            self._stop()
+
+    def _start(self):
+        if self.source is None:
+            raise RuntimeError("No camera source selected")
+        capture = open_frame_source(self.source, speed=self.speed, loop=True)
+        if not capture.isOpened():
+            capture.release()
+            raise RuntimeError(f"Cannot open camera source {self.source}")
+        self.capture = capture
+        self._apply_settings(self.settings)
+
+        self.gesture_state.reset()
+        self._last_result = None
+        self.pipeline = FramePipeline(
+            capture,
+            infer=self._infer,
+            render=self._render,
+            on_frame=self._publish,
+            flip=self.flip,
+            logger=self.logger
+        )
+        self.pipeline.start()
+        self.logger.info(f"Camera service started on {self.source}")
+
+    def _stop(self):
+        pipeline, self.pipeline = self.pipeline, None
+        if pipeline is not None:
+            # Joins the stage threads before the camera is released
+            pipeline.stop()
+        if self.capture is not None:
+            self.capture.release()
+            self.capture = None
+        detector, self.process_detector = self.process_detector, None
+        if detector is not None:
+            if pipeline is None or pipeline.wait(0):
+                detector.close()
+            else:
+                # The inference thread is still inside findHands (which can wait
+                # longer than stop() does): close the process once it has returned
+                threading.Thread(target=self._close_detector_after, args=(pipeline, detector),
+                                 name='CameraService-detector-close', daemon=True).start()
+        self.logger.info("Camera service stopped")
+
+    def _close_detector_after(self, pipeline, detector):
+        pipeline.wait()
+        detector.close()
+
+    def _apply_settings(self, settings):
+        capture = self.capture
+        if 'brightness' in settings:
+            capture.set(cv2.CAP_PROP_BRIGHTNESS, settings['brightness'] if settings['brightness'] >= 0 else 0.5)
+        if 'contrast' in settings:
+            capture.set(cv2.CAP_PROP_CONTRAST, settings['contrast'] if settings['contrast'] >= 0 else 0.5)
+        if 'width' in settings and 'height' in settings:
+            capture.set(cv2.CAP_PROP_FRAME_WIDTH, settings['width'])
+            capture.set(cv2.CAP_PROP_FRAME_HEIGHT, settings['height'])
+        if 'exposure' in settings:
+            # Auto vs manual exposure
+            if settings['exposure'] == 0:
+                capture.set(cv2.CAP_PROP_AUTO_EXPOSURE, 3)  # 3 = auto
+            else:
+                capture.set(cv2.CAP_PROP_AUTO_EXPOSURE, 1)  # 1 = manual
+                capture.set(cv2.CAP_PROP_EXPOSURE, settings['exposure'])
+
+    def _detector(self):
+        """Detector for the inference stage, created on first use (pipeline thread)"""
+        if self.use_process_detector and self.process_detector is None:
+            try:
+                # Started in the inference thread so loading MediaPipe does not block the GUI
+                detector = ProcessHandDetector(logger=self.logger, **self.detector_options)
+                if self.pipeline is None or not self.pipeline.running or self.process_detector is not None:
+                    # Service stopped (or restarted) while the process was starting
+                    detector.close()
+                    return self.hand_detector
+                self.process_detector = detector
+            except Exception as e:
+                self.use_process_detector = False
+                self.logger.error(f"Hand detector process failed, using in-process detector: {str(e)}")
+        if self.process_detector is not None:
+            return self.process_detector
+        if self.hand_detector is None and self.mediapipe_available:
+            try:
+                self.hand_detector = HandDetector(**self.detector_options)
+                self.logger.info("Hand detector initialized")
+            except Exception as e:
+                self.mediapipe_available = False
+                self.logger.error(f"Failed to initialize hand detector: {str(e)}")
+        return self.hand_detector
+
+    def _infer(self, frame):
+        """Inference stage: hand landmarks and debounced gesture (pipeline thread)
+
+        While the gesture is stable, inference is skipped on some frames and
+        the previous result is reused.
+
+        Returns:
+            Gesture result dictionary, or None if MediaPipe is not available
+        """
+        detector = self._detector()
+        if detector is None:
+            return None
+
+        now = time.monotonic()
+        if not self.gesture_state.should_infer(now) and self._last_result is not None:
+            return dict(self._last_result, double_tap_active=False, skipped=True)
+
+        _, hand_lms = detector.findHands(frame, draw=False)
+        pinch = float(pinch_distance(hand_lms, 4, 8)[0]) if len(hand_lms) else None
+        update = self.gesture_state.update(detector.count_finger(hand_lms), pinch,
+                                           is_fist(hand_lms), now, time.monotonic() - now)
+        if update.tap_status:
+            self.tap_events += 1
+
+        n_fingers = update.gesture
+        self._last_result = {
+            'landmarks': hand_lms,
+            'n_fingers': n_fingers,
+            'raw_fingers': update.raw_gesture,
+            'gesture': detector.get_hand_gesture(n_fingers),
+            'option': detector.get_option(n_fingers),
+            'fingers_touching': update.fingers_touching,
+            'tap_count': update.tap_count,
+            'tap_events': self.tap_events,
+            'double_tap_active': update.tap_status is not None,
+            'skipped': False
+        }
+        return self._last_result
+
+    def _render(self, frame, result):
+        """Display stage: RGB image for Qt with the gesture overlay (colors are RGB)"""
+        overlay = self.frame_ring.acquire(frame.shape)
+        cv2.cvtColor(frame, cv2.COLOR_BGR2RGB, dst=overlay)
+
+        if result is None:
+            h, w, _ = overlay.shape
+            cv2.putText(overlay, "MediaPipe not available", (int(w/4), int(h/2)-30),
+                        cv2.FONT_HERSHEY_SIMPLEX, 0.8, (255, 0, 0), 2)
+            return overlay
+
+        # Landmarks were found at inference resolution but are in frame pixels
+        draw_landmarks(overlay, result['landmarks'], landmark_color=(255, 0, 0))
+        if result['option'] > 0:
+            cv2.putText(overlay, f"Option: {result['option']}",
+                        (10, 70), cv2.FONT_HERSHEY_SIMPLEX, 1, (0, 255, 0), 2)
+        cv2.putText(overlay, f"Tap Count: {result['tap_count']}", (10, 110),
+                    cv2.FONT_HERSHEY_SIMPLEX, 1, (255, 0, 0), 2)
+        double_tap_active = result['double_tap_active']
+        double_tap_text = "Double Tap: ACTIVE" if double_tap_active else "Double Tap: Inactive"
+        double_tap_color = (0, 255, 0) if double_tap_active else (255, 0, 0)
+        cv2.putText(overlay, double_tap_text, (10, 150), cv2.FONT_HERSHEY_SIMPLEX, 1, double_tap_color, 2)
+        return overlay
+
+    def _publish(self):
+        """Hand the newest packet to every subscriber (pipeline display thread)"""
+        pipeline = self.pipeline
+        if pipeline is None:
+            return
+        packet = pipeline.latest()
+        if packet is None:
+            return
+        for subscription in self._subscribers:
+            subscription._slot.put(packet)
+            if subscription.on_frame is not None:
+                try:
+                    subscription.on_frame()
+                except Exception as e:
+                    self.logger.error(f"Error in {subscription.name} frame callback: {str(e)}")
+
+
+_shared_service = None
+_shared_lock = threading.Lock()
+
+
+def shared_camera_service():
+    """Get the application-wide CameraService, creating it on first use"""
+    global _shared_service
+    with _shared_lock:
+        if _shared_service is None:
+            _shared_service = CameraService()
+        return _shared_service
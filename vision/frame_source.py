@@ -0,0 +1,175 @@
+"""
+Frame sources for the vision pipeline
+
+open_frame_source() returns either a live cv2.VideoCapture (camera index)
+or a ReplaySource that plays back a recorded video file or a directory of
+images. ReplaySource has the parts of the cv2.VideoCapture interface the
+application uses (read, isOpened, release, get, set), so the gesture path
+can be benchmarked and regression-tested without a camera.
+
+Replayed frames carry deterministic timestamps (frame index / fps) that do
+not depend on how fast they are read.
+
+Author: Sunny24
+Date: May 21, 2025
+"""
+
+import logging
+import os
+import time
+
+import cv2
+
+IMAGE_EXTENSIONS = ('.png', '.jpg', '.jpeg', '.bmp')
+DEFAULT_REPLAY_FPS = 30.0
+
+# Replay speeds
+SPEED_NATIVE = 'native'  # Paced at the recording frame rate
+SPEED_MAX = 'max'        # As fast as frames are read
+
+
+class ReplaySource:
+    """
+    Replay a video file or an image directory like a camera
+
+    Args:
+        path: Video file (anything cv2.VideoCapture reads) or directory of images
+            (played in file name order)
+        speed: SPEED_NATIVE to pace frames at fps, SPEED_MAX to return them immediately
+        loop: Start again from the first frame at the end
+        fps: Frame rate for timestamps and pacing (default: from the video, or 30)
+        logger: Optional logger instance
+
+    Raises:
+        ValueError: If speed is unknown or the directory has no images
+    """
+
+    def __init__(self, path, speed=SPEED_NATIVE, loop=False, fps=None, logger=None):
+        if speed not in (SPEED_NATIVE, SPEED_MAX):
+            raise ValueError(f"Unknown replay speed: {speed}")
+        self.path = path
+        self.speed = speed
+        self.loop = loop
+        self.logger = logger or logging.getLogger('ReplaySource')
+
+        self._capture = None
+        self._images = None
+        if os.path.isdir(path):
+            self._images = sorted(
+                os.path.join(path, name) for name in os.listdir(path)
+                if name.lower().endswith(IMAGE_EXTENSIONS)
+            )
+            if not self._images:
+                raise ValueError(f"No images in {path}")
+            self.fps = fps or DEFAULT_REPLAY_FPS
+        else:
+            self._capture = cv2.VideoCapture(path)
+            self.fps = fps or self._capture.get(cv2.CAP_PROP_FPS) or DEFAULT_REPLAY_FPS
+
+        self.frame_index = -1    # Index of the last frame returned (counts on across loops)
+        self.timestamp = None    # frame_index / fps of the last frame returned
+        self._position = 0       # Position in the file or image list
+        self._start_time = None
+        self._size = None
+        self._released = False
+
+    @property
+    def frame_count(self):
+        """Number of frames in the recording (0 if unknown)"""
+        if self._images is not None:
+            return len(self._images)
+        return int(self._capture.get(cv2.CAP_PROP_FRAME_COUNT))
+
+    def isOpened(self):
+        if self._released:
+            return False
+        return self._images is not None or self._capture.isOpened()
+
+    def read(self):
+        """
+        Get the next frame
+
+        Returns:
+            Tuple of (ok, frame) like cv2.VideoCapture.read(); ok is False at
+            the end of the recording (unless looping)
+        """
+        frame = self._next_frame()
+        if frame is None and self.loop and self._position > 0:
+            self._rewind()
+            frame = self._next_frame()
+        if frame is None:
+            return False, None
+
+        self.frame_index += 1
+        self.timestamp = self.frame_index / self.fps
+        if self.speed == SPEED_NATIVE:
+            if self._start_time is None:
+                self._start_time = time.monotonic()
+            delay = self._start_time + self.timestamp - time.monotonic()
+            if delay > 0:
+                time.sleep(delay)
+        return True, frame
+
+    def get(self, prop):
+        """Subset of cv2.VideoCapture.get() for replayed frames"""
+        if prop == cv2.CAP_PROP_FPS:
+            return self.fps
+        if prop == cv2.CAP_PROP_POS_FRAMES:
+            return float(self._position)
+        if prop == cv2.CAP_PROP_FRAME_COUNT:
+            return float(self.frame_count)
+        if prop in (cv2.CAP_PROP_FRAME_WIDTH, cv2.CAP_PROP_FRAME_HEIGHT) and self._size:
+            return float(self._size[0] if prop == cv2.CAP_PROP_FRAME_WIDTH else self._size[1])
+        return 0.0
+
+    def set(self, prop, value):
+        """Camera settings do not apply to a recording; always returns False"""
+        return False
+
+    def release(self):
+        self._released = True
+        if self._capture is not None:
+            self._capture.release()
+
+    def _next_frame(self):
+        if self._released:
+            return None
+        if self._images is not None:
+            while self._position < len(self._images):
+                image_path = self._images[self._position]
+                self._position += 1
+                frame = cv2.imread(image_path)
+                if frame is not None:
+                    self._size = (frame.shape[1], frame.shape[0])
+                    return frame
+                self.logger.warning(f"Cannot read image {image_path}")
+            return None
+        ok, frame = self._capture.read()
+        if not ok:
+            return None
+        self._position += 1
+        self._size = (frame.shape[1], frame.shape[0])
+        return frame
+
+    def _rewind(self):
+        self._position = 0
+        if self._capture is not None:
+            self._capture.set(cv2.CAP_PROP_POS_FRAMES, 0)
+
+
+def open_frame_source(source, speed=SPEED_NATIVE, loop=False, fps=None):
+    """
+    Open a camera or a recording
+
+    Args:
+        source: Camera index (int or digit string), video file path or image directory
+        speed: Replay speed for recordings (SPEED_NATIVE or SPEED_MAX)
+        loop: Loop recordings
+        fps: Replay frame rate override
+
+    Returns:
+        cv2.VideoCapture for a camera, ReplaySource for a recording
+    """
+    if isinstance(source, int) or (isinstance(source, str) and source.isdigit()):
+        return cv2.VideoCapture(int(source))
+    return ReplaySource(source, speed=speed, loop=loop, fps=fps)
@@ -0,0 +1,229 @@
+"""
+Gesture state machine: debouncing, double tap and adaptive frame skipping
+
+Raw per-frame classifications flicker, so a gesture is only confirmed when it
+wins N of the last M votes (N-of-M voting). The confirmed gesture then stays
+until another gesture collects N votes (hysteresis), and a change is reported
+exactly once. The thumb/index pinch uses two thresholds (touch below
+pinch_on, release above pinch_off) and feeds the double tap detector.
+
+While the confirmed gesture is stable and no pinch is in progress, inference
+only needs to run every k-th frame; should_infer() grows k up to max_skip and
+drops back to 1 as soon as a frame disagrees. stats() reports the frames
+skipped, the inference time saved and the latency added by skipping.
+
+Author: Sunny24
+Date: May 21, 2025
+"""
+
+import logging
+import threading
+import time
+from collections import Counter, deque
+
+NO_HAND = -1
+
+
+class GestureUpdate:
+    """Result of GestureStateMachine.update()"""
+
+    __slots__ = ('gesture', 'raw_gesture', 'changed', 'fingers_touching', 'tap_count', 'tap_status')
+
+    def __init__(self, gesture, raw_gesture, changed, fingers_touching, tap_count, tap_status):
+        self.gesture = gesture                    # Confirmed finger count (NO_HAND if none)
+        self.raw_gesture = raw_gesture            # This frame's classification
+        self.changed = changed                    # Confirmed gesture changed on this frame
+        self.fingers_touching = fingers_touching  # Pinch state after hysteresis
+        self.tap_count = tap_count
+        self.tap_status = tap_status              # "triggered", "reset" or None
+
+
+class GestureStateMachine:
+    """
+    Debounced gesture state with double tap detection and adaptive inference
+
+    Args:
+        window: Number of recent frames that vote (M)
+        votes: Votes a gesture needs within the window to be confirmed (N)
+        pinch_on: Pinch distance in pixels below which the fingers touch
+        pinch_off: Pinch distance in pixels above which they are released again
+        tap_interval: Minimum seconds between two counted taps
+        tap_timeout: Seconds after which a single tap is forgotten
+        stable_frames: Agreeing inferred frames needed before skipping grows
+        max_skip: Largest k (inference on every k-th frame)
+        logger: Optional logger instance
+    """
+
+    def __init__(self, window=5, votes=3, pinch_on=40, pinch_off=55, tap_interval=0.5,
+                 tap_timeout=1.0, stable_frames=10, max_skip=3, logger=None):
+        self.window = window
+        self.votes = votes
+        self.pinch_on = pinch_on
+        self.pinch_off = pinch_off
+        self.tap_interval = tap_interval
+        self.tap_timeout = tap_timeout
+        self.stable_frames = stable_frames
+        self.max_skip = max_skip
+        self.logger = logger or logging.getLogger('GestureStateMachine')
+        self._lock = threading.Lock()
+        self.reset()
+
+    def reset(self):
+        """Forget all history (e.g. when the stream restarts)"""
+        with self._lock:
+            self.gesture = NO_HAND
+            self._votes = deque(maxlen=self.window)
+            self._confirmed_at = None
+
+            # Double tap
+            self.fingers_touching = False
+            self.tap_count = 0
+            self.last_tap_time = 0
+            self.triggered = False
+
+            # Adaptive skipping
+            self.skip_interval = 1
+            self._agreeing = 0
+            self._since_inference = 0
+            self._first_skip_time = None
+
+            # Counters
+            self.frames = 0
+            self.inferred = 0
+            self.changes = 0
+            self._inference_time = 0.0
+            self._added_latency = deque(maxlen=100)
+
+    def should_infer(self, timestamp=None):
+        """
+        Decide whether the current frame needs inference
+
+        Call once per captured frame; when it returns False the previous
+        result can be reused.
+        """
+        timestamp = time.monotonic() if timestamp is None else timestamp
+        with self._lock:
+            self.frames += 1
+            if self._since_inference + 1 >= self.skip_interval:
+                return True
+            if self._since_inference == 0:
+                self._first_skip_time = timestamp
+            self._since_inference += 1
+            return False
+
+    def update(self, n_fingers, pinch_distance=None, fist=False, timestamp=None, inference_time=None):
+        """
+        Feed the classification of one inferred frame
+
+        Args:
+            n_fingers: Raw finger count (NO_HAND if no hand)
+            pinch_distance: Thumb/index tip distance in pixels, None if no hand
+            fist: Frame classified as a fist (counts as 0 fingers)
+            timestamp: Frame time in seconds (default: time.monotonic())
+            inference_time: Seconds spent on inference for this frame, for stats()
+
+        Returns:
+            GestureUpdate
+        """
+        timestamp = time.monotonic() if timestamp is None else timestamp
+        raw = 0 if fist and n_fingers != NO_HAND else n_fingers
+        fingers_touching, tap_count, tap_status = self.update_pinch(pinch_distance, timestamp)
+
+        with self._lock:
+            self.inferred += 1
+            if inference_time is not None:
+                self._inference_time += inference_time
+
+            # Latency added by skipping: the change may have happened on the first skipped frame
+            if raw != self.gesture and self._since_inference and self._first_skip_time is not None:
+                self._added_latency.append(timestamp - self._first_skip_time)
+            self._since_inference = 0
+            self._first_skip_time = None
+
+            # N-of-M voting with hysteresis
+            self._votes.append(raw)
+            changed = False
+            if raw != self.gesture:
+                candidate, count = Counter(self._votes).most_common(1)[0]
+                if candidate != self.gesture and count >= self.votes:
+                    self.logger.debug(f"Gesture {self.gesture} -> {candidate}")
+                    self.gesture = candidate
+                    self._confirmed_at = timestamp
+                    self.changes += 1
+                    changed = True
+
+            # Adaptive skipping: only while everything agrees and no tap is in progress
+            if raw == self.gesture and not fingers_touching and tap_count == 0:
+                self._agreeing += 1
+                if self._agreeing >= self.stable_frames and self.skip_interval < self.max_skip:
+                    self.skip_interval += 1
+                    self._agreeing = 0
+            else:
+                self._agreeing = 0
+                self.skip_interval = 1
+
+            return GestureUpdate(self.gesture, raw, changed, fingers_touching, tap_count, tap_status)
+
+    def update_pinch(self, pinch_distance, timestamp=None):
+        """
+        Update the pinch state and the double tap detector
+
+        A tap is counted when the fingers start touching; two taps trigger,
+        the next two reset.
+
+        Returns:
+            Tuple of (fingers_touching, tap_count, status) with status
+            "triggered", "reset" or None
+        """
+        timestamp = time.time() if timestamp is None else timestamp
+        with self._lock:
+            was_touching = self.fingers_touching
+            if pinch_distance is None:
+                touching = False
+            else:
+                touching = pinch_distance < (self.pinch_off if was_touching else self.pinch_on)
+            self.fingers_touching = touching
+
+            # Chỉ tăng tap_count khi vừa chuyển từ không chạm sang chạm
+            if touching and not was_touching and timestamp - self.last_tap_time > self.tap_interval:
+                self.tap_count += 1
+                self.last_tap_time = timestamp
+
+            # Reset tap_count nếu quá thời gian
+            if self.tap_count == 1 and timestamp - self.last_tap_time > self.tap_timeout:
+                self.tap_count = 0
+
+            status = None
+            if self.tap_count == 2:
+                status = "reset" if self.triggered else "triggered"
+                self.triggered = not self.triggered
+                self.tap_count = 0
+
+            return touching, self.tap_count, status
+
+    def stats(self):
+        """
+        Get skipping counters
+
+        Returns:
+            Dictionary with frames, inferred, skipped, savings (fraction of
+            frames without inference), inference_saved_ms (estimated from the
+            mean inference time), skip_interval, changes and
+            added_latency_ms / added_latency_max_ms (delay between the first
+            skipped frame and the inference that saw a different gesture)
+        """
+        with self._lock:
+            skipped = self.frames - self.inferred if self.frames >= self.inferred else 0
+            mean_inference = self._inference_time / self.inferred if self.inferred else 0.0
+            latencies = list(self._added_latency)
+            return {
+                'frames': self.frames,
+                'inferred': self.inferred,
+                'skipped': skipped,
+                'savings': skipped / self.frames if self.frames else 0.0,
+                'inference_saved_ms': 1000.0 * skipped * mean_inference,
+                'skip_interval': self.skip_interval,
+                'changes': self.changes,
+                'added_latency_ms': 1000.0 * sum(latencies) / len(latencies) if latencies else 0.0,
+                'added_latency_max_ms': 1000.0 * max(latencies) if latencies else 0.0
+            }
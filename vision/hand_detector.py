@@ -1,56 +1,322 @@
 import cv2
 import mediapipe as mp
+import numpy as np
 import os
 import sys
 import traceback
 import time
 
+try:
+    from .gesture_state import GestureStateMachine
+except ImportError:
+    # Run as a script from the vision directory (run_hand_detector.py)
+    from gesture_state import GestureStateMachine
+
+# Landmark indices (MediaPipe hand model, 21 landmarks)
+NUM_LANDMARKS = 21
+FINGER_TIPS = np.array([4, 8, 12, 16, 20])   # Đầu ngón: cái, trỏ, giữa, áp út, út
+FINGER_MIDS = np.array([3, 7, 11, 15, 19])   # Khớp thứ hai của ngón tay
+FINGER_BASES = np.array([1, 5, 9, 13, 17])   # Gốc ngón tay
+PALM_POINTS = np.array([0, 5, 9, 13, 17])    # Cổ tay và gốc các ngón: tâm lòng bàn tay
+HAND_CONNECTIONS = np.array(sorted(mp.solutions.hands.HAND_CONNECTIONS))  # (n, 2) landmark pairs
+
+# Default inference width: frames wider than this are downscaled before MediaPipe
+DEFAULT_INFERENCE_WIDTH = 640
+
+
+def landmarks_to_array(hand_landmarks, width, height, offset=(0, 0), z_scale=1.0):
+    """Convert one MediaPipe hand to a (21, 3) array
+
+    Args:
+        hand_landmarks: MediaPipe NormalizedLandmarkList of one hand
+        width: Width in pixels of the image the landmarks are normalized to
+        height: Height in pixels of the image the landmarks are normalized to
+        offset: (x, y) pixel position of that image in the full frame (for crops)
+        z_scale: Factor applied to z (crop width / frame width for crops)
+
+    Returns:
+        float32 array of rows [x, y, z]: x and y in pixels, z normalized
+        (MediaPipe depth relative to the wrist, same scale as x)
+    """
+    hand = np.array([(lm.x, lm.y, lm.z) for lm in hand_landmarks.landmark], dtype=np.float32)
+    hand[:, 0] = hand[:, 0] * width + offset[0]
+    hand[:, 1] = hand[:, 1] * height + offset[1]
+    if z_scale != 1.0:
+        hand[:, 2] *= z_scale
+    return hand
+
+
+def draw_landmarks(img, hand_lms, landmark_color=(0, 0, 255), connection_color=(224, 224, 224),
+                   thickness=2, radius=2):
+    """Draw hand landmarks given in pixel coordinates onto img in place
+
+    Replaces mp.solutions.drawing_utils so landmarks can be drawn on any buffer
+    (e.g. a display-resolution overlay) after inference ran on a smaller image.
+
+    Args:
+        img: Image to draw on (any 3-channel buffer; colors are in its channel order)
+        hand_lms: (21, 3) landmarks of one hand or (n, 21, 3) stacked hands
+        landmark_color: Color of the landmark dots (default red in BGR)
+        connection_color: Color of the bone lines
+        thickness: Line thickness
+        radius: Landmark dot radius
+    """
+    hands = _as_hands(hand_lms)
+    if not len(hands):
+        return img
+    points = np.rint(hands[:, :, :2]).astype(np.int32)
+    # One polylines call for all bones of all hands
+    lines = points[:, HAND_CONNECTIONS].reshape(-1, 2, 2)
+    cv2.polylines(img, list(lines), False, connection_color, thickness)
+    for x, y in points.reshape(-1, 2):
+        cv2.circle(img, (int(x), int(y)), radius, landmark_color, thickness)
+    return img
+
+
+def _as_hands(hand_lms):
+    """View landmarks as a stack of hands (n, 21, 3); a single hand gives n = 1"""
+    hands = np.asarray(hand_lms, dtype=np.float32)
+    if hands.ndim == 2:
+        hands = hands[np.newaxis] if len(hands) else hands.reshape(0, NUM_LANDMARKS, 3)
+    return hands
+
+
+def count_fingers(hand_lms):
+    """Count extended fingers of every hand
+
+    Args:
+        hand_lms: (21, 3) landmarks of one hand or (n, 21, 3) stacked hands
+
+    Returns:
+        int array of shape (n,) with the number of extended fingers per hand
+    """
+    hands = _as_hands(hand_lms)
+    # Ngón cái duỗi sang ngang: so sánh theo x với khớp liền trước
+    thumb = hands[:, FINGER_TIPS[0], 0] < hands[:, FINGER_TIPS[0] - 1, 0]
+    # 4 ngón còn lại: đầu ngón cao hơn (y nhỏ hơn) khớp thứ nhất
+    others = hands[:, FINGER_TIPS[1:], 1] < hands[:, FINGER_TIPS[1:] - 2, 1]
+    return thumb.astype(int) + others.sum(axis=1)
+
+
+def pinch_distance(hand_lms, idx1=8, idx2=12):
+    """Pixel distance between two landmarks of every hand
+
+    Args:
+        hand_lms: (21, 3) landmarks of one hand or (n, 21, 3) stacked hands
+        idx1, idx2: Landmark indices (e.g. 4 and 8 for thumb and index tips)
+
+    Returns:
+        float array of shape (n,)
+    """
+    hands = _as_hands(hand_lms)
+    return np.linalg.norm(hands[:, idx1, :2] - hands[:, idx2, :2], axis=1)
+
+
+def are_fingers_touching(hand_lms, idx1=8, idx2=12, threshold=40):
+    """Kiểm tra xem hai ngón tay có chạm nhau không (theo pixel)
+
+    Args:
+        hand_lms: (21, 3) landmarks of one hand or (n, 21, 3) stacked hands
+        idx1, idx2: Chỉ số landmark của hai đầu ngón
+        threshold: Ngưỡng khoảng cách pixel để coi là chạm
+
+    Returns:
+        bool for one hand (False if no hand), bool array of shape (n,) for stacked hands
+    """
+    touching = pinch_distance(hand_lms, idx1, idx2) < threshold
+    if np.ndim(hand_lms) == 2:
+        return bool(touching[0]) if len(touching) else False
+    return touching
+
+
+def is_fist(hand_lms):
+    """Kiểm tra nắm đấm dựa trên khoảng cách các đầu ngón tay đến tâm lòng bàn tay
+
+    A finger is bent when its tip is closer to the palm centre than its
+    second joint (thumb: closer than 1.5x its base). At least 4 bent fingers
+    make a fist.
+
+    Args:
+        hand_lms: (21, 3) landmarks of one hand or (n, 21, 3) stacked hands
+
+    Returns:
+        bool for one hand (False if no hand), bool array of shape (n,) for stacked hands
+    """
+    hands = _as_hands(hand_lms)
+    xy = hands[:, :, :2]
+    palm = xy[:, PALM_POINTS].mean(axis=1, keepdims=True)
+    to_palm = np.linalg.norm(xy - palm, axis=2)  # (n, 21)
+
+    thumb_bent = to_palm[:, FINGER_TIPS[0]] < to_palm[:, FINGER_BASES[0]] * 1.5
+    fingers_bent = to_palm[:, FINGER_TIPS[1:]] < to_palm[:, FINGER_MIDS[1:]]
+    fist = thumb_bent.astype(int) + fingers_bent.sum(axis=1) >= 4
+    if np.ndim(hand_lms) == 2:
+        return bool(fist[0]) if len(fist) else False
+    return fist
+
+
 class HandDetector():
-    def __init__(self, min_detection_confidence=0.7):
+    def __init__(self, min_detection_confidence=0.7, min_tracking_confidence=0.5,
+                 max_num_hands=2, model_complexity=1, static_image_mode=False,
+                 tracking_mode=False, roi_padding=0.3, min_roi_size=128, redetect_interval=30,
+                 inference_width=DEFAULT_INFERENCE_WIDTH):
         """Initialize the hand detector with MediaPipe
 
         Args:
             min_detection_confidence: Minimum confidence value for hand detection
+            min_tracking_confidence: Minimum confidence to keep tracking a hand
+                (MediaPipe tracking, and the region of interest in tracking_mode)
+            max_num_hands: Maximum number of hands to detect
+            model_complexity: Landmark model complexity, 0 (fast) or 1 (accurate)
+            static_image_mode: Run palm detection on every image instead of tracking
+            tracking_mode: Process only a padded box around the previous landmarks
+                while the hand is tracked, and the full frame when it is lost
+            roi_padding: Padding around the landmark bounding box, as a fraction of its size
+            min_roi_size: Minimum side of the region of interest in pixels
+            redetect_interval: In tracking_mode, process the full frame at least
+                every N frames to pick up hands entering outside the region (0 = never)
+            inference_width: Images (or crops) wider than this are downscaled to it
+                before MediaPipe; landmarks are still returned in full-resolution
+                pixels. None to always use the full resolution.
         """
         self.mpHands = mp.solutions.hands
-        self.hands = self.mpHands.Hands(min_detection_confidence=min_detection_confidence)
+        self.min_tracking_confidence = min_tracking_confidence
+        hands_options = dict(
+            static_image_mode=static_image_mode,
+            max_num_hands=max_num_hands,
+            model_complexity=model_complexity,
+            min_detection_confidence=min_detection_confidence,
+            min_tracking_confidence=min_tracking_confidence
+        )
+        self.hands = self.mpHands.Hands(**hands_options)
         self.mpDraw = mp.solutions.drawing_utils
         
-        # Thêm các biến cho double tap
-        self.tap_count = 0
-        self.last_tap_time = 0
-        self.triggered = False
-        self.tap_timeout = 1.0  # giây
+        # Inference resolution, with buffers reused across frames of the same size
+        self.inference_width = inference_width
+        self._small_buffer = None
+        self._rgb_buffer = None
+        
+        # Region of interest tracking; crops get their own graph so MediaPipe's
+        # internal tracking state is not mixed between crop and frame coordinates
+        self.tracking_mode = tracking_mode
+        self.roi_hands = self.mpHands.Hands(**hands_options) if tracking_mode else None
+        self.roi_padding = roi_padding
+        self.min_roi_size = min_roi_size
+        self.redetect_interval = redetect_interval
+        self.roi = None  # (x0, y0, x1, y1) in pixels, None when not tracking
+        self._frames_since_full = 0
+        self.tracking_stats = {'roi_frames': 0, 'full_frames': 0, 'lost': 0}
+        
+        # Double tap (pinch hysteresis, tap timing) for update_double_tap
+        self.gesture_state = GestureStateMachine()
 
-    def findHands(self, img):
+    def findHands(self, img, multi_hand=False, draw=True):
         """Detect hands in an image
 
         Args:
             img: Input image (BGR format from OpenCV)
+            multi_hand: Return all detected hands instead of the first one
+            draw: Draw the landmarks on img; pass False to draw them later
+                (e.g. with draw_landmarks() on a display buffer)
 
         Returns:
-            Tuple of (processed image with landmarks drawn, hand landmarks list)
+            Tuple of (processed image with landmarks drawn, hand landmarks).
+            Landmarks are a float32 (21, 3) array of [x, y, z] rows (x, y in
+            pixels, z normalized) for the first hand, empty (0, 3) if no hand
+            was found. With multi_hand, a stacked (n_hands, 21, 3) array.
+            
+        In tracking_mode only the region of interest is processed while the
+        hand is tracked (see self.roi and self.tracking_stats).
+        """
+        h, w, _ = img.shape
+        hands = None
+        
+        if self.tracking_mode and self.roi is not None:
+            if self.redetect_interval and self._frames_since_full >= self.redetect_interval:
+                self.roi = None
+            else:
+                hands, confidence = self._process(self.roi_hands, img, self.roi)
+                if len(hands) and confidence >= self.min_tracking_confidence:
+                    self.tracking_stats['roi_frames'] += 1
+                    self._frames_since_full += 1
+                else:
+                    # Hand lost in the crop: detect on the full frame
+                    self.tracking_stats['lost'] += 1
+                    hands = None
+                    
+        if hands is None:
+            hands, _ = self._process(self.hands, img, (0, 0, w, h))
+            self.tracking_stats['full_frames'] += 1
+            self._frames_since_full = 0
+            
+        if draw:
+            draw_landmarks(img, hands)
+            
+        if self.tracking_mode:
+            self.roi = self._roi_around(hands, w, h) if len(hands) else None
+            
+        if multi_hand:
+            return img, hands
+        if not len(hands):
+            return img, np.empty((0, 3), dtype=np.float32)
+        return img, hands[0]
+    
+    def _process(self, hands_model, img, box):
+        """Run MediaPipe on a box of img, downscaled to the inference width
+        
+        Args:
+            hands_model: mp.solutions.hands.Hands instance
+            img: Full BGR frame
+            box: (x0, y0, x1, y1) region to process, the full frame for detection
+            
+        Returns:
+            Tuple of (stacked (n, 21, 3) landmarks in frame pixels, lowest handedness score)
         """
+        x0, y0, x1, y1 = box
+        view = img[y0:y1, x0:x1]  # No copy
+        crop_w, crop_h = x1 - x0, y1 - y0
+        
+        # Downscale once; landmarks are normalized so they map back to the crop as is
+        if self.inference_width and crop_w > self.inference_width:
+            size = (self.inference_width, max(1, round(crop_h * self.inference_width / crop_w)))
+            if self._small_buffer is None or self._small_buffer.shape[1::-1] != size:
+                self._small_buffer = np.empty((size[1], size[0], 3), dtype=np.uint8)
+            view = cv2.resize(view, size, dst=self._small_buffer, interpolation=cv2.INTER_AREA)
+            
         # Convert from BGR to RGB (MediaPipe requires RGB)
-        imgRGB = cv2.cvtColor(img, cv2.COLOR_BGR2RGB)
+        if self._rgb_buffer is None or self._rgb_buffer.shape != view.shape:
+            self._rgb_buffer = np.empty(view.shape, dtype=np.uint8)
+        imgRGB = cv2.cvtColor(view, cv2.COLOR_BGR2RGB, dst=self._rgb_buffer)
         
         # Process with MediaPipe
-        results = self.hands.process(imgRGB)
+        results = hands_model.process(imgRGB)
         
-        hand_lms = []
-        if results.multi_hand_landmarks:
-            # Draw landmarks on all detected hands
-            for handlm in results.multi_hand_landmarks:
-                self.mpDraw.draw_landmarks(img, handlm, self.mpHands.HAND_CONNECTIONS)
-                
-            # Extract coordinates for the first hand only
-            firstHand = results.multi_hand_landmarks[0]
-            h, w, _ = img.shape
-            for id, lm in enumerate(firstHand.landmark):
-                real_x, real_y = int(lm.x * w), int(lm.y * h)
-                hand_lms.append([id, real_x, real_y])
-                
-        return img, hand_lms
+        detected = results.multi_hand_landmarks or []
+        if not detected:
+            return np.empty((0, NUM_LANDMARKS, 3), dtype=np.float32), 0.0
+            
+        z_scale = crop_w / img.shape[1]
+        hands = np.stack([landmarks_to_array(handlm, crop_w, crop_h, (x0, y0), z_scale) for handlm in detected])
+        scores = [handedness.classification[0].score for handedness in (results.multi_handedness or [])]
+        return hands, min(scores) if scores else 1.0
+    
+    def _roi_around(self, hands, width, height):
+        """Padded box (x0, y0, x1, y1) around all landmarks, clipped to the frame"""
+        xy = hands[:, :, :2].reshape(-1, 2)
+        (min_x, min_y), (max_x, max_y) = xy.min(axis=0), xy.max(axis=0)
+        cx, cy = (min_x + max_x) / 2, (min_y + max_y) / 2
+        side = max(max_x - min_x, max_y - min_y) * (1 + 2 * self.roi_padding)
+        half = max(side, self.min_roi_size) / 2
+        x0, y0 = max(int(cx - half), 0), max(int(cy - half), 0)
+        x1, y1 = min(int(cx + half) + 1, width), min(int(cy + half) + 1, height)
+        if x1 - x0 < 2 or y1 - y0 < 2:
+            return None
+        return x0, y0, x1, y1
+    
+    def reset_tracking(self):
+        """Forget the region of interest so the next frame is detected on the full frame"""
+        self.roi = None
+        self._frames_since_full = 0
     
     def count_finger(self, hand_lms):
         """Count number of extended fingers
@@ -61,22 +327,9 @@ class HandDetector():
         Returns:
             Number of extended fingers (-1 if no hand detected)
         """
-        finger_start_index = [4, 8, 12, 16, 20]  # Index of fingertips
-        n_finger = 0
-        
-        if len(hand_lms) > 0:
-            # Check thumb (comparison is different because thumb extends sideways)
-            if hand_lms[finger_start_index[0]][1] < hand_lms[finger_start_index[0]-1][1]:
-                n_finger += 1
-                
-            # Check other 4 fingers
-            for idx in range(1, 5):
-                if hand_lms[finger_start_index[idx]][2] < hand_lms[finger_start_index[idx]-2][2]:
-                    n_finger += 1
-                    
-            return n_finger
-        else:
+        if len(hand_lms) == 0:
             return -1
+        return int(count_fingers(hand_lms)[0])
             
     def get_option(self, n_fingers):
         """Map finger count to an option number
@@ -130,48 +383,21 @@ class HandDetector():
 
     def are_fingers_touching(self, hand_lms, idx1=8, idx2=12, threshold=40):
         """Kiểm tra xem hai ngón tay có chạm nhau không"""
-        if len(hand_lms) > max(idx1, idx2):
-            x1, y1 = hand_lms[idx1][1], hand_lms[idx1][2]
-            x2, y2 = hand_lms[idx2][1], hand_lms[idx2][2]
-            dist = ((x2 - x1)**2 + (y2 - y1)**2) ** 0.5
-            return dist < threshold
-        return False
+        return are_fingers_touching(hand_lms, idx1, idx2, threshold)
+
+    def is_fist(self, hand_lms):
+        """Kiểm tra nắm đấm (see is_fist())"""
+        return is_fist(hand_lms)
 
     def update_double_tap(self, hand_lms, idx1=8, idx2=12):
         """Cập nhật trạng thái double tap, trả về trạng thái trigger/reset
         Đã thêm timeout: chỉ nhận 1 lần tap khi vừa chạm và phải nhả ra mới nhận lần tiếp theo
+        
+        Returns:
+            Tuple of (fingers_touching, tap_count, status), see GestureStateMachine.update_pinch()
         """
-        fingers_touching = self.are_fingers_touching(hand_lms, idx1, idx2)
-        current_time = time.time()
-        status = None
-
-        # Thêm biến để nhớ trạng thái lần trước
-        if not hasattr(self, '_prev_fingers_touching'):
-            self._prev_fingers_touching = False
-
-        # Chỉ tăng tap_count khi vừa chuyển từ không chạm sang chạm
-        if fingers_touching and not self._prev_fingers_touching:
-            if current_time - self.last_tap_time > 0.5:
-                self.tap_count += 1
-                self.last_tap_time = current_time
-
-        self._prev_fingers_touching = fingers_touching
-
-        # Reset tap_count nếu quá thời gian
-        if self.tap_count == 1 and current_time - self.last_tap_time > self.tap_timeout:
-            self.tap_count = 0
-
-        # Trigger khi double tap
-        if self.tap_count == 2 and not self.triggered:
-            self.triggered = True
-            self.tap_count = 0
-            status = "triggered"
-        elif self.triggered and self.tap_count == 2:
-            self.triggered = False
-            self.tap_count = 0
-            status = "reset"
-
-        return fingers_touching, self.tap_count, status
+        distance = float(pinch_distance(hand_lms, idx1, idx2)[0]) if len(hand_lms) else None
+        return self.gesture_state.update_pinch(distance, time.time())
 
 # Create an alias for backward compatibility
 handDetector = HandDetector
@@ -0,0 +1,407 @@
+"""
+Threaded capture / inference / display pipeline for camera frames
+
+Each stage runs in its own thread and hands frames to the next stage through
+a LatestSlot, a single-slot queue that keeps only the newest frame. A slow
+stage therefore never builds up a backlog: frames it could not take in time
+are dropped and counted, and the frame it picks up next is always the most
+recent one. Every stage keeps FPS and latency counters (StageStats).
+
+The GUI only receives finished packets: the display stage stores the packet
+in an output slot and calls ``on_frame()``; the GUI takes it with latest().
+Display images are written into a FrameBufferRing, so the GUI can wrap them
+in a QImage without copying.
+
+Author: Sunny24
+Date: May 21, 2025
+"""
+
+import logging
+import threading
+import time
+from collections import deque
+
+import cv2
+import numpy as np
+
+
+class LatestSlot:
+    """Single-slot queue: put() replaces an item that was not taken yet"""
+
+    def __init__(self):
+        self._item = None
+        self._cond = threading.Condition()
+        self._closed = False
+        self.dropped = 0
+
+    def put(self, item):
+        """Store item, dropping the previous one if it was not taken"""
+        with self._cond:
+            if self._item is not None:
+                self.dropped += 1
+            self._item = item
+            self._cond.notify()
+
+    def get(self, timeout=None):
+        """
+        Take the item, waiting up to timeout seconds for one
+
+        Returns:
+            The item, or None on timeout or after close()
+        """
+        with self._cond:
+            if self._item is None and not self._closed:
+                self._cond.wait(timeout)
+            item, self._item = self._item, None
+            return item
+
+    def get_nowait(self):
+        """Take the item if there is one, else return None"""
+        with self._cond:
+            item, self._item = self._item, None
+            return item
+
+    def close(self):
+        """Wake up waiting readers"""
+        with self._cond:
+            self._closed = True
+            self._cond.notify_all()
+
+    def reopen(self):
+        """Clear the slot and allow waiting again after close()"""
+        with self._cond:
+            self._closed = False
+            self._item = None
+            self.dropped = 0
+
+
+class StageStats:
+    """FPS and latency counters of one pipeline stage over a sliding window"""
+
+    def __init__(self, name, window=60):
+        self.name = name
+        self.frames = 0
+        self._times = deque(maxlen=window)
+        self._latencies = deque(maxlen=window)
+        self._lock = threading.Lock()
+
+    def record(self, latency):
+        """Record one processed frame and its latency in seconds"""
+        with self._lock:
+            self.frames += 1
+            self._times.append(time.monotonic())
+            self._latencies.append(latency)
+
+    def reset(self):
+        with self._lock:
+            self.frames = 0
+            self._times.clear()
+            self._latencies.clear()
+
+    def snapshot(self):
+        """
+        Get the current counters
+
+        Returns:
+            Dictionary with frames, fps, latency_ms (mean) and latency_max_ms
+        """
+        with self._lock:
+            fps = 0.0
+            if len(self._times) > 1:
+                span = self._times[-1] - self._times[0]
+                if span > 0:
+                    fps = (len(self._times) - 1) / span
+            latencies = list(self._latencies)
+        return {
+            'frames': self.frames,
+            'fps': fps,
+            'latency_ms': 1000.0 * sum(latencies) / len(latencies) if latencies else 0.0,
+            'latency_max_ms': 1000.0 * max(latencies) if latencies else 0.0
+        }
+
+
+class FrameBufferRing:
+    """
+    Preallocated ring of image buffers shared by a producer thread and the GUI
+
+    The producer writes each frame into acquire() and hands it on; every
+    viewer calls show() with the buffer it displays. acquire() never returns
+    a buffer being shown nor the newest one handed on (a viewer may be about
+    to take it), so three buffers are enough for tear-free display with one
+    viewer. The ring grows by one buffer when all of them are in use.
+    """
+
+    def __init__(self, count=3, dtype=np.uint8):
+        if count < 3:
+            raise ValueError("FrameBufferRing needs at least 3 buffers")
+        self.count = count
+        self.dtype = dtype
+        self._buffers = []
+        self._shape = None
+        self._next = 0
+        self._last = None   # Index of the newest acquired buffer
+        self._fronts = {}   # Viewer -> index of the buffer it shows
+        self._lock = threading.Lock()
+
+    def acquire(self, shape):
+        """Get a buffer of the given shape to write the next frame into"""
+        with self._lock:
+            if shape != self._shape:
+                # Old buffers stay valid for whoever still references them
+                self._buffers = [np.empty(shape, dtype=self.dtype) for _ in range(self.count)]
+                self._shape = shape
+                self._last = None
+                self._fronts = {}
+            in_use = set(self._fronts.values())
+            in_use.add(self._last)
+            for _ in range(len(self._buffers)):
+                index = self._next
+                self._next = (self._next + 1) % len(self._buffers)
+                if index not in in_use:
+                    self._last = index
+                    return self._buffers[index]
+            # More viewers than spare buffers
+            self._buffers.append(np.empty(shape, dtype=self.dtype))
+            self._last = len(self._buffers) - 1
+            return self._buffers[self._last]
+
+    def show(self, buffer, viewer=None):
+        """Mark buffer (from acquire()) as displayed by viewer; None when it shows nothing"""
+        with self._lock:
+            self._show_locked(buffer, viewer)
+
+    def take(self, slot, viewer=None):
+        """
+        Take the newest packet from slot and mark its image as displayed by viewer
+
+        Both happen under the ring lock, so acquire() cannot hand the packet's
+        buffer out again between taking the packet and marking it (which
+        show() after get_nowait() would allow).
+
+        Args:
+            slot: LatestSlot holding FramePackets
+            viewer: Key of the viewer, as for show()
+
+        Returns:
+            FramePacket, or None if there is no new one (the viewer keeps
+            its current buffer)
+        """
+        with self._lock:
+            packet = slot.get_nowait()
+            if packet is not None:
+                self._show_locked(packet.image, viewer)
+            return packet
+
+    def _show_locked(self, buffer, viewer):
+        self._fronts.pop(viewer, None)
+        for index, candidate in enumerate(self._buffers):
+            if candidate is buffer:
+                self._fronts[viewer] = index
+                break
+
+
+class FramePacket:
+    """A frame travelling through the pipeline"""
+
+    __slots__ = ('seq', 'timestamp', 'frame', 'result', 'image', 'latencies')
+
+    def __init__(self, seq, timestamp, frame):
+        self.seq = seq              # Capture sequence number
+        self.timestamp = timestamp  # time.monotonic() at capture
+        self.frame = frame          # BGR frame (annotated in place by the stages)
+        self.result = None          # Value returned by the inference function
+        self.image = None           # Ready-to-show image from the display stage
+        self.latencies = {}         # Stage name -> seconds spent in that stage
+
+
+class FramePipeline:
+    """
+    Capture -> inference -> display pipeline running in three threads
+
+    Args:
+        source: Frame source with read() -> (ok, frame), e.g. cv2.VideoCapture
+        infer: Called as infer(frame) in the inference thread; returns the
+            result stored in packet.result (may annotate frame in place)
+        render: Called as render(frame, result) in the display thread; returns
+            the image to show, normally a buffer from self.frame_ring
+            (default: BGR -> RGB conversion into the ring)
+        on_frame: Called without arguments from the display thread when a new
+            packet is available through latest()
+        flip: Mirror frames horizontally at capture
+        logger: Optional logger instance
+    """
+
+    STAGES = ('capture', 'inference', 'display')
+
+    def __init__(self, source, infer=None, render=None, on_frame=None, flip=True, logger=None):
+        self.source = source
+        self.infer = infer
+        self.render = render or self._convert_to_rgb
+        self.on_frame = on_frame
+        self.flip = flip
+        self.logger = logger or logging.getLogger('FramePipeline')
+
+        # Held while reading from the source; take it to reconfigure the source
+        self.source_lock = threading.Lock()
+
+        # Display images; latest() marks the one the GUI shows in frame_ring
+        self.frame_ring = FrameBufferRing()
+
+        self._capture_slot = LatestSlot()
+        self._inference_slot = LatestSlot()
+        self._output_slot = LatestSlot()
+        self.stage_stats = {name: StageStats(name) for name in self.STAGES}
+        self.end_to_end = StageStats('end_to_end')
+        self.read_failures = 0
+
+        self._running = False
+        self._threads = []
+
+    @property
+    def running(self):
+        return self._running
+
+    def start(self):
+        """Start the stage threads"""
+        if self._running:
+            return
+        for slot in (self._capture_slot, self._inference_slot, self._output_slot):
+            slot.reopen()
+        for stats in list(self.stage_stats.values()) + [self.end_to_end]:
+            stats.reset()
+        self.read_failures = 0
+        self._running = True
+        self._threads = [
+            threading.Thread(target=target, name=f"FramePipeline-{name}", daemon=True)
+            for name, target in zip(self.STAGES, (self._capture_loop, self._inference_loop, self._display_loop))
+        ]
+        for thread in self._threads:
+            thread.start()
+        self.logger.debug("Frame pipeline started")
+
+    def stop(self, timeout=2.0):
+        """Stop the stage threads and wait for them to finish
+
+        A stage still busy after timeout (e.g. a slow infer call) keeps
+        running until that call returns; use wait() to know when it is done.
+        """
+        if not self._running:
+            return
+        self._running = False
+        for slot in (self._capture_slot, self._inference_slot, self._output_slot):
+            slot.close()
+        for thread in self._threads:
+            if thread is not threading.current_thread():
+                thread.join(timeout)
+        self._threads = [thread for thread in self._threads if thread.is_alive()]
+        if self._threads:
+            self.logger.warning(f"Frame pipeline stopped, still finishing: "
+                                f"{', '.join(thread.name for thread in self._threads)}")
+        else:
+            self.logger.debug("Frame pipeline stopped")
+
+    def wait(self, timeout=None):
+        """
+        Wait for the stage threads left running by stop()
+
+        Returns:
+            True if no stage thread is running any more
+        """
+        for thread in self._threads:
+            if thread is not threading.current_thread():
+                thread.join(timeout)
+        self._threads = [thread for thread in self._threads if thread.is_alive()]
+        return not self._threads
+
+    def latest(self):
+        """Take the newest finished packet, or None if there is no new one
+
+        Its image is marked as displayed in self.frame_ring (see FrameBufferRing.take()).
+        """
+        return self.frame_ring.take(self._output_slot)
+
+    def stats(self):
+        """
+        Get per-stage counters
+
+        Returns:
+            Dictionary of stage name -> StageStats.snapshot() plus 'dropped'
+            (frames replaced in the slot feeding that stage), 'end_to_end'
+            (capture until ready to show) and 'read_failures'
+        """
+        result = {}
+        feeding = {'inference': self._capture_slot, 'display': self._inference_slot}
+        for name, stats in self.stage_stats.items():
+            result[name] = stats.snapshot()
+            result[name]['dropped'] = feeding[name].dropped if name in feeding else 0
+        result['end_to_end'] = self.end_to_end.snapshot()
+        result['end_to_end']['dropped'] = self._output_slot.dropped
+        result['read_failures'] = self.read_failures
+        return result
+
+    def _convert_to_rgb(self, frame, result):
+        return cv2.cvtColor(frame, cv2.COLOR_BGR2RGB, dst=self.frame_ring.acquire(frame.shape))
+
+    def _capture_loop(self):
+        seq = 0
+        stats = self.stage_stats['capture']
+        while self._running:
+            start = time.monotonic()
+            try:
+                with self.source_lock:
+                    ok, frame = self.source.read()
+            except Exception as e:
+                self.logger.error(f"Error reading frame: {str(e)}")
+                ok, frame = False, None
+            if not ok or frame is None:
+                self.read_failures += 1
+                time.sleep(0.01)
+                continue
+            if self.flip:
+                frame = cv2.flip(frame, 1)
+            seq += 1
+            now = time.monotonic()
+            packet = FramePacket(seq, now, frame)
+            packet.latencies['capture'] = now - start
+            stats.record(now - start)
+            self._capture_slot.put(packet)
+
+    def _inference_loop(self):
+        stats = self.stage_stats['inference']
+        while self._running:
+            packet = self._capture_slot.get(0.5)
+            if packet is None:
+                continue
+            start = time.monotonic()
+            if self.infer is not None:
+                try:
+                    packet.result = self.infer(packet.frame)
+                except Exception as e:
+                    self.logger.error(f"Error in inference stage: {str(e)}")
+            latency = time.monotonic() - start
+            packet.latencies['inference'] = latency
+            stats.record(latency)
+            self._inference_slot.put(packet)
+
+    def _display_loop(self):
+        stats = self.stage_stats['display']
+        while self._running:
+            packet = self._inference_slot.get(0.5)
+            if packet is None:
+                continue
+            start = time.monotonic()
+            try:
+                packet.image = self.render(packet.frame, packet.result)
+            except Exception as e:
+                self.logger.error(f"Error in display stage: {str(e)}")
+                continue
+            now = time.monotonic()
+            packet.latencies['display'] = now - start
+            stats.record(now - start)
+            self.end_to_end.record(now - packet.timestamp)
+            self._output_slot.put(packet)
+            if self.on_frame is not None:
+                try:
+                    self.on_frame()
+                except Exception as e:
+                    self.logger.error(f"Error in frame callback: {str(e)}")
@@ -0,0 +1,227 @@
+"""
+Process backend for HandDetector
+
+MediaPipe inference, and the Python work around it, competes for the GIL
+with the Qt event loop, the EGM send loop and the socket threads when it
+runs in the GUI process. ProcessHandDetector runs HandDetector in a child
+process instead. Frames are passed through a multiprocessing.shared_memory
+block that both processes view as a NumPy array, so only a short message
+goes over the pipe, and only the landmark array comes back.
+
+ProcessHandDetector has the same findHands() signature and gesture helpers
+as HandDetector, so it can be used in its place.
+
+Author: Sunny24
+Date: May 21, 2025
+"""
+
+import logging
+import multiprocessing as mp
+import time
+from multiprocessing import shared_memory
+
+import numpy as np
+
+from .hand_detector import HandDetector, draw_landmarks
+from .gesture_state import GestureStateMachine
+
+# Shared frame buffer size allocated up front (grown if a larger frame arrives)
+DEFAULT_MAX_FRAME_SHAPE = (1080, 1920, 3)
+
+
+def _detector_worker(conn, shm_name, detector_options):
+    """Child process: run HandDetector on frames placed in shared memory"""
+    shm = shared_memory.SharedMemory(name=shm_name)
+    try:
+        detector = HandDetector(**detector_options)
+        conn.send(('ready', None))
+        while True:
+            message = conn.recv()
+            kind = message[0]
+            if kind == 'frame':
+                _, seq, height, width = message
+                # Zero-copy view of the frame written by the parent
+                frame = np.ndarray((height, width, 3), dtype=np.uint8, buffer=shm.buf)
+                try:
+                    _, hands = detector.findHands(frame, multi_hand=True, draw=False)
+                    conn.send(('result', (seq, hands)))
+                except Exception as e:
+                    conn.send(('error', (seq, str(e))))
+                del frame
+            elif kind == 'buffer':
+                # Parent replaced the shared block with a larger one
+                shm.close()
+                shm = shared_memory.SharedMemory(name=message[1])
+            elif kind == 'reset':
+                detector.reset_tracking()
+            elif kind == 'stop':
+                break
+    except (EOFError, KeyboardInterrupt):
+        pass
+    finally:
+        shm.close()
+
+
+class ProcessHandDetector:
+    """
+    HandDetector running in a separate process
+
+    Args:
+        max_frame_shape: Largest expected frame shape, sizes the shared buffer
+        timeout: Seconds to wait for the child to return a result
+        start_timeout: Seconds to wait for the child to load MediaPipe
+        logger: Optional logger instance
+        **detector_options: Passed to HandDetector in the child process
+
+    Raises:
+        RuntimeError: If the child process does not start within start_timeout
+    """
+
+    def __init__(self, max_frame_shape=DEFAULT_MAX_FRAME_SHAPE, timeout=5.0, start_timeout=30.0,
+                 logger=None, **detector_options):
+        self.logger = logger or logging.getLogger('ProcessHandDetector')
+        self.timeout = timeout
+        self.detector_options = detector_options
+        self.gesture_state = GestureStateMachine()
+        self._seq = 0
+        self._pending = None  # Seq of the frame the child may still be reading
+        self._process = None
+        self._conn = None
+        self._shm = None
+        self._allocate(int(np.prod(max_frame_shape)))
+
+        # Spawn a fresh interpreter: forking a process with Qt and socket threads is unsafe
+        context = mp.get_context('spawn')
+        self._conn, child_conn = context.Pipe()
+        self._process = context.Process(
+            target=_detector_worker,
+            args=(child_conn, self._shm.name, detector_options),
+            name='HandDetectorProcess',
+            daemon=True
+        )
+        self._process.start()
+        child_conn.close()
+        try:
+            self._receive('ready', start_timeout)
+        except Exception:
+            self.close()
+            raise
+        self.logger.info(f"Hand detector process started (pid {self._process.pid})")
+
+    def findHands(self, img, multi_hand=False, draw=True):
+        """Detect hands in an image in the child process
+
+        Args:
+            img: Input image (BGR format from OpenCV)
+            multi_hand: Return all detected hands instead of the first one
+            draw: Draw the landmarks on img
+
+        Returns:
+            Same as HandDetector.findHands()
+
+        Raises:
+            RuntimeError: If the child process fails or does not answer in time
+        """
+        # After a timeout the child may still be reading the previous frame:
+        # the shared block is only rewritten once it has answered for it
+        if self._pending is not None:
+            self._wait_result(self._pending)
+
+        height, width, _ = img.shape
+        if height * width * 3 > self._shm.size:
+            self._allocate(height * width * 3)
+            self._conn.send(('buffer', self._shm.name))
+
+        # The only copy: frame into the shared block the child reads from
+        np.copyto(np.ndarray(img.shape, dtype=np.uint8, buffer=self._shm.buf), img)
+        self._seq += 1
+        self._pending = self._seq
+        self._conn.send(('frame', self._seq, height, width))
+        hands = self._wait_result(self._seq)
+
+        if draw:
+            draw_landmarks(img, hands)
+        if multi_hand:
+            return img, hands
+        if not len(hands):
+            return img, np.empty((0, 3), dtype=np.float32)
+        return img, hands[0]
+
+    def reset_tracking(self):
+        """Forget the region of interest of the child's detector"""
+        self._conn.send(('reset',))
+
+    @property
+    def alive(self):
+        return self._process is not None and self._process.is_alive()
+
+    def close(self):
+        """Stop the child process and release the shared memory"""
+        if self._process is not None:
+            try:
+                self._conn.send(('stop',))
+            except (OSError, ValueError):
+                pass
+            self._process.join(2.0)
+            if self._process.is_alive():
+                self._process.terminate()
+                self._process.join(1.0)
+            self._process = None
+        if self._conn is not None:
+            self._conn.close()
+            self._conn = None
+        self._release()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, tb):
+        self.close()
+
+    def _wait_result(self, seq):
+        """Hands for frame seq; the child is done with the shared block afterwards"""
+        while True:
+            result_seq, hands = self._receive('result', self.timeout)
+            if result_seq == seq:
+                self._pending = None
+                return hands
+            # Late answer for an earlier frame
+
+    def _receive(self, expected, timeout):
+        """Wait up to timeout seconds for a message of kind expected from the child"""
+        deadline = time.monotonic() + timeout
+        while True:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0 or not self._conn.poll(remaining):
+                raise RuntimeError(f"Hand detector process did not answer within {timeout} s")
+            try:
+                kind, payload = self._conn.recv()
+            except EOFError:
+                raise RuntimeError("Hand detector process exited")
+            if kind == expected:
+                return payload
+            if kind == 'error' and (expected != 'result' or payload[0] == self._pending):
+                self._pending = None
+                raise RuntimeError(f"Hand detector process error: {payload[1]}")
+
+    def _allocate(self, size):
+        """Create a shared block of at least size bytes, replacing the current one"""
+        old = self._shm
+        self._shm = shared_memory.SharedMemory(create=True, size=size)
+        if old is not None:
+            old.close()
+            old.unlink()
+
+    def _release(self):
+        if self._shm is not None:
+            self._shm.close()
+            self._shm.unlink()
+            self._shm = None
+
+    # Gesture helpers only use the landmarks, so HandDetector's work as is here
+    count_finger = HandDetector.count_finger
+    get_option = HandDetector.get_option
+    get_hand_gesture = HandDetector.get_hand_gesture
+    are_fingers_touching = HandDetector.are_fingers_touching
+    is_fist = HandDetector.is_fist
+    update_double_tap = HandDetector.update_double_tap
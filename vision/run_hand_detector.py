@@ -1,151 +1,161 @@
-import cv2
-import math
+import argparse
+import csv
+import sys
 import time
-from hand_detector import HandDetector
 
-def are_fingers_touching(hand_lms, idx1=8, idx2=12, threshold=40):
-    """
-    Kiểm tra xem hai ngón tay có chạm nhau không (theo pixel)
-    idx1, idx2: chỉ số landmark của hai đầu ngón
-    threshold: ngưỡng khoảng cách pixel để coi là chạm
-    """
-    if len(hand_lms) > max(idx1, idx2):
-        x1, y1 = hand_lms[idx1][1], hand_lms[idx1][2]
-        x2, y2 = hand_lms[idx2][1], hand_lms[idx2][2]
-        dist = math.hypot(x2 - x1, y2 - y1)
-        return dist < threshold
-    return False
-
-def is_fist(hand_lms, threshold_ratio=0.3):
-    """
-    Kiểm tra nếu là nắm đấm dựa trên vị trí tương đối của các đầu ngón tay
-    so với lòng bàn tay và mối quan hệ giữa các khớp ngón tay
+import cv2
+import numpy as np
+
+from hand_detector import HandDetector, is_fist, pinch_distance
+from gesture_state import GestureStateMachine
+from frame_source import open_frame_source, SPEED_NATIVE, SPEED_MAX
+
+STAGES = ('read', 'inference', 'gesture', 'draw')
+
+
+def load_labels(path):
+    """Đọc file nhãn CSV: mỗi dòng "frame,fingers" (-1 = không có tay), dòng # bị bỏ qua
+
+    Returns:
+        Dictionary frame index -> expected finger count
     """
-    if not hand_lms or len(hand_lms) < 21:
-        return False
-    
-    # Lấy tọa độ tâm lòng bàn tay (điểm số 0, 5, 9, 13, 17)
-    palm_x = (hand_lms[0][1] + hand_lms[5][1] + hand_lms[9][1] + hand_lms[13][1] + hand_lms[17][1]) / 5
-    palm_y = (hand_lms[0][2] + hand_lms[5][2] + hand_lms[9][2] + hand_lms[13][2] + hand_lms[17][2]) / 5
-    
-    # Tính khoảng cách từ cổ tay đến tâm lòng bàn tay để làm ngưỡng tham chiếu
-    wrist_to_palm = math.hypot(palm_x - hand_lms[0][1], palm_y - hand_lms[0][2])
-    threshold = wrist_to_palm * threshold_ratio
-    
-    # Các điểm mút của ngón tay (ngón cái, trỏ, giữa, áp út, út)
-    finger_tips = [4, 8, 12, 16, 20]
-    # Các điểm gốc ngón tay (điểm nối với lòng bàn tay)
-    finger_bases = [1, 5, 9, 13, 17]
-    # Các khớp thứ hai của ngón tay
-    finger_mids = [3, 7, 11, 15, 19]
-    
-    # Đếm số ngón tay đang co (đầu ngón gần lòng bàn tay)
-    bent_fingers = 0
-    
-    for i in range(5):  # Kiểm tra từng ngón tay
-        tip_idx = finger_tips[i]
-        base_idx = finger_bases[i]
-        mid_idx = finger_mids[i]
-        
-        # Tính khoảng cách từ đầu ngón đến tâm lòng bàn tay
-        tip_to_palm = math.hypot(hand_lms[tip_idx][1] - palm_x, hand_lms[tip_idx][2] - palm_y)
-        
-        # Tính khoảng cách từ gốc ngón đến tâm lòng bàn tay
-        base_to_palm = math.hypot(hand_lms[base_idx][1] - palm_x, hand_lms[base_idx][2] - palm_y)
-        
-        # Đối với ngón cái, xử lý đặc biệt
-        if i == 0:  # Ngón cái
-            # Kiểm tra ngón cái có đang co vào hay không
-            if tip_to_palm < base_to_palm * 1.5:
-                bent_fingers += 1
+    labels = {}
+    with open(path, newline='') as label_file:
+        for row in csv.reader(label_file):
+            if not row or row[0].strip().startswith('#') or not row[0].strip().lstrip('-').isdigit():
+                continue  # Comment or header
+            labels[int(row[0])] = int(row[1])
+    return labels
+
+
+def print_report(timings, frames, elapsed, labels, raw_hits, confirmed_hits, labelled):
+    """In độ trễ từng stage (percentile) và độ chính xác so với file nhãn"""
+    print(f"\n{frames} frames in {elapsed:.2f} s ({frames / elapsed if elapsed else 0:.1f} fps)\n")
+    print(f"{'stage (ms)':<12}{'p50':>9}{'p90':>9}{'p95':>9}{'p99':>9}{'max':>9}")
+    total = np.zeros(frames)
+    for stage in STAGES:
+        values = np.array(timings[stage]) * 1e3
+        total += values
+        p50, p90, p95, p99 = np.percentile(values, [50, 90, 95, 99])
+        print(f"{stage:<12}{p50:>9.2f}{p90:>9.2f}{p95:>9.2f}{p99:>9.2f}{values.max():>9.2f}")
+    p50, p90, p95, p99 = np.percentile(total, [50, 90, 95, 99])
+    print(f"{'total':<12}{p50:>9.2f}{p90:>9.2f}{p95:>9.2f}{p99:>9.2f}{total.max():>9.2f}")
+
+    if labels is not None:
+        if labelled:
+            print(f"\nAccuracy on {labelled} labelled frames: raw {raw_hits / labelled:.1%}, "
+                  f"confirmed {confirmed_hits / labelled:.1%}")
         else:
-            # Kiểm tra các ngón khác: Đầu ngón phải gần lòng bàn tay hơn khớp giữa
-            mid_to_palm = math.hypot(hand_lms[mid_idx][1] - palm_x, hand_lms[mid_idx][2] - palm_y)
-            if tip_to_palm < mid_to_palm:
-                bent_fingers += 1
-    
-    # Được coi là nắm đấm nếu ít nhất 4 ngón tay đều co
-    return bent_fingers >= 4
-
-def run_hand_detector():
-    cap = cv2.VideoCapture(0)
+            print("\nNo labelled frames were replayed")
+
+
+def run_hand_detector(source=0, speed=SPEED_NATIVE, labels_path=None, benchmark=False, max_frames=0):
+    """Chạy nhận diện cử chỉ trên camera hoặc video/thư mục ảnh ghi sẵn
+
+    Args:
+        source: Camera index, video file or image directory
+        speed: Replay speed for recordings (native or max)
+        labels_path: Optional CSV of expected finger counts per frame
+        benchmark: Headless run that prints latency percentiles and accuracy
+        max_frames: Stop after this many frames (0 = until the source ends)
+    """
+    cap = open_frame_source(source, speed=speed)
+    if not cap.isOpened():
+        print(f"Cannot open source: {source}")
+        return 1
     detector = HandDetector()
 
-    tap_count = 0
-    last_tap_time = 0
-    triggered = False
-    tap_timeout = 1.0  # giây, khoảng thời gian tối đa giữa 2 lần chập để tính là double tap
-    
-    # Thêm đếm thời gian để ổn định nhận diện nắm đấm
-    fist_counter = 0
-    fist_detected = False
-    
-    while True:
+    # Nắm đấm, số ngón và double tap đều được ổn định bởi cùng một state machine
+    gesture_state = GestureStateMachine()
+
+    labels = load_labels(labels_path) if labels_path else None
+    timings = {stage: [] for stage in STAGES}
+    labelled = raw_hits = confirmed_hits = 0
+    frame_number = 0
+    started = time.perf_counter()
+
+    while not max_frames or frame_number < max_frames:
+        t0 = time.perf_counter()
         ret, frame = cap.read()
         if not ret:
             break
+        # Replay gives deterministic frame indices and timestamps; a camera uses the clock
+        frame_index = getattr(cap, 'frame_index', frame_number)
+        timestamp = getattr(cap, 'timestamp', None)
+        if timestamp is None:
+            timestamp = time.time()
+        frame_number += 1
+        t1 = time.perf_counter()
 
         img, hand_lms = detector.findHands(frame)
-        
-        # Kiểm tra nắm đấm trước khi đếm ngón tay 
-        if is_fist(hand_lms):
-            fist_counter += 1
-            if fist_counter > 3:  # Cần phát hiện nắm đấm liên tục vài frame để xác nhận
-                fist_detected = True
-        else:
-            fist_counter = max(0, fist_counter - 1)
-            if fist_counter == 0:
-                fist_detected = False
-        
-        if fist_detected:
-            gesture = "Nắm đấm"
-            n_fingers = 0
-        else:
-            n_fingers = detector.count_finger(hand_lms)
-            gesture = detector.get_hand_gesture(n_fingers)
-            
-            fingers_touching = are_fingers_touching(hand_lms, 4, 8)
-
-            # Double tap detection
-            current_time = time.time()
-            if fingers_touching:
-                if current_time - last_tap_time > 0.5:  # tránh đếm liên tục khi giữ chập
-                    tap_count += 1
-                    last_tap_time = current_time
-
-            # Reset tap_count nếu quá thời gian
-            if tap_count == 1 and current_time - last_tap_time > tap_timeout:
-                tap_count = 0
-
-            # Trigger khi double tap
-            if tap_count == 2 and not triggered:
-                gesture += " + Đã kích hoạt!"
-                print("Đã kích hoạt!")
-                triggered = True
-                tap_count = 0  # reset để chờ lần double tap tiếp theo
+        t2 = time.perf_counter()
+
+        pinch = float(pinch_distance(hand_lms, 4, 8)[0]) if len(hand_lms) else None
+        update = gesture_state.update(detector.count_finger(hand_lms), pinch, is_fist(hand_lms), timestamp)
+
+        n_fingers = update.gesture
+        tap_count = update.tap_count
+        gesture = detector.get_hand_gesture(n_fingers)
+        if update.changed and not benchmark:
+            print(f"Cử chỉ: {gesture}")
 
-            # Reset trigger nếu double tap lần nữa
-            if triggered and tap_count == 2:
-                gesture += " + Đã reset!"
+        if update.tap_status == "triggered":
+            gesture += " + Đã kích hoạt!"
+            if not benchmark:
+                print("Đã kích hoạt!")
+        elif update.tap_status == "reset":
+            gesture += " + Đã reset!"
+            if not benchmark:
                 print("Đã reset!")
-                triggered = False
-                tap_count = 0
 
-            if fingers_touching:
-                gesture += " + Chập 2 ngón!"
+        if update.fingers_touching:
+            gesture += " + Chập 2 ngón!"
+
+        if labels is not None and frame_index in labels:
+            labelled += 1
+            raw_hits += update.raw_gesture == labels[frame_index]
+            confirmed_hits += n_fingers == labels[frame_index]
+        t3 = time.perf_counter()
 
         # Hiển thị thông tin debug
         cv2.putText(img, f'Fingers: {n_fingers}', (10, 40), cv2.FONT_HERSHEY_SIMPLEX, 1, (0,255,0), 2)
         cv2.putText(img, gesture, (10, 80), cv2.FONT_HERSHEY_SIMPLEX, 1, (255,0,0), 2)
         cv2.putText(img, f'Tap Count: {tap_count}', (10, 120), cv2.FONT_HERSHEY_SIMPLEX, 1, (0,0,255), 2)
-        cv2.putText(img, f'Fist Counter: {fist_counter}', (10, 160), cv2.FONT_HERSHEY_SIMPLEX, 1, (255,0,255), 2)
-        
-        cv2.imshow("Hand Detector", img)
-        if cv2.waitKey(1) & 0xFF == ord('q'):
-            break
+        cv2.putText(img, f'Raw: {update.raw_gesture}', (10, 160), cv2.FONT_HERSHEY_SIMPLEX, 1, (255,0,255), 2)
+        t4 = time.perf_counter()
+
+        for stage, duration in zip(STAGES, (t1 - t0, t2 - t1, t3 - t2, t4 - t3)):
+            timings[stage].append(duration)
 
+        if not benchmark:
+            cv2.imshow("Hand Detector", img)
+            if cv2.waitKey(1) & 0xFF == ord('q'):
+                break
+
+    elapsed = time.perf_counter() - started
     cap.release()
-    cv2.destroyAllWindows()
+    if benchmark:
+        if not frame_number:
+            print("No frames read")
+            return 1
+        print_report(timings, frame_number, elapsed, labels, raw_hits, confirmed_hits, labelled)
+    else:
+        cv2.destroyAllWindows()
+    return 0
+
+
+def main():
+    arg_parser = argparse.ArgumentParser(description="Hand gesture detector on a camera or a recording")
+    arg_parser.add_argument('--source', default='0', help='Camera index, video file or image directory (default: 0)')
+    arg_parser.add_argument('--speed', choices=[SPEED_NATIVE, SPEED_MAX], default=SPEED_NATIVE,
+                            help='Replay speed for recordings')
+    arg_parser.add_argument('--labels', help='CSV "frame,fingers" with the expected finger count per frame')
+    arg_parser.add_argument('--benchmark', action='store_true',
+                            help='Run headless and report per-stage latency percentiles and accuracy')
+    arg_parser.add_argument('--max-frames', type=int, default=0, help='Stop after N frames')
+    args = arg_parser.parse_args()
+    return run_hand_detector(args.source, args.speed, args.labels, args.benchmark, args.max_frames)
+
 
 if __name__ == "__main__":
-    run_hand_detector()
\ No newline at end of file
+    sys.exit(main())